@@ -13,11 +13,14 @@ if sys.version_info[0] >= 3:
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 # Local imports
+from modules import startup_timeline
 from modules.backup_manager import auto_backup_check
 from modules.health import run_preflight_checks
 from modules.logger import log
 from ui.main import start_app
 
+startup_timeline.mark("imports")
+
 if __name__ == "__main__":
     # Initialize logger
     log.info("=" * 50)
@@ -28,13 +31,17 @@ if __name__ == "__main__":
     if not preflight.get("ok", False):
         log.critical("Startup aborted due to failed preflight checks")
         raise SystemExit(1)
-
-    # Check for auto-backup
-    try:
-        if auto_backup_check():
-            log.info("Auto-backup completed successfully")
-    except Exception as e:
-        log.error(f"Auto-backup failed: {e}")
+    startup_timeline.mark("preflight")
+
+    # Check for auto-backup (in service mode the data service backs up shop.db)
+    service_mode, _ = config.get_data_service_settings()
+    if not service_mode:
+        try:
+            if auto_backup_check():
+                log.info("Auto-backup completed successfully")
+        except Exception as e:
+            log.error(f"Auto-backup failed: {e}")
+        startup_timeline.mark("auto-backup")
 
     # Load theme from configuration
     cfg = config.load_config()
@@ -46,8 +53,8 @@ if __name__ == "__main__":
     
     # from ui.login_view import show_login
     # log.info("Showing login screen...")
-    # show_login(lambda: start_app(theme_name=theme))
+    # show_login(lambda: start_app(theme_name=theme, on_ready=startup_timeline.log_timeline))
     
     # Direct start without login (TEMPORARY)
     log.info("Starting application without login (login disabled for testing)...")
-    start_app(theme_name=theme)
+    start_app(theme_name=theme, on_ready=startup_timeline.log_timeline)
@@ -32,9 +32,70 @@ DEFAULT_SHOP_INFO = {
     "theme": "cosmo"
 }
 
+# SQLite storage profiles (see modules/db.py). Pick one with
+# "database": {"storage_profile": "..."} in shop_config.json; individual
+# settings can be overridden with "database": {"pragmas": {...}}.
+STORAGE_PROFILES = {
+    # Rollback journal with a full fsync per commit. Use this when shop.db
+    # lives on a network share: WAL needs all terminals on the same machine.
+    "compatible": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,        # KiB when negative (2 MB)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,       # ms
+        "wal_autocheckpoint": 1000,
+    },
+    # WAL: readers never block the till, commits only fsync at checkpoints
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # 16 MB
+        "mmap_size": 67108864,      # 64 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 4000,  # background checkpointer does the rest
+    },
+    # WAL with an fsync on every commit (no loss of the last commits on power cut)
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 67108864,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 1000,
+    },
+    # Larger caches for big catalogs on machines with RAM to spare
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,       # 64 MB
+        "mmap_size": 268435456,     # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+        "wal_autocheckpoint": 8000,
+    },
+}
+# Safe everywhere, including shop.db on a network share; the WAL profiles
+# are opt-in for a database on the machine's own disk
+DEFAULT_STORAGE_PROFILE = "compatible"
+
 DEFAULT_CONFIG = {
     "database": {
-        "path": str(DB_PATH)
+        "path": str(DB_PATH),
+        "storage_profile": DEFAULT_STORAGE_PROFILE,
+        "pragmas": {},
+        "wal_checkpoint_interval": 60,  # seconds, 0 disables the background checkpointer
+        "report_timeout": 60,           # seconds a report may run before it is interrupted
+        # Writes that find the database locked by another terminal (after
+        # waiting busy_timeout) are retried with jittered exponential backoff
+        "write_retry": {
+            "attempts": 5,
+            "base_delay_ms": 50,
+            "max_delay_ms": 1000
+        }
     },
     "logging": {
         "log_file": str(LOG_FILE),
@@ -42,6 +103,16 @@ DEFAULT_CONFIG = {
     },
     "shop_info": DEFAULT_SHOP_INFO,
     "theme": "cosmo",
+    "audit": {
+        "durability": "buffered",  # "strict": write each event before returning
+        "queue_size": 10000,       # events held in memory before new ones are dropped
+        "batch_size": 200          # events per group commit
+    },
+    "data_service": {
+        "mode": "direct",                  # "service": send controller calls to a data service
+        "address": "tcp:127.0.0.1:8765",   # or "unix:/path/to/shop.sock"
+        "secret": None                     # shared secret; required if the service listens off loopback
+    },
     "backup": {
         "auto_backup_enabled": True,
         "auto_backup_frequency": "daily",
@@ -64,6 +135,39 @@ def load_config():
             print(f"Error loading config: {e}")
     return DEFAULT_CONFIG.copy()
 
+def get_storage_profile(cfg=None):
+    """
+    Resolve the SQLite storage profile from configuration.
+    
+    Returns:
+        Tuple (profile_name, settings dict, checkpoint interval in seconds)
+    """
+    if cfg is None:
+        cfg = load_config()
+    db_cfg = cfg.get("database", {}) or {}
+    name = db_cfg.get("storage_profile", DEFAULT_STORAGE_PROFILE)
+    if name not in STORAGE_PROFILES:
+        print(f"Unknown storage profile '{name}', using '{DEFAULT_STORAGE_PROFILE}'")
+        name = DEFAULT_STORAGE_PROFILE
+    settings = dict(STORAGE_PROFILES[name])
+    settings.update(db_cfg.get("pragmas", {}) or {})
+    interval = db_cfg.get("wal_checkpoint_interval", DEFAULT_CONFIG["database"]["wal_checkpoint_interval"])
+    return name, settings, interval
+
+def get_data_service_settings(cfg=None):
+    """
+    Resolve how this terminal reaches the database.
+    
+    Returns:
+        Tuple (service_mode, settings dict); in service mode the data service
+        owns shop.db and this terminal must not open it
+    """
+    if cfg is None:
+        cfg = load_config()
+    settings = dict(DEFAULT_CONFIG["data_service"])
+    settings.update(cfg.get("data_service") or {})
+    return settings.get("mode") == "service", settings
+
 def save_config(config_data):
     """Save configuration to JSON file."""
     try:
@@ -1,2 +1,66 @@
 # controllers/__init__.py
 # This package contains business logic controllers
+"""
+Controllers run in-process by default ("direct" mode). ``use_service``
+routes their methods to a data service process instead (see
+modules.data_service); views keep calling the same static methods. The
+module functions views call directly are routed along with them (see
+modules.service_routing).
+"""
+
+import importlib
+
+from modules import service_routing
+
+# Controller classes whose methods can run in the data service
+SERVICE_CONTROLLERS = {
+    "InventoryController": "controllers.inventory_controller",
+    "RepairController": "controllers.repair_controller",
+    "POSController": "controllers.pos_controller",
+    "ReportController": "controllers.report_controller",
+}
+
+# Methods that stay local: they return in-process objects or publish events
+# to this terminal's views; their database work is @served, so it still
+# runs in the service
+LOCAL_METHODS = {"InventoryController.get_repository", "InventoryController.post_receipt"}
+
+_direct = {}  # class name -> {method name: direct function}
+
+
+def _controller(class_name):
+    return getattr(importlib.import_module(SERVICE_CONTROLLERS[class_name]), class_name)
+
+
+def direct_methods():
+    """Return {class name: {method: function}} of the in-process implementations."""
+    methods = {}
+    for class_name in SERVICE_CONTROLLERS:
+        if class_name in _direct:
+            methods[class_name] = dict(_direct[class_name])
+            continue
+        cls = _controller(class_name)
+        methods[class_name] = {name: attr.__func__ for name, attr in vars(cls).items()
+                               if isinstance(attr, staticmethod) and not name.startswith("_")
+                               and f"{class_name}.{name}" not in LOCAL_METHODS}
+    return methods
+
+
+def use_service(client):
+    """Route controller methods and @served module functions through a DataServiceClient."""
+    service_routing.set_client(client)
+    for class_name, methods in direct_methods().items():
+        _direct.setdefault(class_name, methods)
+        cls = _controller(class_name)
+        for name in methods:
+            setattr(cls, name, staticmethod(client.function(f"{class_name}.{name}")))
+
+
+def use_direct():
+    """Run controller methods in-process again (undoes use_service)."""
+    service_routing.set_client(None)
+    for class_name, methods in list(_direct.items()):
+        cls = _controller(class_name)
+        for name, func in methods.items():
+            setattr(cls, name, staticmethod(func))
+        del _direct[class_name]
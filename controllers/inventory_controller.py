@@ -3,11 +3,22 @@
 from modules import models
 from modules.audit_logger import log_action
 from modules.quick_add_templates import get_templates
+from modules.inventory_repository import get_inventory_repository
 
 class InventoryController:
     @staticmethod
     def get_all_items():
         return models.get_inventory()
+
+    @staticmethod
+    def get_repository():
+        """Shared inventory snapshot with O(1) lookups (see modules.inventory_repository)"""
+        return get_inventory_repository()
+
+    @staticmethod
+    def get_items_changed_since(version):
+        """Items changed after ``version`` (see models.inventory_changed_since)"""
+        return models.inventory_changed_since(version)
     
     @staticmethod
     def add_item(sku, name, qty, buy, sell, category, desc, storage=None, ram=None, color=None, 
@@ -34,6 +45,23 @@ class InventoryController:
             )
         return success
     
+    @staticmethod
+    def post_receipt(supplier, lines, reference=None, user=None, cost_method="last", imei=None, notes=None):
+        """Receive goods: stock, buy prices, serials and cost history in one commit (see modules.receiving)"""
+        from modules.receiving import post_receipt
+        return post_receipt(supplier, lines, reference=reference, user=user,
+                            cost_method=cost_method, imei=imei, notes=notes)
+
+    @staticmethod
+    def get_receipts(limit=100):
+        from modules.receiving import get_receipts
+        return get_receipts(limit)
+
+    @staticmethod
+    def get_cost_history(item_id):
+        from modules.receiving import get_cost_history
+        return get_cost_history(item_id)
+
     @staticmethod
     def get_item_cost(name_or_sku):
         return models.get_item_cost(name_or_sku)
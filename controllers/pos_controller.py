@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 # controllers/pos_controller.py
+import time
+
 from modules import models
-from modules.audit_logger import log_action
+from modules.logger import log
+
+
+def _ms_since(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
 
 class POSController:
     @staticmethod
@@ -13,6 +20,7 @@ class POSController:
         Args:
             customer_name: Customer name
             items: list of dicts with keys: id, sku, name, category, qty, price, cost
+                (and barcode, for individually scanned units)
             customer_phone: Customer phone (optional)
             customer_email: Customer email (optional)
             customer_address: Customer address (optional)
@@ -24,53 +32,120 @@ class POSController:
         Returns:
             sale_id if successful, None otherwise
         """
-        # Get or create customer
-        customer_id = None
-        if customer_name or customer_phone:
-            customer_id = models.get_or_create_customer(
-                name=customer_name or "Walk-in",
-                phone=customer_phone,
-                email=customer_email,
-                address=customer_address,
-                customer_type='Sales'
-            )
+        result = POSController.checkout(
+            customer_name, items, customer_phone=customer_phone, customer_email=customer_email,
+            customer_address=customer_address, seller_name=seller_name,
+            discount_percent=discount_percent, payment_method=payment_method, notes=notes
+        )
+        return result['sale_id'] if result else None
+
+    @staticmethod
+    def checkout(customer_name, items, customer_phone=None, customer_email=None, customer_address=None,
+                 seller_name="System", discount_percent=0, payment_method="Cash", notes=None):
+        """
+        Record a whole sale as one unit of work.
+        
+        The customer upsert, sale header, line items, stock decrements,
+        barcode status changes (items with a 'barcode' key), customer
+        statistics and the audit record are written in a single BEGIN
+        IMMEDIATE transaction: either all of them commit or none do. Stock
+        is taken with conditional decrements, and a transaction that finds
+        the database locked by another till is retried (see
+        transaction_manager.execute_with_retry), so busy tills neither
+        oversell nor drop sales.
+        
+        Args:
+            Same as create_sale
+        
+        Returns:
+            Dictionary with sale_id, customer_id, total and timings (ms per
+            stage, plus the number of attempts), or None if the sale was rejected (nothing is written)
+        """
+        from modules.transaction_manager import execute_with_retry
+        from modules.barcode_manager import mark_sold
+        from modules.audit_logger import record_action
         
         # Calculate totals
         subtotal = sum([i['qty'] * i['price'] for i in items])
         discount_amount = (subtotal * discount_percent) / 100
         total = subtotal - discount_amount
         
-        # Create comprehensive sale record
-        sale_id = models.create_sale_detailed(
-            customer_name=customer_name,
-            customer_id=customer_id,
-            customer_phone=customer_phone,
-            customer_email=customer_email,
-            customer_address=customer_address,
-            items=items,
-            subtotal=subtotal,
-            discount_percent=discount_percent,
-            discount_amount=discount_amount,
-            total_amount=total,
-            seller_name=seller_name,
-            payment_method=payment_method,
-            notes=notes
-        )
+        timings = {}
+        attempts = {'count': 0, 'written': None}
+        started = time.perf_counter()
         
-        if sale_id:
+        def write(conn):
+            # Runs again from the top if another till held the lock (nothing was kept)
+            attempts['count'] += 1
+            timings.clear()
+            timings['lock_wait'] = _ms_since(started)
+            c = conn.cursor()
+            
+            # Get or create customer
+            stage = time.perf_counter()
+            customer_id = None
+            if customer_name or customer_phone:
+                customer_id = models.upsert_customer(
+                    c,
+                    name=customer_name or "Walk-in",
+                    phone=customer_phone,
+                    email=customer_email,
+                    address=customer_address,
+                    customer_type='Sales'
+                )
+            timings['customer'] = _ms_since(stage)
+            
+            # Stock, header, line items and daily totals (adds its own stages)
+            sale_id = models.insert_sale(
+                c, customer_name, customer_id, customer_phone, customer_email, customer_address,
+                items, subtotal, discount_percent, discount_amount, total,
+                seller_name=seller_name, payment_method=payment_method, notes=notes,
+                timings=timings
+            )
+            
+            stage = time.perf_counter()
+            mark_sold(c, [i['barcode'] for i in items if i.get('barcode')], sale_id)
+            timings['barcodes'] = _ms_since(stage)
+            
             # Update customer statistics
+            stage = time.perf_counter()
             if customer_id:
-                models.update_customer_purchase(customer_id, total)
+                models.record_customer_purchase(c, customer_id, total)
+            timings['customer_stats'] = _ms_since(stage)
             
-            log_action(
+            stage = time.perf_counter()
+            record_action(
+                c,
                 user=seller_name,
                 action_type="CREATE",
                 entity_type="sale",
                 entity_id=sale_id,
                 description=f"Sale by {seller_name} for {customer_name}, items: {len(items)}, total: EGP {total:.2f}"
             )
-        return sale_id
+            timings['audit'] = _ms_since(stage)
+            attempts['written'] = time.perf_counter()
+            return sale_id, customer_id
+        
+        try:
+            sale_id, customer_id = execute_with_retry(write)
+        except ValueError as ve:
+            print(f"checkout validation error: {ve}")
+            return None
+        except Exception as e:
+            print(f"checkout error: {e}")
+            return None
+        
+        timings['commit'] = _ms_since(attempts['written'])
+        timings['total'] = _ms_since(started)
+        timings['attempts'] = attempts['count']
+        log.debug(f"Checkout sale #{sale_id} timings (ms): {timings}")
+        return {'sale_id': sale_id, 'customer_id': customer_id, 'total': total, 'timings': timings}
     
     @staticmethod
     def get_sales_history():
         return models.get_sales_history()
+
+    @staticmethod
+    def get_sales_changed_since(version):
+        """Sales changed after ``version`` (see models.sales_changed_since)"""
+        return models.sales_changed_since(version)
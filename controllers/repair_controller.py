@@ -7,6 +7,11 @@ class RepairController:
     @staticmethod
     def get_all_repairs():
         return models.get_repairs()
+
+    @staticmethod
+    def get_repairs_changed_since(version):
+        """Repairs changed after ``version`` (see models.repairs_changed_since)"""
+        return models.repairs_changed_since(version)
     
     @staticmethod
     def create_repair(order_num, cust, phone, model, imei, problem, est_date, tech, total, note="", email=None, address=None):
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # controllers/report_controller.py
 from modules import models
+from modules.dashboard_snapshot import get_dashboard_snapshot
 from modules.logger import log
 
 class ReportController:
@@ -9,8 +10,9 @@ class ReportController:
         """Get dashboard summary with safe data extraction"""
         log.debug("Fetching dashboard summary")
         try:
-            stats = models.get_dashboard_stats()
-            sales_today = models.get_daily_sales_total()
+            # One cached snapshot serves the cards, best sellers and chart
+            stats = get_dashboard_snapshot()
+            sales_today = stats.get('sales_today', 0.0)
             
             # Safely extract data with defaults
             summary = {
@@ -64,7 +66,7 @@ class ReportController:
     def get_repair_distribution():
         """Get repair distribution with safe data handling"""
         try:
-            data = models.get_repair_distribution()
+            data = get_dashboard_snapshot().get('repair_distribution', [])
             if not data:
                 return []
             
@@ -86,7 +88,7 @@ class ReportController:
     def get_top_selling_items():
         """Get top selling items with quantity, revenue, and profit"""
         try:
-            data = models.get_top_selling_items()
+            data = get_dashboard_snapshot().get('top_selling_items', [])
             if not data:
                 return []
             
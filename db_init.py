@@ -165,4 +165,11 @@ except Exception as e:
 
 conn.commit()
 conn.close()
+
+# ===================== Schema migrations =====================
+# Adds the columns/tables introduced after the base schema above
+from modules.migrations import migrate
+result = migrate()
+print(f"Schema version: {result['to']}")
+
 print("Database initialized:", DB)
@@ -1,12 +1,244 @@
 # modules/audit_logger.py
-import sqlite3
+"""
+Audit trail for business actions.
+
+In "buffered" durability mode (the default) ``log_action`` only queues the
+event; a background writer drains the queue and inserts whole batches with
+executemany in one transaction (group commit), so callers on the UI thread
+never wait for an fsync. "strict" mode writes each event before returning.
+Pending events are flushed before audit logs are read and at shutdown.
+"""
+import atexit
+import queue
+import threading
 from datetime import datetime
-from modules.logger import log
 import config
+from modules.db import get_conn
+from modules.logger import log
+from modules.service_routing import served
+
+STRICT = "strict"
+BUFFERED = "buffered"
+
+_INSERT_SQL = '''
+    INSERT INTO audit_logs (timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _insert_rows(rows):
+    """Insert audit rows in a single transaction."""
+    conn = get_conn()
+    try:
+        conn.executemany(_INSERT_SQL, rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class AuditWriter:
+    """Bounded queue of audit events drained by a background thread"""
+    
+    def __init__(self, queue_size=10000, batch_size=200, idle_wait=0.5):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.idle_wait = idle_wait
+        self.thread = None
+        self._stop = threading.Event()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,     # queue was full
+            'failed': 0,      # batch insert raised
+            'batches': 0,
+            'max_depth': 0,
+        }
+    
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        with self._lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self._stop.clear()
+            self.thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self.thread.start()
+    
+    def submit(self, row) -> bool:
+        """Queue one audit row without blocking. Returns False if it was dropped."""
+        self.start()
+        with self._cond:
+            self._pending += 1
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+            with self._lock:
+                self.stats['dropped'] += 1
+                dropped = self.stats['dropped']
+            if dropped == 1 or dropped % 1000 == 0:
+                log.warning(f"Audit queue full, {dropped} event(s) dropped so far")
+            return False
+        with self._lock:
+            self.stats['enqueued'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], self.queue.qsize())
+        return True
+    
+    def flush(self, timeout=5.0) -> bool:
+        """Wait until every queued event has been written. Returns False on timeout."""
+        if self.thread is None or not self.thread.is_alive():
+            return self._pending == 0
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+    
+    def stop(self, timeout=5.0):
+        """Flush pending events and stop the thread"""
+        flushed = self.flush(timeout)
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout)
+        return flushed
+    
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+    
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.idle_wait)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+    
+    def _write(self, batch):
+        try:
+            _insert_rows(batch)
+            with self._lock:
+                self.stats['written'] += len(batch)
+                self.stats['batches'] += 1
+        except Exception as e:
+            with self._lock:
+                self.stats['failed'] += len(batch)
+            log.error(f"Failed to write {len(batch)} audit event(s): {e}")
+        finally:
+            with self._cond:
+                self._pending -= len(batch)
+                self._cond.notify_all()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_mode = None
+
+
+def _audit_config():
+    return config.load_config().get("audit", config.DEFAULT_CONFIG["audit"]) or {}
+
+
+def get_audit_mode() -> str:
+    """Return the durability mode: 'strict' or 'buffered'."""
+    global _mode
+    if _mode is None:
+        mode = _audit_config().get("durability", BUFFERED)
+        _mode = mode if mode in (STRICT, BUFFERED) else BUFFERED
+    return _mode
+
+
+def set_audit_mode(mode: str):
+    """Switch durability mode at runtime. Switching to strict flushes the queue."""
+    global _mode
+    if mode not in (STRICT, BUFFERED):
+        raise ValueError(f"Invalid audit durability mode: {mode}")
+    if mode == STRICT:
+        flush_audit_log()
+    _mode = mode
 
-def get_conn():
-    return sqlite3.connect(config.DB_PATH)
 
+def get_audit_writer() -> AuditWriter:
+    """Return the process-wide writer, creating it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                cfg = _audit_config()
+                _writer = AuditWriter(
+                    queue_size=cfg.get("queue_size", 10000),
+                    batch_size=cfg.get("batch_size", 200),
+                )
+    return _writer
+
+
+def flush_audit_log(timeout=5.0) -> bool:
+    """Block until all buffered audit events are in the database."""
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
+
+
+def shutdown_audit_writer(timeout=5.0):
+    """Flush and stop the background writer (registered with atexit)."""
+    global _writer
+    if _writer is not None:
+        if not _writer.stop(timeout):
+            log.error(f"Audit writer stopped with {_writer.queue_depth()} event(s) unwritten")
+        _writer = None
+
+atexit.register(shutdown_audit_writer)
+
+
+def get_audit_stats() -> dict:
+    """Return writer counters plus current mode and queue depth."""
+    stats = {'mode': get_audit_mode(), 'queue_depth': 0, 'enqueued': 0, 'written': 0,
+             'dropped': 0, 'failed': 0, 'batches': 0, 'max_depth': 0}
+    if _writer is not None:
+        with _writer._lock:
+            stats.update(_writer.stats)
+        stats['queue_depth'] = _writer.queue_depth()
+    return stats
+
+
+def record_action(c, user, action_type, entity_type, entity_id=None, description="", old_value=None, new_value=None):
+    """
+    Write an audit event with the caller's cursor, as part of its transaction.
+    
+    Use this instead of log_action when the event must commit (or roll back)
+    together with the change it describes. Arguments as for log_action.
+    """
+    timestamp = datetime.now().isoformat()
+    c.execute(_INSERT_SQL, (timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description))
+    log.info(f"Audit: {user} - {action_type} {entity_type} #{entity_id}: {description}")
+
+
+def record_actions(c, events):
+    """
+    Write many audit events with the caller's cursor in one executemany.
+    
+    Args:
+        c: Cursor of an open transaction
+        events: (user, action_type, entity_type, entity_id, description,
+            old_value, new_value) tuples
+    """
+    timestamp = datetime.now().isoformat()
+    rows = [(timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
+            for user, action_type, entity_type, entity_id, description, old_value, new_value in events]
+    if rows:
+        c.executemany(_INSERT_SQL, rows)
+        log.info(f"Audit: {len(rows)} event(s) recorded")
+
+
+@served
 def log_action(user, action_type, entity_type, entity_id=None, description="", old_value=None, new_value=None):
     """
     Log an audit event to the database.
@@ -20,30 +252,28 @@ def log_action(user, action_type, entity_type, entity_id=None, description="", o
         old_value: Previous value (for updates)
         new_value: New value (for updates)
     """
-    conn = get_conn()
-    c = conn.cursor()
-    
     timestamp = datetime.now().isoformat()
+    row = (timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
+    
+    if get_audit_mode() == BUFFERED:
+        if get_audit_writer().submit(row):
+            log.info(f"Audit: {user} - {action_type} {entity_type} #{entity_id}: {description}")
+        return
     
     try:
-        c.execute('''
-            INSERT INTO audit_logs (timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description))
-        
-        conn.commit()
+        _insert_rows([row])
         log.info(f"Audit: {user} - {action_type} {entity_type} #{entity_id}: {description}")
     except Exception as e:
         log.error(f"Failed to log audit event: {e}")
-    finally:
-        conn.close()
 
+@served(read=True)
 def get_logs(limit=100, user=None, action_type=None, entity_type=None, start_date=None, end_date=None):
     """
     Retrieve audit logs with optional filtering.
     
     Returns: List of tuples (log_id, timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
     """
+    flush_audit_log()
     conn = get_conn()
     c = conn.cursor()
     
@@ -78,12 +308,14 @@ def get_logs(limit=100, user=None, action_type=None, entity_type=None, start_dat
     
     return rows
 
+@served(read=True)
 def get_entity_history(entity_type, entity_id):
     """
     Get all audit logs for a specific entity.
     
     Returns: List of tuples (log_id, timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
     """
+    flush_audit_log()
     conn = get_conn()
     c = conn.cursor()
     
@@ -98,10 +330,12 @@ def get_entity_history(entity_type, entity_id):
     
     return rows
 
+@served
 def clear_old_logs(days=90):
     """
     Delete audit logs older than specified days.
     """
+    flush_audit_log()
     conn = get_conn()
     c = conn.cursor()
     
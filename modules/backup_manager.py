@@ -4,6 +4,7 @@ import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
 import config
+from modules.db import close_all
 from modules.logger import log
 
 BACKUP_DIR = Path(__file__).resolve().parents[1] / "backups"
@@ -79,6 +80,9 @@ def restore_backup(backup_filename):
         safety_backup = BACKUP_DIR / f"pre_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
         shutil.copy2(config.DB_PATH, safety_backup)
         
+        # Pooled connections must not survive the file being overwritten
+        close_all()
+        
         # Restore the backup
         shutil.copy2(backup_path, config.DB_PATH)
         log.info(f"Database restored from: {backup_filename}")
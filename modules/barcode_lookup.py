@@ -129,12 +129,13 @@ class BarcodeDatabase:
         conn = get_conn()
         c = conn.cursor()
         
-        # Try to find by SKU or barcode field
-        c.execute("""SELECT name, category, buy_price, sell_price, storage, ram, color, 
-                            condition, brand, model, warranty_months, description
-                     FROM inventory 
-                     WHERE sku = ? OR barcode = ?
-                     LIMIT 1""", (barcode, barcode))
+        # Try to find by SKU, then by barcode field (one index lookup each)
+        columns = """name, category, buy_price, sell_price, storage, ram, color,
+                     condition, brand, model, warranty_months, description"""
+        c.execute(f"""SELECT {columns} FROM inventory WHERE sku = ?
+                      UNION ALL
+                      SELECT {columns} FROM inventory WHERE barcode = ?
+                      LIMIT 1""", (barcode, barcode))
         
         row = c.fetchone()
         conn.close()
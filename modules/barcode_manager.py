@@ -4,9 +4,17 @@ Barcode Management System
 Handles individual product instances with unique barcodes
 """
 
+import csv
 from modules.db import get_conn
+from modules.transaction_manager import execute_with_retry
+from modules.validators import validate_barcode, validate_imei
 from datetime import datetime
-from typing import Optional, List, Tuple
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Tuple
+
+# Rows written per transaction by bulk_ingest_barcodes
+BULK_CHUNK_SIZE = 500
 
 
 class BarcodeStatus:
@@ -176,6 +184,36 @@ def mark_barcode_sold(barcode: str, sale_id: int) -> bool:
         return False
 
 
+def mark_sold(c, barcodes, sale_id: int):
+    """
+    Mark several barcodes as sold with the caller's cursor (no commit).
+    
+    Args:
+        c: Cursor of an open transaction
+        barcodes: Barcodes sold in the sale
+        sale_id: Sale ID
+    
+    Raises:
+        ValueError: A barcode does not exist or is no longer available
+    """
+    barcodes = list(dict.fromkeys(barcodes))
+    if not barcodes:
+        return
+    sold_date = datetime.now().isoformat()
+    c.executemany("""
+        UPDATE product_barcodes
+        SET status = ?, sold_date = ?, sale_id = ?
+        WHERE barcode = ? AND status = ?
+    """, [(BarcodeStatus.SOLD, sold_date, sale_id, barcode, BarcodeStatus.AVAILABLE) for barcode in barcodes])
+    if c.rowcount != len(barcodes):
+        c.execute(f"""SELECT barcode FROM product_barcodes
+                      WHERE sale_id = ? AND barcode IN ({','.join('?' * len(barcodes))})""",
+                  [sale_id] + barcodes)
+        marked = {row[0] for row in c.fetchall()}
+        missing = [barcode for barcode in barcodes if barcode not in marked]
+        raise ValueError(f"Barcode(s) not available: {', '.join(missing)}")
+
+
 def get_product_stock_count(item_id: int) -> int:
     """
     Get count of available barcodes for a product.
@@ -317,6 +355,197 @@ def get_all_barcodes_for_item(item_id: int) -> List[Tuple]:
         return []
 
 
+def _ingest_row(row, item_id):
+    """Normalize one ingest row to (barcode, serial_number, item_id, sku, notes)."""
+    if isinstance(row, dict):
+        item = row.get('item_id') or item_id
+        try:
+            item = int(item) if item is not None else None
+        except (TypeError, ValueError):
+            pass  # reported as an unknown item
+        return (str(row.get('barcode') or row.get('imei') or '').strip(),
+                (str(row.get('serial_number') or row.get('serial') or '').strip() or None),
+                item,
+                (str(row.get('sku') or '').strip() or None),
+                row.get('notes') or None)
+    if isinstance(row, (tuple, list)):
+        barcode = str(row[0] or '').strip() if row else ''
+        serial = (str(row[1] or '').strip() or None) if len(row) > 1 else None
+        return barcode, serial, item_id, None, None
+    return str(row or '').strip(), None, item_id, None, None
+
+
+def check_unit_barcode(barcode: str, imei: Optional[bool] = None) -> Optional[str]:
+    """
+    Return why a unit barcode is invalid, or None if it is acceptable.
+    
+    Args:
+        barcode: Barcode/IMEI/serial (already stripped)
+        imei: True: must be a valid IMEI; False: no IMEI check; None: only
+            15-digit numeric codes must be valid IMEIs
+    """
+    if not validate_barcode(barcode):
+        return "empty or longer than 50 characters" if barcode else "empty barcode"
+    looks_like_imei = barcode.isdigit() and len(barcode) == 15
+    if imei or (imei is None and looks_like_imei):
+        if not validate_imei(barcode):
+            return "invalid IMEI (must be 15 digits with a valid check digit)"
+    return None
+
+
+def _resolve_items(c, refs, known_ids: Dict, known_skus: Dict):
+    """Look up the item ids and SKUs of one chunk that are not cached yet."""
+    ids = [ref for kind, ref in refs if kind == 'id' and ref not in known_ids]
+    skus = [ref for kind, ref in refs if kind == 'sku' and ref not in known_skus]
+    if ids:
+        c.execute(f"SELECT item_id FROM inventory WHERE item_id IN ({','.join('?' * len(ids))})", ids)
+        found = {row[0] for row in c.fetchall()}
+        known_ids.update((ref, ref in found) for ref in ids)
+    if skus:
+        c.execute(f"SELECT sku, item_id FROM inventory WHERE sku IN ({','.join('?' * len(skus))})", skus)
+        found = dict(c.fetchall())
+        known_skus.update((ref, found.get(ref)) for ref in skus)
+
+
+def _ingest_chunk(conn, chunk, known_ids, known_skus, added_date):
+    """Insert one chunk of validated rows; runs inside a write transaction."""
+    c = conn.cursor()
+    refs = {('sku', sku) if sku else ('id', item) for _, _, _, item, sku, _ in chunk}
+    _resolve_items(c, refs, known_ids, known_skus)
+
+    barcodes = [entry[1] for entry in chunk]
+    c.execute(f"SELECT barcode FROM product_barcodes WHERE barcode IN ({','.join('?' * len(barcodes))})",
+              barcodes)
+    existing = {row[0] for row in c.fetchall()}
+
+    rows = []
+    duplicates, unknown = [], []
+    for number, barcode, serial, item, sku, notes in chunk:
+        if barcode in existing:
+            duplicates.append((number, barcode, "already registered"))
+            continue
+        resolved = known_skus.get(sku) if sku else (item if known_ids.get(item) else None)
+        if resolved is None:
+            unknown.append((number, barcode, f"unknown item {sku or item}"))
+            continue
+        rows.append((resolved, barcode, serial, BarcodeStatus.AVAILABLE, added_date, notes))
+
+    # The write lock is held since before the check above; OR IGNORE only
+    # guards against the unexpected, a duplicate never aborts the chunk
+    c.executemany("""
+        INSERT OR IGNORE INTO product_barcodes
+        (item_id, barcode, serial_number, status, added_date, notes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+    return max(c.rowcount, 0), duplicates, unknown
+
+
+def bulk_ingest_barcodes(rows: Iterable, item_id: int = None, imei: Optional[bool] = None,
+                         chunk_size: int = BULK_CHUNK_SIZE,
+                         progress: Callable[[int, Optional[int]], None] = None) -> Dict:
+    """
+    Register many unit barcodes (IMEIs, serials) in a few chunked transactions.
+    
+    Rows are read lazily and written ``chunk_size`` at a time: each chunk is
+    validated, checked against the inventory and the existing barcodes with
+    one query each, and inserted with a single executemany in one write
+    transaction. Bad rows are reported, never fatal.
+    
+    Args:
+        rows: Iterable of barcodes, (barcode, serial_number) tuples or dicts
+            with barcode (or imei), serial_number (or serial), item_id or
+            sku, and notes (see read_barcode_csv)
+        item_id: Product ID for rows that do not name their own item
+        imei: True: every barcode must be a valid IMEI; False: no IMEI
+            check; None: 15-digit numeric barcodes must be valid IMEIs
+        chunk_size: Rows per transaction
+        progress: Called as progress(rows_done, total) after each chunk;
+            total is None when ``rows`` has no length
+    
+    Returns:
+        Dict with total and added counts, and lists of (row number,
+        barcode, reason) for duplicates, invalid and unknown_items. Row
+        numbers count from 1 in input order.
+    """
+    total = len(rows) if hasattr(rows, '__len__') else None
+    report = {'total': 0, 'added': 0, 'duplicates': [], 'invalid': [], 'unknown_items': []}
+    known_ids, known_skus = {}, {}
+    seen = set()
+    added_date = datetime.now().isoformat()
+
+    numbered = enumerate(rows, 1)
+    while True:
+        batch = list(islice(numbered, max(1, chunk_size)))
+        if not batch:
+            break
+        chunk = []
+        for number, raw in batch:
+            barcode, serial, item, sku, notes = _ingest_row(raw, item_id)
+            reason = check_unit_barcode(barcode, imei)
+            if reason:
+                report['invalid'].append((number, barcode, reason))
+            elif barcode in seen:
+                report['duplicates'].append((number, barcode, "repeated in this batch"))
+            elif item is None and not sku:
+                report['unknown_items'].append((number, barcode, "no item given"))
+            else:
+                seen.add(barcode)
+                chunk.append((number, barcode, serial, item, sku, notes))
+
+        if chunk:
+            try:
+                added, duplicates, unknown = execute_with_retry(
+                    _ingest_chunk, chunk, known_ids, known_skus, added_date)
+                report['added'] += added
+                report['duplicates'].extend(duplicates)
+                report['unknown_items'].extend(unknown)
+            except Exception as e:
+                print(f"Error ingesting barcodes: {e}")
+                report['invalid'].extend((entry[0], entry[1], f"not saved: {e}") for entry in chunk)
+
+        report['total'] += len(batch)
+        if progress:
+            progress(report['total'], total)
+
+    for key in ('duplicates', 'invalid', 'unknown_items'):
+        report[key].sort()
+    return report
+
+
+def read_barcode_csv(path) -> Iterator[Dict]:
+    """
+    Stream the rows of a barcode CSV file for bulk_ingest_barcodes.
+    
+    A header row (barcode or imei, serial_number or serial, item_id, sku,
+    notes; any order, case-insensitive) names the columns. Without one the
+    columns are barcode, then serial_number.
+    
+    Args:
+        path: CSV file path
+    
+    Yields:
+        Dict per non-empty row
+    """
+    with open(Path(path), newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = None
+        for line in reader:
+            if not any(cell.strip() for cell in line):
+                continue
+            if header is None:
+                names = [cell.strip().lower() for cell in line]
+                if 'barcode' in names or 'imei' in names:
+                    header = names
+                    continue
+                header = ['barcode', 'serial_number']
+            yield {name: value.strip() for name, value in zip(header, line) if name}
+
+
+def ingest_barcode_csv(path, **kwargs) -> Dict:
+    """Register the barcodes of a CSV file (see read_barcode_csv and bulk_ingest_barcodes)."""
+    return bulk_ingest_barcodes(read_barcode_csv(path), **kwargs)
+
+
 def bulk_add_barcodes(item_id: int, barcodes: List[str]) -> Tuple[int, int]:
     """
     Add multiple barcodes at once.
@@ -328,13 +557,5 @@ def bulk_add_barcodes(item_id: int, barcodes: List[str]) -> Tuple[int, int]:
     Returns:
         Tuple of (success_count, failure_count)
     """
-    success = 0
-    failure = 0
-    
-    for barcode in barcodes:
-        if add_barcode(item_id, barcode.strip()):
-            success += 1
-        else:
-            failure += 1
-    
-    return success, failure
+    report = bulk_ingest_barcodes(barcodes, item_id=item_id, imei=False)
+    return report['added'], report['total'] - report['added']
@@ -0,0 +1,210 @@
+# modules/change_log.py
+"""
+Change journal for multi-terminal synchronization.
+
+Triggers on the synced tables append one row per inserted, updated or
+deleted record to ``change_log``. Every row has a sequence number that
+only grows (AUTOINCREMENT, never reused). A terminal remembers the last
+sequence it has seen and reads only the newer rows, so finding out what
+another terminal changed costs O(changes), not a reload of every table.
+
+Old journal rows are pruned after JOURNAL_RETENTION_DAYS. A reader that
+falls behind the pruned range is told the journal is incomplete and
+should do a full refresh.
+
+Journal rows written by this process's own commits are remembered as
+sequence ranges (see own_ranges) so the monitor can leave them out.
+"""
+
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from modules.db import add_commit_hook, get_conn, read_committed
+from modules.logger import log
+from modules.service_routing import served
+
+JOURNAL_RETENTION_DAYS = 2
+
+# table -> SQL expression (over NEW/OLD) for the id that is journaled.
+# Barcodes are journaled under the inventory item they belong to.
+TRACKED_TABLES = {
+    "inventory": "{r}.item_id",
+    "sales": "{r}.sale_id",
+    "repair_orders": "{r}.repair_id",
+    "customers": "{r}.customer_id",
+    "product_barcodes": "{r}.item_id",
+}
+
+
+def create_tables(c):
+    """Create the journal table and its triggers (called from the schema migration)."""
+    c.execute("""CREATE TABLE IF NOT EXISTS change_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER,
+                    op TEXT NOT NULL,
+                    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'))
+                )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_change_log_changed_at ON change_log(changed_at)")
+
+    for table, id_expr in TRACKED_TABLES.items():
+        for event, op, row in (("INSERT", "I", "new"), ("UPDATE", "U", "new"), ("DELETE", "D", "old")):
+            c.execute(f"""CREATE TRIGGER IF NOT EXISTS change_log_{table}_{op.lower()}
+                          AFTER {event} ON {table}
+                          BEGIN
+                              INSERT INTO change_log (table_name, row_id, op)
+                              VALUES ('{table}', {id_expr.format(r=row)}, '{op}');
+                          END""")
+
+
+def _last_seq(conn) -> int:
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+# (first, last] sequence ranges written by this process's commits, for the
+# database epoch (see db.get_data_version) they were committed to
+_own_lock = threading.Lock()
+_own = {"epoch": None, "ranges": deque(maxlen=1000)}
+
+
+def _note_own_rows(conn):
+    """
+    Commit hook: find the journal rows the pending transaction wrote.
+
+    The writer holds the write lock, so every sequence number between the
+    last committed one and the one inside the transaction is its own.
+    """
+    try:
+        last = _last_seq(conn)
+        epoch, committed = read_committed("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    except sqlite3.Error:
+        return None   # busy or no journal: the rows are simply not skipped
+    first = committed[0][0] if committed else 0
+    if last <= first:
+        return None
+
+    def remember():
+        with _own_lock:
+            if _own["epoch"] != epoch:
+                _own["epoch"] = epoch
+                _own["ranges"].clear()
+            _own["ranges"].append((first, last))
+    return remember
+
+
+add_commit_hook(_note_own_rows)
+
+
+def own_ranges(epoch, after_seq: int) -> List[Tuple[int, int]]:
+    """
+    Return the sorted (first, last] ranges this process committed after ``after_seq``.
+
+    ``epoch`` is the first item of the caller's get_data_version token;
+    ranges of another database are dropped. Ranges at or before
+    ``after_seq`` are forgotten: the only reader (the monitor) has moved
+    past them.
+    """
+    with _own_lock:
+        if _own["epoch"] != epoch:
+            _own["ranges"].clear()
+            return []
+        # Sorted: two threads may remember their commits out of order
+        ranges = sorted(r for r in _own["ranges"] if r[1] > after_seq)
+        _own["ranges"].clear()
+        _own["ranges"].extend(ranges)
+    return ranges
+
+
+@served(read=True)
+def get_last_seq() -> int:
+    """Return the newest sequence number in the journal (0 if empty)."""
+    conn = get_conn()
+    try:
+        return _last_seq(conn)
+    finally:
+        conn.close()
+
+
+def _journal_range(c, after_seq: int) -> Tuple[int, bool]:
+    """Newest sequence number and whether every row after ``after_seq`` is still journaled."""
+    newest = _last_seq(c.connection)
+    oldest = c.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+    if newest < after_seq:
+        # The sequence went backwards: the database file was replaced (restore)
+        return newest, False
+    # Sequence numbers have no gaps except at the pruned low end
+    complete = newest == after_seq or (oldest is not None and oldest <= after_seq + 1)
+    return newest, complete
+
+
+@served(read=True)
+def read_since(after_seq: int, skip: Sequence[Tuple[int, int]] = ()) -> Tuple[Dict[str, set], int, bool]:
+    """
+    Collect the changes recorded after ``after_seq``.
+
+    Rows inside the sorted (first, last] ranges of ``skip`` are left out.
+
+    Returns:
+        (changed ids per table, newest sequence number, complete). ``complete``
+        is False when rows the caller has not seen were already pruned (or the
+        database was replaced); the caller should then treat every table as
+        changed.
+    """
+    conn = get_conn()
+    try:
+        c = conn.cursor()
+        # One read transaction so the range check and the rows agree
+        c.execute("BEGIN")
+        newest, complete = _journal_range(c, after_seq)
+        c.execute("SELECT seq, table_name, row_id FROM change_log WHERE seq > ?", (after_seq,))
+        rows = c.fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    lasts = [last for _, last in skip]
+    changes: Dict[str, set] = {}
+    for seq, table, row_id in rows:
+        i = bisect_left(lasts, seq)
+        if i < len(skip) and skip[i][0] < seq:
+            continue
+        changes.setdefault(table, set()).add(row_id)
+    return changes, newest, complete
+
+
+def changed_ids(c, table: str, after_seq: int) -> Tuple[set, int, bool]:
+    """
+    Ids of ``table`` rows changed after ``after_seq``, read with cursor ``c``.
+
+    Runs inside the caller's transaction so the caller can fetch the rows
+    from the same snapshot.
+
+    Returns:
+        (changed ids, newest sequence number, complete) as for read_since
+    """
+    newest, complete = _journal_range(c, after_seq)
+    c.execute("SELECT DISTINCT row_id FROM change_log WHERE seq > ? AND table_name = ?",
+              (after_seq, table))
+    return {row[0] for row in c.fetchall()}, newest, complete
+
+
+@served
+def prune(retention_days: int = JOURNAL_RETENTION_DAYS) -> Optional[int]:
+    """Delete journal rows older than ``retention_days``; returns rows deleted."""
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime('%Y-%m-%dT%H:%M:%S')
+    conn = get_conn()
+    try:
+        deleted = conn.execute("DELETE FROM change_log WHERE changed_at < ?", (cutoff,)).rowcount
+        conn.commit()
+        return deleted
+    except Exception as e:
+        conn.rollback()
+        log.error(f"Change journal prune failed: {e}")
+        return None
+    finally:
+        conn.close()
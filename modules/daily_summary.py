@@ -0,0 +1,236 @@
+# modules/daily_summary.py
+"""
+Daily sales and repair rollup tables.
+
+``daily_sales_summary`` and ``daily_repair_summary`` hold one row per day with
+the totals that reports and dashboards need (transaction counts, revenue,
+profit, discounts). They are kept current inside the same transaction as the
+write that changes them (see models.create_sale_detailed, add_repair_part,
+update_repair_status, ...), so a period report reads one row per day instead
+of every sale, line item and repair part in the period.
+
+Run ``python -m modules.daily_summary`` to rebuild both tables from the raw
+rows (backfill after an import or a manual edit of sales/repair data).
+"""
+
+from typing import Dict, List
+
+from modules.db import get_conn
+from modules.date_range import range_clause
+from modules.logger import log
+
+_SALES_ROLLUP_SQL = """
+    SELECT
+        substr(s.sale_date, 1, 10) as day,
+        COUNT(*),
+        COALESCE(SUM(s.total_amount), 0),
+        COALESCE(SUM(s.discount_amount), 0),
+        COALESCE(SUM((SELECT SUM(si.quantity * (si.unit_price - si.cost_price))
+                      FROM sale_items si WHERE si.sale_id = s.sale_id)), 0)
+    FROM sales s
+    WHERE {where}
+    GROUP BY day
+"""
+
+# Repair orders count as revenue once they are Completed or Delivered
+_REPAIR_ROLLUP_SQL = """
+    SELECT
+        substr(ro.received_date, 1, 10) as day,
+        COUNT(*),
+        COALESCE(SUM(ro.total_estimate), 0),
+        SUM(CASE WHEN ro.status IN ('Completed', 'Delivered') THEN 1 ELSE 0 END),
+        COALESCE(SUM(CASE WHEN ro.status IN ('Completed', 'Delivered')
+                          THEN ro.total_estimate END), 0),
+        COALESCE(SUM(CASE WHEN ro.status IN ('Completed', 'Delivered')
+                          THEN (SELECT SUM(rp.qty * (rp.unit_price - rp.cost_price))
+                                FROM repair_parts rp WHERE rp.repair_id = ro.repair_id) END), 0)
+    FROM repair_orders ro
+    WHERE {where}
+    GROUP BY day
+"""
+
+
+def create_tables(c):
+    """Create the rollup tables (called from the schema migration)."""
+    c.execute("""CREATE TABLE IF NOT EXISTS daily_sales_summary (
+                    day TEXT PRIMARY KEY,
+                    transaction_count INTEGER NOT NULL DEFAULT 0,
+                    revenue REAL NOT NULL DEFAULT 0,
+                    discount REAL NOT NULL DEFAULT 0,
+                    profit REAL NOT NULL DEFAULT 0
+                )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS daily_repair_summary (
+                    day TEXT PRIMARY KEY,
+                    order_count INTEGER NOT NULL DEFAULT 0,
+                    estimate_total REAL NOT NULL DEFAULT 0,
+                    completed_count INTEGER NOT NULL DEFAULT 0,
+                    completed_revenue REAL NOT NULL DEFAULT 0,
+                    completed_profit REAL NOT NULL DEFAULT 0
+                )""")
+
+
+# ==================== Maintenance (inside the caller's transaction) ====================
+
+def record_sale(c, sale_date: str, total_amount: float, profit: float, discount: float = 0.0):
+    """
+    Add one new sale to its day's totals.
+
+    Must be called with the cursor of the transaction that inserted the sale.
+    """
+    day = str(sale_date)[:10]
+    c.execute("INSERT OR IGNORE INTO daily_sales_summary (day) VALUES (?)", (day,))
+    c.execute("""UPDATE daily_sales_summary
+                 SET transaction_count = transaction_count + 1,
+                     revenue = revenue + ?,
+                     discount = discount + ?,
+                     profit = profit + ?
+                 WHERE day = ?""",
+              (total_amount or 0.0, discount or 0.0, profit or 0.0, day))
+
+
+def refresh_sales_day(c, day: str):
+    """Recompute one day's sales totals from the raw rows."""
+    day = str(day)[:10]
+    where, params = range_clause("s.sale_date", day, day)
+    c.execute("DELETE FROM daily_sales_summary WHERE day = ?", (day,))
+    c.execute("INSERT INTO daily_sales_summary (day, transaction_count, revenue, discount, profit) "
+              + _SALES_ROLLUP_SQL.format(where=where), params)
+
+
+def refresh_repair_day(c, day: str):
+    """Recompute one day's repair totals from the raw rows."""
+    day = str(day)[:10]
+    where, params = range_clause("ro.received_date", day, day)
+    c.execute("DELETE FROM daily_repair_summary WHERE day = ?", (day,))
+    c.execute("INSERT INTO daily_repair_summary (day, order_count, estimate_total, completed_count, "
+              "completed_revenue, completed_profit) " + _REPAIR_ROLLUP_SQL.format(where=where), params)
+
+
+def refresh_repair(c, repair_id: int):
+    """
+    Recompute the totals of the day a repair order was received.
+
+    A status change or a new part moves the order in or out of the completed
+    totals, so the (small) day is recomputed rather than patched.
+    """
+    c.execute("SELECT received_date FROM repair_orders WHERE repair_id = ?", (repair_id,))
+    row = c.fetchone()
+    if row and row[0]:
+        refresh_repair_day(c, row[0])
+
+
+def rebuild(c):
+    """Rebuild both rollup tables from scratch using the given cursor."""
+    c.execute("DELETE FROM daily_sales_summary")
+    c.execute("INSERT INTO daily_sales_summary (day, transaction_count, revenue, discount, profit) "
+              + _SALES_ROLLUP_SQL.format(where="s.sale_date IS NOT NULL"))
+    c.execute("DELETE FROM daily_repair_summary")
+    c.execute("INSERT INTO daily_repair_summary (day, order_count, estimate_total, completed_count, "
+              "completed_revenue, completed_profit) "
+              + _REPAIR_ROLLUP_SQL.format(where="ro.received_date IS NOT NULL"))
+
+
+def rebuild_daily_summaries() -> Dict:
+    """
+    Rebuild the rollup tables from the raw sales and repair rows.
+
+    Returns:
+        Dictionary with the number of sales days and repair days written
+    """
+    from modules.transaction_manager import transaction
+
+    with transaction() as conn:
+        c = conn.cursor()
+        rebuild(c)
+        sales_days = c.execute("SELECT COUNT(*) FROM daily_sales_summary").fetchone()[0]
+        repair_days = c.execute("SELECT COUNT(*) FROM daily_repair_summary").fetchone()[0]
+    log.info(f"Daily summaries rebuilt: {sales_days} sales days, {repair_days} repair days")
+    return {'sales_days': sales_days, 'repair_days': repair_days}
+
+
+# ==================== Queries ====================
+
+def get_sales_totals(start_date: str, end_date: str, conn=None) -> Dict:
+    """
+    Sum the daily sales rows for an inclusive day range.
+
+    Returns:
+        Dictionary with transaction_count, revenue, discount and profit
+    """
+    own = conn is None
+    conn = conn or get_conn()
+    try:
+        row = conn.execute("""
+            SELECT SUM(transaction_count), SUM(revenue), SUM(discount), SUM(profit)
+            FROM daily_sales_summary
+            WHERE day BETWEEN ? AND ?
+        """, (str(start_date)[:10], str(end_date)[:10])).fetchone()
+    finally:
+        if own:
+            conn.close()
+    return {
+        'transaction_count': row[0] or 0,
+        'revenue': float(row[1] or 0.0),
+        'discount': float(row[2] or 0.0),
+        'profit': float(row[3] or 0.0),
+    }
+
+
+def get_daily_sales(start_date: str, end_date: str = None, conn=None) -> List[tuple]:
+    """
+    Return (day, transaction_count, revenue, discount, profit) rows for a day range.
+
+    end_date None means "up to the latest day".
+    """
+    own = conn is None
+    conn = conn or get_conn()
+    try:
+        if end_date is None:
+            rows = conn.execute("""
+                SELECT day, transaction_count, revenue, discount, profit
+                FROM daily_sales_summary WHERE day >= ? ORDER BY day
+            """, (str(start_date)[:10],)).fetchall()
+        else:
+            rows = conn.execute("""
+                SELECT day, transaction_count, revenue, discount, profit
+                FROM daily_sales_summary WHERE day BETWEEN ? AND ? ORDER BY day
+            """, (str(start_date)[:10], str(end_date)[:10])).fetchall()
+    finally:
+        if own:
+            conn.close()
+    return rows
+
+
+def get_repair_totals(start_date: str, end_date: str, conn=None) -> Dict:
+    """
+    Sum the daily repair rows for an inclusive day range.
+
+    Returns:
+        Dictionary with order_count, estimate_total, completed_count,
+        completed_revenue and completed_profit
+    """
+    own = conn is None
+    conn = conn or get_conn()
+    try:
+        row = conn.execute("""
+            SELECT SUM(order_count), SUM(estimate_total), SUM(completed_count),
+                   SUM(completed_revenue), SUM(completed_profit)
+            FROM daily_repair_summary
+            WHERE day BETWEEN ? AND ?
+        """, (str(start_date)[:10], str(end_date)[:10])).fetchone()
+    finally:
+        if own:
+            conn.close()
+    return {
+        'order_count': row[0] or 0,
+        'estimate_total': float(row[1] or 0.0),
+        'completed_count': row[2] or 0,
+        'completed_revenue': float(row[3] or 0.0),
+        'completed_profit': float(row[4] or 0.0),
+    }
+
+
+if __name__ == "__main__":
+    result = rebuild_daily_summaries()
+    print(f"✅ Rebuilt daily summaries: {result['sales_days']} sales days, "
+          f"{result['repair_days']} repair days")
@@ -0,0 +1,173 @@
+# modules/dashboard_snapshot.py
+"""
+Cached dashboard snapshot.
+
+All dashboard KPIs (cards, best sellers, recent repairs, repair chart) are
+read in one read transaction with a handful of combined aggregate queries.
+The result is cached and reused until another connection commits (tracked
+with ``PRAGMA data_version``), the day changes, or the TTL expires, so a
+burst of sale/repair/inventory events triggers one computation instead of
+one per listener.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+from modules.db import get_conn, get_data_version
+from modules.logger import log
+
+# Seconds a snapshot may be reused even when nothing was committed
+SNAPSHOT_TTL = 30
+
+_lock = threading.Lock()
+_cache = {"key": None, "computed_at": 0.0, "snapshot": None}
+_stats = {"hits": 0, "misses": 0, "last_duration_ms": 0.0}
+
+
+def _empty_snapshot() -> Dict:
+    return {
+        'total_repairs': 0,
+        'pending_repairs': 0,
+        'total_revenue': 0.0,
+        'repair_revenue': 0.0,
+        'sales_revenue': 0.0,
+        'sales_profit': 0.0,
+        'sales_today': 0.0,
+        'low_stock': 0,
+        'overdue_count': 0,
+        'recent_repairs': [],
+        'top_selling_items': [],
+        'repair_distribution': [],
+    }
+
+
+def compute_snapshot() -> Dict:
+    """
+    Compute every dashboard KPI in one read transaction (no caching).
+
+    Returns:
+        Dictionary with the keys of models.get_dashboard_stats plus
+        sales_today, top_selling_items and repair_distribution
+    """
+    started = time.perf_counter()
+    today = datetime.now().strftime('%Y-%m-%d')
+    snapshot = _empty_snapshot()
+
+    conn = get_conn()
+    try:
+        c = conn.cursor()
+        # One snapshot of the database for all queries below
+        c.execute("BEGIN")
+
+        # Repair KPIs in a single pass
+        c.execute("""
+            SELECT
+                COUNT(*),
+                SUM(CASE WHEN status NOT IN ('Completed', 'Delivered', 'Cancelled') THEN 1 ELSE 0 END),
+                SUM(CASE WHEN status IN ('Completed', 'Delivered') THEN total_estimate ELSE 0 END),
+                SUM(CASE WHEN status NOT IN ('Completed', 'Delivered', 'Cancelled')
+                          AND estimated_delivery < ? THEN 1 ELSE 0 END)
+            FROM repair_orders
+        """, (today,))
+        total, pending, repair_revenue, overdue = c.fetchone()
+
+        # Sales KPIs from the daily rollup, plus low stock
+        c.execute("""
+            SELECT
+                SUM(revenue),
+                SUM(profit),
+                SUM(CASE WHEN day = ? THEN revenue ELSE 0 END),
+                (SELECT COUNT(*) FROM inventory WHERE quantity < 5)
+            FROM daily_sales_summary
+        """, (today,))
+        sales_revenue, sales_profit, sales_today, low_stock = c.fetchone()
+
+        snapshot['total_repairs'] = total or 0
+        snapshot['pending_repairs'] = pending or 0
+        snapshot['overdue_count'] = overdue or 0
+        snapshot['repair_revenue'] = float(repair_revenue or 0.0)
+        snapshot['sales_revenue'] = float(sales_revenue or 0.0)
+        snapshot['total_revenue'] = snapshot['repair_revenue'] + snapshot['sales_revenue']
+        snapshot['sales_profit'] = float(sales_profit or 0.0)
+        snapshot['sales_today'] = float(sales_today or 0.0)
+        snapshot['low_stock'] = low_stock or 0
+
+        c.execute("""
+            SELECT order_number, customer_name, device_model, status, received_date, total_estimate
+            FROM repair_orders
+            ORDER BY repair_id DESC
+            LIMIT 10
+        """)
+        snapshot['recent_repairs'] = c.fetchall()
+
+        c.execute("""
+            SELECT
+                i.name,
+                SUM(si.quantity) as total_sold,
+                SUM(si.quantity * si.unit_price) as revenue,
+                SUM(si.quantity * (si.unit_price - si.cost_price)) as profit
+            FROM sale_items si
+            JOIN inventory i ON si.item_id = i.item_id
+            GROUP BY si.item_id
+            ORDER BY total_sold DESC
+            LIMIT 5
+        """)
+        snapshot['top_selling_items'] = c.fetchall()
+
+        c.execute("""
+            SELECT device_model, COUNT(*) as count
+            FROM repair_orders
+            GROUP BY device_model
+            ORDER BY count DESC
+            LIMIT 5
+        """)
+        snapshot['repair_distribution'] = c.fetchall()
+
+        conn.rollback()
+    finally:
+        conn.close()
+
+    _stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return snapshot
+
+
+def get_dashboard_snapshot(max_age: float = None) -> Dict:
+    """
+    Return the dashboard snapshot, recomputing it only when the data changed.
+
+    Args:
+        max_age: Seconds a cached snapshot may be reused (default SNAPSHOT_TTL)
+
+    Returns:
+        Snapshot dictionary (see compute_snapshot); do not modify it
+    """
+    ttl = SNAPSHOT_TTL if max_age is None else max_age
+    key = (get_data_version(), datetime.now().strftime('%Y-%m-%d'))
+    with _lock:
+        now = time.monotonic()
+        if _cache["key"] == key and now - _cache["computed_at"] < ttl:
+            _stats["hits"] += 1
+            return _cache["snapshot"]
+
+        _stats["misses"] += 1
+        try:
+            snapshot = compute_snapshot()
+        except Exception as e:
+            log.error(f"Dashboard snapshot failed: {e}")
+            return _cache["snapshot"] or _empty_snapshot()
+        _cache.update(key=key, computed_at=now, snapshot=snapshot)
+        return snapshot
+
+
+def invalidate_snapshot():
+    """Drop the cached snapshot so the next call recomputes it."""
+    with _lock:
+        _cache.update(key=None, computed_at=0.0, snapshot=None)
+
+
+def get_snapshot_stats() -> Dict:
+    """Return cache hit/miss counters and the last computation time."""
+    with _lock:
+        return dict(_stats)
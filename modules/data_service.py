@@ -0,0 +1,527 @@
+# modules/data_service.py
+"""
+Optional local data service: one process owns the database, terminals talk to it.
+
+Normally every terminal opens shop.db itself, which relies on file locking
+(fragile on shared folders past two terminals). In service mode a single
+process opens the database and serves the models/controllers API over a
+Unix socket or a localhost TCP port; terminals run with
+``data_service.mode = "service"`` and route their controller calls, and the
+module functions marked @served (see modules.service_routing), to it
+(see controllers.use_service).
+
+Protocol: every message is a frame of a 4-byte big-endian length followed by
+compact JSON. A request carries a batch of calls, answered in order::
+
+    {"calls": [{"fn": "models.get_inventory", "args": [], "kwargs": {}}, ...]}
+    {"results": [{"ok": <value>} | {"error": "<type>: <message>"}, ...]}
+
+Tuples, sets and dicts with non-string keys are tagged so rows come back
+as tuples, exactly as in direct mode.
+
+Inside the service, writes (anything not declared a read, see is_read)
+go through one writer thread in arrival order, so there is never more than
+one writer on the database. Reads run on the connection's handler thread
+and are cached until the database changes (db.get_data_version) or the
+date changes ("today's sales" must move on at midnight).
+
+A service on a non-loopback address must have a shared secret
+(``data_service.secret`` / ``--secret``); every request carries it and
+requests without it are refused. The secret is not encryption: use it on
+the shop's own network only.
+
+Run a service (fully offline, one Linux box):
+    python -m modules.data_service --address unix:/tmp/shop.sock
+    python -m modules.data_service --address tcp:127.0.0.1:8765
+"""
+
+import hmac
+import inspect
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from modules.db import get_data_version
+from modules.logger import log
+from modules.service_routing import SERVED_READS, mark_serving, served_api
+
+DEFAULT_ADDRESS = "tcp:127.0.0.1:8765"
+
+# Hosts a service may listen on without a shared secret
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# Frames larger than this are refused (protects both ends from garbage)
+MAX_FRAME = 64 * 1024 * 1024
+
+# Read results kept per data version
+READ_CACHE_SIZE = 256
+
+_HEADER = struct.Struct(">I")
+
+# Model functions and controller methods that only read. @served functions
+# declare it themselves (@served(read=True)); anything not listed is a write
+_READS = frozenset({
+    "models.check_inventory_availability",
+    "models.customers_changed_since",
+    "models.get_all_customers",
+    "models.get_all_users",
+    "models.get_customer_details",
+    "models.get_customer_history",
+    "models.get_daily_sales_total",
+    "models.get_dashboard_stats",
+    "models.get_data_seq",
+    "models.get_inventory_item_by_id",
+    "models.get_item_cost",
+    "models.get_profit_stats",
+    "models.get_repair_details",
+    "models.get_repair_distribution",
+    "models.get_repair_parts_total",
+    "models.get_repairs",
+    "models.get_sale_details",
+    "models.get_sales_history",
+    "models.get_top_selling_items",
+    "models.get_user",
+    "models.repairs_changed_since",
+    "models.sales_changed_since",
+    "models.search",
+    "models.search_customer_by_phone",
+    "InventoryController.get_all_items",
+    "InventoryController.get_cost_history",
+    "InventoryController.get_item_cost",
+    "InventoryController.get_items_changed_since",
+    "InventoryController.get_receipts",
+    "POSController.get_sales_changed_since",
+    "POSController.get_sales_history",
+    "RepairController.get_all_repairs",
+    "RepairController.get_repair_details",
+    "RepairController.get_repairs_changed_since",
+    "ReportController.get_dashboard_summary",
+    "ReportController.get_expense_summary",
+    "ReportController.get_profit_loss_report",
+    "ReportController.get_repair_distribution",
+    "ReportController.get_revenue_trends",
+    "ReportController.get_top_selling_items",
+})
+
+
+class DataServiceError(Exception):
+    """A call failed inside the data service (or the service is unreachable)."""
+
+
+def is_read(name: str) -> bool:
+    """True if the API function ``name`` ("module.function") only reads."""
+    return name in _READS or name in SERVED_READS
+
+
+# ---------- wire format ----------
+
+def _pack(value):
+    """Make a value JSON-safe, tagging tuples and sets so they survive the trip."""
+    if isinstance(value, tuple):
+        return {"__t": [_pack(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__s": [_pack(v) for v in value]}
+    if isinstance(value, list):
+        return [_pack(v) for v in value]
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value):
+            return {k: _pack(v) for k, v in value.items()}
+        return {"__d": [[_pack(k), _pack(v)] for k, v in value.items()]}
+    if isinstance(value, bytes):
+        return {"__b": value.hex()}
+    return value
+
+
+def _unpack_object(obj):
+    if len(obj) == 1:
+        if "__t" in obj:
+            return tuple(obj["__t"])
+        if "__s" in obj:
+            return set(obj["__s"])
+        if "__b" in obj:
+            return bytes.fromhex(obj["__b"])
+        if "__d" in obj:
+            return {k: v for k, v in obj["__d"]}
+    return obj
+
+
+def encode(message) -> bytes:
+    """Encode one message as a frame (length header + compact JSON)."""
+    body = json.dumps(_pack(message), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(body) > MAX_FRAME:
+        raise DataServiceError(f"Message too large ({len(body)} bytes)")
+    return _HEADER.pack(len(body)) + body
+
+
+def _recv_exactly(sock, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(sock):
+    """Read one message; None when the peer closed the connection."""
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME:
+        raise DataServiceError(f"Frame too large ({size} bytes)")
+    body = _recv_exactly(sock, size)
+    if body is None:
+        return None
+    return json.loads(body.decode("utf-8"), object_hook=_unpack_object)
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """
+    Parse "unix:/path/to.sock" or "tcp:host:port".
+
+    Returns:
+        (family, address) with family "unix" or "tcp"
+    """
+    kind, _, rest = (address or DEFAULT_ADDRESS).partition(":")
+    if kind == "unix" and rest:
+        return "unix", rest
+    if kind == "tcp" and rest:
+        host, _, port = rest.rpartition(":")
+        return "tcp", (host or "127.0.0.1", int(port))
+    raise ValueError(f"Invalid data service address: {address!r} (use unix:/path or tcp:host:port)")
+
+
+# ---------- API exposed by the service ----------
+
+def _takes_cursor(func) -> bool:
+    """True for helpers that run on the caller's cursor ``c`` (they cannot be called remotely)."""
+    try:
+        params = list(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        return False
+    return bool(params) and params[0] == "c"
+
+
+def _public_functions(module) -> Dict[str, Any]:
+    return {name: obj for name, obj in vars(module).items()
+            if callable(obj) and not name.startswith("_")
+            and getattr(obj, "__module__", None) == module.__name__
+            and not _takes_cursor(obj)}
+
+
+def build_api() -> Dict[str, Any]:
+    """
+    Map "models.<function>", "<Controller>.<method>" and the @served module
+    functions to the direct implementations. Model helpers that take an open
+    cursor are left out.
+    """
+    from modules import models
+    import controllers
+
+    api = {f"models.{name}": getattr(func, "direct", func)
+           for name, func in _public_functions(models).items()}
+    for class_name, methods in controllers.direct_methods().items():
+        for name, func in methods.items():
+            api[f"{class_name}.{name}"] = func
+    api.update(served_api())
+    return api
+
+
+# ---------- server ----------
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        service = self.server.service
+        # Calls made while serving run here, even if this process is also a client
+        mark_serving()
+        while True:
+            try:
+                request = read_frame(self.request)
+            except (OSError, ValueError, DataServiceError) as e:
+                log.warning(f"Data service: dropping connection: {e}")
+                return
+            if request is None:
+                return
+            calls = request.get("calls", []) if isinstance(request, dict) else []
+            if not service.authorized(request):
+                log.warning(f"Data service: refused a request without the shared secret from {self.client_address}")
+                try:
+                    self.request.sendall(encode({"results": [{"error": "DataServiceError: not authorized"}] * len(calls)}))
+                except OSError:
+                    pass
+                return
+            response = {"results": service.execute(calls)}
+            try:
+                self.request.sendall(encode(response))
+            except DataServiceError as e:
+                self.request.sendall(encode({"results": [{"error": f"DataServiceError: {e}"}] * len(calls)}))
+            except OSError:
+                return
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # pragma: no cover - Windows
+    _UnixServer = None
+
+
+class DataService:
+    """The database owner: executes batched API calls with one writer thread and a read cache"""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, api: Optional[Dict[str, Any]] = None,
+                 secret: Optional[str] = None):
+        self.address = address
+        self.api = api if api is not None else build_api()
+        self.secret = secret or None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-service-writer",
+                                          initializer=mark_serving)
+        self._cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._cache_version = None
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.stats = {"requests": 0, "calls": 0, "reads": 0, "writes": 0,
+                      "cache_hits": 0, "errors": 0, "refused": 0}
+
+    # ----- lifecycle -----
+    def start(self):
+        """Listen and serve in a background thread; returns the bound address."""
+        family, where = parse_address(self.address)
+        if family == "unix":
+            if _UnixServer is None:
+                raise DataServiceError("Unix sockets are not available on this platform")
+            if os.path.exists(where):
+                os.unlink(where)
+            self._server = _UnixServer(where, _Handler)
+            bound = f"unix:{where}"
+        else:
+            if where[0] not in LOOPBACK_HOSTS and not self.secret:
+                raise DataServiceError(f"Refusing to listen on non-local address {where[0]} "
+                                       "without a shared secret (data_service.secret)")
+            self._server = _TCPServer(where, _Handler)
+            host, port = self._server.server_address[:2]
+            bound = f"tcp:{host}:{port}"
+        self._server.service = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="data-service", daemon=True)
+        self._thread.start()
+        self.address = bound
+        log.info(f"Data service listening on {bound}")
+        return bound
+
+    def stop(self):
+        """Stop listening, finish queued writes and release the socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            family, where = parse_address(self.address)
+            if family == "unix" and os.path.exists(where):
+                os.unlink(where)
+            self._server = None
+        self._writer.shutdown(wait=True)
+
+    # ----- execution -----
+    def authorized(self, request) -> bool:
+        """True if the service has no secret or ``request`` carries it."""
+        if self.secret is None:
+            return True
+        given = request.get("secret") if isinstance(request, dict) else None
+        if isinstance(given, str) and hmac.compare_digest(given.encode("utf-8"), self.secret.encode("utf-8")):
+            return True
+        with self._lock:
+            self.stats["refused"] += 1
+        return False
+
+    def execute(self, calls: List[dict]) -> List[dict]:
+        """Run a batch of calls in order; each gets {"ok": value} or {"error": text}."""
+        with self._lock:
+            self.stats["requests"] += 1
+        return [self._execute_one(call) for call in calls]
+
+    def _execute_one(self, call) -> dict:
+        try:
+            name = call["fn"]
+            args = list(call.get("args", ()))
+            kwargs = dict(call.get("kwargs", {}))
+        except (TypeError, KeyError):
+            return self._error("DataServiceError", "malformed call")
+        func = self.api.get(name)
+        if func is None:
+            return self._error("DataServiceError", f"unknown function {name!r}")
+
+        with self._lock:
+            self.stats["calls"] += 1
+        try:
+            if is_read(name):
+                return {"ok": self._read(name, func, args, kwargs)}
+            with self._lock:
+                self.stats["writes"] += 1
+            # One writer, in arrival order
+            return {"ok": self._writer.submit(func, *args, **kwargs).result()}
+        except Exception as e:
+            return self._error(type(e).__name__, str(e))
+
+    def _read(self, name, func, args, kwargs):
+        key = (name, json.dumps(_pack([args, kwargs]), sort_keys=True, separators=(",", ":")))
+        # Reads relative to "today" change at midnight without any commit
+        version = (get_data_version(), date.today().isoformat())
+        with self._lock:
+            self.stats["reads"] += 1
+            if self._cache_version != version:
+                self._cache.clear()
+                self._cache_version = version
+            elif key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return self._cache[key]
+        result = func(*args, **kwargs)
+        with self._lock:
+            if self._cache_version == version:
+                self._cache[key] = result
+                if len(self._cache) > READ_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _error(self, kind, message) -> dict:
+        with self._lock:
+            self.stats["errors"] += 1
+        return {"error": f"{kind}: {message}"}
+
+
+# ---------- client ----------
+
+class DataServiceClient:
+    """Connection from a terminal to the data service (thread-safe; one request at a time)"""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 30.0, secret: Optional[str] = None):
+        self.address = address
+        self.timeout = timeout
+        self.secret = secret or None
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        family, where = parse_address(self.address)
+        if family == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        sock.connect(where)
+        return sock
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def batch(self, calls) -> List[Any]:
+        """
+        Send several calls in one round trip.
+
+        Args:
+            calls: Iterable of (function name, args, kwargs)
+
+        Returns:
+            Results in order; a failed call's slot holds a DataServiceError
+        """
+        request = {"calls": [{"fn": fn, "args": list(args or ()), "kwargs": dict(kwargs or {})}
+                             for fn, args, kwargs in calls]}
+        if self.secret:
+            request["secret"] = self.secret
+        frame = encode(request)
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    self._sock.sendall(frame)
+                    response = read_frame(self._sock)
+                    if response is None:
+                        raise ConnectionError("data service closed the connection")
+                    break
+                except OSError as e:
+                    if self._sock is not None:
+                        self._sock.close()
+                        self._sock = None
+                    # Reconnect once (the service may have restarted); a
+                    # timeout may mean the call ran, so it is not repeated
+                    if attempt == 2 or isinstance(e, socket.timeout):
+                        raise DataServiceError(f"Data service unreachable at {self.address}: {e}") from e
+        return [DataServiceError(r["error"]) if "error" in r else r.get("ok")
+                for r in response["results"]]
+
+    def call(self, fn: str, *args, **kwargs):
+        """Call one API function; raises DataServiceError if it failed."""
+        (result,) = self.batch([(fn, args, kwargs)])
+        if isinstance(result, DataServiceError):
+            raise result
+        return result
+
+    def function(self, fn: str):
+        """Return a local callable that forwards to ``fn`` in the service."""
+        def remote(*args, **kwargs):
+            return self.call(fn, *args, **kwargs)
+        remote.__name__ = fn.rsplit(".", 1)[-1]
+        remote.__qualname__ = f"remote:{fn}"
+        return remote
+
+
+def main(argv=None):
+    """Command line entry point: run the service in the foreground."""
+    import argparse
+    import time
+
+    import config
+
+    parser = argparse.ArgumentParser(description="Serve the shop database to other terminals")
+    cfg = (config.load_config().get("data_service") or {})
+    parser.add_argument("--address", default=cfg.get("address", DEFAULT_ADDRESS),
+                        help="unix:/path/to.sock or tcp:127.0.0.1:PORT")
+    parser.add_argument("--secret", default=cfg.get("secret"),
+                        help="shared secret terminals must send (required off loopback)")
+    options = parser.parse_args(argv)
+
+    from modules.backup_manager import auto_backup_check
+    from modules.migrations import migrate
+    from modules.db_checkpoint import start_wal_checkpointer, stop_wal_checkpointer
+    # Terminals in service mode leave migrations and backups to the service
+    migrate()
+    try:
+        if auto_backup_check():
+            log.info("Auto-backup completed successfully")
+    except Exception as e:
+        log.error(f"Auto-backup failed: {e}")
+    service = DataService(options.address, secret=options.secret)
+    print(f"Data service listening on {service.start()} (Ctrl+C to stop)")
+    # The service owns the database file, so it also checkpoints the WAL
+    start_wal_checkpointer()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        stop_wal_checkpointer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# modules/date_range.py
+"""
+Index-friendly date-range predicates for report queries.
+
+Dates are stored as ISO-8601 text ('YYYY-MM-DD' or 'YYYY-MM-DDTHH:MM:SS...'),
+which sorts lexically. A day range [start, end] can therefore be written as
+the half-open range ``start <= column < end + 1 day`` on the raw column,
+which SQLite can answer from an index. ``DATE(column) BETWEEN ? AND ?``
+cannot use an index because the column is wrapped in a function.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+
+def _parse_day(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d')
+
+
+def day_bounds(start_date, end_date=None) -> Tuple[str, Optional[str]]:
+    """
+    Convert an inclusive day range into half-open bounds.
+    
+    Args:
+        start_date: First day (YYYY-MM-DD string or datetime)
+        end_date: Last day, inclusive (None for an open-ended range)
+    
+    Returns:
+        Tuple (lower_bound, upper_bound_exclusive); the upper bound is None
+        when end_date is None
+    """
+    lower = _parse_day(start_date).strftime('%Y-%m-%d')
+    if end_date is None:
+        return lower, None
+    upper = (_parse_day(end_date) + timedelta(days=1)).strftime('%Y-%m-%d')
+    return lower, upper
+
+
+def range_clause(column: str, start_date, end_date=None) -> Tuple[str, tuple]:
+    """
+    Build a sargable WHERE fragment for a day range on a text date column.
+    
+    Args:
+        column: Column reference as it appears in the query (e.g. "s.sale_date")
+        start_date: First day
+        end_date: Last day, inclusive (None for "from start_date on")
+    
+    Returns:
+        Tuple (sql_fragment, params), e.g.
+        ("s.sale_date >= ? AND s.sale_date < ?", ('2024-01-01', '2024-02-01'))
+    """
+    lower, upper = day_bounds(start_date, end_date)
+    if upper is None:
+        return f"{column} >= ?", (lower,)
+    return f"{column} >= ? AND {column} < ?", (lower, upper)
+
+
+def days_back(days: int, today: datetime = None) -> str:
+    """Return the YYYY-MM-DD date ``days`` days before today."""
+    today = today or datetime.now()
+    return (today - timedelta(days=days)).strftime('%Y-%m-%d')
@@ -1,65 +1,523 @@
 # modules/db.py
+"""
+Database connection management.
+
+Connections are pooled per thread: ``get_conn()`` hands out an idle, already
+configured connection when one is available, and ``close()`` puts it back in
+the pool instead of closing it. Existing call sites (``conn = get_conn() ...
+conn.close()`` and ``with get_conn() as conn``) keep working unchanged.
+
+Every new connection gets the PRAGMAs of the configured storage profile
+(journal mode, synchronous, cache/mmap size, ...; see config.STORAGE_PROFILES).
+
+Reports use ``get_report_conn()`` instead: read-only connections from a
+separate pool, with one consistent snapshot per report and a time limit.
+"""
 from pathlib import Path
+import os
 import sqlite3
+import threading
+import time
+
+import config
+from modules.logger import log
+from modules.service_routing import served
 
 # DB file is at project root: E:\PHONE MANAGEMENT SYSTEM\shop.db
 DB_PATH = Path(__file__).resolve().parents[1] / "shop.db"
 
-def get_conn():
-    """Return a sqlite3.Connection to the project DB with UTF-8 support for Arabic text."""
-    conn = sqlite3.connect(str(DB_PATH))
+# Maximum number of idle connections kept per thread and database file
+POOL_MAX_IDLE = 4
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {
+    "opened": 0,     # new sqlite3 connections created
+    "reused": 0,     # checkouts served from the idle pool
+    "released": 0,   # connections handed back to the pool
+    "closed": 0,     # connections really closed (pool full, stale, close_all)
+    "discarded": 0,  # connections dropped without returning to the pool
+}
+# Bumped by close_all(); idle connections from an older generation are closed
+_generation = 0
+
+
+def _count(key: str, n: int = 1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def _file_identity(path: str):
+    """Return (device, inode) of the DB file, or None if it does not exist yet."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+def _idle_pool() -> dict:
+    pool = getattr(_local, "idle", None)
+    if pool is None:
+        pool = _local.idle = {}
+    return pool
+
+
+# ==================== Storage profile ====================
+
+# Order matters: busy_timeout first so switching journal mode waits for locks
+_PRAGMA_ORDER = ("busy_timeout", "journal_mode", "synchronous", "cache_size",
+                 "mmap_size", "temp_store", "wal_autocheckpoint")
+_KEYWORD_PRAGMAS = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA", "0", "1", "2", "3"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY", "0", "1", "2"},
+}
+
+_storage = None  # (profile name, settings, checkpoint interval), loaded lazily
+_pragma_warnings = set()
+
+# File systems where WAL's shared memory is not shared between machines
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afs", "9p",
+                       "fuse.sshfs", "davfs", "fuse.davfs2", "fuse.rclone"}
+
+
+def is_network_path(path) -> bool:
+    """True if ``path`` is on a network share (UNC/mapped drive, NFS, SMB, ...)."""
+    path = os.path.abspath(str(path))
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            DRIVE_REMOTE = 4
+            return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + "\\") == DRIVE_REMOTE
+        except Exception:
+            return False
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return False
+    best, fstype = "", ""
+    for mount_point, kind in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) > len(best):
+            best, fstype = mount_point, kind
+    return fstype in NETWORK_FILESYSTEMS
+
+
+def _check_network_share(storage):
+    """Fall back to the compatible profile when a WAL profile meets a network share."""
+    name, settings, interval = storage
+    if str(settings.get("journal_mode", "")).upper() != "WAL" or not is_network_path(DB_PATH):
+        return storage
+    log.warning(f"{DB_PATH} is on a network share; WAL is unsafe there, "
+                f"using the 'compatible' profile instead of '{name}'")
+    return "compatible", dict(config.STORAGE_PROFILES["compatible"]), interval
+
+
+def get_storage_profile():
+    """Return the active storage profile as (name, settings, checkpoint_interval)."""
+    global _storage
+    if _storage is None:
+        _storage = _check_network_share(config.get_storage_profile())
+    return _storage
+
+
+def reload_storage_profile(cfg=None):
+    """Re-read the storage profile and drop pooled connections so it takes effect."""
+    global _storage
+    _storage = _check_network_share(config.get_storage_profile(cfg))
+    close_all()
+    return _storage
+
+
+def _pragma_statement(name: str, value) -> str:
+    """Build a PRAGMA statement, refusing values that are not plain keywords/integers."""
+    if name in _KEYWORD_PRAGMAS:
+        value = str(value).upper()
+        if value not in _KEYWORD_PRAGMAS[name]:
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+    else:
+        value = int(value)
+    return f"PRAGMA {name} = {value}"
+
+
+def _apply_storage_profile(conn: sqlite3.Connection):
+    _, settings, _ = get_storage_profile()
+    for name in _PRAGMA_ORDER:
+        if name not in settings:
+            continue
+        try:
+            conn.execute(_pragma_statement(name, settings[name])).fetchall()
+        except (sqlite3.Error, ValueError) as e:
+            # e.g. WAL is refused on some network file systems; keep going
+            if name not in _pragma_warnings:
+                _pragma_warnings.add(name)
+                log.warning(f"Could not apply PRAGMA {name}={settings[name]}: {e}")
+
+
+def describe_storage() -> dict:
+    """
+    Report the storage settings actually in effect on a pooled connection.
+
+    Returns:
+        Dictionary with the profile name and the live value of each PRAGMA
+    """
+    name, _, interval = get_storage_profile()
+    report = {"profile": name, "wal_checkpoint_interval": interval}
+    conn = get_conn()
+    try:
+        for pragma in _PRAGMA_ORDER:
+            row = conn.execute(f"PRAGMA {pragma}").fetchone()
+            report[pragma] = row[0] if row else None
+    finally:
+        conn.close()
+    return report
+
+
+# ==================== Connection pool ====================
+
+def _configure(conn: sqlite3.Connection):
+    """Apply per-connection settings once, when the connection is opened."""
     # Ensure UTF-8 encoding for Arabic and international characters
     conn.text_factory = str
-    return conn
+    _apply_storage_profile(conn)
+
+
+def _reset(conn: sqlite3.Connection):
+    """Undo per-checkout changes so the next borrower gets a clean connection."""
+    if conn.in_transaction:
+        conn.rollback()
+    conn.set_progress_handler(None, 0)
+    conn.row_factory = None
+    conn.text_factory = str
+    conn.isolation_level = ""
+
+
+# Called with the raw connection just before a pooled connection commits a
+# transaction; a hook may return a callable to run once the commit succeeded.
+_commit_hooks = []
+
+
+def add_commit_hook(hook):
+    """Register ``hook(conn)`` to run before every commit of a pooled connection."""
+    if hook not in _commit_hooks:
+        _commit_hooks.append(hook)
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled sqlite3.Connection.
+
+    Behaves like the wrapped connection, except that ``close()`` returns the
+    connection to the pool of the thread that opened it. Uncommitted changes
+    are rolled back on close, exactly as with a plain connection.
+    """
+
+    __slots__ = ("_conn", "_path", "_identity", "_generation", "_owner")
+
+    def __init__(self, conn, path, identity, generation):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_identity", identity)
+        object.__setattr__(self, "_generation", generation)
+        object.__setattr__(self, "_owner", threading.get_ident())
+
+    def _raw(self) -> sqlite3.Connection:
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return conn
+
+    @property
+    def raw(self) -> sqlite3.Connection:
+        """The underlying sqlite3.Connection (e.g. for ``Connection.backup``)."""
+        return self._raw()
+
+    def __getattr__(self, name):
+        return getattr(self._raw(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw(), name, value)
 
-def init_db():
-    """Initialize the database with necessary tables."""
-    with get_conn() as conn:
-        c = conn.cursor()
-        
-        # Audit logs table (Phase 3)
-        c.execute('''CREATE TABLE IF NOT EXISTS audit_logs (
-                        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        user TEXT,
-                        action_type TEXT NOT NULL,
-                        entity_type TEXT NOT NULL,
-                        entity_id INTEGER,
-                        old_value TEXT,
-                        new_value TEXT,
-                        description TEXT
-                    )''')
-        
-        # Repair history table
-        c.execute('''CREATE TABLE IF NOT EXISTS repair_history (
-                        history_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        repair_id INTEGER,
-                        action_date TEXT,
-                        action_by TEXT,
-                        status_from TEXT,
-                        status_to TEXT,
-                        comment TEXT,
-                        FOREIGN KEY(repair_id) REFERENCES repair_orders(repair_id)
-                    )''')
-        
-        # Scan log table (for barcode scanning tracking)
-        c.execute('''CREATE TABLE IF NOT EXISTS scan_log (
-                        scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        scan_date TEXT NOT NULL,
-                        barcode TEXT NOT NULL,
-                        scan_type TEXT,
-                        user TEXT,
-                        module TEXT
-                    )''')
-        
-        # Check if barcode column exists in inventory, add if not
-        c.execute("PRAGMA table_info(inventory)")
-        columns = [col[1] for col in c.fetchall()]
-        if 'barcode' not in columns:
-            c.execute("ALTER TABLE inventory ADD COLUMN barcode TEXT")
-            c.execute("CREATE INDEX IF NOT EXISTS idx_inventory_barcode ON inventory(barcode)")
-        
+    def commit(self):
+        """Commit, running the commit hooks first when a write is pending."""
+        conn = self._raw()
+        after = [hook(conn) for hook in _commit_hooks] if conn.in_transaction else ()
         conn.commit()
+        for done in after:
+            if done is not None:
+                done()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Same semantics as sqlite3.Connection: commit or roll back, don't close
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def close(self):
+        """Return the connection to the pool."""
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            return
+        object.__setattr__(self, "_conn", None)
+        _release(conn, self._path, self._identity, self._generation, self._owner)
+
+    def __del__(self):
+        # Connections that are never closed (e.g. ``with get_conn() as conn``)
+        # go back to the pool once the proxy is garbage collected.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def _release(conn, path, identity, generation, owner):
+    if owner != threading.get_ident():
+        # sqlite3 connections are bound to their thread; let GC close it
+        _count("discarded")
+        return
+    try:
+        _reset(conn)
+    except sqlite3.Error:
+        conn.close()
+        _count("discarded")
+        return
+
+    idle = _idle_pool().setdefault(path, [])
+    if generation != _generation or len(idle) >= POOL_MAX_IDLE:
+        conn.close()
+        _count("closed")
+        return
+    idle.append((conn, identity, generation))
+    _count("released")
+
+
+def get_conn():
+    """
+    Return a connection to the project DB with UTF-8 support for Arabic text.
+
+    The connection comes from the calling thread's pool when possible. Call
+    ``close()`` (or let it go out of scope) to hand it back.
+    """
+    path = str(DB_PATH)
+    identity = _file_identity(path)
+    idle = _idle_pool().get(path)
+
+    while idle:
+        conn, conn_identity, generation = idle.pop()
+        # Skip connections to a file that was deleted/replaced since they were opened
+        if identity is not None and conn_identity == identity and generation == _generation:
+            _count("reused")
+            return PooledConnection(conn, path, identity, generation)
+        conn.close()
+        _count("closed")
+
+    conn = sqlite3.connect(path)
+    _configure(conn)
+    _count("opened")
+    if identity is None:
+        identity = _file_identity(path)
+    return PooledConnection(conn, path, identity, _generation)
+
+
+def close_all():
+    """
+    Close every pooled connection.
+
+    Idle connections of the calling thread are closed immediately; those of
+    other threads are closed the next time that thread asks for a connection.
+    Use after replacing the database file (e.g. restoring a backup).
+    """
+    global _generation, _watcher
+    with _stats_lock:
+        _generation += 1
+    pool = _idle_pool()
+    for idle in pool.values():
+        while idle:
+            conn, _, _ = idle.pop()
+            conn.close()
+            _count("closed")
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher[4].close()
+            _watcher = None
+
+
+# ==================== Change detection ====================
+
+# PRAGMA data_version only changes for commits made by *other* connections, so
+# it is read on a dedicated connection that never writes.
+_watcher_lock = threading.Lock()
+_watcher = None  # (path, identity, generation, epoch, connection)
+_watcher_epoch = 0
+
+
+@served(read=True)
+def get_data_version():
+    """
+    Return a token that changes whenever any connection commits to the DB.
+
+    Cheap enough to call on every refresh (one PRAGMA on an idle connection).
+    The token is (epoch, data_version): compare it for equality. The epoch
+    changes when the database file is switched or replaced (e.g. restored).
+    """
+    with _watcher_lock:
+        epoch, conn = _watcher_conn()
+        return (epoch, conn.execute("PRAGMA data_version").fetchone()[0])
+
+
+def read_committed(sql, params=()):
+    """
+    Run a read outside every transaction of the calling thread.
+
+    Uses the watcher connection, so only committed data is seen. Never waits
+    for a lock: raises sqlite3.OperationalError if the database is busy.
+
+    Returns:
+        (epoch, rows); the epoch is the one get_data_version reports
+    """
+    with _watcher_lock:
+        epoch, conn = _watcher_conn()
+        conn.execute("PRAGMA busy_timeout = 0")
+        try:
+            return epoch, conn.execute(sql, params).fetchall()
+        finally:
+            conn.execute("PRAGMA busy_timeout = 5000")
+
+
+def _watcher_conn():
+    """(epoch, connection) of the watcher, reopened if the DB was switched. Hold _watcher_lock."""
+    global _watcher, _watcher_epoch
+    path = str(DB_PATH)
+    identity = _file_identity(path)
+    if _watcher is not None:
+        w_path, w_identity, w_generation, _, w_conn = _watcher
+        if w_path != path or w_identity != identity or w_generation != _generation:
+            w_conn.close()
+            _watcher = None
+    if _watcher is None:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        _watcher_epoch += 1
+        _watcher = (path, identity or _file_identity(path), _generation, _watcher_epoch, conn)
+    _, _, _, epoch, conn = _watcher
+    return epoch, conn
+
+
+def get_pool_stats() -> dict:
+    """
+    Return connection pool counters.
+
+    Keys: opened, reused, released, closed, discarded, plus ``idle`` (idle
+    connections held by the calling thread) and ``reuse_ratio``.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["idle"] = sum(len(idle) for idle in _idle_pool().values())
+    checkouts = stats["opened"] + stats["reused"]
+    stats["reuse_ratio"] = round(stats["reused"] / checkouts, 3) if checkouts else 0.0
+    return stats
+
+
+# ==================== Read-only report connections ====================
+
+# Seconds a report may run before it is interrupted (database.report_timeout)
+DEFAULT_REPORT_TIMEOUT = 60
+# SQLite VM instructions between two watchdog checks
+_WATCHDOG_STEPS = 10000
+# PRAGMAs of the storage profile that make sense on a read-only connection
+_READER_PRAGMAS = ("busy_timeout", "cache_size", "mmap_size", "temp_store")
+
+_report_stats = {"reports": 0, "timeouts": 0}
+
+
+def get_report_timeout() -> float:
+    """Seconds a report may run (from configuration)."""
+    db_cfg = config.load_config().get("database", {}) or {}
+    return float(db_cfg.get("report_timeout", DEFAULT_REPORT_TIMEOUT))
+
+
+def _open_reader(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    conn.text_factory = str
+    _, settings, _ = get_storage_profile()
+    for name in _READER_PRAGMAS:
+        if name in settings:
+            try:
+                conn.execute(_pragma_statement(name, settings[name])).fetchall()
+            except (sqlite3.Error, ValueError):
+                pass
+    # Belt and braces on top of mode=ro: refuse any write statement
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def get_report_conn(path=None, timeout=None):
+    """
+    Return a read-only connection for a report (close it when done).
+
+    The connection is opened with ``mode=ro`` and ``query_only``, so it can
+    never take the write lock the checkout needs. In WAL mode it starts in a
+    read transaction: every query of the report sees the same snapshot,
+    even if sales are committed meanwhile, and they are not blocked. With a
+    rollback journal a read transaction would block every commit until the
+    report closes, so there each query reads on its own. A watchdog
+    interrupts the report once it has run for ``timeout`` seconds; its next
+    query then raises sqlite3.OperationalError ("interrupted").
+
+    Args:
+        path: Database file (default: DB_PATH)
+        timeout: Seconds before the report is interrupted (default: configured)
+    """
+    path = str(path or DB_PATH)
+    key = "report:" + path
+    identity = _file_identity(path)
+    idle = _idle_pool().get(key)
+
+    conn = None
+    while idle:
+        candidate, conn_identity, generation = idle.pop()
+        if identity is not None and conn_identity == identity and generation == _generation:
+            conn = candidate
+            _count("reused")
+            break
+        candidate.close()
+        _count("closed")
+    if conn is None:
+        conn = _open_reader(path)
+        _count("opened")
+
+    limit = get_report_timeout() if timeout is None else timeout
+    deadline = time.monotonic() + limit
+
+    def watchdog():
+        if time.monotonic() > deadline:
+            with _stats_lock:
+                _report_stats["timeouts"] += 1
+            log.warning(f"Report interrupted after {limit:g}s")
+            return 1
+        return 0
+
+    conn.set_progress_handler(watchdog, _WATCHDOG_STEPS)
+    if str(conn.execute("PRAGMA journal_mode").fetchone()[0]).lower() == "wal":
+        # Pin the snapshot: the read transaction starts with the first read
+        conn.execute("BEGIN")
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+    with _stats_lock:
+        _report_stats["reports"] += 1
+    return PooledConnection(conn, key, identity, _generation)
+
+
+def get_report_stats() -> dict:
+    """Return report counters: reports (connections handed out) and timeouts."""
+    with _stats_lock:
+        return dict(_report_stats)
 
-# Call init_db() when the module is imported to ensure tables exist
-init_db()
@@ -0,0 +1,124 @@
+# modules/db_checkpoint.py
+"""
+Background WAL checkpointing.
+
+In WAL mode committed pages accumulate in shop.db-wal until a checkpoint
+copies them back into the database file. SQLite normally does this inside
+whichever commit crosses ``wal_autocheckpoint``, i.e. on the till. This
+scheduler runs passive checkpoints on its own thread instead, and truncates
+the WAL file when it has grown large.
+"""
+
+import threading
+import time
+
+from modules.db import get_conn, get_storage_profile
+from modules.logger import log
+
+# Truncate the WAL file once a checkpoint leaves it larger than this many frames
+TRUNCATE_ABOVE_FRAMES = 10000
+
+
+class WalCheckpointer:
+    """Periodically checkpoint the WAL from a background thread"""
+
+    def __init__(self, interval=60, truncate_above_frames=TRUNCATE_ABOVE_FRAMES):
+        self.interval = interval
+        self.truncate_above_frames = truncate_above_frames
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+        self.stats = {
+            "runs": 0,
+            "busy": 0,            # checkpoints that could not finish (readers active)
+            "frames_checkpointed": 0,
+            "truncations": 0,
+            "last_duration_ms": 0.0,
+        }
+
+    def start(self):
+        """Start the checkpoint thread"""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, name="wal-checkpointer", daemon=True)
+        self.thread.start()
+        log.info(f"WAL checkpointer started (every {self.interval}s)")
+
+    def stop(self, final_checkpoint=True):
+        """Stop the thread and optionally leave the WAL empty for the next start"""
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if final_checkpoint:
+            self.checkpoint("TRUNCATE")
+        log.info("WAL checkpointer stopped")
+
+    def checkpoint(self, mode="PASSIVE"):
+        """
+        Run one checkpoint.
+
+        Args:
+            mode: PASSIVE, FULL, RESTART or TRUNCATE
+
+        Returns:
+            Tuple (busy, wal_frames, checkpointed_frames) or None on error
+        """
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        started = time.perf_counter()
+        conn = get_conn()
+        try:
+            busy, frames, done = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            if (mode == "PASSIVE" and not busy and frames >= self.truncate_above_frames
+                    and done == frames):
+                # Everything is copied back; reset the file so it stops growing
+                busy, frames, done = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+                self.stats["truncations"] += 1
+        except Exception as e:
+            log.error(f"WAL checkpoint failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+        self.stats["runs"] += 1
+        self.stats["busy"] += 1 if busy else 0
+        self.stats["frames_checkpointed"] += max(done, 0)
+        self.stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return busy, frames, done
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            self.checkpoint()
+
+
+# Global checkpointer instance
+wal_checkpointer = None
+
+def start_wal_checkpointer(interval=None):
+    """Start the global checkpointer if the database runs in WAL mode"""
+    global wal_checkpointer
+    if wal_checkpointer is not None:
+        return wal_checkpointer
+
+    _, settings, configured_interval = get_storage_profile()
+    if interval is None:
+        interval = configured_interval
+    if str(settings.get("journal_mode", "")).upper() != "WAL" or not interval:
+        log.info("WAL checkpointer not started (WAL disabled or interval is 0)")
+        return None
+
+    wal_checkpointer = WalCheckpointer(interval)
+    wal_checkpointer.start()
+    return wal_checkpointer
+
+def stop_wal_checkpointer():
+    """Stop the global checkpointer"""
+    global wal_checkpointer
+    if wal_checkpointer:
+        wal_checkpointer.stop()
+        wal_checkpointer = None
@@ -1,76 +1,126 @@
 # modules/db_monitor.py
 """
 Database change monitor for real-time synchronization across multiple app instances.
-Monitors database file for changes and triggers UI updates.
+
+Commits are detected with ``PRAGMA data_version`` (one cheap query per check,
+see db.get_data_version). When something was committed, only the change
+journal rows added since the last check are read (see modules.change_log)
+and one typed event per changed table is published, carrying the changed
+ids. Commits that touch no journaled table (e.g. an audit log row) publish
+nothing. Journal rows written by this terminal's own commits are skipped
+(see change_log.own_ranges): the views that made those changes have already
+published their events.
 """
 
-import os
 import time
 import threading
 from pathlib import Path
+
+from modules import change_log
+from modules.db import get_data_version
 from modules.event_manager import event_manager
+from modules.logger import log
+
+# Journaled table -> event published when it changes
+TABLE_EVENTS = {
+    "inventory": "inventory_changed",
+    "product_barcodes": "inventory_changed",
+    "sales": "sale_completed",
+    "repair_orders": "repair_updated",
+    "customers": "customer_updated",
+}
+
+# How often (seconds) old journal rows are pruned
+PRUNE_INTERVAL = 3600
+
 
 class DatabaseMonitor:
-    """Monitor database file for changes and notify all views"""
-    
+    """Monitor the database for commits and notify all views of what changed"""
+
     def __init__(self, db_path, check_interval=2):
         self.db_path = Path(db_path)
         self.check_interval = check_interval
-        self.last_modified = None
+        self.last_version = None
+        self.last_seq = 0
+        self.last_prune = 0.0
         self.monitoring = False
         self.monitor_thread = None
-        
+        self._stop = threading.Event()
+        self.stats = {"checks": 0, "commits_seen": 0, "changes": 0, "events": 0, "full_refreshes": 0}
+
     def start(self):
         """Start monitoring database for changes"""
         if self.monitoring:
             return
-        
+
         self.monitoring = True
-        self.last_modified = self.get_db_modified_time()
+        self._stop.clear()
+        # Start from "now": changes made before startup are already on screen
+        self.last_version = get_data_version()
+        self.last_seq = change_log.get_last_seq()
+        self.last_prune = time.monotonic()
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         print("✅ Database monitor started")
-    
+
     def stop(self):
         """Stop monitoring"""
         self.monitoring = False
+        self._stop.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
         print("⏹️ Database monitor stopped")
-    
-    def get_db_modified_time(self):
-        """Get database file last modified time"""
-        try:
-            return os.path.getmtime(self.db_path)
-        except:
-            return None
-    
+
     def _monitor_loop(self):
         """Background monitoring loop"""
         while self.monitoring:
             try:
-                current_modified = self.get_db_modified_time()
-                
-                if current_modified and self.last_modified:
-                    if current_modified > self.last_modified:
-                        # Database changed! Notify all views
-                        print(f"🔄 Database changed detected at {time.strftime('%H:%M:%S')}")
-                        self._notify_changes()
-                        self.last_modified = current_modified
-                
-                time.sleep(self.check_interval)
-                
+                self.check()
+                if time.monotonic() - self.last_prune >= PRUNE_INTERVAL:
+                    self.last_prune = time.monotonic()
+                    change_log.prune()
             except Exception as e:
                 print(f"Error in database monitor: {e}")
-                time.sleep(self.check_interval)
-    
-    def _notify_changes(self):
-        """Notify all views about database changes"""
-        # Trigger refresh events for all data types
-        event_manager.notify('database_changed', {'source': 'external'})
-        event_manager.notify('inventory_changed', {'source': 'external'})
-        event_manager.notify('sale_completed', {'source': 'external'})
-        event_manager.notify('customer_updated', {'source': 'external'})
+            self._stop.wait(self.check_interval)
+
+    def check(self):
+        """
+        Look for new commits once and publish events for what changed.
+
+        Returns:
+            Dictionary of event type -> ids published (ids None = full refresh)
+        """
+        self.stats["checks"] += 1
+        version = get_data_version()
+        if version == self.last_version:
+            return {}
+        self.last_version = version
+        self.stats["commits_seen"] += 1
+
+        own = change_log.own_ranges(version[0], self.last_seq)
+        changes, self.last_seq, complete = change_log.read_since(self.last_seq, skip=own)
+        if not complete:
+            # Fell behind the pruned journal: refresh everything
+            self.stats["full_refreshes"] += 1
+            log.info("Change journal incomplete; requesting full refresh")
+            published = {event: None for event in set(TABLE_EVENTS.values())}
+        else:
+            published = {}
+            for table, ids in changes.items():
+                event = TABLE_EVENTS.get(table)
+                if event is None:
+                    continue
+                self.stats["changes"] += len(ids)
+                published.setdefault(event, set()).update(ids)
+
+        for event, ids in published.items():
+            self._notify_changes(event, ids)
+        return published
+
+    def _notify_changes(self, event, ids):
+        """Publish one change event (delivered on the UI main loop by the event manager)"""
+        self.stats["events"] += 1
+        event_manager.notify(event, {'source': 'monitor'}, ids=ids)
 
 
 # Global monitor instance
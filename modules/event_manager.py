@@ -2,13 +2,60 @@
 """
 Central event manager for real-time synchronization across all views.
 When data changes in one view, all other views are automatically notified and refreshed.
+
+Once attached to the Tk root (``event_manager.attach(app)``), events are
+delivered on the Tk main loop:
+
+- repeated events of the same type published before the next idle tick are
+  coalesced into one delivery whose data lists every payload and the union
+  of the entity ids they carried (``ids``; None means "anything may have
+  changed", so subscribers should do a full refresh);
+- ``notify`` may be called from any thread; publishes from background
+  threads are queued and picked up by the main loop, never run on the
+  calling thread;
+- an event published (directly or indirectly) by a subscriber of the same
+  event type is dropped and logged instead of starting a refresh loop.
+
+Without ``attach`` (tests, scripts) events are delivered synchronously, as
+before, with the same loop protection. Per-subscriber dispatch timings are
+available from ``get_stats()``.
 """
 
+import threading
+import time
+
+from modules.logger import log
+
+# How often (ms) the main loop checks for events published by other threads
+THREAD_POLL_MS = 100
+
+# Longest chain of events causing events before the chain is cut
+MAX_CHAIN = 8
+
+
+def _callback_name(callback) -> str:
+    name = getattr(callback, "__qualname__", None) or repr(callback)
+    code = getattr(callback, "__code__", None)
+    if code is not None and name.endswith("<lambda>"):
+        name = f"{name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+    return name
+
+
+def _entity_ids(data, ids):
+    """Entity ids carried by one publish, or None if unknown."""
+    found = set(ids) if ids else set()
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if value is not None and (key == "id" or key.endswith("_id")):
+                found.add(value)
+    return found or None
+
+
 class EventManager:
     """Singleton event manager for application-wide notifications"""
-    
+
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(EventManager, cls).__new__(cls)
@@ -18,32 +65,192 @@ class EventManager:
                 'repair_updated': [],
                 'customer_updated': [],
             }
+            cls._instance._init_dispatch()
         return cls._instance
-    
+
+    def _init_dispatch(self):
+        self._lock = threading.RLock()
+        self._widget = None
+        self._main_thread = threading.get_ident()
+        self._pending = {}        # event_type -> {'payloads': [...], 'ids': set or None, 'chain': tuple}
+        self._idle_job = None
+        self._poll_job = None
+        self._local = threading.local()  # .chain: event types being dispatched on this thread
+        self._stats = {"published": 0, "delivered": 0, "coalesced": 0, "dropped_loops": 0}
+        self._timings = {}        # subscriber name -> {'calls', 'total_ms', 'max_ms'}
+
+    # ---------- main loop integration ----------
+    def attach(self, widget):
+        """
+        Deliver events on the Tk main loop of ``widget`` (call once from the main thread).
+        """
+        with self._lock:
+            self._widget = widget
+            self._main_thread = threading.get_ident()
+        self._schedule_poll()
+
+    def detach(self):
+        """Stop main-loop delivery (e.g. when the main window closes); pending events are dropped."""
+        with self._lock:
+            widget, self._widget = self._widget, None
+            jobs = (self._idle_job, self._poll_job)
+            self._idle_job = self._poll_job = None
+            self._pending.clear()
+        for job in jobs:
+            if widget is not None and job is not None:
+                try:
+                    widget.after_cancel(job)
+                except Exception:
+                    pass
+
+    def _schedule_poll(self):
+        widget = self._widget
+        if widget is None:
+            return
+        try:
+            self._poll_job = widget.after(THREAD_POLL_MS, self._poll)
+        except Exception:
+            self._poll_job = None
+
+    def _poll(self):
+        # Main loop: deliver anything queued by background threads
+        self._poll_job = None
+        if self._pending and self._idle_job is None:
+            self.flush()
+        self._schedule_poll()
+
+    def _on_idle(self):
+        self._idle_job = None
+        self.flush()
+
+    # ---------- subscriptions ----------
     def subscribe(self, event_type, callback):
         """Subscribe a callback to an event type"""
-        if event_type in self.listeners:
-            if callback not in self.listeners[event_type]:
-                self.listeners[event_type].append(callback)
-    
+        with self._lock:
+            if event_type in self.listeners:
+                if callback not in self.listeners[event_type]:
+                    self.listeners[event_type].append(callback)
+
     def unsubscribe(self, event_type, callback):
         """Unsubscribe a callback from an event type"""
-        if event_type in self.listeners and callback in self.listeners[event_type]:
-            self.listeners[event_type].remove(callback)
-    
-    def notify(self, event_type, data=None):
-        """Notify all subscribers of an event"""
-        if event_type in self.listeners:
-            for callback in self.listeners[event_type]:
+        with self._lock:
+            if event_type in self.listeners and callback in self.listeners[event_type]:
+                self.listeners[event_type].remove(callback)
+
+    # ---------- publishing ----------
+    def notify(self, event_type, data=None, ids=None):
+        """
+        Notify all subscribers of an event.
+
+        Args:
+            event_type: Event name (e.g. 'inventory_changed')
+            data: Optional payload dict; keys named 'id' or '*_id' count as entity ids
+            ids: Optional iterable of ids of the changed entities
+        """
+        with self._lock:
+            self._stats["published"] += 1
+            if event_type not in self.listeners:
+                return
+            chain = self._current_chain()
+            if event_type in chain or len(chain) >= MAX_CHAIN:
+                self._stats["dropped_loops"] += 1
+                log.warning(f"Event loop detected: {' -> '.join(chain + (event_type,))}; dropped")
+                return
+
+            batch = self._pending.get(event_type)
+            entity_ids = _entity_ids(data, ids)
+            if batch is None:
+                self._pending[event_type] = {'payloads': [data], 'ids': entity_ids, 'chain': chain}
+            else:
+                self._stats["coalesced"] += 1
+                batch['payloads'].append(data)
+                if batch['ids'] is None or entity_ids is None:
+                    batch['ids'] = None
+                else:
+                    batch['ids'] |= entity_ids
+
+            widget = self._widget
+            on_main = threading.get_ident() == self._main_thread
+            if widget is not None and on_main and self._idle_job is None:
+                try:
+                    self._idle_job = widget.after_idle(self._on_idle)
+                except Exception:
+                    self._idle_job = None
+
+        if widget is None:
+            # Not attached to a main loop: deliver right away
+            self.flush()
+        # Otherwise the idle callback (or, from other threads, the poll) delivers it
+
+    def flush(self):
+        """Deliver all pending events now, on the calling thread."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                event_type, batch = next(iter(self._pending.items()))
+                del self._pending[event_type]
+                callbacks = list(self.listeners.get(event_type, ()))
+            self._dispatch(event_type, batch, callbacks)
+
+    def _dispatch(self, event_type, batch, callbacks):
+        payloads = batch['payloads']
+        data = dict(payloads[-1]) if isinstance(payloads[-1], dict) else {}
+        data['ids'] = frozenset(batch['ids']) if batch['ids'] is not None else None
+        data['events'] = payloads
+        data['coalesced'] = len(payloads)
+
+        previous = self._current_chain()
+        self._local.chain = batch['chain'] + (event_type,)
+        try:
+            for callback in callbacks:
+                started = time.perf_counter()
                 try:
                     callback(data)
                 except Exception as e:
                     print(f"Error in event callback for {event_type}: {e}")
-    
+                finally:
+                    self._record(callback, (time.perf_counter() - started) * 1000)
+            with self._lock:
+                self._stats["delivered"] += 1
+        finally:
+            self._local.chain = previous
+
+    def _current_chain(self):
+        return getattr(self._local, "chain", ())
+
+    def _record(self, callback, elapsed_ms):
+        name = _callback_name(callback)
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            timing['calls'] += 1
+            timing['total_ms'] += elapsed_ms
+            timing['max_ms'] = max(timing['max_ms'], elapsed_ms)
+
+    def get_stats(self):
+        """
+        Return dispatch counters and per-subscriber timings.
+
+        Returns:
+            Dictionary with published, delivered, coalesced, dropped_loops and
+            'subscribers' (name -> calls, total_ms, max_ms), slowest first
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            timings = sorted(self._timings.items(), key=lambda kv: kv[1]['total_ms'], reverse=True)
+            stats['subscribers'] = {name: {k: round(v, 2) if isinstance(v, float) else v
+                                           for k, v in timing.items()}
+                                    for name, timing in timings}
+        return stats
+
     def clear_all(self):
         """Clear all listeners (useful for testing)"""
-        for event_type in self.listeners:
-            self.listeners[event_type] = []
+        with self._lock:
+            for event_type in self.listeners:
+                self.listeners[event_type] = []
+            self._pending.clear()
 
 
 # Global instance
@@ -9,7 +9,10 @@ and comprehensive financial dashboards.
 
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
-from modules.db import get_conn
+from modules.db import get_report_conn
+from modules.date_range import range_clause, days_back
+from modules import daily_summary
+from modules.service_routing import served
 
 
 def get_profit_loss_report(start_date: str, end_date: str) -> Dict:
@@ -23,8 +26,7 @@ def get_profit_loss_report(start_date: str, end_date: str) -> Dict:
     Returns:
         Dictionary with revenue, costs, profit breakdown
     """
-    conn = get_conn()
-    c = conn.cursor()
+    conn = get_report_conn()
     
     report = {
         'period': {'start': start_date, 'end': end_date},
@@ -33,41 +35,20 @@ def get_profit_loss_report(start_date: str, end_date: str) -> Dict:
         'summary': {}
     }
     
-    # Sales Revenue and Profit
-    c.execute("""
-        SELECT 
-            COUNT(*) as transaction_count,
-            SUM(total_amount) as total_revenue,
-            SUM(si.quantity * (si.unit_price - si.cost_price)) as total_profit
-        FROM sales s
-        LEFT JOIN sale_items si ON s.sale_id = si.sale_id
-        WHERE DATE(s.sale_date) BETWEEN ? AND ?
-    """, (start_date, end_date))
-    
-    sales_data = c.fetchone()
+    # Sales Revenue and Profit (one summary row per day)
+    sales = daily_summary.get_sales_totals(start_date, end_date, conn)
     report['sales'] = {
-        'transaction_count': sales_data[0] or 0,
-        'revenue': float(sales_data[1] or 0.0),
-        'profit': float(sales_data[2] or 0.0)
+        'transaction_count': sales['transaction_count'],
+        'revenue': sales['revenue'],
+        'profit': sales['profit']
     }
     
-    # Repair Revenue and Profit
-    c.execute("""
-        SELECT 
-            COUNT(*) as repair_count,
-            SUM(total_estimate) as total_revenue,
-            SUM(rp.qty * (rp.unit_price - rp.cost_price)) as total_profit
-        FROM repair_orders ro
-        LEFT JOIN repair_parts rp ON ro.repair_id = rp.repair_id
-        WHERE DATE(ro.received_date) BETWEEN ? AND ?
-        AND ro.status IN ('Completed', 'Delivered')
-    """, (start_date, end_date))
-    
-    repair_data = c.fetchone()
+    # Repair Revenue and Profit (completed/delivered orders)
+    repairs = daily_summary.get_repair_totals(start_date, end_date, conn)
     report['repairs'] = {
-        'order_count': repair_data[0] or 0,
-        'revenue': float(repair_data[1] or 0.0),
-        'profit': float(repair_data[2] or 0.0)
+        'order_count': repairs['completed_count'],
+        'revenue': repairs['completed_revenue'],
+        'profit': repairs['completed_profit']
     }
     
     # Summary
@@ -122,6 +103,58 @@ def get_monthly_profit_loss(year: int = None, month: int = None) -> Dict:
     return get_profit_loss_report(start_date, last_day)
 
 
+@served(read=True)
+def get_sales_report(start_date: str, end_date: str, detail: str = "sales") -> Dict:
+    """
+    Sales totals and detail rows for the Reports tab and printed reports.
+    
+    Everything is read on one report connection, so the totals and the rows
+    come from the same snapshot.
+    
+    Args:
+        start_date: First day (YYYY-MM-DD)
+        end_date: Last day, inclusive
+        detail: "sales" (one row per sale), "days" or "weeks"
+    
+    Returns:
+        Dictionary with 'totals' (transaction_count, revenue, discount,
+        profit) and 'rows':
+        sales: (sale_id, time, customer, items, subtotal, discount, total, profit), newest first
+        days: (day, transaction_count, revenue, discount, profit), oldest first
+        weeks: (week number, first day, last day, transaction_count, revenue, profit)
+    """
+    if detail not in ("sales", "days", "weeks"):
+        raise ValueError(f"Unknown report detail: {detail!r}")
+    conn = get_report_conn()
+    try:
+        totals = daily_summary.get_sales_totals(start_date, end_date, conn)
+        if detail == "days":
+            rows = daily_summary.get_daily_sales(start_date, end_date, conn)
+        elif detail == "weeks":
+            rows = conn.execute("""
+                SELECT strftime('%W', day), MIN(day), MAX(day),
+                       SUM(transaction_count), SUM(revenue), SUM(profit)
+                FROM daily_sales_summary
+                WHERE day BETWEEN ? AND ?
+                GROUP BY strftime('%W', day)
+                ORDER BY MIN(day)
+            """, (start_date, end_date)).fetchall()
+        else:
+            where, params = range_clause("s.sale_date", start_date, end_date)
+            rows = conn.execute(f"""
+                SELECT s.sale_id, s.sale_time, s.customer_name, COUNT(si.id),
+                       s.subtotal, s.discount_amount, s.total_amount, SUM(si.profit)
+                FROM sales s
+                LEFT JOIN sale_items si ON s.sale_id = si.sale_id
+                WHERE {where}
+                GROUP BY s.sale_id
+                ORDER BY s.sale_date DESC, s.sale_time DESC
+            """, params).fetchall()
+    finally:
+        conn.close()
+    return {'totals': totals, 'rows': rows}
+
+
 def get_sales_trends(days: int = 30) -> List[Dict]:
     """
     Get sales trends for the last N days.
@@ -132,35 +165,19 @@ def get_sales_trends(days: int = 30) -> List[Dict]:
     Returns:
         List of daily sales data
     """
-    conn = get_conn()
-    c = conn.cursor()
-    
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    c.execute("""
-        SELECT 
-            DATE(sale_date) as date,
-            COUNT(*) as transaction_count,
-            SUM(total_amount) as revenue,
-            SUM(si.quantity * (si.unit_price - si.cost_price)) as profit
-        FROM sales s
-        LEFT JOIN sale_items si ON s.sale_id = si.sale_id
-        WHERE DATE(sale_date) >= ?
-        GROUP BY DATE(sale_date)
-        ORDER BY date
-    """, (start_date.strftime('%Y-%m-%d'),))
+    conn = get_report_conn()
+    rows = daily_summary.get_daily_sales(days_back(days), conn=conn)
+    conn.close()
     
     trends = []
-    for row in c.fetchall():
+    for day, count, revenue, _discount, profit in rows:
         trends.append({
-            'date': row[0],
-            'transactions': row[1],
-            'revenue': float(row[2] or 0.0),
-            'profit': float(row[3] or 0.0)
+            'date': day,
+            'transactions': count,
+            'revenue': float(revenue or 0.0),
+            'profit': float(profit or 0.0)
         })
     
-    conn.close()
     return trends
 
 
@@ -175,26 +192,34 @@ def get_top_selling_products(limit: int = 10, days: int = 30) -> List[Dict]:
     Returns:
         List of top products with sales data
     """
-    conn = get_conn()
+    conn = get_report_conn()
     c = conn.cursor()
     
-    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    where, params = range_clause("s.sale_date", days_back(days))
     
-    c.execute("""
+    # Aggregate the period's line items per item first, then look up names
+    c.execute(f"""
         SELECT 
             i.name,
             i.sku,
-            SUM(si.quantity) as units_sold,
-            SUM(si.quantity * si.unit_price) as revenue,
-            SUM(si.quantity * (si.unit_price - si.cost_price)) as profit
-        FROM sale_items si
-        JOIN inventory i ON si.item_id = i.item_id
-        JOIN sales s ON si.sale_id = s.sale_id
-        WHERE DATE(s.sale_date) >= ?
-        GROUP BY si.item_id
-        ORDER BY revenue DESC
+            t.units_sold,
+            t.revenue,
+            t.profit
+        FROM (
+            SELECT 
+                si.item_id,
+                SUM(si.quantity) as units_sold,
+                SUM(si.quantity * si.unit_price) as revenue,
+                SUM(si.quantity * (si.unit_price - si.cost_price)) as profit
+            FROM sales s
+            JOIN sale_items si ON si.sale_id = s.sale_id
+            WHERE {where}
+            GROUP BY si.item_id
+        ) t
+        JOIN inventory i ON i.item_id = t.item_id
+        ORDER BY t.revenue DESC
         LIMIT ?
-    """, (start_date, limit))
+    """, params + (limit,))
     
     products = []
     for row in c.fetchall():
@@ -221,22 +246,24 @@ def get_top_customers(limit: int = 10, days: int = 30) -> List[Dict]:
     Returns:
         List of top customers with spending data
     """
-    conn = get_conn()
+    conn = get_report_conn()
     c = conn.cursor()
     
-    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    where, params = range_clause("sale_date", days_back(days))
     
-    c.execute("""
+    # The unary + keeps the planner on idx_sales_date for the range instead of
+    # walking all of idx_sales_customer to avoid a sort for the GROUP BY
+    c.execute(f"""
         SELECT 
             customer_name,
             COUNT(*) as transaction_count,
             SUM(total_amount) as total_spent
         FROM sales
-        WHERE DATE(sale_date) >= ?
-        GROUP BY customer_name
+        WHERE {where}
+        GROUP BY +customer_name
         ORDER BY total_spent DESC
         LIMIT ?
-    """, (start_date, limit))
+    """, params + (limit,))
     
     customers = []
     for row in c.fetchall():
@@ -257,7 +284,7 @@ def get_inventory_valuation() -> Dict:
     Returns:
         Dictionary with cost value, retail value, and potential profit
     """
-    conn = get_conn()
+    conn = get_report_conn()
     c = conn.cursor()
     
     c.execute("""
@@ -296,7 +323,7 @@ def get_low_stock_items(threshold: int = 5) -> List[Dict]:
     Returns:
         List of low stock items
     """
-    conn = get_conn()
+    conn = get_report_conn()
     c = conn.cursor()
     
     c.execute("""
@@ -337,46 +364,46 @@ def get_repair_analytics(days: int = 30) -> Dict:
     Returns:
         Dictionary with repair statistics
     """
-    conn = get_conn()
+    conn = get_report_conn()
     c = conn.cursor()
     
-    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    where, params = range_clause("received_date", days_back(days))
     
     # Overall stats
-    c.execute("""
+    c.execute(f"""
         SELECT 
             COUNT(*) as total_repairs,
             AVG(total_estimate) as avg_value,
             SUM(total_estimate) as total_revenue
         FROM repair_orders
-        WHERE DATE(received_date) >= ?
-    """, (start_date,))
+        WHERE {where}
+    """, params)
     
     overall = c.fetchone()
     
     # By status
-    c.execute("""
+    c.execute(f"""
         SELECT 
             status,
             COUNT(*) as count
         FROM repair_orders
-        WHERE DATE(received_date) >= ?
+        WHERE {where}
         GROUP BY status
-    """, (start_date,))
+    """, params)
     
     by_status = {row[0]: row[1] for row in c.fetchall()}
     
     # Most common device models
-    c.execute("""
+    c.execute(f"""
         SELECT 
             device_model,
             COUNT(*) as count
         FROM repair_orders
-        WHERE DATE(received_date) >= ?
+        WHERE {where}
         GROUP BY device_model
         ORDER BY count DESC
         LIMIT 5
-    """, (start_date,))
+    """, params)
     
     top_devices = [{'model': row[0], 'count': row[1]} for row in c.fetchall()]
     
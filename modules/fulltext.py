@@ -0,0 +1,250 @@
+# modules/fulltext.py
+"""
+Full-text search over inventory, customers and repair orders (SQLite FTS5).
+
+Each searchable table has an FTS5 shadow table whose rowid is the base
+table's primary key. Triggers on the base tables keep them in sync, so every
+write path (models, imports, manual edits in a DB browser) stays searchable
+without extra code.
+
+The shadow tables use the ``trigram`` tokenizer, which matches any substring
+of at least three characters (like the old ``LIKE '%...%'`` scans, but from
+an index) and works for Arabic as well as Latin text. Arabic spelling
+variants are folded on both sides: alef forms to bare alef, alef maqsura to
+yaa, taa marbuta to haa, and harakat/tatweel are dropped, so "أحمد" finds
+"احمد".
+
+Run ``python -m modules.fulltext`` to rebuild the indexes from the base tables.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+from modules.db import get_conn
+from modules.logger import log
+
+# Arabic letters folded to one spelling before indexing and searching
+_ARABIC_FOLDS = [
+    ("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"),
+    ("ى", "ي"), ("ة", "ه"),
+]
+# Harakat (fathatan .. sukun) and tatweel, removed entirely
+_ARABIC_MARKS = [chr(cp) for cp in range(0x064B, 0x0653)] + ["ـ"]
+
+# Trigram tokenizer: terms need at least this many characters
+MIN_TERM_LENGTH = 3
+
+# name -> (base table, key column, {fts column: SQL expression over the base row})
+SOURCES = {
+    "inventory": ("inventory", "item_id", {
+        "sku": "{r}.sku",
+        "name": "{r}.name",
+        "brand": "{r}.brand",
+        "model": "{r}.model",
+        "specs": "COALESCE({r}.storage, '') || ' ' || COALESCE({r}.ram, '') || ' ' || COALESCE({r}.color, '')",
+    }),
+    "customers": ("customers", "customer_id", {
+        "name": "{r}.name",
+        "phone": "{r}.phone",
+        "email": "{r}.email",
+    }),
+    "repairs": ("repair_orders", "repair_id", {
+        "order_number": "{r}.order_number",
+        "customer": "COALESCE({r}.customer_name, '') || ' ' || COALESCE({r}.customer_phone, '')",
+        "device_model": "{r}.device_model",
+        "imei": "{r}.imei",
+        "problem": "{r}.reported_problem",
+    }),
+}
+
+# Display columns returned by search(): (title, subtitle) per source
+_DISPLAY = {
+    "inventory": ("b.name", "b.sku"),
+    "customers": ("b.name", "b.phone"),
+    "repairs": ("b.order_number", "COALESCE(b.customer_name, '') || ' - ' || COALESCE(b.device_model, '')"),
+}
+
+
+def normalize(text) -> str:
+    """Fold Arabic spelling variants and drop diacritics (same rules as the triggers)."""
+    text = "" if text is None else str(text)
+    for mark in _ARABIC_MARKS:
+        text = text.replace(mark, "")
+    for variant, base in _ARABIC_FOLDS:
+        text = text.replace(variant, base)
+    return text
+
+
+def _normalize_sql(expr: str) -> str:
+    """SQL expression applying normalize() to ``expr`` (nested replace() calls)."""
+    for mark in _ARABIC_MARKS:
+        expr = f"replace({expr}, '{mark}', '')"
+    for variant, base in _ARABIC_FOLDS:
+        expr = f"replace({expr}, '{variant}', '{base}')"
+    return expr
+
+
+def _fts_table(source: str) -> str:
+    return f"{source}_fts"
+
+
+def _values_sql(source: str, row: str) -> str:
+    _, _, columns = SOURCES[source]
+    return ", ".join(_normalize_sql(f"COALESCE({expr.format(r=row)}, '')") for expr in columns.values())
+
+
+def indexed_columns(source: str) -> List[str]:
+    """Base table columns that feed the FTS row of ``source``."""
+    _, _, columns = SOURCES[source]
+    found = []
+    for expr in columns.values():
+        for column in re.findall(r"\{r\}\.(\w+)", expr):
+            if column not in found:
+                found.append(column)
+    return found
+
+
+def _sync_statements(source: str):
+    _, key, columns = SOURCES[source]
+    fts = _fts_table(source)
+    insert = f"INSERT INTO {fts}(rowid, {', '.join(columns)}) VALUES (new.{key}, {_values_sql(source, 'new')});"
+    delete = f"DELETE FROM {fts} WHERE rowid = old.{key};"
+    return insert, delete
+
+
+def _create_update_trigger(c, source: str):
+    # Only updates of indexed columns re-index the row: stock, totals and
+    # status updates on the checkout path leave the FTS table alone
+    table, _, _ = SOURCES[source]
+    fts = _fts_table(source)
+    insert, delete = _sync_statements(source)
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {', '.join(indexed_columns(source))} "
+              f"ON {table} BEGIN {delete} {insert} END")
+
+
+def create_tables(c):
+    """Create the FTS tables and their sync triggers (called from the schema migration)."""
+    for source, (table, key, columns) in SOURCES.items():
+        fts = _fts_table(source)
+        names = ", ".join(columns)
+        c.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, tokenize='trigram')")
+
+        insert, delete = _sync_statements(source)
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+        _create_update_trigger(c, source)
+
+
+def recreate_update_triggers(c):
+    """Replace the update triggers with ones limited to the indexed columns."""
+    for source in SOURCES:
+        c.execute(f"DROP TRIGGER IF EXISTS {_fts_table(source)}_au")
+        _create_update_trigger(c, source)
+
+
+def rebuild(c) -> Dict[str, int]:
+    """Refill every FTS table from its base table; returns rows indexed per source."""
+    counts = {}
+    for source, (table, key, columns) in SOURCES.items():
+        fts = _fts_table(source)
+        c.execute(f"DELETE FROM {fts}")
+        c.execute(f"INSERT INTO {fts}(rowid, {', '.join(columns)}) "
+                  f"SELECT {key}, {_values_sql(source, table)} FROM {table}")
+        counts[source] = c.rowcount
+        c.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+    return counts
+
+
+def rebuild_search_index() -> Optional[Dict[str, int]]:
+    """Rebuild all FTS tables in one transaction (backfill / repair)."""
+    conn = get_conn()
+    try:
+        counts = rebuild(conn.cursor())
+        conn.commit()
+        log.info(f"Full-text indexes rebuilt: {counts}")
+        return counts
+    except Exception as e:
+        conn.rollback()
+        log.error(f"Full-text rebuild failed: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def match_expression(query: str, column: str = None) -> Optional[str]:
+    """
+    Turn user input into an FTS5 MATCH expression.
+
+    Every whitespace-separated term must appear (AND); terms are quoted so
+    punctuation in SKUs, e-mails and phone numbers is taken literally. Terms
+    shorter than MIN_TERM_LENGTH are ignored (the trigram index cannot
+    answer them). Returns None when no usable term is left.
+    """
+    terms = [t for t in normalize(query).split() if len(t) >= MIN_TERM_LENGTH]
+    if not terms:
+        return None
+    quoted = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+    return f"{column} : ({quoted})" if column else quoted
+
+
+def search(query: str, sources: Iterable[str] = None, limit: int = 20, conn=None) -> List[Dict]:
+    """
+    Ranked search across inventory, customers and repair orders.
+
+    Args:
+        query: Free text (SKU, name, phone, IMEI, order number, ...)
+        sources: Subset of "inventory", "customers", "repairs" (default: all)
+        limit: Maximum number of results overall
+        conn: Optional connection to use (default: a pooled one)
+
+    bm25 scores depend on each table's own statistics (row count, column
+    count, text length), so they are only compared within a source. Each
+    match gets a 'score': its bm25 relative to the best match of its source
+    (1.0 for that best match). Results are merged by score, so every source's
+    best match comes before any source's second best.
+
+    Returns:
+        List of dicts with 'type', 'id', 'title', 'subtitle', 'rank' (bm25
+        within the source, lower is better) and 'score', best matches first
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    own = conn is None
+    if own:
+        conn = get_conn()
+    try:
+        ranked = []
+        for source in (sources or SOURCES):
+            table, key, _ = SOURCES[source]
+            fts = _fts_table(source)
+            title, subtitle = _DISPLAY[source]
+            rows = conn.execute(f"""
+                SELECT f.rowid, {title}, {subtitle}, f.rank
+                FROM {fts} f
+                JOIN {table} b ON b.{key} = f.rowid
+                WHERE {fts} MATCH ?
+                ORDER BY f.rank
+                LIMIT ?
+            """, (expression, limit)).fetchall()
+            if not rows:
+                continue
+            best = rows[0][3]
+            for position, row in enumerate(rows):
+                score = row[3] / best if best < 0 else 1.0
+                ranked.append((-score, position, {'type': source, 'id': row[0], 'title': row[1],
+                                                  'subtitle': row[2], 'rank': row[3], 'score': score}))
+        # Equal scores (e.g. every source's best) go by position within the source
+        ranked.sort(key=lambda r: r[:2])
+        return [r[2] for r in ranked[:limit]]
+    except Exception as e:
+        log.error(f"Full-text search failed: {e}")
+        return []
+    finally:
+        if own:
+            conn.close()
+
+
+if __name__ == "__main__":
+    print(rebuild_search_index())
@@ -7,9 +7,9 @@ from typing import List
 
 import config
 from modules.backup_manager import ensure_backup_dir
-from modules.db import get_conn
+from modules.db import describe_storage, get_conn
 from modules.logger import log
-from modules import models
+from modules.migrations import migrate
 
 
 @dataclass
@@ -20,6 +20,46 @@ class CheckResult:
     critical: bool = False
 
 
+def _check_database(record):
+    try:
+        with get_conn() as conn:
+            conn.execute("SELECT 1")
+        record("Database connection", True, "Connection established")
+    except Exception as exc:
+        record("Database connection", False, f"Cannot open DB: {exc}", critical=True)
+
+    try:
+        storage = describe_storage()
+        settings = ", ".join(f"{k}={v}" for k, v in storage.items() if k != "profile")
+        record("Storage profile", True, f"{storage['profile']} ({settings})")
+    except Exception as exc:
+        record("Storage profile", False, f"Cannot read storage settings: {exc}")
+
+    try:
+        result = migrate()
+        if result["applied"]:
+            message = f"Migrated from version {result['from']} to {result['to']}"
+        else:
+            message = f"Schema is up to date (version {result['to']})"
+        record("Schema check", True, message)
+    except Exception as exc:
+        record("Schema check", False, f"Failed to migrate schema: {exc}", critical=True)
+
+
+def _check_data_service(service_cfg: dict, record):
+    from modules.data_service import DataServiceClient, DEFAULT_ADDRESS
+
+    address = service_cfg.get("address") or DEFAULT_ADDRESS
+    client = DataServiceClient(address, timeout=10, secret=service_cfg.get("secret"))
+    try:
+        client.call("models.get_data_seq")
+        record("Data service", True, f"Reachable at {address}")
+    except Exception as exc:
+        record("Data service", False, f"Cannot reach {address}: {exc}", critical=True)
+    finally:
+        client.close()
+
+
 def run_preflight_checks() -> dict:
     """
     Execute a battery of checks before booting the UI.
@@ -50,18 +90,13 @@ def run_preflight_checks() -> dict:
         record("Configuration", False, f"Failed to load config: {exc}", critical=True)
 
     # 2. Database connectivity + schema
-    try:
-        with get_conn() as conn:
-            conn.execute("SELECT 1")
-        record("Database connection", True, "Connection established")
-    except Exception as exc:
-        record("Database connection", False, f"Cannot open DB: {exc}", critical=True)
-
-    try:
-        models.check_schema()
-        record("Schema check", True, "Schema is up to date")
-    except Exception as exc:
-        record("Schema check", False, f"Failed to validate schema: {exc}", critical=True)
+    service_mode, service_cfg = config.get_data_service_settings()
+    if service_mode:
+        # The data service owns shop.db and migrates it; this terminal only
+        # needs to reach it
+        _check_data_service(service_cfg, record)
+    else:
+        _check_database(record)
 
     # 3. Backup directory
     try:
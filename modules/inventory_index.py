@@ -0,0 +1,152 @@
+# modules/inventory_index.py
+"""
+In-memory search index for the inventory grid.
+
+The index is built once per inventory snapshot (see
+modules.inventory_repository) and
+answers the grid's filters without touching every row:
+
+- text search uses a trigram map (trigram -> item positions) to find the
+  candidates, then confirms each one with a substring check on the
+  precomputed lower-case search text;
+- category and low-stock filters are precomputed position sets, combined
+  by set intersection;
+- per-item display data (formatted row, tags, ...) is computed once by an
+  optional ``display`` callback and reused on every keystroke.
+
+Usage:
+    index = get_inventory_index(display=format_row)
+    for pos in index.search("iphone", category="Phones"):
+        row, extra = index.rows[pos], index.displays[pos]
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+from modules.inventory_repository import get_inventory_repository, invalidate_inventory_repository
+
+# Items with fewer units than this count as low stock
+LOW_STOCK_THRESHOLD = 5
+
+# Row layout of models.get_inventory()
+_CATEGORY = 3
+_QUANTITY = 4
+
+
+def search_text(row) -> str:
+    """Normalized text a row is matched against (all columns, lower case)."""
+    return " ".join([str(x) if x else "" for x in row]).lower()
+
+
+def _quantity(row) -> int:
+    try:
+        return int(row[_QUANTITY])
+    except (TypeError, ValueError):
+        return 0
+
+
+class InventorySearchIndex:
+    """Precomputed search structures for one snapshot of the inventory"""
+
+    def __init__(self, rows, display: Optional[Callable] = None, version=None):
+        """
+        Args:
+            rows: Inventory rows (see models.get_inventory), in display order
+            display: Optional callable(row) whose result is stored in ``displays``
+            version: Journal sequence number the rows are current to (informational)
+        """
+        self.rows = list(rows)
+        self.version = version
+        self.texts = [search_text(row) for row in self.rows]
+        self.displays = [display(row) for row in self.rows] if display else [None] * len(self.rows)
+
+        # Sorted non-empty categories, for the category filter
+        self.categories: List[str] = sorted({str(row[_CATEGORY]) for row in self.rows if row[_CATEGORY]})
+        self.by_category: Dict[str, set] = {}
+        self.low_stock = set()
+        self._trigrams: Dict[str, set] = {}
+
+        for pos, (row, text) in enumerate(zip(self.rows, self.texts)):
+            self.by_category.setdefault(str(row[_CATEGORY]), set()).add(pos)
+            if _quantity(row) < LOW_STOCK_THRESHOLD:
+                self.low_stock.add(pos)
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                grams = self._trigrams.get(gram)
+                if grams is None:
+                    self._trigrams[gram] = {pos}
+                else:
+                    grams.add(pos)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def search(self, query: str = "", category: str = "All", low_stock: bool = False) -> List[int]:
+        """
+        Return the positions (into ``rows``) of matching items, in row order.
+
+        Args:
+            query: Case-insensitive substring to look for in any column
+            category: Only items of this category ("All" for any)
+            low_stock: Only items below LOW_STOCK_THRESHOLD units
+        """
+        query = (query or "").lower()
+        filters = []
+        if category and category != "All":
+            filters.append(self.by_category.get(category, set()))
+        if low_stock:
+            filters.append(self.low_stock)
+
+        if len(query) >= 3:
+            grams = [self._trigrams.get(query[i:i + 3]) for i in range(len(query) - 2)]
+            if any(g is None for g in grams):
+                return []
+            filters.extend(grams)
+
+        if filters:
+            filters.sort(key=len)
+            candidates = filters[0]
+            for other in filters[1:]:
+                candidates = candidates & other
+                if not candidates:
+                    return []
+            candidates = sorted(candidates)
+        else:
+            candidates = range(len(self.rows))
+
+        if not query:
+            return list(candidates)
+        texts = self.texts
+        return [pos for pos in candidates if query in texts[pos]]
+
+
+_lock = threading.Lock()
+_cache = {"key": None, "index": None}
+
+
+def get_inventory_index(display: Optional[Callable] = None) -> InventorySearchIndex:
+    """
+    Return the inventory index, rebuilding it only when the inventory changed.
+
+    Args:
+        display: Callable(row) precomputing per-item display data; the cache
+            is per callable, so pass the same function on every call
+
+    Returns:
+        InventorySearchIndex (shared; do not modify it)
+    """
+    repo = get_inventory_repository()
+    key = (repo, display)
+    with _lock:
+        if _cache["key"] == key:
+            return _cache["index"]
+    index = InventorySearchIndex(repo.rows, display=display, version=repo.seq)
+    with _lock:
+        _cache.update(key=key, index=index)
+    return index
+
+
+def invalidate_inventory_index():
+    """Drop the cached index (and the inventory snapshot) so the next call rebuilds it."""
+    invalidate_inventory_repository()
+    with _lock:
+        _cache.update(key=None, index=None)
@@ -0,0 +1,215 @@
+# modules/inventory_repository.py
+"""
+Process-wide in-memory copy of the inventory.
+
+The inventory grid, the sales screens and the label dialog all read the
+same snapshot instead of each loading their own copy. A snapshot holds
+the rows of models.get_inventory() once, plus dictionaries from item id,
+SKU and barcode to the row, so lookups are O(1) instead of a scan.
+
+Snapshots are immutable and safe to share between threads. When the
+database changed (db.get_data_version), the change journal says whether
+inventory or barcode rows were touched: if not, the current snapshot is
+kept; if so, only the changed items and their barcodes are re-read and
+patched into a new snapshot (models.inventory_changed_since, barcodes_of).
+A full reload happens only on first use, when the journal no longer covers
+the snapshot, or when the database file was switched.
+
+Usage:
+    repo = get_inventory_repository()
+    row = repo.get(item_id) or repo.by_barcode(code)
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from modules import change_log, models
+from modules.db import get_conn, get_data_version
+from modules.logger import log
+from modules.service_routing import served
+
+# Row layout of models.get_inventory()
+_ITEM_ID = 0
+_SKU = 1
+_CATEGORY = 3
+
+# Journaled tables whose changes make the snapshot stale
+_TABLES = ("inventory", "product_barcodes")
+
+
+class InventoryRepository:
+    """One immutable snapshot of the inventory, indexed by item id, SKU and barcode"""
+
+    __slots__ = ("rows", "seq", "epoch", "categories", "barcodes", "_by_id", "_by_sku",
+                 "_by_barcode", "_item_barcodes", "_by_category")
+
+    def __init__(self, rows, barcodes=(), seq: int = 0, epoch=None):
+        """
+        Args:
+            rows: Inventory rows (see models.get_inventory)
+            barcodes: (barcode, item_id, is_product_barcode) tuples
+            seq: Change journal sequence number the rows were read at
+            epoch: Database epoch the rows were read from (see db.get_data_version)
+        """
+        self.rows: List[tuple] = list(rows)
+        self.seq = seq
+        self.epoch = epoch
+        self._by_id: Dict[int, int] = {}
+        self._by_sku: Dict[str, int] = {}
+        self._by_category: Dict[str, List[int]] = {}
+        for pos, row in enumerate(self.rows):
+            self._by_id[row[_ITEM_ID]] = pos
+            if row[_SKU]:
+                self._by_sku[str(row[_SKU])] = pos
+            self._by_category.setdefault(str(row[_CATEGORY]), []).append(pos)
+        # Sorted non-empty categories, for category filters
+        self.categories: List[str] = sorted({str(row[_CATEGORY]) for row in self.rows if row[_CATEGORY]})
+
+        self.barcodes: List[tuple] = list(barcodes)
+        self._by_barcode: Dict[str, int] = {}
+        self._item_barcodes: Dict[int, str] = {}
+        for barcode, item_id, is_product in self.barcodes:
+            self._by_barcode[str(barcode)] = item_id
+            if is_product:
+                self._item_barcodes[item_id] = str(barcode)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __contains__(self, item_id):
+        return item_id in self._by_id
+
+    def get(self, item_id) -> Optional[tuple]:
+        """Row of the item with this id, or None."""
+        pos = self._by_id.get(item_id)
+        return self.rows[pos] if pos is not None else None
+
+    def by_sku(self, sku) -> Optional[tuple]:
+        """Row of the item with this exact SKU, or None."""
+        pos = self._by_sku.get(str(sku))
+        return self.rows[pos] if pos is not None else None
+
+    def by_barcode(self, barcode) -> Optional[tuple]:
+        """
+        Row of the item a barcode belongs to, or None.
+
+        Both product barcodes (inventory.barcode) and per-unit barcodes
+        (product_barcodes, any status) are known; check a unit's status with
+        modules.barcode_manager before selling it.
+        """
+        item_id = self._by_barcode.get(str(barcode))
+        return self.get(item_id) if item_id is not None else None
+
+    def barcode_of(self, item_id) -> Optional[str]:
+        """Product barcode printed on the item's labels, or None."""
+        return self._item_barcodes.get(item_id)
+
+    def in_category(self, category) -> List[tuple]:
+        """Rows of one category, in row order."""
+        return [self.rows[pos] for pos in self._by_category.get(str(category), ())]
+
+
+_BARCODES_SQL = """
+    SELECT barcode, item_id, 1 FROM inventory WHERE barcode IS NOT NULL AND barcode != '' {where}
+    UNION ALL
+    SELECT barcode, item_id, 0 FROM product_barcodes {where_units}
+"""
+
+# Item ids per barcodes_of query (two IN lists stay below SQLite's variable limit)
+_BARCODE_CHUNK = 400
+
+
+@served(read=True)
+def load_barcodes():
+    """(barcode, item_id, is_product_barcode) of every product and unit barcode."""
+    conn = get_conn()
+    try:
+        return conn.execute(_BARCODES_SQL.format(where="", where_units="")).fetchall()
+    finally:
+        conn.close()
+
+
+@served(read=True)
+def barcodes_of(item_ids) -> List[tuple]:
+    """(barcode, item_id, is_product_barcode) of the given items' barcodes."""
+    item_ids = list(item_ids)
+    rows = []
+    conn = get_conn()
+    try:
+        for start in range(0, len(item_ids), _BARCODE_CHUNK):
+            chunk = item_ids[start:start + _BARCODE_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            sql = _BARCODES_SQL.format(where=f"AND item_id IN ({marks})", where_units=f"WHERE item_id IN ({marks})")
+            rows.extend(conn.execute(sql, chunk * 2).fetchall())
+    finally:
+        conn.close()
+    return rows
+
+
+def _patch_barcodes(barcodes, item_ids):
+    """``barcodes`` with the entries of ``item_ids`` re-read from the database."""
+    fresh = barcodes_of(item_ids)
+    codes = {str(row[0]) for row in fresh}
+    kept = [row for row in barcodes if row[1] not in item_ids and str(row[0]) not in codes]
+    return kept + [tuple(row) for row in fresh]
+
+
+def _refresh(repo: Optional[InventoryRepository], seq: int, epoch):
+    """
+    Bring ``repo`` (current to journal position ``seq``) up to date.
+
+    Returns:
+        (snapshot, journal position it is current to); the snapshot is
+        ``repo`` itself when no inventory or barcode row changed
+    """
+    if repo is not None and repo.epoch == epoch:
+        try:
+            changes, newest, complete = change_log.read_since(seq)
+            if complete:
+                item_ids = set()
+                for table in _TABLES:
+                    item_ids |= changes.get(table, set())
+                if not item_ids:
+                    # Something else was committed (a repair, a customer...); the
+                    # snapshot stays as it is, only the journal position moves
+                    return repo, newest
+                rows = models.apply_changes(repo.rows, models.inventory_changed_since(seq))
+                if rows is not None:
+                    barcodes = _patch_barcodes(repo.barcodes, item_ids)
+                    return InventoryRepository(rows, barcodes, seq=newest, epoch=epoch), newest
+        except Exception as e:
+            log.warning(f"Inventory repository delta failed, reloading: {e}")
+
+    # Take the sequence first: anything committed during the load is re-read next time
+    seq = change_log.get_last_seq()
+    return InventoryRepository(models.get_inventory(), load_barcodes(), seq=seq, epoch=epoch), seq
+
+
+_lock = threading.Lock()
+# The journal position lives here, not on the (immutable, shared) snapshot
+_cache = {"version": None, "repo": None, "seq": 0}
+
+
+def get_inventory_repository() -> InventoryRepository:
+    """
+    Return the shared inventory snapshot, refreshing it if the database changed.
+
+    Returns:
+        InventoryRepository (shared; do not modify it)
+    """
+    version = get_data_version()
+    with _lock:
+        if _cache["version"] == version and _cache["repo"] is not None:
+            return _cache["repo"]
+        repo, seq = _refresh(_cache["repo"], _cache["seq"], version[0])
+        _cache.update(version=version, repo=repo, seq=seq)
+        return repo
+
+
+def invalidate_inventory_repository():
+    """Drop the shared snapshot so the next call reloads it from the database."""
+    with _lock:
+        _cache.update(version=None, repo=None, seq=0)
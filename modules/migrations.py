@@ -0,0 +1,362 @@
+# modules/migrations.py
+"""
+Versioned schema migrations.
+
+The schema version is stored in ``PRAGMA user_version``. Each migration step
+has a version number and brings the database from the previous version to
+its own; steps are idempotent so databases created by older releases (which
+already have some of the columns) migrate cleanly.
+
+When the database is current, ``migrate()`` costs a single PRAGMA query.
+Nothing runs on import: the app calls ``migrate()`` from the startup
+preflight checks and ``db_init.py`` calls it after creating the base tables.
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+from modules.db import get_conn
+from modules.logger import log
+
+# (version, description, step) in ascending version order
+MIGRATIONS: List[Tuple[int, str, Callable]] = []
+
+
+def migration(version: int, description: str):
+    """Register a migration step for the given schema version."""
+    def decorator(func: Callable) -> Callable:
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"Migration {version} registered out of order")
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+# ==================== Helpers ====================
+
+def _columns(c, table: str) -> List[str]:
+    c.execute(f"PRAGMA table_info({table})")
+    return [col[1] for col in c.fetchall()]
+
+
+def _add_column(c, table: str, column: str, definition: str):
+    """Add a column unless it already exists."""
+    if column not in _columns(c, table):
+        log.info(f"Migrating: adding {table}.{column}")
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _rename_or_add_column(c, table: str, old: str, new: str, definition: str):
+    """Rename a legacy column to its current name, or add it if neither exists."""
+    cols = _columns(c, table)
+    if new in cols:
+        return
+    if old in cols:
+        log.info(f"Migrating: renaming {table}.{old} -> {new}")
+        c.execute(f"ALTER TABLE {table} RENAME COLUMN {old} TO {new}")
+    else:
+        _add_column(c, table, new, definition)
+
+
+# ==================== Migration steps ====================
+
+@migration(1, "Base tables")
+def _base_tables(c):
+    c.execute("""CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    full_name TEXT,
+                    role TEXT DEFAULT 'Cashier',
+                    created_at TEXT
+                )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS inventory (
+                    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sku TEXT UNIQUE,
+                    name TEXT,
+                    description TEXT,
+                    quantity INTEGER DEFAULT 0,
+                    buy_price REAL DEFAULT 0,
+                    sell_price REAL DEFAULT 0
+                )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS customers (
+                    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    phone TEXT UNIQUE,
+                    email TEXT,
+                    address TEXT,
+                    customer_type TEXT DEFAULT 'Both',
+                    created_date TEXT,
+                    last_purchase_date TEXT,
+                    last_repair_date TEXT,
+                    total_purchases INTEGER DEFAULT 0,
+                    total_repairs INTEGER DEFAULT 0,
+                    total_spent REAL DEFAULT 0.0,
+                    notes TEXT
+                )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS sales (
+                    sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_date TEXT,
+                    customer_id INTEGER,
+                    customer_name TEXT,
+                    total_amount REAL,
+                    FOREIGN KEY(customer_id) REFERENCES customers(customer_id)
+                )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS sale_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_id INTEGER,
+                    item_id INTEGER,
+                    quantity INTEGER,
+                    unit_price REAL,
+                    cost_price REAL DEFAULT 0,
+                    FOREIGN KEY(sale_id) REFERENCES sales(sale_id),
+                    FOREIGN KEY(item_id) REFERENCES inventory(item_id)
+                )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS repair_orders (
+                    repair_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    order_number TEXT UNIQUE,
+                    customer_id INTEGER,
+                    customer_name TEXT,
+                    customer_phone TEXT,
+                    device_model TEXT,
+                    imei TEXT,
+                    reported_problem TEXT,
+                    received_date TEXT,
+                    estimated_delivery TEXT,
+                    status TEXT DEFAULT 'Received',
+                    technician TEXT,
+                    total_estimate REAL DEFAULT 0,
+                    notes TEXT,
+                    FOREIGN KEY(customer_id) REFERENCES customers(customer_id)
+                )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS repair_parts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    repair_id INTEGER,
+                    item_id INTEGER,
+                    part_name TEXT,
+                    qty INTEGER DEFAULT 1,
+                    unit_price REAL DEFAULT 0,
+                    FOREIGN KEY(repair_id) REFERENCES repair_orders(repair_id),
+                    FOREIGN KEY(item_id) REFERENCES inventory(item_id)
+                )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS repair_history (
+                    history_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    repair_id INTEGER,
+                    action_date TEXT,
+                    action_by TEXT,
+                    status_from TEXT,
+                    status_to TEXT,
+                    comment TEXT,
+                    FOREIGN KEY(repair_id) REFERENCES repair_orders(repair_id)
+                )""")
+
+    # Audit logs table (Phase 3)
+    c.execute("""CREATE TABLE IF NOT EXISTS audit_logs (
+                    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    user TEXT,
+                    action_type TEXT NOT NULL,
+                    entity_type TEXT NOT NULL,
+                    entity_id INTEGER,
+                    old_value TEXT,
+                    new_value TEXT,
+                    description TEXT
+                )""")
+
+    # Scan log table (for barcode scanning tracking)
+    c.execute("""CREATE TABLE IF NOT EXISTS scan_log (
+                    scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    scan_date TEXT NOT NULL,
+                    barcode TEXT NOT NULL,
+                    scan_type TEXT,
+                    user TEXT,
+                    module TEXT
+                )""")
+
+
+@migration(2, "Legacy column names and cost tracking")
+def _legacy_columns(c):
+    _add_column(c, "repair_parts", "cost_price", "REAL DEFAULT 0.0")
+    _add_column(c, "sale_items", "cost_price", "REAL DEFAULT 0.0")
+    _rename_or_add_column(c, "sale_items", "qty", "quantity", "INTEGER DEFAULT 0")
+    _rename_or_add_column(c, "sale_items", "price", "unit_price", "REAL DEFAULT 0.0")
+    _add_column(c, "sales", "customer_name", "TEXT")
+    _rename_or_add_column(c, "sales", "total", "total_amount", "REAL DEFAULT 0.0")
+    _add_column(c, "inventory", "category", "TEXT DEFAULT 'General'")
+    _add_column(c, "inventory", "barcode", "TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_inventory_barcode ON inventory(barcode)")
+
+
+@migration(3, "Phone specifications and customer links")
+def _phone_specs(c):
+    for column in ("storage", "ram", "color", "condition", "brand", "model"):
+        _add_column(c, "inventory", column, "TEXT")
+    _add_column(c, "inventory", "warranty_months", "INTEGER")
+    _add_column(c, "sales", "customer_id", "INTEGER")
+    _add_column(c, "repair_orders", "customer_id", "INTEGER")
+
+
+@migration(4, "Detailed sales records for reporting")
+def _detailed_sales(c):
+    sales_columns = {
+        'seller_name': 'TEXT',  # Who made the sale
+        'customer_phone': 'TEXT',
+        'customer_email': 'TEXT',
+        'customer_address': 'TEXT',
+        'subtotal': 'REAL DEFAULT 0',  # Before discount
+        'discount_percent': 'REAL DEFAULT 0',
+        'discount_amount': 'REAL DEFAULT 0',
+        'payment_method': "TEXT DEFAULT 'Cash'",
+        'sale_time': 'TEXT',  # Exact time of sale (HH:MM:SS)
+        'notes': 'TEXT',
+    }
+    for column, definition in sales_columns.items():
+        _add_column(c, "sales", column, definition)
+
+    item_columns = {
+        'item_name': 'TEXT',  # Product name (for historical record)
+        'item_sku': 'TEXT',
+        'item_category': 'TEXT',
+        'line_total': 'REAL DEFAULT 0',  # quantity * unit_price
+        'profit': 'REAL DEFAULT 0',  # (unit_price - cost_price) * quantity
+    }
+    for column, definition in item_columns.items():
+        _add_column(c, "sale_items", column, definition)
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sales_seller ON sales(seller_name)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_name)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON sale_items(sale_id)")
+
+
+@migration(5, "Per-unit product barcodes")
+def _product_barcodes(c):
+    c.execute("""CREATE TABLE IF NOT EXISTS product_barcodes (
+                    barcode_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    item_id INTEGER NOT NULL,
+                    barcode TEXT UNIQUE NOT NULL,
+                    serial_number TEXT,
+                    status TEXT DEFAULT 'available',
+                    added_date TEXT,
+                    sold_date TEXT,
+                    sale_id INTEGER,
+                    notes TEXT,
+                    FOREIGN KEY(item_id) REFERENCES inventory(item_id),
+                    FOREIGN KEY(sale_id) REFERENCES sales(sale_id)
+                )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_barcode ON product_barcodes(barcode)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_barcode_item ON product_barcodes(item_id, status)")
+
+
+@migration(6, "Indexes for date-range reports")
+def _report_indexes(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_repair_orders_received ON repair_orders(received_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_repair_parts_repair ON repair_parts(repair_id)")
+
+
+@migration(7, "Daily sales and repair summaries")
+def _daily_summaries(c):
+    from modules import daily_summary
+    daily_summary.create_tables(c)
+    daily_summary.rebuild(c)
+
+
+@migration(8, "Full-text search indexes")
+def _fulltext_search(c):
+    from modules import fulltext
+    fulltext.create_tables(c)
+    fulltext.rebuild(c)
+
+
+@migration(9, "Change journal for multi-terminal sync")
+def _change_journal(c):
+    from modules import change_log
+    change_log.create_tables(c)
+
+
+@migration(10, "Stocktake sessions")
+def _stocktake_sessions(c):
+    from modules import stocktake
+    stocktake.create_tables(c)
+
+
+@migration(11, "Goods receiving and cost history")
+def _goods_receiving(c):
+    from modules import receiving
+    receiving.create_tables(c)
+
+
+@migration(12, "Stocktake counts remember the quantity on hand")
+def _stocktake_expected(c):
+    _add_column(c, "stocktake_counts", "expected", "INTEGER")
+
+
+@migration(13, "Full-text update triggers watch only indexed columns")
+def _fulltext_update_of(c):
+    from modules import fulltext
+    fulltext.recreate_update_triggers(c)
+
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ==================== Engine ====================
+
+def get_schema_version() -> int:
+    """Return the schema version recorded in the database."""
+    conn = get_conn()
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def migrate(target: int = None) -> Dict:
+    """
+    Bring the database schema up to ``target`` (default: latest).
+
+    All pending steps run in one write transaction, so a failed step leaves
+    the database at its previous version.
+
+    Returns:
+        Dictionary with 'from', 'to' and 'applied' (list of step descriptions)
+    """
+    if target is None:
+        target = LATEST_VERSION
+
+    conn = get_conn()
+    try:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        if current >= target:
+            # Fast path: schema is current
+            return {'from': current, 'to': current, 'applied': []}
+
+        # Take the write lock, then re-read: another terminal may have migrated
+        conn.execute("BEGIN IMMEDIATE")
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        start = current
+        applied = []
+        c = conn.cursor()
+        for version, description, step in MIGRATIONS:
+            if version <= current or version > target:
+                continue
+            log.info(f"Applying schema migration {version}: {description}")
+            step(c)
+            c.execute(f"PRAGMA user_version = {int(version)}")
+            current = version
+            applied.append(description)
+        conn.commit()
+        if applied:
+            log.info(f"Schema migrated from version {start} to {current}")
+        return {'from': start, 'to': current, 'applied': applied}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
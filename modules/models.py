@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 # modules/models.py
 from .db import get_conn
+from . import daily_summary
+from . import fulltext
+from . import change_log
+from .service_routing import served
 from datetime import datetime
-import hashlib, os
+import hashlib, os, time
 
 # ---------------- password helpers ----------------
 def hash_password(plain: str) -> str:
@@ -24,6 +28,7 @@ def get_user(username: str):
     row = c.fetchone(); conn.close()
     return row
 
+@served
 def add_user(username: str, plain_password: str, full_name: str = "", role: str = "Cashier"):
     hashed = hash_password(plain_password)
     conn = get_conn(); c = conn.cursor()
@@ -44,6 +49,7 @@ def get_all_users():
     rows = c.fetchall(); conn.close()
     return rows
 
+@served
 def delete_user_by_id(user_id: int) -> bool:
     conn = get_conn(); c = conn.cursor()
     try:
@@ -56,6 +62,7 @@ def delete_user_by_id(user_id: int) -> bool:
     finally:
         conn.close()
 
+@served
 def update_user_password(user_id: int, new_plain: str) -> bool:
     hashed = hash_password(new_plain)
     conn = get_conn(); c = conn.cursor()
@@ -226,6 +233,21 @@ def update_inventory_item(item_id: int, sku: str, name: str, category: str, qty:
         return False
 
 
+# Row shapes shared by the list queries and their *_changed_since deltas
+_INVENTORY_SELECT = """SELECT item_id, sku, name, category, quantity, buy_price, sell_price,
+                              storage, ram, color, condition, brand, model, warranty_months
+                       FROM inventory"""
+_REPAIRS_SELECT = """SELECT repair_id, order_number, customer_name, customer_phone, device_model,
+                            imei, status, received_date, estimated_delivery
+                     FROM repair_orders"""
+_CUSTOMERS_SELECT = """SELECT customer_id, name, phone, email, address, customer_type,
+                              total_purchases, total_repairs, total_spent,
+                              last_purchase_date, last_repair_date, created_date
+                       FROM customers"""
+_SALES_SELECT = "SELECT sale_id, sale_date, customer_name, total_amount FROM sales"
+
+
+@served(read=True)
 def get_inventory():
     """
     Get all inventory items with phone specifications.
@@ -235,9 +257,7 @@ def get_inventory():
     """
     conn = get_conn()
     c = conn.cursor()
-    c.execute("""SELECT item_id, sku, name, category, quantity, buy_price, sell_price, 
-                        storage, ram, color, condition, brand, model, warranty_months 
-                 FROM inventory""")
+    c.execute(_INVENTORY_SELECT)
     rows = c.fetchall()
     conn.close()
     return rows
@@ -261,6 +281,7 @@ def get_inventory_item_by_id(item_id: int):
     return row
 
 
+@served(read=True)
 def get_inventory_item_by_sku(sku: str):
     """
     Get a specific inventory item by SKU.
@@ -279,6 +300,25 @@ def get_inventory_item_by_sku(sku: str):
     return row
 
 
+@served(read=True)
+def get_inventory_item_for_edit(item_id: int):
+    """
+    Get the fields the edit dialog shows for one item.
+    
+    Returns:
+        Tuple (item_id, sku, name, category, quantity, buy_price, sell_price,
+        storage, ram, color, description) or None if not found
+    """
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""SELECT item_id, sku, name, category, quantity, buy_price, sell_price,
+                        storage, ram, color, description
+                 FROM inventory WHERE item_id = ?""", (item_id,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+
 def update_inventory_quantity(item_id: int, new_quantity: int) -> bool:
     """
     Update inventory quantity with validation and transaction support.
@@ -325,7 +365,7 @@ def decrease_inventory_quantity(item_id: int, amount: int) -> bool:
         True if successful, False otherwise
     """
     from modules.validators import validate_quantity
-    from modules.transaction_manager import transaction
+    from modules.transaction_manager import execute_with_retry
     
     # Validate amount
     amount_result = validate_quantity(amount)
@@ -336,30 +376,49 @@ def decrease_inventory_quantity(item_id: int, amount: int) -> bool:
     amount = amount_result.normalized_value
     
     try:
-        with transaction() as conn:
-            c = conn.cursor()
-            
-            # Get current quantity
-            c.execute("SELECT quantity FROM inventory WHERE item_id = ?", (item_id,))
-            row = c.fetchone()
-            if not row:
-                raise ValueError(f"Item with ID {item_id} not found")
-            
-            current_qty = row[0]
-            new_qty = current_qty - amount
-            
-            if new_qty < 0:
-                raise ValueError(f"Insufficient inventory: current={current_qty}, requested={amount}")
-            
-            # Update quantity
-            c.execute("UPDATE inventory SET quantity = ? WHERE item_id = ?", (new_qty, item_id))
-        
+        execute_with_retry(lambda conn: reserve_stock(conn.cursor(), {item_id: amount}))
         return True
     except Exception as e:
         print(f"decrease_inventory_quantity error: {e}")
         return False
 
 
+def reserve_stock(c, quantities: dict):
+    """
+    Take stock out of inventory with the caller's cursor (no commit).
+    
+    Stock is checked with one query, then every decrement is applied in one
+    batch as a conditional ``UPDATE ... WHERE quantity >= ?``, so stock never
+    goes negative even if another terminal sold the same units in between.
+    Use it inside a BEGIN IMMEDIATE transaction (see
+    transaction_manager.execute_with_retry) so that cannot happen at all.
+    
+    Args:
+        c: Cursor of an open transaction
+        quantities: item_id -> units to take
+    
+    Raises:
+        ValueError: An item is missing or has too little stock (the caller
+            must roll back; some decrements may already be applied)
+    """
+    quantities = {item_id: qty for item_id, qty in quantities.items() if qty}
+    if not quantities:
+        return
+    ids = list(quantities)
+    c.execute(f"SELECT item_id, quantity FROM inventory WHERE item_id IN ({','.join('?' * len(ids))})", ids)
+    available = dict(c.fetchall())
+    for item_id, qty in quantities.items():
+        if item_id not in available:
+            raise ValueError(f"Item with ID {item_id} not found")
+        if available[item_id] < qty:
+            raise ValueError(f"Insufficient inventory for item {item_id}: available={available[item_id]}, requested={qty}")
+    
+    c.executemany("UPDATE inventory SET quantity = quantity - ? WHERE item_id = ? AND quantity >= ?",
+                  [(qty, item_id, qty) for item_id, qty in quantities.items()])
+    if c.rowcount != len(quantities):
+        raise ValueError("Stock changed while the sale was being recorded; please retry")
+
+
 def delete_inventory_item(item_id: int) -> bool:
     """
     Delete an inventory item from the database.
@@ -407,6 +466,16 @@ def check_inventory_availability(item_id: int, required_quantity: int) -> bool:
     return row[0] >= required_quantity
 
 # ---------------- repairs ----------------
+@served(read=True)
+def get_last_order_number():
+    """Return the highest numeric repair order number, or None if there is none."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("SELECT MAX(CAST(order_number AS INTEGER)) FROM repair_orders WHERE order_number GLOB '[0-9]*'")
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else None
+
 def create_repair_order(order_number: str, customer_name: str, phone: str, model: str, imei: str,
                         problem: str, est_date: str, tech: str, note: str, total_est: float, customer_id: int = None):
     """
@@ -484,6 +553,8 @@ def create_repair_order(order_number: str, customer_name: str, phone: str, model
             action_date = datetime.now().isoformat()
             c.execute('''INSERT INTO repair_history (repair_id, action_date, action_by, status_from, status_to, comment)
                          VALUES (?, ?, ?, ?, ?, ?)''', (rid, action_date, customer_name, None, 'Received', 'Order created'))
+            
+            daily_summary.refresh_repair_day(c, received)
         
         return rid
     except Exception as e:
@@ -492,7 +563,7 @@ def create_repair_order(order_number: str, customer_name: str, phone: str, model
 
 def get_repairs():
     conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT repair_id, order_number, customer_name, customer_phone, device_model, imei, status, received_date, estimated_delivery FROM repair_orders ORDER BY repair_id DESC")
+    c.execute(_REPAIRS_SELECT + " ORDER BY repair_id DESC")
     rows = c.fetchall(); conn.close()
     return rows
 
@@ -564,6 +635,8 @@ def add_repair_part(repair_id: int, part_name: str, qty: int, unit_price: float,
             new_total = c.fetchone()[0] or 0.0
             
             c.execute("UPDATE repair_orders SET total_estimate = ? WHERE repair_id = ?", (new_total, repair_id))
+            
+            daily_summary.refresh_repair(c, repair_id)
         
         return True
     except Exception as e:
@@ -640,6 +713,8 @@ def update_repair_status(repair_id: int, new_status: str, action_by: str, commen
             action_date = datetime.now().isoformat()
             c.execute('''INSERT INTO repair_history (repair_id, action_date, action_by, status_from, status_to, comment)
                          VALUES (?, ?, ?, ?, ?, ?)''', (repair_id, action_date, action_by, old_status, new_status, comment))
+            
+            daily_summary.refresh_repair(c, repair_id)
         
         return True
     except Exception as e:
@@ -662,6 +737,9 @@ def delete_repair_order(repair_id: int) -> bool:
         with transaction() as conn:
             c = conn.cursor()
             
+            c.execute("SELECT received_date FROM repair_orders WHERE repair_id = ?", (repair_id,))
+            row = c.fetchone()
+            
             # Delete repair parts first (foreign key constraint)
             c.execute("DELETE FROM repair_parts WHERE repair_id = ?", (repair_id,))
             
@@ -675,6 +753,9 @@ def delete_repair_order(repair_id: int) -> bool:
             if c.rowcount == 0:
                 print(f"delete_repair_order: No repair order found with ID {repair_id}")
                 return False
+            
+            if row and row[0]:
+                daily_summary.refresh_repair_day(c, row[0])
         
         return True
     except Exception as e:
@@ -824,17 +905,40 @@ def get_top_selling_items():
 # ---------------- CRM & Advanced ----------------
 def get_customer_history(phone: str):
     conn = get_conn(); c = conn.cursor()
-    c.execute("""SELECT repair_id, order_number, device_model, status, received_date, total_estimate
-                 FROM repair_orders WHERE customer_phone LIKE ? ORDER BY received_date DESC""", (f"%{phone}%",))
+    expression = fulltext.match_expression(phone, "customer")
+    if expression:
+        # Full-text index on customer name/phone (see modules.fulltext)
+        c.execute("""SELECT repair_id, order_number, device_model, status, received_date, total_estimate
+                     FROM repair_orders
+                     WHERE repair_id IN (SELECT rowid FROM repairs_fts WHERE repairs_fts MATCH ?)
+                       AND customer_phone LIKE ?
+                     ORDER BY received_date DESC""", (expression, f"%{phone}%"))
+    else:
+        # Too short for the trigram index
+        c.execute("""SELECT repair_id, order_number, device_model, status, received_date, total_estimate
+                     FROM repair_orders WHERE customer_phone LIKE ? ORDER BY received_date DESC""", (f"%{phone}%",))
     rows = c.fetchall(); conn.close()
     return rows
 
-# ===================== CUSTOMER MANAGEMENT =====================
 
-def get_or_create_customer(name, phone, email=None, address=None, customer_type='Both'):
-    """Get existing customer or create new one. Returns customer_id."""
-    conn = get_conn(); c = conn.cursor()
+def search(query: str, sources=None, limit: int = 20):
+    """
+    Ranked full-text search across inventory, customers and repair orders.
+    
+    Args:
+        query: Free text (SKU, name, phone, IMEI, order number, ...; Arabic supported)
+        sources: Optional subset of "inventory", "customers", "repairs"
+        limit: Maximum number of results
     
+    Returns:
+        List of dicts with 'type', 'id', 'title', 'subtitle', 'rank', 'score' (best first)
+    """
+    return fulltext.search(query, sources=sources, limit=limit)
+
+# ===================== CUSTOMER MANAGEMENT =====================
+
+def upsert_customer(c, name, phone, email=None, address=None, customer_type='Both'):
+    """Get or create a customer with the caller's cursor (no commit). Returns customer_id."""
     # Try to find by phone first (most reliable)
     if phone:
         c.execute("SELECT customer_id FROM customers WHERE phone = ?", (phone,))
@@ -846,25 +950,27 @@ def get_or_create_customer(name, phone, email=None, address=None, customer_type=
                         SET name = ?, email = ?, address = ?, customer_type = ?
                         WHERE customer_id = ?""",
                      (name, email, address, customer_type, customer_id))
-            conn.commit(); conn.close()
             return customer_id
     
     # Create new customer
-    from datetime import datetime
     now = datetime.now().isoformat()
     c.execute("""INSERT INTO customers 
                 (name, phone, email, address, customer_type, created_date)
                 VALUES (?, ?, ?, ?, ?, ?)""",
              (name, phone, email, address, customer_type, now))
-    customer_id = c.lastrowid
+    return c.lastrowid
+
+
+def get_or_create_customer(name, phone, email=None, address=None, customer_type='Both'):
+    """Get existing customer or create new one. Returns customer_id."""
+    conn = get_conn(); c = conn.cursor()
+    customer_id = upsert_customer(c, name, phone, email, address, customer_type)
     conn.commit(); conn.close()
     return customer_id
 
 
-def update_customer_purchase(customer_id, amount):
-    """Update customer purchase statistics"""
-    conn = get_conn(); c = conn.cursor()
-    from datetime import datetime
+def record_customer_purchase(c, customer_id, amount):
+    """Add one purchase to a customer's statistics with the caller's cursor (no commit)."""
     now = datetime.now().isoformat()
     c.execute("""UPDATE customers 
                 SET total_purchases = total_purchases + 1,
@@ -872,6 +978,12 @@ def update_customer_purchase(customer_id, amount):
                     last_purchase_date = ?
                 WHERE customer_id = ?""",
              (amount, now, customer_id))
+
+
+def update_customer_purchase(customer_id, amount):
+    """Update customer purchase statistics"""
+    conn = get_conn(); c = conn.cursor()
+    record_customer_purchase(c, customer_id, amount)
     conn.commit(); conn.close()
 
 
@@ -891,23 +1003,30 @@ def update_customer_repair(customer_id):
 def get_all_customers():
     """Get list of all customers from customers table"""
     conn = get_conn(); c = conn.cursor()
-    c.execute("""SELECT customer_id, name, phone, email, address, customer_type,
-                 total_purchases, total_repairs, total_spent,
-                 last_purchase_date, last_repair_date, created_date
-                 FROM customers 
-                 ORDER BY created_date DESC""")
+    c.execute(_CUSTOMERS_SELECT + " ORDER BY created_date DESC")
     rows = c.fetchall(); conn.close()
     return rows
 
 
 def search_customer_by_phone(phone):
-    """Search for customer by phone number"""
+    """Search for customer by phone number (exact match first, then best partial match)"""
     conn = get_conn(); c = conn.cursor()
-    c.execute("""SELECT customer_id, name, phone, email, address, customer_type,
-                 total_purchases, total_repairs, total_spent
-                 FROM customers 
-                 WHERE phone LIKE ?""", (f"%{phone}%",))
-    result = c.fetchone(); conn.close()
+    columns = """customer_id, name, phone, email, address, customer_type,
+                 total_purchases, total_repairs, total_spent"""
+    c.execute(f"SELECT {columns} FROM customers WHERE phone = ?", (phone,))
+    result = c.fetchone()
+    if result is None:
+        expression = fulltext.match_expression(phone, "phone")
+        if expression:
+            c.execute(f"""SELECT {columns} FROM customers
+                          WHERE customer_id = (SELECT rowid FROM customers_fts
+                                               WHERE customers_fts MATCH ? ORDER BY rank LIMIT 1)""",
+                      (expression,))
+        else:
+            # Too short for the trigram index
+            c.execute(f"SELECT {columns} FROM customers WHERE phone LIKE ?", (f"%{phone}%",))
+        result = c.fetchone()
+    conn.close()
     return result
 
 
@@ -974,7 +1093,7 @@ def create_sale(customer_name: str, items: list, customer_id: int = None) -> int
         sale_id if successful, None otherwise
     """
     from modules.validators import validate_required, validate_quantity, validate_price
-    from modules.transaction_manager import transaction
+    from modules.transaction_manager import execute_with_retry
     
     # Validate customer name
     name_result = validate_required(customer_name, "customer_name")
@@ -1008,35 +1127,30 @@ def create_sale(customer_name: str, items: list, customer_id: int = None) -> int
     total_amount = sum([i[1] * i[2] for i in items])
     date_str = datetime.now().isoformat()
     
-    try:
-        with transaction() as conn:
-            c = conn.cursor()
-            
-            # Check inventory availability for all items BEFORE making any changes
-            for item_id, qty, unit_price, cost_price in items:
-                c.execute("SELECT quantity FROM inventory WHERE item_id = ?", (item_id,))
-                row = c.fetchone()
-                if not row:
-                    raise ValueError(f"Item with ID {item_id} not found")
-                
-                available_qty = row[0]
-                if available_qty < qty:
-                    raise ValueError(f"Insufficient inventory for item {item_id}: available={available_qty}, requested={qty}")
-            
-            # All checks passed, now perform the sale
-            # Create sale record with customer_id
-            c.execute("INSERT INTO sales (sale_date, customer_id, customer_name, total_amount) VALUES (?, ?, ?, ?)",
-                      (date_str, customer_id, customer_name, total_amount))
-            sale_id = c.lastrowid
-            
-            # Add items and update inventory
-            for item_id, qty, unit_price, cost_price in items:
-                c.execute("INSERT INTO sale_items (sale_id, item_id, quantity, unit_price, cost_price) VALUES (?, ?, ?, ?, ?)",
-                          (sale_id, item_id, qty, unit_price, cost_price))
-                c.execute("UPDATE inventory SET quantity = quantity - ? WHERE item_id = ?",
-                          (qty, item_id))
+    def record(conn):
+        c = conn.cursor()
+        
+        # Take the stock first with conditional decrements: nothing else is
+        # written if any item is short, even if another terminal sells it too
+        wanted = {}
+        for item_id, qty, unit_price, cost_price in items:
+            wanted[item_id] = wanted.get(item_id, 0) + qty
+        reserve_stock(c, wanted)
+        
+        # Create sale record with customer_id
+        c.execute("INSERT INTO sales (sale_date, customer_id, customer_name, total_amount) VALUES (?, ?, ?, ?)",
+                  (date_str, customer_id, customer_name, total_amount))
+        sale_id = c.lastrowid
         
+        c.executemany("INSERT INTO sale_items (sale_id, item_id, quantity, unit_price, cost_price) VALUES (?, ?, ?, ?, ?)",
+                      [(sale_id, item_id, qty, unit_price, cost_price) for item_id, qty, unit_price, cost_price in items])
+        
+        profit = sum(qty * (unit_price - cost_price) for _, qty, unit_price, cost_price in items)
+        daily_summary.record_sale(c, date_str, total_amount, profit)
         return sale_id
+    
+    try:
+        return execute_with_retry(record)
     except ValueError as ve:
         print(f"create_sale validation error: {ve}")
         return None
@@ -1070,66 +1184,13 @@ def create_sale_detailed(customer_name: str, customer_id: int, customer_phone: s
     Returns:
         sale_id if successful, None otherwise
     """
-    from modules.transaction_manager import transaction
-    from datetime import datetime
-    
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    time_str = datetime.now().strftime("%H:%M:%S")
+    from modules.transaction_manager import execute_with_retry
     
     try:
-        with transaction() as conn:
-            c = conn.cursor()
-            
-            # Check inventory availability for all items BEFORE making any changes
-            for item in items:
-                item_id = item['id']
-                qty = item['qty']
-                
-                c.execute("SELECT quantity FROM inventory WHERE item_id = ?", (item_id,))
-                row = c.fetchone()
-                if not row:
-                    raise ValueError(f"Item with ID {item_id} not found")
-                
-                available_qty = row[0]
-                if available_qty < qty:
-                    raise ValueError(f"Insufficient inventory for item {item_id}: available={available_qty}, requested={qty}")
-            
-            # Create comprehensive sale record
-            c.execute("""
-                INSERT INTO sales (
-                    sale_date, sale_time, customer_id, customer_name, customer_phone,
-                    customer_email, customer_address, subtotal, discount_percent,
-                    discount_amount, total_amount, seller_name, payment_method, notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (date_str, time_str, customer_id, customer_name, customer_phone,
-                  customer_email, customer_address, subtotal, discount_percent,
-                  discount_amount, total_amount, seller_name, payment_method, notes))
-            
-            sale_id = c.lastrowid
-            
-            # Add detailed sale items and update inventory
-            for item in items:
-                item_id = item['id']
-                sku = item['sku']
-                name = item['name']
-                category = item.get('category', 'Unknown')
-                qty = item['qty']
-                unit_price = item['price']
-                cost_price = item['cost']
-                line_total = qty * unit_price
-                profit = (unit_price - cost_price) * qty
-                
-                c.execute("""
-                    INSERT INTO sale_items (
-                        sale_id, item_id, item_sku, item_name, item_category,
-                        quantity, unit_price, cost_price, line_total, profit
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (sale_id, item_id, sku, name, category, qty, unit_price, cost_price, line_total, profit))
-                
-                # Update inventory
-                c.execute("UPDATE inventory SET quantity = quantity - ? WHERE item_id = ?", (qty, item_id))
-        
-        return sale_id
+        return execute_with_retry(
+            lambda conn: insert_sale(conn.cursor(), customer_name, customer_id, customer_phone, customer_email,
+                                     customer_address, items, subtotal, discount_percent, discount_amount,
+                                     total_amount, seller_name, payment_method, notes))
     
     except ValueError as ve:
         print(f"create_sale_detailed validation error: {ve}")
@@ -1137,13 +1198,87 @@ def create_sale_detailed(customer_name: str, customer_id: int, customer_phone: s
     except Exception as e:
         print(f"create_sale_detailed error: {e}")
         return None
-    except Exception as e:
-        print(f"create_sale error: {e}")
-        return None
+
+
+def insert_sale(c, customer_name: str, customer_id: int, customer_phone: str, customer_email: str,
+                customer_address: str, items: list, subtotal: float, discount_percent: float,
+                discount_amount: float, total_amount: float, seller_name: str = "System",
+                payment_method: str = "Cash", notes: str = None, timings: dict = None) -> int:
+    """
+    Write a sale (header, line items, stock decrements, daily totals) with the
+    caller's cursor. The caller owns the transaction and commits or rolls back.
+    
+    Args:
+        c: Cursor of an open transaction
+        timings: Optional dict that receives per-stage durations in ms
+        (others as for create_sale_detailed)
+    
+    Returns:
+        sale_id
+    
+    Raises:
+        ValueError: An item is missing or has too little stock (see reserve_stock)
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    
+    def lap(stage):
+        nonlocal started
+        now = time.perf_counter()
+        timings[stage] = round((now - started) * 1000, 3)
+        started = now
+    
+    now = datetime.now()
+    date_str = now.strftime("%Y-%m-%d")
+    time_str = now.strftime("%H:%M:%S")
+    
+    # Take the stock first: nothing else is written if any item is short
+    # (several cart lines may be the same item, e.g. individually scanned units)
+    wanted = {}
+    for item in items:
+        wanted[item['id']] = wanted.get(item['id'], 0) + item['qty']
+    reserve_stock(c, wanted)
+    lap("stock")
+    
+    # Create comprehensive sale record
+    c.execute("""
+        INSERT INTO sales (
+            sale_date, sale_time, customer_id, customer_name, customer_phone,
+            customer_email, customer_address, subtotal, discount_percent,
+            discount_amount, total_amount, seller_name, payment_method, notes
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (date_str, time_str, customer_id, customer_name, customer_phone,
+          customer_email, customer_address, subtotal, discount_percent,
+          discount_amount, total_amount, seller_name, payment_method, notes))
+    sale_id = c.lastrowid
+    lap("header")
+    
+    # Add detailed sale items
+    lines = []
+    total_profit = 0.0
+    for item in items:
+        qty = item['qty']
+        unit_price = item['price']
+        cost_price = item['cost']
+        profit = (unit_price - cost_price) * qty
+        total_profit += profit
+        lines.append((sale_id, item['id'], item['sku'], item['name'], item.get('category', 'Unknown'),
+                      qty, unit_price, cost_price, qty * unit_price, profit))
+    c.executemany("""
+        INSERT INTO sale_items (
+            sale_id, item_id, item_sku, item_name, item_category,
+            quantity, unit_price, cost_price, line_total, profit
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, lines)
+    lap("line_items")
+    
+    daily_summary.record_sale(c, date_str, total_amount, total_profit, discount_amount)
+    lap("daily_summary")
+    return sale_id
 
 def get_sales_history():
     conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT sale_id, sale_date, customer_name, total_amount FROM sales ORDER BY sale_date DESC")
+    c.execute(_SALES_SELECT + " ORDER BY sale_date DESC")
     rows = c.fetchall(); conn.close()
     return rows
 
@@ -1158,77 +1293,93 @@ def get_sale_details(sale_id: int):
     conn.close()
     return sale_info, sale_items
 
-# --- Schema Check ---
-def check_schema():
+# --- Delta queries (incremental refresh) ---
+# The row version is the change journal sequence number (modules.change_log):
+# the journal triggers stamp every insert, update and delete. A caller keeps
+# the version returned with its last load and asks only for what changed.
+
+def get_data_seq() -> int:
+    """Current row version; pass it to a *_changed_since call later."""
+    return change_log.get_last_seq()
+
+
+def _changed_since(table: str, key: str, select_sql: str, version: int) -> dict:
     conn = get_conn(); c = conn.cursor()
     try:
-        def get_columns(table_name: str):
-            c.execute(f"PRAGMA table_info({table_name})")
-            return [col[1] for col in c.fetchall()]
-
-        def rename_column(table_name: str, old: str, new: str):
-            try:
-                c.execute(f"ALTER TABLE {table_name} RENAME COLUMN {old} TO {new}")
-            except Exception as err:
-                print(f"rename_column {table_name}.{old}->{new} failed:", err)
-
-        # Check for 'cost_price' in repair_parts
-        cols = get_columns("repair_parts")
-        if 'cost_price' not in cols:
-            print("Migrating: Adding cost_price to repair_parts")
-            c.execute("ALTER TABLE repair_parts ADD COLUMN cost_price REAL DEFAULT 0.0")
-        
-        # Check for 'cost_price' in sale_items
-        sale_item_cols = get_columns("sale_items")
-        if 'cost_price' not in sale_item_cols:
-            print("Migrating: Adding cost_price to sale_items")
-            c.execute("ALTER TABLE sale_items ADD COLUMN cost_price REAL DEFAULT 0.0")
-
-        # Ensure quantity/unit_price column names align with code
-        sale_item_cols = get_columns("sale_items")
-        if 'quantity' not in sale_item_cols:
-            if 'qty' in sale_item_cols:
-                print("Migrating: Renaming sale_items.qty -> quantity")
-                rename_column("sale_items", "qty", "quantity")
-            else:
-                print("Migrating: Adding quantity to sale_items")
-                c.execute("ALTER TABLE sale_items ADD COLUMN quantity INTEGER DEFAULT 0")
-
-        sale_item_cols = get_columns("sale_items")
-        if 'unit_price' not in sale_item_cols:
-            if 'price' in sale_item_cols:
-                print("Migrating: Renaming sale_items.price -> unit_price")
-                rename_column("sale_items", "price", "unit_price")
-            else:
-                print("Migrating: Adding unit_price to sale_items")
-                c.execute("ALTER TABLE sale_items ADD COLUMN unit_price REAL DEFAULT 0.0")
-
-        # Ensure sales table includes customer_name & total_amount
-        sales_cols = get_columns("sales")
-        if 'customer_name' not in sales_cols:
-            print("Migrating: Adding customer_name to sales")
-            c.execute("ALTER TABLE sales ADD COLUMN customer_name TEXT")
-
-        sales_cols = get_columns("sales")
-        if 'total_amount' not in sales_cols:
-            if 'total' in sales_cols:
-                print("Migrating: Renaming sales.total -> total_amount")
-                rename_column("sales", "total", "total_amount")
-            else:
-                print("Migrating: Adding total_amount to sales")
-                c.execute("ALTER TABLE sales ADD COLUMN total_amount REAL DEFAULT 0.0")
-
-        # Check for 'category' in inventory
-        inv_cols = get_columns("inventory")
-        if 'category' not in inv_cols:
-            print("Migrating: Adding category to inventory")
-            c.execute("ALTER TABLE inventory ADD COLUMN category TEXT DEFAULT 'General'")
-        
-        conn.commit()
-    except Exception as e:
-        print("Schema check error:", e)
+        # One read transaction: the journal range and the rows come from the same snapshot
+        c.execute("BEGIN")
+        ids, newest, complete = change_log.changed_ids(c, table, version)
+        rows = []
+        if complete and ids:
+            id_list = sorted(ids)
+            for start in range(0, len(id_list), 500):
+                chunk = id_list[start:start + 500]
+                c.execute(f"{select_sql} WHERE {key} IN ({','.join('?' * len(chunk))})", chunk)
+                rows.extend(c.fetchall())
     finally:
+        conn.rollback()
         conn.close()
+    found = {row[0] for row in rows}
+    return {'version': newest, 'upserted': rows,
+            'deleted': sorted(ids - found) if complete else [], 'complete': complete}
+
+
+@served(read=True)
+def inventory_changed_since(version: int) -> dict:
+    """
+    Inventory rows inserted, updated or deleted after ``version``.
+
+    Returns:
+        Dictionary with 'version' (pass to the next call), 'upserted' (rows
+        shaped like get_inventory), 'deleted' (item ids) and 'complete'.
+        When 'complete' is False the journal no longer covers ``version``
+        and the caller must reload everything with get_inventory.
+    """
+    return _changed_since("inventory", "item_id", _INVENTORY_SELECT, version)
+
+
+def repairs_changed_since(version: int) -> dict:
+    """Repair orders changed after ``version`` (rows shaped like get_repairs); see inventory_changed_since."""
+    return _changed_since("repair_orders", "repair_id", _REPAIRS_SELECT, version)
+
+
+def customers_changed_since(version: int) -> dict:
+    """Customers changed after ``version`` (rows shaped like get_all_customers); see inventory_changed_since."""
+    return _changed_since("customers", "customer_id", _CUSTOMERS_SELECT, version)
 
-# Run schema check on import
-check_schema()
+
+def sales_changed_since(version: int) -> dict:
+    """Sales changed after ``version`` (rows shaped like get_sales_history); see inventory_changed_since."""
+    return _changed_since("sales", "sale_id", _SALES_SELECT, version)
+
+
+def apply_changes(rows, delta: dict, key_index: int = 0, sort_key=None, reverse: bool = False):
+    """
+    Patch a cached row list with a *_changed_since result.
+
+    Updated rows keep their place, new rows are appended and deleted rows are
+    dropped. Pass ``sort_key``/``reverse`` to restore the list's order.
+
+    Returns:
+        The patched list, or None if the delta is incomplete (reload instead)
+    """
+    if not delta.get('complete'):
+        return None
+    upserted = {row[key_index]: row for row in delta['upserted']}
+    gone = set(delta['deleted'])
+    patched = []
+    for row in rows:
+        key = row[key_index]
+        if key in gone:
+            continue
+        patched.append(upserted.pop(key, row))
+    patched.extend(upserted.values())
+    if sort_key is not None:
+        patched.sort(key=sort_key, reverse=reverse)
+    return patched
+
+# --- Schema Check ---
+def check_schema():
+    """Bring the schema up to date. Kept for older callers; see modules.migrations."""
+    from modules.migrations import migrate
+    return migrate()
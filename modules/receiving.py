@@ -0,0 +1,336 @@
+# modules/receiving.py
+"""
+Goods receiving: post a supplier delivery in one transaction.
+
+A receiving document has a supplier, an optional reference (delivery note
+or invoice number) and lines of (item, quantity, unit cost, serials).
+``post_receipt`` validates every line, then in a single write transaction
+records the document, increases stock, updates buy prices, registers the
+serials/IMEIs as available units and appends to ``cost_history``. Writes
+are batched with executemany, so a 200-line delivery is a handful of
+statements and one commit. If any line is invalid nothing is written and
+the problems are reported per line.
+
+``cost_history`` keeps the unit cost of every receipt line, for stock
+valuation (see get_cost_history).
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from modules.barcode_manager import BarcodeStatus, check_unit_barcode
+from modules.db import get_conn
+from modules.logger import log
+from modules.service_routing import served
+
+# Buy price after a receipt: the latest unit cost, or the weighted average
+# of the stock on hand and the received units
+COST_LAST = "last"
+COST_AVERAGE = "average"
+
+# Values per IN (...) list when looking up items and serials
+_IN_CHUNK = 500
+
+
+def create_tables(c):
+    """Create the receiving tables (called from the schema migration)."""
+    c.execute("""CREATE TABLE IF NOT EXISTS receiving_documents (
+                    receipt_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    supplier TEXT NOT NULL,
+                    reference TEXT,
+                    received_at TEXT NOT NULL,
+                    created_by TEXT,
+                    line_count INTEGER,
+                    unit_count INTEGER,
+                    total_cost REAL,
+                    notes TEXT
+                )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS receiving_lines (
+                    line_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    receipt_id INTEGER NOT NULL,
+                    line_no INTEGER NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    unit_cost REAL NOT NULL,
+                    serial_count INTEGER DEFAULT 0,
+                    FOREIGN KEY(receipt_id) REFERENCES receiving_documents(receipt_id),
+                    FOREIGN KEY(item_id) REFERENCES inventory(item_id)
+                )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS cost_history (
+                    cost_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    item_id INTEGER NOT NULL,
+                    receipt_id INTEGER,
+                    quantity INTEGER NOT NULL,
+                    unit_cost REAL NOT NULL,
+                    previous_buy_price REAL,
+                    recorded_at TEXT NOT NULL,
+                    FOREIGN KEY(item_id) REFERENCES inventory(item_id),
+                    FOREIGN KEY(receipt_id) REFERENCES receiving_documents(receipt_id)
+                )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_receiving_lines_receipt ON receiving_lines(receipt_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cost_history_item ON cost_history(item_id, recorded_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_receiving_documents_received ON receiving_documents(received_at)")
+
+
+class ReceiptRejected(ValueError):
+    """A receiving document failed validation; ``errors`` lists (line_no, message)"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid line(s)")
+        self.errors = errors
+
+
+def _in_chunks(values):
+    values = list(values)
+    for start in range(0, len(values), _IN_CHUNK):
+        chunk = values[start:start + _IN_CHUNK]
+        yield chunk, ",".join("?" * len(chunk))
+
+
+def _as_item_id(value) -> Optional[int]:
+    """An item id given as int or text (forms, CSV), or None if it is not an integer."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _normalize_lines(lines, imei):
+    """Check each line on its own; returns (parsed lines, errors)."""
+    parsed, errors = [], []
+    seen_serials = {}
+    for line_no, line in enumerate(lines, 1):
+        serials = [str(s).strip() for s in (line.get('serials') or []) if str(s).strip()]
+        try:
+            quantity = int(line.get('quantity') or len(serials))
+            unit_cost = float(line.get('unit_cost'))
+        except (TypeError, ValueError):
+            errors.append((line_no, "quantity and unit cost must be numbers"))
+            continue
+        item_id, sku = line.get('item_id'), (str(line.get('sku') or '').strip() or None)
+        problems = []
+        if item_id is not None and str(item_id).strip() != "":
+            item_id = _as_item_id(item_id)
+            if item_id is None:
+                problems.append(f"item id {line.get('item_id')!r} is not a whole number")
+        else:
+            item_id = None
+            if not sku:
+                problems.append("no item (item_id or sku)")
+        if quantity <= 0:
+            problems.append("quantity must be positive")
+        if unit_cost < 0:
+            problems.append("unit cost cannot be negative")
+        if serials and len(serials) != quantity:
+            problems.append(f"{len(serials)} serial(s) for a quantity of {quantity}")
+        for serial in serials:
+            reason = check_unit_barcode(serial, imei)
+            if reason:
+                problems.append(f"{serial}: {reason}")
+            elif serial in seen_serials:
+                problems.append(f"{serial}: also on line {seen_serials[serial]}")
+            else:
+                seen_serials[serial] = line_no
+        if problems:
+            errors.extend((line_no, problem) for problem in problems)
+        else:
+            parsed.append({'line_no': line_no, 'item_id': item_id, 'sku': sku,
+                           'quantity': quantity, 'unit_cost': unit_cost, 'serials': serials})
+    return parsed, errors
+
+
+def _post(conn, supplier, reference, lines, user, cost_method, notes, timings):
+    c = conn.cursor()
+    stage = time.perf_counter()
+    errors = []
+
+    # Items: one lookup per IN list; current stock and buy price for costing
+    items = {}     # item_id -> [quantity, buy_price]
+    by_sku = {}
+    ids = {line['item_id'] for line in lines if not line['sku']}
+    skus = {line['sku'] for line in lines if line['sku']}
+    for chunk, marks in _in_chunks(ids):
+        c.execute(f"SELECT item_id, quantity, buy_price FROM inventory WHERE item_id IN ({marks})", chunk)
+        items.update((item_id, [int(qty or 0), float(buy or 0)]) for item_id, qty, buy in c.fetchall())
+    for chunk, marks in _in_chunks(skus):
+        c.execute(f"SELECT sku, item_id, quantity, buy_price FROM inventory WHERE sku IN ({marks})", chunk)
+        for sku, item_id, qty, buy in c.fetchall():
+            by_sku[sku] = item_id
+            items[item_id] = [int(qty or 0), float(buy or 0)]
+    for line in lines:
+        if line['sku']:
+            line['item_id'] = by_sku.get(line['sku'])
+        if line['item_id'] not in items:
+            errors.append((line['line_no'], f"unknown item {line['sku'] or line['item_id']}"))
+
+    serial_lines = {serial: line['line_no'] for line in lines for serial in line['serials']}
+    for chunk, marks in _in_chunks(serial_lines):
+        c.execute(f"SELECT barcode FROM product_barcodes WHERE barcode IN ({marks})", chunk)
+        errors.extend((serial_lines[row[0]], f"{row[0]}: already registered") for row in c.fetchall())
+    if errors:
+        raise ReceiptRejected(sorted(errors))
+    timings['validate'] = round((time.perf_counter() - stage) * 1000, 2)
+
+    stage = time.perf_counter()
+    now = datetime.now().isoformat()
+    units = sum(line['quantity'] for line in lines)
+    total_cost = round(sum(line['quantity'] * line['unit_cost'] for line in lines), 2)
+    c.execute("""INSERT INTO receiving_documents
+                 (supplier, reference, received_at, created_by, line_count, unit_count, total_cost, notes)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+              (supplier, reference, now, user, len(lines), units, total_cost, notes))
+    receipt_id = c.lastrowid
+    c.executemany("""INSERT INTO receiving_lines (receipt_id, line_no, item_id, quantity, unit_cost, serial_count)
+                     VALUES (?, ?, ?, ?, ?, ?)""",
+                  [(receipt_id, line['line_no'], line['item_id'], line['quantity'], line['unit_cost'],
+                    len(line['serials'])) for line in lines])
+
+    # Lines of the same item are applied in order, so costs chain correctly
+    history = []
+    for line in lines:
+        on_hand, buy_price = items[line['item_id']]
+        if cost_method == COST_AVERAGE and on_hand > 0:
+            new_price = (on_hand * buy_price + line['quantity'] * line['unit_cost']) / (on_hand + line['quantity'])
+        else:
+            new_price = line['unit_cost']
+        history.append((line['item_id'], receipt_id, line['quantity'], line['unit_cost'], buy_price, now))
+        items[line['item_id']] = [on_hand + line['quantity'], round(new_price, 2)]
+    received = {}
+    for line in lines:
+        received[line['item_id']] = received.get(line['item_id'], 0) + line['quantity']
+    c.executemany("UPDATE inventory SET quantity = quantity + ?, buy_price = ? WHERE item_id = ?",
+                  [(qty, items[item_id][1], item_id) for item_id, qty in received.items()])
+    c.executemany("""INSERT INTO cost_history
+                     (item_id, receipt_id, quantity, unit_cost, previous_buy_price, recorded_at)
+                     VALUES (?, ?, ?, ?, ?, ?)""", history)
+    c.executemany("""INSERT INTO product_barcodes (item_id, barcode, status, added_date, notes)
+                     VALUES (?, ?, ?, ?, ?)""",
+                  [(line['item_id'], serial, BarcodeStatus.AVAILABLE, now, f"Receipt #{receipt_id}")
+                   for line in lines for serial in line['serials']])
+    from modules.audit_logger import record_action
+    record_action(c, user, "CREATE", "receiving", receipt_id,
+                  f"Received {units} unit(s) on {len(lines)} line(s) from {supplier}"
+                  + (f" (ref {reference})" if reference else ""),
+                  new_value=f"{total_cost:.2f}")
+    timings['write'] = round((time.perf_counter() - stage) * 1000, 2)
+    return {'receipt_id': receipt_id, 'lines': len(lines), 'units': units,
+            'serials': len(serial_lines), 'total_cost': total_cost, 'items': sorted(received)}
+
+
+def post_receipt(supplier: str, lines: List[Dict], reference: str = None, user: str = None,
+                 cost_method: str = COST_LAST, imei: Optional[bool] = None, notes: str = None) -> Dict:
+    """
+    Post a receiving document: stock, buy prices, serials and cost history in one commit.
+
+    Args:
+        supplier: Supplier name
+        lines: Dicts with item_id or sku, quantity, unit_cost and optionally
+            serials (list of barcodes/IMEIs; their count must match quantity,
+            which defaults to it)
+        reference: Delivery note / invoice number
+        user: Who received the goods
+        cost_method: COST_LAST (buy price = latest unit cost) or COST_AVERAGE
+            (weighted average with the stock on hand)
+        imei: IMEI check of serials, as for barcode_manager.check_unit_barcode
+        notes: Free text stored on the document
+
+    Returns:
+        Dict with receipt_id (None if nothing was posted), errors (list of
+        (line number, message); line numbers count from 1) and, when
+        posted: lines, units, serials, total_cost, items and timings (ms)
+    """
+    supplier = (supplier or "").strip()
+    if not supplier:
+        return {'receipt_id': None, 'errors': [(0, "supplier is required")]}
+    if cost_method not in (COST_LAST, COST_AVERAGE):
+        return {'receipt_id': None, 'errors': [(0, f"unknown cost method {cost_method}")]}
+    parsed, errors = _normalize_lines(lines, imei)
+    if not parsed and not errors:
+        errors = [(0, "the document has no lines")]
+    if errors:
+        return {'receipt_id': None, 'errors': errors}
+
+    result = save_receipt(supplier, reference, parsed, user or "System", cost_method, notes)
+    if result['receipt_id'] is not None:
+        from modules.event_manager import event_manager
+        event_manager.notify('inventory_changed', {'action': 'receiving', 'receipt': result['receipt_id']},
+                             ids=result['items'])
+    return result
+
+
+@served
+def save_receipt(supplier: str, reference: Optional[str], lines: List[Dict], user: str,
+                 cost_method: str, notes: Optional[str]) -> Dict:
+    """
+    Write checked receipt lines (see post_receipt) in one transaction.
+
+    Checks against the database (unknown items, serials already registered)
+    happen inside the transaction; if any fails nothing is written.
+    """
+    from modules.transaction_manager import execute_with_retry
+
+    start = time.perf_counter()
+    timings = {}
+    try:
+        result = execute_with_retry(_post, supplier, reference, lines, user, cost_method, notes, timings)
+    except ReceiptRejected as e:
+        return {'receipt_id': None, 'errors': e.errors}
+    except Exception as e:
+        print(f"Error posting receipt: {e}")
+        return {'receipt_id': None, 'errors': [(0, str(e))]}
+    timings['total'] = round((time.perf_counter() - start) * 1000, 2)
+    result.update(errors=[], timings=timings)
+    log.info(f"Receipt #{result['receipt_id']} from {supplier}: {result['units']} unit(s), "
+             f"{result['lines']} line(s) in {timings['total']} ms")
+    return result
+
+
+@served(read=True)
+def get_receipts(limit: int = 100) -> List[tuple]:
+    """
+    Latest receiving documents.
+
+    Returns:
+        List of tuples: (receipt_id, supplier, reference, received_at,
+        created_by, line_count, unit_count, total_cost)
+    """
+    conn = get_conn()
+    try:
+        return conn.execute("""SELECT receipt_id, supplier, reference, received_at, created_by,
+                                      line_count, unit_count, total_cost
+                               FROM receiving_documents ORDER BY receipt_id DESC LIMIT ?""",
+                            (limit,)).fetchall()
+    except Exception as e:
+        print(f"Error getting receipts: {e}")
+        return []
+    finally:
+        conn.close()
+
+
+@served(read=True)
+def get_cost_history(item_id: int) -> List[tuple]:
+    """
+    Unit costs an item was received at, oldest first.
+
+    Returns:
+        List of tuples: (recorded_at, quantity, unit_cost, previous_buy_price,
+        receipt_id, supplier)
+    """
+    conn = get_conn()
+    try:
+        return conn.execute("""SELECT h.recorded_at, h.quantity, h.unit_cost, h.previous_buy_price,
+                                      h.receipt_id, d.supplier
+                               FROM cost_history h
+                               LEFT JOIN receiving_documents d ON d.receipt_id = h.receipt_id
+                               WHERE h.item_id = ?
+                               ORDER BY h.recorded_at, h.cost_id""", (item_id,)).fetchall()
+    except Exception as e:
+        print(f"Error getting cost history: {e}")
+        return []
+    finally:
+        conn.close()
@@ -13,17 +13,14 @@ from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 from reportlab.pdfgen import canvas
 from datetime import datetime, timedelta
-import sqlite3
 from pathlib import Path
 
+from modules.financial_reports import get_sales_report
+
 class ReportPrinter:
     """Generates printable PDF reports"""
     
-    def __init__(self, db_path=None):
-        if db_path is None:
-            # Get absolute path to shop.db in project root
-            db_path = Path(__file__).resolve().parents[2] / "shop.db"
-        self.db_path = Path(db_path)
+    def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
     
@@ -56,10 +53,6 @@ class ReportPrinter:
             spaceAfter=6
         )
     
-    def get_db_conn(self):
-        """Get database connection"""
-        return sqlite3.connect(str(self.db_path))
-    
     def generate_daily_report(self, date=None, output_path=None):
         """Generate daily sales report"""
         if date is None:
@@ -79,33 +72,14 @@ class ReportPrinter:
         story.append(Paragraph(f"Date: {date}", self.normal_style))
         story.append(Spacer(1, 0.3*inch))
         
-        # Get data
-        conn = self.get_db_conn()
-        c = conn.cursor()
-        
-        # Summary statistics
-        c.execute("""
-            SELECT 
-                COUNT(*) as total_sales,
-                SUM(total_amount) as revenue,
-                SUM(subtotal - total_amount) as total_discount
-            FROM sales 
-            WHERE sale_date = ?
-        """, (date,))
-        stats = c.fetchone()
-        
-        total_sales = stats[0] or 0
-        revenue = stats[1] or 0.0
-        total_discount = stats[2] or 0.0
-        
-        # Get profit
-        c.execute("""
-            SELECT SUM(profit) 
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.sale_id
-            WHERE s.sale_date = ?
-        """, (date,))
-        profit = c.fetchone()[0] or 0.0
+        # Get data (totals from the daily rollup table, one row per sale)
+        report = get_sales_report(date, date)
+        stats = report['totals']
+        
+        total_sales = stats['transaction_count']
+        revenue = stats['revenue']
+        total_discount = stats['discount']
+        profit = stats['profit']
         
         # Summary table
         story.append(Paragraph("Summary", self.heading_style))
@@ -136,26 +110,9 @@ class ReportPrinter:
         # Sales details
         story.append(Paragraph("Sales Details", self.heading_style))
         
-        c.execute("""
-            SELECT 
-                s.sale_id,
-                s.sale_time,
-                s.customer_name,
-                COUNT(si.id) as item_count,
-                s.subtotal,
-                s.discount_amount,
-                s.total_amount,
-                SUM(si.profit) as total_profit
-            FROM sales s
-            LEFT JOIN sale_items si ON s.sale_id = si.sale_id
-            WHERE s.sale_date = ?
-            GROUP BY s.sale_id
-            ORDER BY s.sale_time DESC
-        """, (date,))
-        
         sales_data = [['Sale #', 'Time', 'Customer', 'Items', 'Subtotal', 'Discount', 'Total', 'Profit']]
         
-        for row in c.fetchall():
+        for row in report['rows']:
             sales_data.append([
                 str(row[0]),
                 row[1] or "N/A",
@@ -167,8 +124,6 @@ class ReportPrinter:
                 f'{row[7]:,.2f}' if row[7] else '0.00'
             ])
         
-        conn.close()
-        
         if len(sales_data) > 1:
             sales_table = Table(sales_data, colWidths=[0.6*inch, 0.8*inch, 1.2*inch, 0.6*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch])
             sales_table.setStyle(TableStyle([
@@ -218,33 +173,14 @@ class ReportPrinter:
         story.append(Paragraph(f"Week: {start_date} to {end_date}", self.normal_style))
         story.append(Spacer(1, 0.3*inch))
         
-        # Get data
-        conn = self.get_db_conn()
-        c = conn.cursor()
-        
-        # Summary statistics
-        c.execute("""
-            SELECT 
-                COUNT(*) as total_sales,
-                SUM(total_amount) as revenue,
-                SUM(subtotal - total_amount) as total_discount
-            FROM sales 
-            WHERE sale_date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        stats = c.fetchone()
-        
-        total_sales = stats[0] or 0
-        revenue = stats[1] or 0.0
-        total_discount = stats[2] or 0.0
-        
-        # Get profit
-        c.execute("""
-            SELECT SUM(profit) 
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.sale_id
-            WHERE s.sale_date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        profit = c.fetchone()[0] or 0.0
+        # Get data (from the daily rollup table)
+        report = get_sales_report(start_date, end_date, detail="days")
+        stats = report['totals']
+        
+        total_sales = stats['transaction_count']
+        revenue = stats['revenue']
+        total_discount = stats['discount']
+        profit = stats['profit']
         
         # Summary table
         story.append(Paragraph("Weekly Summary", self.heading_style))
@@ -277,31 +213,16 @@ class ReportPrinter:
         # Daily breakdown
         story.append(Paragraph("Daily Breakdown", self.heading_style))
         
-        c.execute("""
-            SELECT 
-                sale_date,
-                COUNT(*) as sales_count,
-                SUM(total_amount) as daily_revenue,
-                SUM(si.profit) as daily_profit
-            FROM sales s
-            LEFT JOIN sale_items si ON s.sale_id = si.sale_id
-            WHERE s.sale_date BETWEEN ? AND ?
-            GROUP BY sale_date
-            ORDER BY sale_date
-        """, (start_date, end_date))
-        
         daily_data = [['Date', 'Sales', 'Revenue', 'Profit']]
         
-        for row in c.fetchall():
+        for day, count, day_revenue, _discount, day_profit in report['rows']:
             daily_data.append([
-                row[0],
-                str(row[1]),
-                f'EGP {row[2]:,.2f}' if row[2] else 'EGP 0.00',
-                f'EGP {row[3]:,.2f}' if row[3] else 'EGP 0.00'
+                day,
+                str(count),
+                f'EGP {day_revenue:,.2f}' if day_revenue else 'EGP 0.00',
+                f'EGP {day_profit:,.2f}' if day_profit else 'EGP 0.00'
             ])
         
-        conn.close()
-        
         if len(daily_data) > 1:
             daily_table = Table(daily_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
             daily_table.setStyle(TableStyle([
@@ -359,33 +280,14 @@ class ReportPrinter:
         story.append(Paragraph(f"Month: {month_name}", self.normal_style))
         story.append(Spacer(1, 0.3*inch))
         
-        # Get data
-        conn = self.get_db_conn()
-        c = conn.cursor()
-        
-        # Summary statistics
-        c.execute("""
-            SELECT 
-                COUNT(*) as total_sales,
-                SUM(total_amount) as revenue,
-                SUM(subtotal - total_amount) as total_discount
-            FROM sales 
-            WHERE sale_date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        stats = c.fetchone()
-        
-        total_sales = stats[0] or 0
-        revenue = stats[1] or 0.0
-        total_discount = stats[2] or 0.0
-        
-        # Get profit
-        c.execute("""
-            SELECT SUM(profit) 
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.sale_id
-            WHERE s.sale_date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        profit = c.fetchone()[0] or 0.0
+        # Get data (from the daily rollup table)
+        report = get_sales_report(start_date, end_date, detail="weeks")
+        stats = report['totals']
+        
+        total_sales = stats['transaction_count']
+        revenue = stats['revenue']
+        total_discount = stats['discount']
+        profit = stats['profit']
         
         # Get number of days in month
         days_in_month = (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days + 1
@@ -422,24 +324,9 @@ class ReportPrinter:
         # Weekly breakdown
         story.append(Paragraph("Weekly Breakdown", self.heading_style))
         
-        c.execute("""
-            SELECT 
-                strftime('%W', sale_date) as week_num,
-                MIN(sale_date) as week_start,
-                MAX(sale_date) as week_end,
-                COUNT(*) as sales_count,
-                SUM(total_amount) as weekly_revenue,
-                SUM(si.profit) as weekly_profit
-            FROM sales s
-            LEFT JOIN sale_items si ON s.sale_id = si.sale_id
-            WHERE s.sale_date BETWEEN ? AND ?
-            GROUP BY week_num
-            ORDER BY week_start
-        """, (start_date, end_date))
-        
         weekly_data = [['Week', 'Period', 'Sales', 'Revenue', 'Profit']]
         
-        for idx, row in enumerate(c.fetchall(), 1):
+        for idx, row in enumerate(report['rows'], 1):
             weekly_data.append([
                 f'Week {idx}',
                 f'{row[1]} to {row[2]}',
@@ -448,8 +335,6 @@ class ReportPrinter:
                 f'EGP {row[5]:,.2f}' if row[5] else 'EGP 0.00'
             ])
         
-        conn.close()
-        
         if len(weekly_data) > 1:
             weekly_table = Table(weekly_data, colWidths=[1*inch, 2*inch, 1*inch, 1.5*inch, 1.5*inch])
             weekly_table.setStyle(TableStyle([
@@ -0,0 +1,242 @@
+# modules/scan_resolver.py
+"""
+Hot-path barcode resolution for the POS scanner.
+
+A scan is resolved to the item it belongs to from an in-memory LRU cache
+of barcode -> ScanHit (item, unit status, price). On a miss one query
+looks the code up as a unit barcode (product_barcodes), a product barcode
+(inventory.barcode) and a SKU; each branch of the UNION uses its own
+index, unlike ``sku = ? OR barcode = ?``. ``resolve_many`` does the same
+for a whole burst of scans with one ``IN (...)`` query.
+
+The cache follows the change journal: when the database changed
+(db.get_data_version), entries of items whose inventory or barcode rows
+were touched are evicted, and codes that were not found are forgotten.
+If the journal no longer covers the cache, or the database file was
+switched, the whole cache is dropped.
+
+Usage:
+    hit = get_scan_resolver().resolve(code)
+    if hit and hit.sellable: ...
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from modules import change_log
+from modules.db import get_conn, get_data_version
+from modules.logger import log
+from modules.service_routing import served
+
+# Barcodes kept in the cache
+CACHE_SIZE = 4096
+
+# Journaled tables whose changes make cached hits stale
+_TABLES = ("inventory", "product_barcodes")
+
+# Codes looked up per query (three IN lists stay below SQLite's variable limit)
+BATCH_SIZE = 300
+
+# Unit barcodes rank first, then product barcodes, then SKUs
+_LOOKUP_SQL = """
+    SELECT 0 AS rank, pb.barcode, pb.item_id, pb.serial_number, pb.status, i.name, i.sell_price, i.sku, 1
+    FROM product_barcodes pb JOIN inventory i ON i.item_id = pb.item_id
+    WHERE pb.barcode IN ({marks})
+    UNION ALL
+    SELECT 1, barcode, item_id, NULL, 'available', name, sell_price, sku, 0
+    FROM inventory WHERE barcode IN ({marks})
+    UNION ALL
+    SELECT 2, sku, item_id, NULL, 'available', name, sell_price, sku, 0
+    FROM inventory WHERE sku IN ({marks})
+"""
+
+
+class ScanHit(NamedTuple):
+    """What a scanned code refers to"""
+    item_id: int
+    barcode: str
+    serial: Optional[str]
+    status: str          # unit status (see barcode_manager.BarcodeStatus); 'available' for products
+    name: str
+    price: float
+    sku: str
+    unit: bool           # True: one tracked unit (product_barcodes); False: product barcode/SKU
+
+    @property
+    def sellable(self) -> bool:
+        return self.status == 'available'
+
+
+@served(read=True)
+def lookup_rows(codes) -> list:
+    """Database rows for ``codes``: (rank, code, item_id, serial, status, name, price, sku, unit)."""
+    rows = []
+    conn = get_conn()
+    try:
+        for start in range(0, len(codes), BATCH_SIZE):
+            chunk = codes[start:start + BATCH_SIZE]
+            sql = _LOOKUP_SQL.format(marks=",".join("?" * len(chunk)))
+            rows.extend(conn.execute(sql, chunk * 3).fetchall())
+    finally:
+        conn.close()
+    return rows
+
+
+def _lookup(codes):
+    """Look ``codes`` up in the database; returns {code: ScanHit} for the ones found."""
+    best = {}
+    for rank, code, item_id, serial, status, name, price, sku, unit in lookup_rows(codes):
+        code = str(code)
+        if code not in best or rank < best[code][0]:
+            best[code] = (rank, ScanHit(item_id, code, serial, status, name,
+                                        float(price or 0), sku, bool(unit)))
+    return {code: hit for code, (_, hit) in best.items()}
+
+
+class ScanResolver:
+    """LRU cache of barcode -> ScanHit kept current through the change journal"""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._hits = OrderedDict()   # barcode -> ScanHit
+        self._missing = set()        # codes known not to exist
+        self._version = None
+        self._seq = None
+        self.stats = {"scans": 0, "hits": 0, "misses": 0, "evicted": 0, "resets": 0,
+                      "lookup_ms": 0.0, "scan_to_cart": 0, "scan_to_cart_ms": 0.0,
+                      "scan_to_cart_max_ms": 0.0, "scan_to_cart_last_ms": 0.0}
+
+    def _sync(self):
+        """Evict entries the database changed since the last scan (lock held)."""
+        version = get_data_version()
+        if version == self._version:
+            return
+        if self._version is None or version[0] != self._version[0] or self._seq is None:
+            self._reset(change_log.get_last_seq())
+        else:
+            try:
+                changes, newest, complete = change_log.read_since(self._seq)
+            except Exception as e:
+                log.warning(f"Scan cache journal read failed, clearing: {e}")
+                changes, newest, complete = {}, change_log.get_last_seq(), False
+            if not complete:
+                self._reset(newest)
+            else:
+                items = set()
+                for table in _TABLES:
+                    items |= changes.get(table, set())
+                if items:
+                    stale = [code for code, hit in self._hits.items() if hit.item_id in items]
+                    for code in stale:
+                        del self._hits[code]
+                    self.stats["evicted"] += len(stale)
+                    # A new barcode or SKU may now exist for a code that was missing
+                    self._missing.clear()
+                self._seq = newest
+        self._version = version
+
+    def _reset(self, seq):
+        self._hits.clear()
+        self._missing.clear()
+        self._seq = seq
+        self.stats["resets"] += 1
+
+    def resolve(self, code: str) -> Optional[ScanHit]:
+        """
+        Return what ``code`` refers to, or None if it is unknown.
+
+        Raises sqlite3.Error if the database cannot be read.
+        """
+        code = (code or "").strip()
+        if not code:
+            return None
+        return self.resolve_many([code])[code]
+
+    def resolve_many(self, codes) -> dict:
+        """
+        Resolve a burst of scans at once: cached codes from memory, the rest
+        with one database query.
+
+        Returns:
+            {code: ScanHit or None} for every distinct non-empty code
+        """
+        codes = [code for code in dict.fromkeys((c or "").strip() for c in codes) if code]
+        results = {}
+        with self._lock:
+            self.stats["scans"] += len(codes)
+            self._sync()
+            misses = []
+            for code in codes:
+                hit = self._hits.get(code)
+                if hit is not None:
+                    self._hits.move_to_end(code)
+                    self.stats["hits"] += 1
+                    results[code] = hit
+                elif code in self._missing:
+                    self.stats["hits"] += 1
+                    results[code] = None
+                else:
+                    misses.append(code)
+            if not misses:
+                return results
+
+            start = time.perf_counter()
+            found = _lookup(misses)
+            self.stats["misses"] += len(misses)
+            self.stats["lookup_ms"] += (time.perf_counter() - start) * 1000
+
+            for code in misses:
+                hit = found.get(code)
+                results[code] = hit
+                if hit is None:
+                    self._missing.add(code)
+                    continue
+                self._hits[code] = hit
+                if len(self._hits) > self.size:
+                    self._hits.popitem(last=False)
+            return results
+
+    def record_scan_to_cart(self, ms: float):
+        """Record how long a scan took from the scanner's Enter to the cart update."""
+        with self._lock:
+            self.stats["scan_to_cart"] += 1
+            self.stats["scan_to_cart_ms"] += ms
+            self.stats["scan_to_cart_last_ms"] = ms
+            self.stats["scan_to_cart_max_ms"] = max(self.stats["scan_to_cart_max_ms"], ms)
+
+    def invalidate(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._version = None
+
+    def get_stats(self) -> dict:
+        """
+        Return cache counters plus ``hit_ratio`` and ``scan_to_cart_avg_ms``.
+
+        Keys: scans, hits, misses, evicted, resets, lookup_ms (time spent in
+        database lookups), scan_to_cart (scans added to a cart) with total,
+        max and last latency in ms, cached (entries held).
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached"] = len(self._hits)
+        stats["hit_ratio"] = round(stats["hits"] / stats["scans"], 3) if stats["scans"] else 0.0
+        stats["scan_to_cart_avg_ms"] = (round(stats["scan_to_cart_ms"] / stats["scan_to_cart"], 2)
+                                        if stats["scan_to_cart"] else 0.0)
+        return stats
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_scan_resolver() -> ScanResolver:
+    """Return the process-wide scan resolver."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ScanResolver()
+        return _resolver
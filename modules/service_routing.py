@@ -0,0 +1,94 @@
+# modules/service_routing.py
+"""
+Run database-touching module functions where the database is.
+
+Controllers are rerouted to the data service as a whole (see
+controllers.use_service). Module functions that views and background
+threads call directly (the inventory snapshot, scan lookups, the change
+journal, stocktake, receiving, audit, user accounts, report data) are
+marked with ``@served`` instead: in service mode a call is forwarded to the
+service as "<module>.<function>"; in direct mode, and on the service's own
+threads, the function runs in-process.
+
+Arguments and results travel as data_service frames: rows, dicts, sets and
+tuples, not connections or objects.
+"""
+
+import functools
+import threading
+from typing import Any, Callable, Dict, Set
+
+# "<module>.<function>" -> in-process implementation of every @served function
+SERVED: Dict[str, Callable] = {}
+
+# Names of the @served functions that only read (see data_service.is_read)
+SERVED_READS: Set[str] = set()
+
+# Modules with @served functions (imported by the service to register them)
+SERVED_MODULES = (
+    "modules.db",
+    "modules.change_log",
+    "modules.models",
+    "modules.audit_logger",
+    "modules.inventory_repository",
+    "modules.scan_resolver",
+    "modules.stocktake",
+    "modules.receiving",
+    "modules.financial_reports",
+)
+
+_client = None
+_local = threading.local()
+
+
+def served(func=None, *, read=False):
+    """
+    Forward calls of ``func`` to the data service while in service mode.
+
+    Mark functions that only read with ``@served(read=True)``: the service
+    runs them beside the writer thread and caches their results.
+    """
+    if func is None:
+        return functools.partial(served, read=read)
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+    SERVED[name] = func
+    if read:
+        SERVED_READS.add(name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        client = _client
+        if client is None or getattr(_local, "serving", False):
+            return func(*args, **kwargs)
+        return client.call(name, *args, **kwargs)
+
+    wrapper.direct = func
+    return wrapper
+
+
+def set_client(client):
+    """Forward @served calls to ``client`` (a DataServiceClient); None runs them here."""
+    global _client
+    _client = client
+
+
+def get_client():
+    """The DataServiceClient in use, or None in direct mode."""
+    return _client
+
+
+def in_service_mode() -> bool:
+    return _client is not None
+
+
+def mark_serving():
+    """Mark the calling thread as one of the service's own (its calls run here)."""
+    _local.serving = True
+
+
+def served_api() -> Dict[str, Any]:
+    """Import SERVED_MODULES and return {name: in-process function}."""
+    import importlib
+    for module in SERVED_MODULES:
+        importlib.import_module(module)
+    return dict(SERVED)
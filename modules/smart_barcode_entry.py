@@ -8,6 +8,9 @@ Handles different scanner types and provides intelligent input processing.
 import time
 from datetime import datetime
 
+# How often (ms) queued burst scans are resolved and applied
+BURST_TICK_MS = 80
+
 class SmartBarcodeProcessor:
     """Processes barcode input with intelligent filtering and validation"""
     
@@ -121,6 +124,90 @@ class BarcodeInputHelper:
         self.last_key_time = 0
 
 
+class BurstScanQueue:
+    """
+    Queue of scans resolved together once per UI tick.
+    
+    ``push`` only appends the scan and returns at once, so the scanner never
+    waits on the database or a dialog. On the next tick every queued scan is
+    resolved with one ``resolve_many`` call (one query for the codes that
+    are not cached) and handed to ``on_batch`` in scan order, so the screen
+    applies a whole burst in one update. Problems are passed to
+    ``on_error`` (e.g. a non-modal tray) instead of raising.
+    
+    Usage:
+        queue = BurstScanQueue(frame, get_scan_resolver().resolve_many,
+                               self._apply_scans, on_error=tray.add)
+        entry.bind('<Return>', lambda e: queue.push(var.get()))
+    """
+    
+    def __init__(self, widget, resolve_many, on_batch, on_error=None, processor=None,
+                 tick_ms=BURST_TICK_MS):
+        """
+        Args:
+            widget: Tk widget whose ``after`` schedules the ticks
+            resolve_many: codes -> {code: result or None}
+            on_batch: Called with [(code, result), ...] for each tick's scans
+            on_error: Called with a message for each rejected scan or failed batch
+            processor: Optional SmartBarcodeProcessor that cleans/filters each scan
+            tick_ms: Delay between the first queued scan and its resolution
+        """
+        self.widget = widget
+        self.resolve_many = resolve_many
+        self.on_batch = on_batch
+        self.on_error = on_error or (lambda message: None)
+        self.processor = processor
+        self.tick_ms = tick_ms
+        self.pending = []
+        self._job = None
+        # perf_counter() of the first scan of the batch being collected/applied
+        self.batch_started = None
+        self.stats = {"scans": 0, "batches": 0, "rejected": 0}
+    
+    def push(self, raw_input) -> bool:
+        """Queue one scan; returns False if it was rejected (reported to on_error)."""
+        code = (raw_input or "").strip()
+        if self.processor is not None:
+            is_valid, code, message = self.processor.process_input(raw_input or "")
+            if not is_valid:
+                self.stats["rejected"] += 1
+                self.on_error(f"{(raw_input or '').strip()}: {message}")
+                return False
+        if not code:
+            return False
+        if not self.pending:
+            self.batch_started = time.perf_counter()
+        self.pending.append(code)
+        self.stats["scans"] += 1
+        if self._job is None:
+            self._job = self.widget.after(self.tick_ms, self.flush)
+        return True
+    
+    def flush(self):
+        """Resolve and apply every queued scan now."""
+        self._job = None
+        scans, self.pending = self.pending, []
+        if not scans:
+            return
+        try:
+            results = self.resolve_many(scans)
+        except Exception as e:
+            self.on_error(f"{len(scans)} scan(s) not resolved: {e}")
+            return
+        self.stats["batches"] += 1
+        self.on_batch([(code, results.get(code)) for code in scans])
+    
+    def cancel(self):
+        """Drop queued scans and the pending tick."""
+        if self._job is not None:
+            try:
+                self.widget.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
+        self.pending = []
+
+
 def format_barcode_for_display(barcode):
     """Format barcode for display with grouping"""
     if len(barcode) <= 8:
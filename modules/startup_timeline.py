@@ -0,0 +1,51 @@
+# modules/startup_timeline.py
+"""
+Timestamps of the application's startup stages.
+
+app.py and ui.main call ``mark()`` as startup progresses; once the main
+window is interactive, ``log_timeline()`` writes one line per stage with the
+time since startup and since the previous stage, e.g.
+
+    Startup: imports +0.412s | preflight +0.051s | ... | interactive +0.180s | total 1.204s
+"""
+
+import time
+from typing import List, Tuple
+
+from modules.logger import log
+
+_start = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+
+
+def reset():
+    """Start a new timeline from now."""
+    global _start
+    _start = time.perf_counter()
+    _marks.clear()
+
+
+def mark(stage: str):
+    """Record that ``stage`` has just finished."""
+    _marks.append((stage, time.perf_counter() - _start))
+
+
+def get_timeline() -> List[Tuple[str, float, float]]:
+    """Return (stage, seconds since start, seconds since previous stage) tuples."""
+    timeline = []
+    previous = 0.0
+    for stage, elapsed in _marks:
+        timeline.append((stage, elapsed, elapsed - previous))
+        previous = elapsed
+    return timeline
+
+
+def log_timeline():
+    """Log the startup timeline (one summary line plus one line per stage)."""
+    timeline = get_timeline()
+    if not timeline:
+        return
+    log.info("Startup: " + " | ".join(f"{stage} +{delta:.3f}s" for stage, _, delta in timeline)
+             + f" | total {timeline[-1][1]:.3f}s")
+    for stage, elapsed, delta in timeline:
+        log.debug(f"  {elapsed:8.3f}s  (+{delta:.3f}s)  {stage}")
@@ -0,0 +1,439 @@
+# modules/stocktake.py
+"""
+Stocktake (cycle count) sessions.
+
+Counts are tallied in memory, keyed by item id: scans (unit barcodes,
+product barcodes, SKUs) and typed quantities only update a dictionary, so
+counting thousands of items runs no queries beyond the cached barcode
+lookups. With each count the session also remembers how many the
+inventory had on hand at that moment (from the shared inventory snapshot),
+and ``variance()`` compares the two at any time.
+
+A session is saved to ``stocktake_sessions`` / ``stocktake_counts`` (and
+the unit barcodes already counted to ``stocktake_units``), so an
+interrupted count can be resumed on any terminal. ``commit()`` applies
+every adjustment in one write transaction, with the audit rows written by
+one executemany, and publishes a single ``inventory_changed`` event. The
+adjustment is the difference found when the item was counted, so sales and
+receipts made between the count and the commit are kept.
+
+The database work is done by the module functions below the class
+(@served, so in service mode it runs in the data service); the session
+object only holds the tally.
+
+Usage:
+    session = StocktakeSession.start("Front shelves", user="admin")
+    session.count_code(scanned)           # or session.set_count(item_id, 7)
+    session.save()                        # resumable from here
+    result = session.commit()
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from modules.db import get_conn
+from modules.logger import log
+from modules.service_routing import served
+
+OPEN = "open"
+COMMITTED = "committed"
+CANCELLED = "cancelled"
+
+# Row layout of models.get_inventory()
+_ITEM_ID, _SKU, _NAME, _CATEGORY, _QUANTITY = 0, 1, 2, 3, 4
+
+
+def create_tables(c):
+    """Create the stocktake tables (called from the schema migration)."""
+    c.execute("""CREATE TABLE IF NOT EXISTS stocktake_sessions (
+                    session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    status TEXT NOT NULL DEFAULT 'open',
+                    category TEXT,
+                    created_by TEXT,
+                    started_at TEXT NOT NULL,
+                    updated_at TEXT,
+                    committed_at TEXT,
+                    notes TEXT
+                )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS stocktake_counts (
+                    session_id INTEGER NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    counted INTEGER NOT NULL,
+                    expected INTEGER,
+                    updated_at TEXT,
+                    PRIMARY KEY (session_id, item_id),
+                    FOREIGN KEY(session_id) REFERENCES stocktake_sessions(session_id)
+                )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS stocktake_units (
+                    session_id INTEGER NOT NULL,
+                    barcode TEXT NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    PRIMARY KEY (session_id, barcode),
+                    FOREIGN KEY(session_id) REFERENCES stocktake_sessions(session_id)
+                )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_stocktake_sessions_status ON stocktake_sessions(status)")
+
+
+@served(read=True)
+def list_sessions(status: Optional[str] = OPEN) -> List[tuple]:
+    """
+    List stocktake sessions, newest first.
+
+    Returns:
+        List of tuples: (session_id, name, status, category, created_by,
+        started_at, updated_at, items counted)
+    """
+    conn = get_conn()
+    try:
+        sql = """SELECT s.session_id, s.name, s.status, s.category, s.created_by, s.started_at, s.updated_at,
+                        (SELECT COUNT(*) FROM stocktake_counts k WHERE k.session_id = s.session_id)
+                 FROM stocktake_sessions s"""
+        params = ()
+        if status:
+            sql += " WHERE s.status = ?"
+            params = (status,)
+        return conn.execute(sql + " ORDER BY s.session_id DESC", params).fetchall()
+    except Exception as e:
+        print(f"Error listing stocktake sessions: {e}")
+        return []
+    finally:
+        conn.close()
+
+
+class StocktakeSession:
+    """One count in progress: an in-memory tally plus its saved state"""
+
+    def __init__(self, session_id: int, name: str = "", category: str = None, user: str = None,
+                 status: str = OPEN, counts: Dict[int, int] = None, units: Dict[str, int] = None,
+                 expected: Dict[int, Optional[int]] = None):
+        self.session_id = session_id
+        self.name = name
+        self.category = category
+        self.user = user
+        self.status = status
+        self.counts: Dict[int, int] = dict(counts or {})
+        # item id -> quantity on hand when it was last counted (None: unknown)
+        self.expected: Dict[int, Optional[int]] = dict(expected or {})
+        self.units: Dict[str, int] = dict(units or {})   # unit barcode -> item id, each counted once
+        self._dirty = set()
+        self._new_units = set()
+
+    # ---------- lifecycle ----------
+    @classmethod
+    def start(cls, name: str = "", user: str = None, category: str = None) -> "StocktakeSession":
+        """Create and save a new open session (``category`` limits it to one category)."""
+        session_id = create_session(name, user, category)
+        log.info(f"Stocktake session #{session_id} started by {user}: {name}")
+        return cls(session_id, name, category, user)
+
+    @classmethod
+    def resume(cls, session_id: int) -> Optional["StocktakeSession"]:
+        """Load a saved session with its counts, or None if it does not exist."""
+        saved = load_session(session_id)
+        if saved is None:
+            return None
+        (name, status, category, user), counts, units, expected = saved
+        return cls(session_id, name, category, user, status, counts, units, expected)
+
+    def _require_open(self):
+        if self.status != OPEN:
+            raise ValueError(f"Stocktake session #{self.session_id} is {self.status}")
+
+    # ---------- counting (memory only) ----------
+    def set_count(self, item_id: int, counted: int, repo=None):
+        """
+        Record the counted quantity of an item (replaces earlier counts).
+
+        The quantity on hand right now is remembered with it, taken from
+        ``repo`` (default: the shared inventory snapshot).
+        """
+        self._require_open()
+        if counted < 0:
+            raise ValueError("Counted quantity cannot be negative")
+        if repo is None:
+            from modules.inventory_repository import get_inventory_repository
+            repo = get_inventory_repository()
+        row = repo.get(item_id)
+        self.counts[item_id] = int(counted)
+        self.expected[item_id] = int(row[_QUANTITY] or 0) if row is not None else None
+        self._dirty.add(item_id)
+
+    def add_count(self, item_id: int, qty: int = 1, repo=None):
+        """Add ``qty`` to the counted quantity of an item."""
+        self.set_count(item_id, max(0, self.counts.get(item_id, 0) + int(qty)), repo)
+
+    def count_hit(self, hit, repo=None) -> Optional[str]:
+        """
+        Count one resolved scan (a scan_resolver.ScanHit).
+
+        A unit barcode counts once per session however often it is scanned;
+        a product barcode or SKU counts one more of the item.
+
+        Returns:
+            None if counted, otherwise why the scan was not counted
+        """
+        self._require_open()
+        if hit.unit:
+            if hit.barcode in self.units:
+                return f"{hit.barcode}: already counted"
+            if not hit.sellable:
+                return f"{hit.barcode}: unit is {hit.status} ({hit.name})"
+            self.units[hit.barcode] = hit.item_id
+            self._new_units.add(hit.barcode)
+        self.add_count(hit.item_id, 1, repo)
+        return None
+
+    def count_code(self, code: str) -> Optional[str]:
+        """Resolve a scanned or typed code and count it (see count_hit)."""
+        from modules.scan_resolver import get_scan_resolver
+        hit = get_scan_resolver().resolve(code)
+        if hit is None:
+            return f"{code}: not registered"
+        return self.count_hit(hit)
+
+    def count_scans(self, scans: Iterable) -> List[str]:
+        """Count a burst of (code, ScanHit or None) pairs; returns the problems."""
+        from modules.inventory_repository import get_inventory_repository
+        repo = get_inventory_repository()
+        problems = []
+        for code, hit in scans:
+            problem = self.count_hit(hit, repo) if hit is not None else f"{code}: not registered"
+            if problem:
+                problems.append(problem)
+        return problems
+
+    # ---------- variance ----------
+    def _in_scope(self, row) -> bool:
+        return not self.category or str(row[_CATEGORY]) == self.category
+
+    def variance(self, include_uncounted: bool = False) -> List[tuple]:
+        """
+        Compare the tally with the inventory.
+
+        ``expected`` is the quantity on hand when the item was counted (the
+        current quantity for items not counted), so ``difference`` is the
+        adjustment commit() will apply.
+
+        Args:
+            include_uncounted: Also list items in scope that were not counted
+                (as counted 0)
+
+        Returns:
+            List of tuples: (item_id, sku, name, expected, counted, difference),
+            largest absolute difference first
+        """
+        from modules.inventory_repository import get_inventory_repository
+        repo = get_inventory_repository()
+        rows = []
+        for row in repo:
+            item_id = row[_ITEM_ID]
+            if item_id in self.counts:
+                counted = self.counts[item_id]
+            elif include_uncounted and self._in_scope(row):
+                counted = 0
+            else:
+                continue
+            expected = self.expected.get(item_id)
+            if expected is None:
+                expected = int(row[_QUANTITY] or 0)
+            rows.append((item_id, row[_SKU], row[_NAME], expected, counted, counted - expected))
+        rows.sort(key=lambda r: (-abs(r[5]), str(r[2])))
+        return rows
+
+    # ---------- persistence ----------
+    def _changes(self):
+        """Counts ({item_id: (counted, expected)}) and unit barcodes changed since the last save."""
+        return ({item_id: (self.counts[item_id], self.expected.get(item_id)) for item_id in self._dirty},
+                {code: self.units[code] for code in self._new_units})
+
+    def _saved(self):
+        self._dirty.clear()
+        self._new_units.clear()
+
+    def save(self) -> bool:
+        """Write the counts changed since the last save (one transaction)."""
+        if self.status != OPEN:
+            return False
+        try:
+            save_counts(self.session_id, *self._changes())
+            self._saved()
+            return True
+        except Exception as e:
+            print(f"Error saving stocktake session: {e}")
+            return False
+
+    def cancel(self) -> bool:
+        """Close the session without changing stock."""
+        try:
+            cancel_session(self.session_id)
+            self.status = CANCELLED
+            return True
+        except Exception as e:
+            print(f"Error cancelling stocktake session: {e}")
+            return False
+
+    def commit(self, user: str = None, zero_uncounted: bool = False) -> Optional[Dict]:
+        """
+        Apply the count to the inventory in one transaction.
+
+        Each counted item is adjusted by the difference found when it was
+        counted (counted - on hand at that moment), so sales, receipts and
+        adjustments made after the count are not undone. Items counted before
+        the quantity on hand was recorded are set to the counted value. Each
+        adjusted item gets one audit row; all of them are written together.
+
+        Args:
+            user: Who commits (default: the session's creator)
+            zero_uncounted: Also set items in scope that were not counted to 0
+
+        Returns:
+            Dict with adjusted (list of (item_id, old, new)) and items_counted,
+            or None on error
+        """
+        self._require_open()
+        user = user or self.user or "system"
+        try:
+            adjusted = commit_counts(self.session_id, *self._changes(), user=user,
+                                     category=self.category, zero_uncounted=zero_uncounted)
+        except Exception as e:
+            print(f"Error committing stocktake session: {e}")
+            return None
+        adjusted = [tuple(row) for row in adjusted]
+        self.status = COMMITTED
+        self._saved()
+        log.info(f"Stocktake #{self.session_id} committed by {user}: {len(adjusted)} item(s) adjusted")
+
+        if adjusted:
+            # One event for the whole count instead of one refresh per item
+            from modules.event_manager import event_manager
+            event_manager.notify('inventory_changed', {'action': 'stocktake', 'session': self.session_id},
+                                 ids=[item_id for item_id, _, _ in adjusted])
+        return {'adjusted': adjusted, 'items_counted': len(self.counts)}
+
+
+# ---------- database ----------
+
+@served
+def create_session(name: str, user: str = None, category: str = None) -> int:
+    """Insert a new open session; returns its id."""
+    now = datetime.now().isoformat()
+    conn = get_conn()
+    try:
+        cur = conn.execute("""INSERT INTO stocktake_sessions (name, status, category, created_by, started_at, updated_at)
+                              VALUES (?, ?, ?, ?, ?, ?)""", (name, OPEN, category, user, now, now))
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+
+@served(read=True)
+def load_session(session_id: int) -> Optional[tuple]:
+    """
+    Returns:
+        ((name, status, category, created_by), {item_id: counted},
+        {unit barcode: item_id}, {item_id: on hand when counted}), or None
+        if the session does not exist
+    """
+    conn = get_conn()
+    try:
+        row = conn.execute("""SELECT name, status, category, created_by FROM stocktake_sessions
+                              WHERE session_id = ?""", (session_id,)).fetchone()
+        if row is None:
+            return None
+        rows = conn.execute("SELECT item_id, counted, expected FROM stocktake_counts WHERE session_id = ?",
+                            (session_id,)).fetchall()
+        units = dict(conn.execute("SELECT barcode, item_id FROM stocktake_units WHERE session_id = ?",
+                                  (session_id,)).fetchall())
+    finally:
+        conn.close()
+    counts = {item_id: counted for item_id, counted, _ in rows}
+    expected = {item_id: on_hand for item_id, _, on_hand in rows}
+    return row, counts, units, expected
+
+
+def _write_counts(c, session_id, counts, units, now):
+    if counts:
+        c.executemany("""INSERT INTO stocktake_counts (session_id, item_id, counted, expected, updated_at)
+                         VALUES (?, ?, ?, ?, ?)
+                         ON CONFLICT(session_id, item_id) DO UPDATE
+                         SET counted = excluded.counted, expected = excluded.expected,
+                             updated_at = excluded.updated_at""",
+                      [(session_id, item_id, counted, expected, now)
+                       for item_id, (counted, expected) in counts.items()])
+    if units:
+        c.executemany("INSERT OR IGNORE INTO stocktake_units (session_id, barcode, item_id) VALUES (?, ?, ?)",
+                      [(session_id, code, item_id) for code, item_id in units.items()])
+    c.execute("UPDATE stocktake_sessions SET updated_at = ? WHERE session_id = ?", (now, session_id))
+
+
+@served
+def save_counts(session_id: int, counts: Dict[int, tuple], units: Dict[str, int]):
+    """
+    Upsert changed counts ({item_id: (counted, on hand when counted)}) and
+    counted unit barcodes ({barcode: item_id}).
+    """
+    from modules.transaction_manager import execute_with_retry
+    execute_with_retry(lambda conn: _write_counts(conn.cursor(), session_id, counts, units,
+                                                  datetime.now().isoformat()))
+
+
+@served
+def cancel_session(session_id: int):
+    """Mark a session cancelled (stock is not changed)."""
+    from modules.transaction_manager import transaction
+    with transaction() as conn:
+        conn.execute("UPDATE stocktake_sessions SET status = ?, updated_at = ? WHERE session_id = ?",
+                     (CANCELLED, datetime.now().isoformat(), session_id))
+
+
+@served
+def commit_counts(session_id: int, counts: Dict[int, tuple], units: Dict[str, int], user: str,
+                  category: str = None, zero_uncounted: bool = False) -> List[tuple]:
+    """
+    Save the last changes and apply the session's counts, in one transaction.
+
+    Each item moves by (counted - on hand when counted); never below 0.
+
+    Returns:
+        List of (item_id, old quantity, new quantity) that were adjusted
+
+    Raises:
+        ValueError if the session is no longer open (e.g. committed elsewhere)
+    """
+    from modules.audit_logger import record_actions
+    from modules.transaction_manager import execute_with_retry
+
+    def apply(conn):
+        c = conn.cursor()
+        now = datetime.now().isoformat()
+        _write_counts(c, session_id, counts, units, now)
+        sql = "SELECT item_id, quantity, category FROM inventory"
+        current = {item_id: (int(qty or 0), cat) for item_id, qty, cat in c.execute(sql)}
+        c.execute("SELECT item_id, counted, expected FROM stocktake_counts WHERE session_id = ?", (session_id,))
+        targets = {}
+        for item_id, counted, expected in c.fetchall():
+            if item_id in current:
+                on_hand = current[item_id][0]
+                # Keep whatever moved since the count; old rows without 'expected' set the count
+                targets[item_id] = max(0, on_hand + counted - expected) if expected is not None else counted
+        if zero_uncounted:
+            for item_id, (_, cat) in current.items():
+                if item_id not in targets and (not category or str(cat) == category):
+                    targets[item_id] = 0
+        adjusted = [(item_id, current[item_id][0], counted)
+                    for item_id, counted in targets.items() if counted != current[item_id][0]]
+        c.executemany("UPDATE inventory SET quantity = ? WHERE item_id = ?",
+                      [(new, item_id) for item_id, _, new in adjusted])
+        record_actions(c, [(user, "UPDATE", "inventory", item_id,
+                            f"Stocktake #{session_id}: {old} -> {new}", str(old), str(new))
+                           for item_id, old, new in adjusted])
+        c.execute("""UPDATE stocktake_sessions SET status = ?, committed_at = ?, updated_at = ?
+                     WHERE session_id = ? AND status = ?""",
+                  (COMMITTED, now, now, session_id, OPEN))
+        if c.rowcount != 1:
+            raise ValueError(f"Stocktake session #{session_id} is no longer open")
+        return adjusted
+
+    return execute_with_retry(apply)
@@ -9,16 +9,24 @@ operations in transactions with automatic commit/rollback.
 from contextlib import contextmanager
 from functools import wraps
 from typing import Callable, Any
+import random
 import sqlite3
+import threading
+import time
+import config
 from modules.db import get_conn
 from modules.logger import log
 
 
 @contextmanager
-def transaction():
+def transaction(immediate: bool = False):
     """
     Context manager for database transactions with automatic commit/rollback.
     
+    Args:
+        immediate: Take the write lock up front (BEGIN IMMEDIATE) so the
+            transaction cannot fail halfway on a lock held by another writer
+    
     Usage:
         with transaction() as conn:
             cursor = conn.cursor()
@@ -34,6 +42,8 @@ def transaction():
     """
     conn = get_conn()
     try:
+        if immediate:
+            conn.execute("BEGIN IMMEDIATE")
         yield conn
         conn.commit()
         log.debug("Transaction committed successfully")
@@ -97,6 +107,105 @@ def execute_in_transaction(func: Callable, *args, **kwargs) -> Any:
         return func(conn, *args, **kwargs)
 
 
+def is_lock_error(error: Exception) -> bool:
+    """True if ``error`` means another connection holds the database lock."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+_write_stats_lock = threading.Lock()
+_write_stats = {"transactions": 0, "contended": 0, "retries": 0, "gave_up": 0}
+_retry_policy = None
+
+
+def get_retry_policy() -> dict:
+    """Return the write retry policy (attempts, base_delay_ms, max_delay_ms) from configuration."""
+    global _retry_policy
+    if _retry_policy is None:
+        default = config.DEFAULT_CONFIG["database"]["write_retry"]
+        db_cfg = config.load_config().get("database", {}) or {}
+        policy = dict(default)
+        policy.update(db_cfg.get("write_retry", {}) or {})
+        policy["attempts"] = max(1, int(policy["attempts"]))
+        _retry_policy = policy
+    return _retry_policy
+
+
+def set_retry_policy(**policy):
+    """Override the write retry policy at runtime (e.g. attempts=1 to disable retries)."""
+    merged = dict(get_retry_policy())
+    merged.update(policy)
+    merged["attempts"] = max(1, int(merged["attempts"]))
+    global _retry_policy
+    _retry_policy = merged
+
+
+def execute_with_retry(func: Callable, *args, **kwargs) -> Any:
+    """
+    Execute a write in a BEGIN IMMEDIATE transaction, retrying on lock contention.
+    
+    The write lock is taken before ``func`` runs, so it either gets the whole
+    database to itself or fails before doing anything. When another terminal
+    holds the lock for longer than busy_timeout, the transaction is rolled
+    back and ``func`` runs again after a jittered exponential backoff, up to
+    the configured number of attempts (see get_retry_policy). ``func`` must
+    therefore only touch the database through the connection it is given.
+    
+    Args:
+        func: Function to execute (receives the connection as first parameter)
+        *args: Positional arguments to pass to func
+        **kwargs: Keyword arguments to pass to func
+    
+    Returns:
+        Result of func execution
+    
+    Raises:
+        sqlite3.OperationalError: Still locked after the last attempt
+        Exception: Anything else func raises (not retried)
+    """
+    policy = get_retry_policy()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            with transaction(immediate=True) as conn:
+                result = func(conn, *args, **kwargs)
+            with _write_stats_lock:
+                _write_stats["transactions"] += 1
+                if attempt > 1:
+                    _write_stats["contended"] += 1
+            return result
+        except sqlite3.OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            if attempt >= policy["attempts"]:
+                with _write_stats_lock:
+                    _write_stats["gave_up"] += 1
+                log.error(f"Write gave up after {attempt} attempt(s): {e}")
+                raise
+            with _write_stats_lock:
+                _write_stats["retries"] += 1
+            delay = min(policy["max_delay_ms"], policy["base_delay_ms"] * 2 ** (attempt - 1))
+            # Jitter keeps tills that collided from colliding again
+            delay = random.uniform(delay / 2, delay)
+            log.warning(f"Database locked, retrying write in {delay:.0f} ms (attempt {attempt}): {e}")
+            time.sleep(delay / 1000)
+
+
+def get_write_stats() -> dict:
+    """
+    Return write contention counters.
+    
+    Keys: transactions (committed), contended (committed after at least one
+    retry), retries (lock errors retried), gave_up (writes that failed after
+    the last attempt).
+    """
+    with _write_stats_lock:
+        return dict(_write_stats)
+
+
 @contextmanager
 def rollback_on_error(conn: sqlite3.Connection):
     """
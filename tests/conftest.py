@@ -156,12 +156,21 @@ def test_db(test_db_dir, monkeypatch):
     conn.commit()
     conn.close()
     
+    # Apply the versioned migrations on top, as the app does at startup
+    from modules.migrations import migrate
+    migrate()
+    
     yield db_path
     
-    # Cleanup: close any open connections and remove database
+    # Cleanup: write buffered audit events, close connections and remove database
+    from modules.audit_logger import flush_audit_log
+    flush_audit_log()
+    db_module.close_all()
     try:
         if db_path.exists():
             db_path.unlink()
+        for suffix in ("-wal", "-shm"):
+            Path(str(db_path) + suffix).unlink(missing_ok=True)
     except Exception as e:
         print(f"Warning: Could not cleanup test database: {e}")
 
@@ -174,6 +183,35 @@ def db_conn(test_db):
     conn.close()
 
 
+@pytest.fixture
+def db_query(test_db):
+    """Run a read on a pooled connection: db_query(sql, params=()) -> rows"""
+    from modules.db import get_conn
+
+    def query(sql, params=()):
+        conn = get_conn()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+    return query
+
+
+@pytest.fixture
+def db_execute(test_db):
+    """Run and commit one statement on a pooled connection: db_execute(sql, params=())"""
+    from modules.db import get_conn
+
+    def execute(sql, params=()):
+        conn = get_conn()
+        try:
+            conn.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+    return execute
+
+
 @pytest.fixture
 def sample_inventory_item():
     """Provide a sample inventory item for testing"""
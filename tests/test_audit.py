@@ -0,0 +1,91 @@
+# tests/test_audit.py
+"""Unit tests for the audit logger and its write-behind queue"""
+
+import pytest
+
+from modules import audit_logger
+from modules.audit_logger import AuditWriter, log_action, get_logs, flush_audit_log
+from modules.db import get_conn
+
+
+def _audit_count():
+    conn = get_conn()
+    count = conn.execute("SELECT COUNT(*) FROM audit_logs").fetchone()[0]
+    conn.close()
+    return count
+
+
+@pytest.fixture
+def audit_mode():
+    """Restore the durability mode after a test changes it"""
+    original = audit_logger.get_audit_mode()
+    yield audit_logger.set_audit_mode
+    audit_logger.set_audit_mode(original)
+
+
+@pytest.mark.unit
+def test_strict_mode_writes_immediately(test_db, audit_mode):
+    """In strict mode the row exists as soon as log_action returns"""
+    audit_mode("strict")
+    log_action("tester", "CREATE", "sale", 1, "strict event")
+    assert _audit_count() == 1
+
+
+@pytest.mark.unit
+def test_buffered_mode_writes_after_flush(test_db, audit_mode):
+    """Buffered events reach the database once flushed"""
+    audit_mode("buffered")
+    for i in range(25):
+        log_action("tester", "UPDATE", "inventory", i, f"event {i}")
+    assert flush_audit_log()
+    assert _audit_count() == 25
+
+
+@pytest.mark.unit
+def test_get_logs_sees_buffered_events(test_db, audit_mode):
+    """Readers flush the queue first, so they never miss recent events"""
+    audit_mode("buffered")
+    log_action("tester", "DELETE", "repair", 7, "buffered delete")
+    rows = get_logs(limit=10, entity_type="repair")
+    assert len(rows) == 1
+    assert rows[0][8] == "buffered delete"
+
+
+@pytest.mark.unit
+def test_writer_groups_events_into_batches(test_db):
+    """A burst of events is committed in fewer transactions than events"""
+    writer = AuditWriter(queue_size=1000, batch_size=50)
+    # Queue everything before the thread starts draining
+    rows = [("2024-01-01T00:00:00", "tester", "CREATE", "sale", i, None, None, "batch")
+            for i in range(120)]
+    for row in rows:
+        writer.queue.put_nowait(row)
+    writer._pending = len(rows)
+    writer.start()
+    assert writer.stop()
+
+    assert writer.stats['written'] == 120
+    assert writer.stats['batches'] == 3
+    assert _audit_count() == 120
+
+
+@pytest.mark.unit
+def test_full_queue_drops_and_counts(test_db):
+    """Events beyond the queue bound are dropped and counted"""
+    writer = AuditWriter(queue_size=2, batch_size=10)
+    writer.start = lambda: None  # keep the queue from draining
+    row = ("2024-01-01T00:00:00", "tester", "CREATE", "sale", 1, None, None, "x")
+
+    assert writer.submit(row)
+    assert writer.submit(row)
+    assert not writer.submit(row)
+    assert writer.stats['dropped'] == 1
+    assert writer.stats['enqueued'] == 2
+    assert writer.queue_depth() == 2
+
+
+@pytest.mark.unit
+def test_invalid_mode_rejected():
+    """Unknown durability modes raise ValueError"""
+    with pytest.raises(ValueError):
+        audit_logger.set_audit_mode("sometimes")
@@ -0,0 +1,69 @@
+# tests/test_barcode_ingest.py
+"""Unit tests for bulk barcode/IMEI ingestion"""
+
+import pytest
+
+from modules import barcode_manager, models
+
+
+def _imei(prefix: str) -> str:
+    """Complete a 14-digit prefix with its Luhn check digit."""
+    total = 0
+    for i, d in enumerate(int(ch) for ch in reversed(prefix)):
+        if i % 2 == 0:
+            d *= 2
+            d = d - 9 if d > 9 else d
+        total += d
+    return prefix + str((10 - total % 10) % 10)
+
+
+@pytest.fixture
+def phone(test_db):
+    models.add_inventory_item("BI-001", "Ingest Phone", 0, 300.0, 400.0, "Phones", "")
+    return models.get_inventory_item_by_sku("BI-001")[0]
+
+
+@pytest.mark.unit
+def test_ingest_reports_every_bad_row(phone, db_query):
+    """Good rows are added in chunks; duplicates, bad IMEIs and unknown items are reported"""
+    good = [_imei(f"3569870000{n:04d}") for n in range(7)]
+    barcode_manager.add_barcode(phone, good[0])
+    bad_imei = good[1][:-1] + str((int(good[1][-1]) + 1) % 10)
+    rows = ([{'barcode': code, 'sku': "BI-001", 'serial': f"SN{n}"} for n, code in enumerate(good)]
+            + [{'barcode': bad_imei, 'sku': "BI-001"},
+               {'barcode': good[2], 'sku': "BI-001"},
+               {'barcode': "CASE-1", 'sku': "NO-SUCH-SKU"},
+               {'barcode': ""}])
+    progress = []
+
+    report = barcode_manager.bulk_ingest_barcodes(rows, chunk_size=4,
+                                                  progress=lambda done, total: progress.append((done, total)))
+
+    assert report['total'] == 11
+    assert report['added'] == 6
+    assert [row[:2] for row in report['duplicates']] == [(1, good[0]), (9, good[2])]
+    assert [row[:2] for row in report['invalid']] == [(8, bad_imei), (11, "")]
+    assert [row[:2] for row in report['unknown_items']] == [(10, "CASE-1")]
+    assert progress == [(4, 11), (8, 11), (11, 11)]
+    assert db_query("SELECT COUNT(*) FROM product_barcodes WHERE item_id = ? AND status = 'available'",
+                    (phone,)) == [(7,)]
+    assert db_query("SELECT serial_number FROM product_barcodes WHERE barcode = ?", (good[3],)) == [("SN3",)]
+
+
+@pytest.mark.unit
+def test_ingest_csv_file(phone, tmp_path, db_query):
+    """A CSV with a header streams into the same ingest"""
+    path = tmp_path / "shipment.csv"
+    path.write_text(f"IMEI,Serial,item_id\n{_imei('35698700001000')},S-1,{phone}\n"
+                    f"{_imei('35698700001001')},S-2,{phone}\n\n", encoding="utf-8")
+
+    report = barcode_manager.ingest_barcode_csv(path, imei=True)
+
+    assert report['added'] == 2 and report['total'] == 2
+    assert db_query("SELECT COUNT(*) FROM product_barcodes WHERE serial_number LIKE 'S-%'") == [(2,)]
+
+
+@pytest.mark.unit
+def test_bulk_add_barcodes_keeps_its_contract(phone):
+    """The old helper still returns (added, failed) and accepts non-IMEI codes"""
+    assert barcode_manager.bulk_add_barcodes(phone, ["ACC-1", " ACC-2 ", "ACC-1"]) == (2, 1)
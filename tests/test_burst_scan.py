@@ -0,0 +1,67 @@
+# tests/test_burst_scan.py
+"""Unit tests for burst scan mode (no display needed)"""
+
+import pytest
+
+from modules.smart_barcode_entry import BurstScanQueue, SmartBarcodeProcessor
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks run when pump() is called"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def after(self, ms, callback):
+        self.jobs.append(callback)
+        return f"after#{len(self.jobs)}"
+
+    def after_cancel(self, job):
+        self.jobs.clear()
+
+    def pump(self):
+        while self.jobs:
+            self.jobs.pop(0)()
+
+
+@pytest.mark.unit
+def test_scans_are_resolved_once_per_tick():
+    """Pushing never resolves; one tick resolves the whole burst in scan order"""
+    widget = FakeWidget()
+    calls, batches = [], []
+
+    def resolve_many(codes):
+        calls.append(list(codes))
+        return {code: code.lower() for code in codes if code != "BAD"}
+
+    queue = BurstScanQueue(widget, resolve_many, batches.append)
+    for code in ("CASE", "CASE", "BAD", "CABLE"):
+        assert queue.push(f" {code} ")
+    assert calls == [] and len(widget.jobs) == 1
+
+    widget.pump()
+
+    assert calls == [["CASE", "CASE", "BAD", "CABLE"]]
+    assert batches == [[("CASE", "case"), ("CASE", "case"), ("BAD", None), ("CABLE", "cable")]]
+    assert queue.pending == [] and queue.stats["batches"] == 1
+
+
+@pytest.mark.unit
+def test_problems_go_to_the_error_callback():
+    """Rejected scans and failed lookups are reported, never raised"""
+    widget = FakeWidget()
+    errors, batches = [], []
+
+    def broken(codes):
+        raise RuntimeError("database is locked")
+
+    processor = SmartBarcodeProcessor({'scan_delay_ms': 0, 'min_length': 4})
+    queue = BurstScanQueue(widget, broken, batches.append, on_error=errors.append, processor=processor)
+
+    assert not queue.push("AB")
+    assert queue.push("ABCD-1")
+    widget.pump()
+
+    assert batches == []
+    assert errors[0].startswith("AB: Barcode too short")
+    assert "database is locked" in errors[1]
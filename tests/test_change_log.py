@@ -0,0 +1,106 @@
+# tests/test_change_log.py
+"""Unit tests for the change journal and the database monitor"""
+
+import sqlite3
+
+import pytest
+
+from modules import change_log, models
+from modules.db_monitor import DatabaseMonitor
+from modules.event_manager import event_manager
+
+
+def _execute_elsewhere(db_path, sql, params=()):
+    """Commit on a connection outside the pool, like another terminal would"""
+    conn = sqlite3.connect(str(db_path))
+    cursor = conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+@pytest.fixture
+def events():
+    received = []
+    event_manager.detach()
+    event_manager.clear_all()
+    for event in ('inventory_changed', 'sale_completed', 'repair_updated', 'customer_updated'):
+        event_manager.subscribe(event, lambda data, event=event: received.append((event, data['ids'])))
+    yield received
+    event_manager.clear_all()
+
+
+@pytest.mark.unit
+def test_triggers_journal_changed_ids(test_db, db_execute):
+    """Inserts, updates and deletes on tracked tables land in the journal"""
+    start = change_log.get_last_seq()
+    models.add_inventory_item("CL-001", "Journal Item", 5, 1.0, 2.0, "Test", "")
+    item_id = models.get_inventory_item_by_sku("CL-001")[0]
+    db_execute("UPDATE inventory SET quantity = 4 WHERE item_id = ?", (item_id,))
+    db_execute("INSERT INTO audit_logs (timestamp, action_type, entity_type) VALUES ('now', 'X', 'Y')")
+
+    changes, last_seq, complete = change_log.read_since(start)
+
+    assert complete
+    assert changes == {'inventory': {item_id}}
+    assert last_seq == change_log.get_last_seq() > start
+    assert change_log.read_since(last_seq) == ({}, last_seq, True)
+
+
+@pytest.mark.unit
+def test_monitor_publishes_typed_events(test_db, events, db_execute):
+    """Only tables that changed are announced, with their ids"""
+    monitor = DatabaseMonitor(test_db)
+    monitor.last_version = None
+    monitor.last_seq = change_log.get_last_seq()
+
+    customer_id = _execute_elsewhere(test_db, "INSERT INTO customers (name, phone) VALUES (?, ?)",
+                                     ("Journal Customer", "01077777777"))
+    published = monitor.check()
+
+    assert published == {'customer_updated': {customer_id}}
+    assert events == [('customer_updated', {customer_id})]
+
+    # Nothing committed since: no query beyond data_version, no events
+    assert monitor.check() == {}
+    db_execute("INSERT INTO audit_logs (timestamp, action_type, entity_type) VALUES ('now', 'X', 'Y')")
+    assert monitor.check() == {}
+    assert len(events) == 1
+
+
+@pytest.mark.unit
+def test_monitor_skips_own_commits(test_db, events):
+    """Commits of this terminal are not announced again; other terminals' are"""
+    monitor = DatabaseMonitor(test_db)
+    monitor.last_version = None
+    monitor.last_seq = change_log.get_last_seq()
+
+    models.get_or_create_customer("Own Customer", "01055555551")
+    models.add_inventory_item("CL-OWN", "Own Item", 1, 1.0, 2.0, "Test", "")
+    assert monitor.check() == {}
+
+    models.get_or_create_customer("Own Customer 2", "01055555552")
+    other_id = _execute_elsewhere(test_db, "INSERT INTO customers (name, phone) VALUES (?, ?)",
+                                  ("Other Customer", "01055555553"))
+    models.get_or_create_customer("Own Customer 3", "01055555554")
+    assert monitor.check() == {'customer_updated': {other_id}}
+    assert events == [('customer_updated', {other_id})]
+    assert change_log.own_ranges(monitor.last_version[0], monitor.last_seq) == []
+
+
+@pytest.mark.unit
+def test_pruned_journal_requests_full_refresh(test_db, events, db_execute):
+    """A reader behind the pruned range is told to refresh everything"""
+    start = change_log.get_last_seq()
+    models.get_or_create_customer("Pruned A", "01066666661")
+    models.get_or_create_customer("Pruned B", "01066666662")
+    db_execute("DELETE FROM change_log")
+
+    _, _, complete = change_log.read_since(start)
+    assert not complete
+
+    monitor = DatabaseMonitor(test_db)
+    monitor.last_seq = start
+    published = monitor.check()
+    assert published['inventory_changed'] is None
+    assert ('customer_updated', None) in events
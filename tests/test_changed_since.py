@@ -0,0 +1,58 @@
+# tests/test_changed_since.py
+"""Unit tests for the *_changed_since delta queries"""
+
+import pytest
+
+from modules import models
+
+
+@pytest.mark.unit
+def test_inventory_delta_patches_cached_list(test_db, db_execute):
+    """Only changed rows come back, and patching gives the same list as a reload"""
+    models.add_inventory_item("DQ-001", "Delta One", 5, 1.0, 2.0, "Test", "")
+    models.add_inventory_item("DQ-002", "Delta Two", 5, 1.0, 2.0, "Test", "")
+    cached = models.get_inventory()
+    version = models.get_data_seq()
+    one = models.get_inventory_item_by_sku("DQ-001")[0]
+    two = models.get_inventory_item_by_sku("DQ-002")[0]
+
+    db_execute("UPDATE inventory SET quantity = 9 WHERE item_id = ?", (one,))
+    db_execute("DELETE FROM inventory WHERE item_id = ?", (two,))
+    models.add_inventory_item("DQ-003", "Delta Three", 1, 1.0, 2.0, "Test", "")
+
+    delta = models.inventory_changed_since(version)
+
+    assert delta['complete']
+    assert delta['deleted'] == [two]
+    assert sorted(row[1] for row in delta['upserted']) == ["DQ-001", "DQ-003"]
+    patched = models.apply_changes(cached, delta)
+    assert sorted(patched) == sorted(models.get_inventory())
+
+    empty = models.inventory_changed_since(delta['version'])
+    assert empty == {'version': delta['version'], 'upserted': [], 'deleted': [], 'complete': True}
+
+
+@pytest.mark.unit
+def test_delta_is_per_table(test_db):
+    """A customer change does not show up in the repairs delta"""
+    version = models.get_data_seq()
+    customer_id = models.get_or_create_customer("Delta Customer", "01055555555")
+
+    assert models.repairs_changed_since(version)['upserted'] == []
+    rows = models.customers_changed_since(version)['upserted']
+    assert [row[0] for row in rows] == [customer_id]
+
+
+@pytest.mark.unit
+def test_incomplete_delta_asks_for_reload(test_db, db_execute):
+    """Pruned or rewound journals make apply_changes return None"""
+    version = models.get_data_seq()
+    models.get_or_create_customer("Pruned Delta", "01055555556")
+    db_execute("DELETE FROM change_log")
+
+    delta = models.customers_changed_since(version)
+    assert not delta['complete']
+    assert models.apply_changes([], delta) is None
+
+    # A version from the future (e.g. the database was restored from a backup)
+    assert not models.sales_changed_since(models.get_data_seq() + 100)['complete']
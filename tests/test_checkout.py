@@ -0,0 +1,66 @@
+# tests/test_checkout.py
+"""Unit tests for the single-transaction checkout"""
+
+import pytest
+
+from controllers.pos_controller import POSController
+from modules import models
+
+
+@pytest.fixture
+def phone(test_db, db_execute):
+    models.add_inventory_item("CO-001", "Checkout Phone", 3, 400.0, 500.0, "Phones", "")
+    item_id = models.get_inventory_item_by_sku("CO-001")[0]
+    for barcode in ("UNIT-A", "UNIT-B"):
+        db_execute("INSERT INTO product_barcodes (item_id, barcode, status) VALUES (?, ?, 'available')",
+                   (item_id, barcode))
+    return item_id
+
+
+def _unit(item_id, barcode):
+    return {'id': item_id, 'sku': "CO-001", 'name': f"Checkout Phone [{barcode}]", 'category': "Phones",
+            'qty': 1, 'price': 500.0, 'cost': 400.0, 'barcode': barcode}
+
+
+@pytest.mark.unit
+def test_checkout_writes_every_stage(phone, db_query):
+    """Sale, lines, stock, barcodes, customer stats and audit row land together"""
+    items = [_unit(phone, "UNIT-A"), _unit(phone, "UNIT-B")]
+
+    result = POSController.checkout("Checkout Customer", items, customer_phone="01033333333",
+                                    seller_name="Tester", discount_percent=10)
+
+    assert result is not None
+    sale_id = result['sale_id']
+    assert result['total'] == 900.0
+    assert {'customer', 'header', 'line_items', 'stock', 'barcodes', 'audit', 'commit'} <= set(result['timings'])
+    assert db_query("SELECT COUNT(*) FROM sale_items WHERE sale_id = ?", (sale_id,)) == [(2,)]
+    assert db_query("SELECT quantity FROM inventory WHERE item_id = ?", (phone,)) == [(1,)]
+    assert db_query("SELECT DISTINCT status, sale_id FROM product_barcodes") == [('sold', sale_id)]
+    assert db_query("SELECT total_purchases, total_spent FROM customers WHERE customer_id = ?",
+                    (result['customer_id'],)) == [(1, 900.0)]
+    assert db_query("SELECT user FROM audit_logs WHERE entity_type = 'sale' AND entity_id = ?",
+                    (sale_id,)) == [('Tester',)]
+
+
+@pytest.mark.unit
+def test_unavailable_barcode_rolls_back_the_sale(phone, db_query, db_execute):
+    """A unit sold elsewhere rejects the whole checkout; nothing is written"""
+    db_execute("UPDATE product_barcodes SET status = 'sold' WHERE barcode = 'UNIT-B'")
+    items = [_unit(phone, "UNIT-A"), _unit(phone, "UNIT-B")]
+
+    assert POSController.create_sale("Rollback Customer", items, customer_phone="01033333334") is None
+
+    assert db_query("SELECT COUNT(*) FROM sales") == [(0,)]
+    assert db_query("SELECT quantity FROM inventory WHERE item_id = ?", (phone,)) == [(3,)]
+    assert db_query("SELECT status FROM product_barcodes WHERE barcode = 'UNIT-A'") == [('available',)]
+    assert db_query("SELECT COUNT(*) FROM customers WHERE phone = '01033333334'") == [(0,)]
+
+
+@pytest.mark.unit
+def test_stock_is_checked_across_lines_of_the_same_item(phone, db_query):
+    """Two lines of one item cannot together sell more than is in stock"""
+    line = {'id': phone, 'sku': "CO-001", 'name': "Checkout Phone", 'qty': 2, 'price': 500.0, 'cost': 400.0}
+
+    assert POSController.create_sale("Customer", [line, dict(line)]) is None
+    assert db_query("SELECT quantity FROM inventory WHERE item_id = ?", (phone,)) == [(3,)]
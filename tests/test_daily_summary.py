@@ -0,0 +1,96 @@
+# tests/test_daily_summary.py
+"""Unit tests for the daily sales/repair rollup tables"""
+
+from datetime import datetime
+
+import pytest
+
+from modules import daily_summary, models
+from modules.db import get_conn
+
+
+def _summary_rows(table):
+    conn = get_conn()
+    rows = conn.execute(f"SELECT * FROM {table} ORDER BY day").fetchall()
+    conn.close()
+    return rows
+
+
+def _new_item(sku, qty):
+    models.add_inventory_item(sku, "Item", qty, 40.0, 100.0, "Test", "")
+    return models.get_inventory_item_by_sku(sku)[0]
+
+
+def _new_repair(order_number="RS-001"):
+    return models.create_repair_order(
+        order_number=order_number, customer_name="Customer", phone="01012345678",
+        model="Phone X", imei="123456789012345", problem="Screen", est_date="",
+        tech="Tech", note="", total_est=0.0)
+
+
+@pytest.mark.unit
+def test_sale_updates_daily_summary(test_db):
+    """create_sale_detailed adds to today's row in the same transaction"""
+    item_id = _new_item("SUM-001", 10)
+    items = [{'id': item_id, 'sku': "SUM-001", 'name': "Item", 'qty': 2, 'price': 100.0, 'cost': 40.0}]
+
+    models.create_sale_detailed("Customer", None, "", "", "", items, 200.0, 10.0, 20.0, 180.0)
+    models.create_sale_detailed("Customer", None, "", "", "", items, 200.0, 0.0, 0.0, 200.0)
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    totals = daily_summary.get_sales_totals(today, today)
+    assert totals['transaction_count'] == 2
+    assert totals['revenue'] == 380.0
+    assert totals['discount'] == 20.0
+    assert totals['profit'] == 240.0
+
+
+@pytest.mark.unit
+def test_failed_sale_leaves_summary_unchanged(test_db):
+    """A rolled-back sale does not touch the rollup table"""
+    item_id = _new_item("SUM-002", 1)
+    items = [{'id': item_id, 'sku': "SUM-002", 'name': "Item", 'qty': 5, 'price': 100.0, 'cost': 40.0}]
+
+    assert models.create_sale_detailed("Customer", None, "", "", "", items, 500.0, 0, 0, 500.0) is None
+    assert _summary_rows("daily_sales_summary") == []
+
+
+@pytest.mark.unit
+def test_repair_summary_follows_status_and_parts(test_db):
+    """Parts and status changes move a repair into the completed totals"""
+    repair_id = _new_repair()
+    models.add_repair_part(repair_id, "Screen", 1, 500.0, 300.0)
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    totals = daily_summary.get_repair_totals(today, today)
+    assert totals['order_count'] == 1
+    assert totals['estimate_total'] == 500.0
+    assert totals['completed_count'] == 0
+
+    models.update_repair_status(repair_id, "Completed", "Tech")
+    totals = daily_summary.get_repair_totals(today, today)
+    assert totals['completed_count'] == 1
+    assert totals['completed_revenue'] == 500.0
+    assert totals['completed_profit'] == 200.0
+
+    models.delete_repair_order(repair_id)
+    assert daily_summary.get_repair_totals(today, today)['order_count'] == 0
+
+
+@pytest.mark.unit
+def test_rebuild_matches_incremental_totals(test_db):
+    """Rebuilding from raw rows gives the same rows as incremental maintenance"""
+    item_id = _new_item("SUM-003", 10)
+    models.create_sale("Customer", [(item_id, 3, 100.0, 40.0)])
+    repair_id = _new_repair("RS-002")
+    models.add_repair_part(repair_id, "Battery", 2, 150.0, 100.0)
+    models.update_repair_status(repair_id, "Delivered", "Tech")
+
+    sales_before = _summary_rows("daily_sales_summary")
+    repairs_before = _summary_rows("daily_repair_summary")
+
+    result = daily_summary.rebuild_daily_summaries()
+
+    assert result == {'sales_days': 1, 'repair_days': 1}
+    assert _summary_rows("daily_sales_summary") == sales_before
+    assert _summary_rows("daily_repair_summary") == repairs_before
@@ -0,0 +1,87 @@
+# tests/test_dashboard_snapshot.py
+"""Unit tests for the cached dashboard snapshot"""
+
+import threading
+
+import pytest
+
+from modules import dashboard_snapshot, models
+from modules.db import get_conn, get_data_version
+
+
+@pytest.fixture
+def snapshot_cache(test_db):
+    dashboard_snapshot.invalidate_snapshot()
+    yield dashboard_snapshot
+    dashboard_snapshot.invalidate_snapshot()
+
+
+def _sell(sku, qty=1):
+    models.add_inventory_item(sku, "Item", 10, 40.0, 100.0, "Test", "")
+    item_id = models.get_inventory_item_by_sku(sku)[0]
+    return models.create_sale("Customer", [(item_id, qty, 100.0, 40.0)])
+
+
+@pytest.mark.unit
+def test_snapshot_matches_individual_queries(snapshot_cache):
+    """The combined queries agree with the per-KPI model functions"""
+    _sell("SNAP-001", 2)
+    models.create_repair_order("SNAP-R1", "Customer", "01012345678", "Phone X", "123456789012345",
+                               "Screen", "2000-01-01", "Tech", "", 250.0)
+
+    snapshot = snapshot_cache.get_dashboard_snapshot()
+    stats = models.get_dashboard_stats()
+
+    for key in ('total_repairs', 'pending_repairs', 'total_revenue', 'sales_profit',
+                'low_stock', 'overdue_count', 'recent_repairs'):
+        assert snapshot[key] == stats[key], key
+    assert snapshot['sales_today'] == models.get_daily_sales_total()
+    assert snapshot['top_selling_items'] == models.get_top_selling_items()
+    assert snapshot['repair_distribution'] == models.get_repair_distribution()
+
+
+@pytest.mark.unit
+def test_snapshot_is_cached_until_data_changes(snapshot_cache):
+    """Repeated calls hit the cache; a commit invalidates it"""
+    first = snapshot_cache.get_dashboard_snapshot()
+    before = snapshot_cache.get_snapshot_stats()
+
+    assert snapshot_cache.get_dashboard_snapshot() is first
+    assert snapshot_cache.get_snapshot_stats()["hits"] == before["hits"] + 1
+
+    _sell("SNAP-002")
+    refreshed = snapshot_cache.get_dashboard_snapshot()
+    assert refreshed is not first
+    assert refreshed['sales_revenue'] == 100.0
+
+
+@pytest.mark.unit
+def test_snapshot_expires_after_ttl(snapshot_cache):
+    """A max_age of 0 always recomputes"""
+    first = snapshot_cache.get_dashboard_snapshot()
+    assert snapshot_cache.get_dashboard_snapshot(max_age=0) is not first
+
+
+@pytest.mark.unit
+def test_data_version_sees_commits_from_any_thread(test_db):
+    """Commits made on pooled connections, in any thread, change the token"""
+    start = get_data_version()
+    assert get_data_version() == start
+
+    conn = get_conn()
+    conn.execute("INSERT INTO inventory (sku, name, quantity) VALUES ('DV-1', 'Item', 1)")
+    conn.commit()
+    conn.close()
+    after_main = get_data_version()
+    assert after_main != start
+
+    def worker():
+        c = get_conn()
+        c.execute("INSERT INTO inventory (sku, name, quantity) VALUES ('DV-2', 'Item', 1)")
+        c.commit()
+        c.close()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert get_data_version() != after_main
@@ -0,0 +1,240 @@
+# tests/test_data_service.py
+"""Unit tests for the local data service (served over a real socket on this machine)"""
+
+import threading
+
+import pytest
+
+import controllers
+from controllers.inventory_controller import InventoryController
+from modules import models
+from modules.data_service import (DataService, DataServiceClient, DataServiceError,
+                                  encode, is_read, read_frame)
+
+
+@pytest.fixture
+def service(test_db, tmp_path):
+    server = DataService(f"unix:{tmp_path / 'shop.sock'}")
+    address = server.start()
+    client = DataServiceClient(address, timeout=5)
+    yield server, client
+    client.close()
+    controllers.use_direct()
+    server.stop()
+
+
+@pytest.mark.unit
+def test_frames_round_trip_rows_and_sets():
+    """Tuples, sets and int-keyed dicts come back as they were sent"""
+    import socket
+    left, right = socket.socketpair()
+    message = {"rows": [(1, "SKU", None, 2.5)], "ids": {3, 4}, "qty": {7: 2}, "name": "هاتف"}
+    left.sendall(encode(message))
+    assert read_frame(right) == message
+    left.close()
+    assert read_frame(right) is None
+    right.close()
+
+
+@pytest.mark.unit
+def test_reads_are_cached_until_a_write(service):
+    """Batched reads hit the cache; a write through the service invalidates it"""
+    server, client = service
+    assert is_read("models.get_inventory") and not is_read("models.get_or_create_customer")
+
+    first, again = client.batch([("models.get_inventory", (), {}), ("models.get_inventory", (), {})])
+    assert first == again == []
+    assert server.stats["cache_hits"] == 1
+
+    assert client.call("models.add_inventory_item", "DS-001", "Service Item", 4, 1.0, 2.0, "Test", "")
+    rows = client.call("models.get_inventory")
+    assert [row[1] for row in rows] == ["DS-001"]
+    assert isinstance(rows[0], tuple)
+    assert server.stats["writes"] == 1
+
+    with pytest.raises(DataServiceError):
+        client.call("models.no_such_function")
+    # Helpers that take the caller's cursor are not published
+    for helper in ("insert_sale", "reserve_stock", "upsert_customer", "record_customer_purchase"):
+        assert f"models.{helper}" not in server.api
+
+
+@pytest.mark.unit
+def test_hot_path_reads_skip_the_writer(service):
+    """Scan lookups, journal polls and snapshot patches are reads, whatever their names"""
+    server, client = service
+    for name in ("scan_resolver.lookup_rows", "change_log.read_since", "inventory_repository.load_barcodes",
+                 "inventory_repository.barcodes_of", "stocktake.load_session", "models.get_inventory"):
+        assert is_read(name), name
+    for name in ("models.get_or_create_customer", "stocktake.save_counts", "models.hash_password"):
+        assert not is_read(name), name
+
+    assert client.call("scan_resolver.lookup_rows", ["NO-SUCH-CODE"]) == []
+    assert client.call("scan_resolver.lookup_rows", ["NO-SUCH-CODE"]) == []
+    assert server.stats["writes"] == 0 and server.stats["cache_hits"] == 1
+
+
+@pytest.mark.unit
+def test_controllers_switch_to_service_mode(service):
+    """After use_service, controller calls run in the service; use_direct restores them"""
+    server, client = service
+    controllers.use_service(client)
+    assert InventoryController.add_item("DS-002", "Remote Item", 1, 1.0, 2.0, "Test", "")
+    assert [row[1] for row in InventoryController.get_all_items()] == ["DS-002"]
+    assert server.stats["calls"] == 2
+    # Local-only methods build their objects here from reads made in the service
+    before = server.stats["calls"]
+    assert len(InventoryController.get_repository()) == 1
+    assert server.stats["calls"] > before
+
+    controllers.use_direct()
+    calls = server.stats["calls"]
+    assert [row[1] for row in InventoryController.get_all_items()] == ["DS-002"]
+    assert server.stats["calls"] == calls
+
+
+@pytest.mark.unit
+def test_concurrent_writers_are_serialized(service):
+    """Several terminals writing at once all succeed through the single writer"""
+    server, _ = service
+    models.add_inventory_item("DS-003", "Stock", 30, 1.0, 2.0, "Test", "")
+    item_id = models.get_inventory_item_by_sku("DS-003")[0]
+    errors = []
+
+    def till():
+        client = DataServiceClient(server.address, timeout=5)
+        try:
+            for _ in range(5):
+                if not client.call("models.decrease_inventory_quantity", item_id, 2):
+                    errors.append("decrement failed")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            client.close()
+
+    tills = [threading.Thread(target=till) for _ in range(3)]
+    for t in tills:
+        t.start()
+    for t in tills:
+        t.join()
+
+    assert errors == []
+    assert models.get_inventory_item_by_id(item_id)[5] == 0
+
+
+@pytest.mark.unit
+def test_served_functions_run_in_the_service(service):
+    """In service mode stocktake, scans and the change journal go through the service"""
+    server, client = service
+    models.add_inventory_item("DS-004", "Counted", 5, 1.0, 2.0, "Test", "")
+    item_id = models.get_inventory_item_by_sku("DS-004")[0]
+    controllers.use_service(client)
+    from modules import change_log
+    from modules.scan_resolver import ScanResolver
+    from modules.stocktake import StocktakeSession
+
+    before = server.stats["calls"]
+    assert ScanResolver().resolve("DS-004").item_id == item_id
+    session = StocktakeSession.start("Remote count", user="tester")
+    session.set_count(item_id, 3)
+    assert session.commit()['adjusted'] == [(item_id, 5, 3)]
+    assert change_log.read_since(0)[0]["inventory"] == {item_id}
+    assert server.stats["calls"] > before
+    assert server.stats["writes"] >= 2
+
+    controllers.use_direct()
+    assert models.get_inventory_item_by_id(item_id)[5] == 3
+
+
+@pytest.mark.unit
+def test_user_accounts_are_written_by_the_service(service):
+    """The user writes the Users tab calls run in the service in service mode"""
+    server, client = service
+    controllers.use_service(client)
+
+    writes = server.stats["writes"]
+    assert models.add_user("remote", "pw123456", "Remote User", "Cashier")
+    assert server.stats["writes"] == writes + 1
+    user_id = models.get_user("remote")[0]
+    assert models.update_user_password(user_id, "pw654321")
+    assert models.delete_user_by_id(user_id)
+    assert server.stats["writes"] == writes + 3
+    assert models.get_user("remote") is None
+
+
+@pytest.mark.unit
+def test_view_lookups_and_reports_are_served_reads(service):
+    """The inventory, repairs and reports tabs read through the service, never shop.db"""
+    from modules import financial_reports
+    server, client = service
+    models.add_inventory_item("DS-005", "Edited", 2, 1.0, 2.0, "Test", "")
+    item_id = models.get_inventory_item_by_sku("DS-005")[0]
+    controllers.use_service(client)
+
+    calls, writes = server.stats["calls"], server.stats["writes"]
+    assert models.get_inventory_item_by_sku("DS-005")[0] == item_id
+    assert models.get_inventory_item_for_edit(item_id)[1:3] == ("DS-005", "Edited")
+    assert models.get_last_order_number() is None
+    report = financial_reports.get_sales_report("2024-01-01", "2024-01-31", detail="days")
+    assert report['rows'] == [] and report['totals']['transaction_count'] == 0
+    assert server.stats["calls"] == calls + 4
+    assert server.stats["writes"] == writes
+    for name in ("models.get_inventory_item_by_sku", "models.get_inventory_item_for_edit",
+                 "models.get_last_order_number", "financial_reports.get_sales_report"):
+        assert is_read(name), name
+
+
+@pytest.mark.unit
+def test_preflight_in_service_mode_does_not_open_shop_db(service, monkeypatch):
+    """A service-mode terminal checks it can reach the service instead of migrating"""
+    import config
+    from modules import health
+    server, _ = service
+    monkeypatch.setattr(config, "get_data_service_settings",
+                        lambda cfg=None: (True, {"mode": "service", "address": server.address}))
+    monkeypatch.setattr(health, "migrate", lambda: pytest.fail("terminal migrated shop.db"))
+    monkeypatch.setattr(health, "get_conn", lambda: pytest.fail("terminal opened shop.db"))
+
+    checks = {check.name: check for check in health.run_preflight_checks()["checks"]}
+    assert checks["Data service"].ok
+    assert "Schema check" not in checks and "Database connection" not in checks
+
+
+@pytest.mark.unit
+def test_cached_reads_expire_at_midnight(service, monkeypatch):
+    """Date-relative reads are not served from yesterday's cache"""
+    import datetime as dt
+    from modules import data_service
+    server, client = service
+    client.call("models.get_inventory")
+    client.call("models.get_inventory")
+    assert server.stats["cache_hits"] == 1
+
+    class Tomorrow(dt.date):
+        @classmethod
+        def today(cls):
+            return dt.date(2099, 1, 1)
+    monkeypatch.setattr(data_service, "date", Tomorrow)
+    client.call("models.get_inventory")
+    assert server.stats["cache_hits"] == 1
+
+
+@pytest.mark.unit
+def test_remote_address_needs_a_secret(test_db, tmp_path):
+    """A non-loopback service without a secret is refused; with one, requests must carry it"""
+    with pytest.raises(DataServiceError):
+        DataService("tcp:0.0.0.0:0").start()
+
+    server = DataService(f"unix:{tmp_path / 'secret.sock'}", secret="s3cret")
+    address = server.start()
+    try:
+        stranger = DataServiceClient(address, timeout=5)
+        with pytest.raises(DataServiceError, match="not authorized"):
+            stranger.call("models.get_inventory")
+        stranger.close()
+        terminal = DataServiceClient(address, timeout=5, secret="s3cret")
+        assert terminal.call("models.get_inventory") == []
+        terminal.close()
+        assert server.stats["refused"] == 1
+    finally:
+        server.stop()
@@ -0,0 +1,296 @@
+# tests/test_db_pool.py
+"""Unit tests for the pooled connection manager in modules.db"""
+
+import sqlite3
+import threading
+
+import pytest
+
+import modules.db as db_module
+from modules.db import get_conn, get_pool_stats, close_all
+from modules.transaction_manager import transaction
+
+
+@pytest.mark.unit
+def test_closed_connection_is_reused(test_db):
+    """Closing a connection returns it to the pool for the next checkout"""
+    conn = get_conn()
+    raw = conn.raw
+    conn.close()
+
+    before = get_pool_stats()
+    conn2 = get_conn()
+    assert conn2.raw is raw
+    conn2.close()
+
+    after = get_pool_stats()
+    assert after["reused"] == before["reused"] + 1
+    assert after["opened"] == before["opened"]
+
+
+@pytest.mark.unit
+def test_nested_checkouts_get_distinct_connections(test_db):
+    """A connection that is checked out is never handed to a second caller"""
+    outer = get_conn()
+    inner = get_conn()
+    assert outer.raw is not inner.raw
+    inner.close()
+    outer.close()
+
+
+@pytest.mark.unit
+def test_close_rolls_back_uncommitted_changes(test_db):
+    """Uncommitted work is discarded on close, like a plain sqlite3 connection"""
+    conn = get_conn()
+    conn.execute("INSERT INTO inventory (sku, name, quantity) VALUES ('POOL-1', 'Pool', 1)")
+    conn.close()
+
+    conn = get_conn()
+    count = conn.execute("SELECT COUNT(*) FROM inventory WHERE sku = 'POOL-1'").fetchone()[0]
+    conn.close()
+    assert count == 0
+
+
+@pytest.mark.unit
+def test_closed_proxy_cannot_be_used(test_db):
+    """Using a connection after close() raises instead of touching the pool"""
+    conn = get_conn()
+    conn.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+@pytest.mark.unit
+def test_checkout_state_is_reset(test_db):
+    """row_factory and isolation_level changes do not leak to the next borrower"""
+    conn = get_conn()
+    conn.row_factory = sqlite3.Row
+    conn.isolation_level = "IMMEDIATE"
+    conn.close()
+
+    conn = get_conn()
+    assert conn.row_factory is None
+    assert conn.isolation_level == ""
+    conn.close()
+
+
+@pytest.mark.unit
+def test_context_manager_commits_and_releases(test_db):
+    """``with get_conn() as conn`` commits and the connection returns to the pool"""
+    with get_conn() as conn:
+        conn.execute("INSERT INTO inventory (sku, name, quantity) VALUES ('POOL-2', 'Pool', 1)")
+    del conn
+
+    with transaction() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM inventory WHERE sku = 'POOL-2'").fetchone()[0]
+    assert count == 1
+    assert get_pool_stats()["idle"] >= 1
+
+
+@pytest.mark.unit
+def test_idle_pool_is_bounded(test_db):
+    """No more than POOL_MAX_IDLE connections are kept per thread"""
+    conns = [get_conn() for _ in range(db_module.POOL_MAX_IDLE + 3)]
+    for conn in conns:
+        conn.close()
+    assert get_pool_stats()["idle"] == db_module.POOL_MAX_IDLE
+
+
+@pytest.mark.unit
+def test_replaced_database_file_is_not_reused(test_db):
+    """Idle connections to a deleted/recreated file are discarded"""
+    conn = get_conn()
+    raw = conn.raw
+    conn.close()
+
+    test_db.unlink()
+    for suffix in ("-wal", "-shm"):
+        test_db.with_name(test_db.name + suffix).unlink(missing_ok=True)
+    sqlite3.connect(str(test_db)).close()
+
+    conn = get_conn()
+    assert conn.raw is not raw
+    conn.close()
+
+
+@pytest.mark.unit
+def test_connections_are_per_thread(test_db):
+    """Each thread gets its own connections"""
+    conn = get_conn()
+    main_raw = conn.raw
+    conn.close()
+
+    seen = []
+
+    def worker():
+        c = get_conn()
+        seen.append(c.raw)
+        c.execute("SELECT 1").fetchone()
+        c.close()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+
+    assert seen and seen[0] is not main_raw
+
+
+@pytest.mark.unit
+def test_close_all_empties_idle_pool(test_db):
+    """close_all() closes the calling thread's idle connections"""
+    get_conn().close()
+    assert get_pool_stats()["idle"] >= 1
+    close_all()
+    assert get_pool_stats()["idle"] == 0
+
+
+# ==================== Storage Profile Tests ====================
+
+@pytest.mark.unit
+def test_storage_profile_applied_to_new_connections(test_db):
+    """New connections run with the configured profile's PRAGMAs"""
+    name, settings, _ = db_module.get_storage_profile()
+    report = db_module.describe_storage()
+
+    assert report["profile"] == name
+    assert str(report["journal_mode"]).upper() == settings["journal_mode"]
+    assert report["cache_size"] == settings["cache_size"]
+    assert report["busy_timeout"] == settings["busy_timeout"]
+
+
+@pytest.mark.unit
+def test_storage_profile_overrides(test_db):
+    """Per-setting overrides in the config win over the named profile"""
+    cfg = {"database": {"storage_profile": "compatible", "pragmas": {"cache_size": -4000}}}
+    try:
+        db_module.reload_storage_profile(cfg)
+        report = db_module.describe_storage()
+        assert report["profile"] == "compatible"
+        assert str(report["journal_mode"]).upper() == "DELETE"
+        assert report["cache_size"] == -4000
+    finally:
+        db_module.reload_storage_profile()
+
+
+@pytest.mark.unit
+def test_unknown_storage_profile_falls_back_to_default():
+    """An unknown profile name resolves to the default profile"""
+    import config
+    name, settings, _ = config.get_storage_profile({"database": {"storage_profile": "nope"}})
+    assert name == config.DEFAULT_STORAGE_PROFILE
+    assert settings == config.STORAGE_PROFILES[config.DEFAULT_STORAGE_PROFILE]
+
+
+@pytest.mark.unit
+def test_default_profile_is_network_safe():
+    """Installs that never chose a profile keep the rollback journal"""
+    import config
+    name, settings, _ = config.get_storage_profile({"database": {"path": "shop.db"}})
+    assert name == "compatible"
+    assert settings["journal_mode"] == "DELETE"
+
+
+@pytest.mark.unit
+def test_wal_profile_refused_on_network_share(test_db, monkeypatch):
+    """A WAL profile falls back to compatible when shop.db is on a network share"""
+    monkeypatch.setattr(db_module, "is_network_path", lambda path: True)
+    try:
+        name, settings, _ = db_module.reload_storage_profile({"database": {"storage_profile": "balanced"}})
+        assert name == "compatible" and settings["journal_mode"] == "DELETE"
+        monkeypatch.setattr(db_module, "is_network_path", lambda path: False)
+        assert db_module.reload_storage_profile({"database": {"storage_profile": "balanced"}})[0] == "balanced"
+    finally:
+        monkeypatch.undo()
+        db_module.reload_storage_profile()
+
+
+@pytest.mark.unit
+def test_pragma_values_are_validated():
+    """Only known keywords and integers are interpolated into PRAGMA statements"""
+    assert db_module._pragma_statement("journal_mode", "wal") == "PRAGMA journal_mode = WAL"
+    assert db_module._pragma_statement("cache_size", "-2000") == "PRAGMA cache_size = -2000"
+    with pytest.raises(ValueError):
+        db_module._pragma_statement("journal_mode", "WAL; DROP TABLE users")
+    with pytest.raises(ValueError):
+        db_module._pragma_statement("mmap_size", "1; DROP TABLE users")
+
+
+@pytest.mark.unit
+def test_wal_checkpoint_runs(test_db):
+    """A manual checkpoint copies committed WAL frames back to the database"""
+    from modules.db_checkpoint import WalCheckpointer
+
+    with transaction() as conn:
+        conn.execute("INSERT INTO inventory (sku, name, quantity) VALUES ('WAL-1', 'Wal', 1)")
+
+    checkpointer = WalCheckpointer(interval=3600)
+    result = checkpointer.checkpoint("TRUNCATE")
+    assert result is not None
+    busy, _, _ = result
+    assert busy == 0
+    assert checkpointer.stats["runs"] == 1
+
+
+@pytest.mark.unit
+def test_report_connection_is_read_only(test_db):
+    """Report connections refuse writes"""
+    conn = db_module.get_report_conn()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO customers (name, phone) VALUES ('Report', '01066666666')")
+    conn.close()
+
+
+@pytest.mark.unit
+def test_report_sees_one_snapshot(test_db):
+    """In WAL mode, sales committed while a report runs do not show up halfway through it"""
+    try:
+        db_module.reload_storage_profile({"database": {"storage_profile": "balanced"}})
+        get_conn().close()  # switches the file to WAL
+        report = db_module.get_report_conn()
+        before = report.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+        writer = get_conn()
+        writer.execute("INSERT INTO customers (name, phone) VALUES ('Walk-in', '01066666667')")
+        writer.commit()
+        writer.close()
+
+        assert report.execute("SELECT COUNT(*) FROM customers").fetchone()[0] == before
+        report.close()
+
+        fresh = db_module.get_report_conn()
+        assert fresh.execute("SELECT COUNT(*) FROM customers").fetchone()[0] == before + 1
+        fresh.close()
+    finally:
+        db_module.reload_storage_profile()
+
+
+@pytest.mark.unit
+def test_report_does_not_block_sales_without_wal(test_db):
+    """With a rollback journal an open report does not hold the lock commits need"""
+    try:
+        db_module.reload_storage_profile({"database": {"storage_profile": "compatible",
+                                                       "pragmas": {"busy_timeout": 100}}})
+        report = db_module.get_report_conn()
+        report.execute("SELECT COUNT(*) FROM customers").fetchone()
+
+        writer = get_conn()
+        writer.execute("INSERT INTO customers (name, phone) VALUES ('Walk-in', '01066666668')")
+        writer.commit()
+        writer.close()
+
+        assert report.execute("SELECT COUNT(*) FROM customers WHERE phone = '01066666668'").fetchone()[0] == 1
+        report.close()
+    finally:
+        db_module.reload_storage_profile()
+
+
+@pytest.mark.unit
+def test_slow_report_is_interrupted(test_db):
+    """A report past its time limit is interrupted and counted"""
+    before = db_module.get_report_stats()["timeouts"]
+    conn = db_module.get_report_conn(timeout=0)
+    with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+        conn.execute("""WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000)
+                        SELECT SUM(i) FROM n""").fetchone()
+    conn.close()
+    assert db_module.get_report_stats()["timeouts"] == before + 1
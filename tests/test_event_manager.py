@@ -0,0 +1,112 @@
+# tests/test_event_manager.py
+"""Unit tests for the coalescing event bus (no display needed)"""
+
+import threading
+
+import pytest
+
+from modules.event_manager import event_manager
+
+
+class FakeRoot:
+    """Stands in for the Tk root: after()/after_idle() callbacks run when pump() is called"""
+
+    def __init__(self):
+        self.idle = []
+        self.timers = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+        return f"idle#{len(self.idle)}"
+
+    def after(self, ms, callback):
+        self.timers.append(callback)
+        return f"after#{len(self.timers)}"
+
+    def after_cancel(self, job):
+        pass
+
+    def pump(self):
+        """Run idle callbacks, then one round of timers (like one main loop pass)."""
+        while self.idle:
+            self.idle.pop(0)()
+        timers, self.timers = self.timers, []
+        for callback in timers:
+            callback()
+        while self.idle:
+            self.idle.pop(0)()
+
+
+@pytest.fixture
+def bus():
+    event_manager.detach()
+    event_manager.clear_all()
+    yield event_manager
+    event_manager.detach()
+    event_manager.clear_all()
+
+
+@pytest.mark.unit
+def test_events_are_coalesced_per_idle_tick(bus):
+    """Several publishes before the idle tick reach a subscriber once, with all ids"""
+    root = FakeRoot()
+    received = []
+    bus.attach(root)
+    bus.subscribe('inventory_changed', received.append)
+
+    bus.notify('inventory_changed', {'action': 'update', 'item_id': 1})
+    bus.notify('inventory_changed', {'action': 'update', 'item_id': 2})
+    bus.notify('inventory_changed', ids=[3])
+    assert received == []
+
+    root.pump()
+
+    assert len(received) == 1
+    assert received[0]['ids'] == {1, 2, 3}
+    assert received[0]['coalesced'] == 3
+
+    bus.notify('inventory_changed', {'action': 'refresh'})
+    root.pump()
+    assert received[1]['ids'] is None
+
+
+@pytest.mark.unit
+def test_background_publish_runs_on_main_loop(bus):
+    """Events from other threads are delivered by the main loop, not the publisher"""
+    root = FakeRoot()
+    threads = []
+    bus.attach(root)
+    bus.subscribe('sale_completed', lambda data: threads.append(threading.get_ident()))
+
+    worker = threading.Thread(target=lambda: bus.notify('sale_completed', {'sale_id': 7}))
+    worker.start()
+    worker.join()
+    assert threads == []
+
+    root.pump()
+    assert threads == [threading.get_ident()]
+
+
+@pytest.mark.unit
+def test_reentrant_cycles_are_dropped(bus):
+    """A subscriber that re-publishes its own event (even indirectly) does not loop"""
+    calls = []
+
+    def on_inventory(data):
+        calls.append('inventory')
+        bus.notify('repair_updated')
+
+    def on_repair(data):
+        calls.append('repair')
+        bus.notify('inventory_changed')
+
+    bus.subscribe('inventory_changed', on_inventory)
+    bus.subscribe('repair_updated', on_repair)
+    before = bus.get_stats()['dropped_loops']
+
+    bus.notify('inventory_changed')
+
+    assert calls == ['inventory', 'repair']
+    stats = bus.get_stats()
+    assert stats['dropped_loops'] == before + 1
+    assert any('on_inventory' in name for name in stats['subscribers'])
@@ -0,0 +1,181 @@
+# tests/test_financial_reports.py
+"""Tests for the date-range report queries in modules.financial_reports"""
+
+from datetime import datetime
+
+import pytest
+
+from modules import daily_summary, financial_reports
+from modules.date_range import day_bounds, range_clause, days_back
+from modules.db import get_conn, get_report_conn
+
+REPORT_TABLES = ("sales", "sale_items", "repair_orders", "repair_parts")
+
+
+def _add_sale(sale_date, total, items):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("INSERT INTO sales (sale_date, customer_name, total_amount) VALUES (?, ?, ?)",
+              (sale_date, "Walk-in", total))
+    sale_id = c.lastrowid
+    for item_id, qty, price, cost in items:
+        c.execute("""INSERT INTO sale_items (sale_id, item_id, quantity, unit_price, cost_price)
+                     VALUES (?, ?, ?, ?, ?)""", (sale_id, item_id, qty, price, cost))
+    daily_summary.record_sale(c, sale_date, total,
+                              sum(qty * (price - cost) for _, qty, price, cost in items))
+    conn.commit()
+    conn.close()
+    return sale_id
+
+
+def _record_plans(monkeypatch):
+    """Capture EXPLAIN QUERY PLAN output for every query the reports run."""
+    plans = []
+
+    def record(conn, sql, params):
+        if sql.lstrip().upper().startswith("SELECT"):
+            detail = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            plans.append((sql, detail))
+
+    class RecordingCursor:
+        def __init__(self, cursor):
+            self._cursor = cursor
+
+        def execute(self, sql, params=()):
+            record(self._cursor.connection, sql, params)
+            return self._cursor.execute(sql, params)
+
+        def __getattr__(self, name):
+            return getattr(self._cursor, name)
+
+    class RecordingConn:
+        def __init__(self, conn):
+            self._conn = conn
+
+        def cursor(self):
+            return RecordingCursor(self._conn.cursor())
+
+        def execute(self, sql, params=()):
+            record(self._conn, sql, params)
+            return self._conn.execute(sql, params)
+
+        def __getattr__(self, name):
+            return getattr(self._conn, name)
+
+    monkeypatch.setattr(financial_reports, "get_report_conn", lambda: RecordingConn(get_report_conn()))
+    return plans
+
+
+def _full_scans(plans):
+    scans = []
+    for sql, detail in plans:
+        for line in detail:
+            words = line.split()
+            if words[:1] == ["SCAN"] and len(words) > 1 and words[1] in REPORT_TABLES:
+                scans.append((line, sql))
+    return scans
+
+
+# ==================== Date Range Helper Tests ====================
+
+@pytest.mark.unit
+def test_day_bounds_are_half_open():
+    """The inclusive end day becomes an exclusive bound on the following day"""
+    assert day_bounds("2024-01-31", "2024-01-31") == ("2024-01-31", "2024-02-01")
+    assert day_bounds("2024-12-01", "2024-12-31") == ("2024-12-01", "2025-01-01")
+    assert day_bounds("2024-03-01") == ("2024-03-01", None)
+
+
+@pytest.mark.unit
+def test_range_clause_includes_whole_end_day(test_db):
+    """Timestamps late on the end day match, the next day does not"""
+    where, params = range_clause("sale_date", "2024-05-01", "2024-05-02")
+    _add_sale("2024-05-02 23:59:59", 10.0, [])
+    _add_sale("2024-05-03 00:00:00", 10.0, [])
+
+    conn = get_conn()
+    count = conn.execute(f"SELECT COUNT(*) FROM sales WHERE {where}", params).fetchone()[0]
+    conn.close()
+    assert count == 1
+
+
+@pytest.mark.unit
+def test_days_back():
+    """days_back counts back from the given day"""
+    assert days_back(7, datetime(2024, 3, 8)) == "2024-03-01"
+
+
+# ==================== Report Tests ====================
+
+@pytest.mark.unit
+def test_profit_loss_counts_each_sale_once(test_db):
+    """A sale with several line items is one transaction and its total counts once"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    _add_sale(today + "T10:00:00", 300.0, [(1, 1, 100.0, 60.0), (2, 2, 100.0, 70.0)])
+
+    report = financial_reports.get_profit_loss_report(today, today)
+
+    assert report['sales']['transaction_count'] == 1
+    assert report['sales']['revenue'] == 300.0
+    assert report['sales']['profit'] == 100.0
+
+
+@pytest.mark.unit
+def test_sales_trends_counts_each_sale_once(test_db):
+    """Daily trend rows are not multiplied by the number of line items"""
+    now = datetime.now().isoformat(timespec='seconds')
+    _add_sale(now, 150.0, [(1, 1, 50.0, 20.0), (2, 1, 100.0, 50.0)])
+
+    trends = financial_reports.get_sales_trends(7)
+
+    assert len(trends) == 1
+    assert trends[0]['transactions'] == 1
+    assert trends[0]['revenue'] == 150.0
+    assert trends[0]['profit'] == 80.0
+
+
+@pytest.mark.unit
+def test_sales_report_rows_for_each_detail(test_db, monkeypatch):
+    """The Reports tab and printed reports get totals and rows from one report connection"""
+    _add_sale("2024-03-04T10:00:00", 300.0, [(1, 1, 100.0, 60.0), (2, 2, 100.0, 70.0)])
+    _add_sale("2024-03-05", 50.0, [(1, 1, 50.0, 30.0)])
+    opened = []
+
+    def report_conn():
+        conn = get_report_conn()
+        opened.append(conn.execute("PRAGMA query_only").fetchone()[0])
+        return conn
+    monkeypatch.setattr(financial_reports, "get_report_conn", report_conn)
+
+    sales = financial_reports.get_sales_report("2024-03-04", "2024-03-05")
+    assert sales['totals']['transaction_count'] == 2
+    assert sales['totals']['revenue'] == 350.0
+    assert [(row[0], row[3], row[6]) for row in sales['rows']] == [(2, 1, 50.0), (1, 2, 300.0)]
+
+    days = financial_reports.get_sales_report("2024-03-04", "2024-03-05", detail="days")
+    assert [(row[0], row[1], row[2]) for row in days['rows']] == [("2024-03-04", 1, 300.0), ("2024-03-05", 1, 50.0)]
+
+    weeks = financial_reports.get_sales_report("2024-03-01", "2024-03-31", detail="weeks")
+    assert [row[1:5] for row in weeks['rows']] == [("2024-03-04", "2024-03-05", 2, 350.0)]
+    assert opened == [1, 1, 1]
+
+    with pytest.raises(ValueError):
+        financial_reports.get_sales_report("2024-03-01", "2024-03-31", detail="months")
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("run_report", [
+    lambda: financial_reports.get_profit_loss_report("2024-01-01", "2024-01-31"),
+    lambda: financial_reports.get_sales_trends(30),
+    lambda: financial_reports.get_top_selling_products(10, 30),
+    lambda: financial_reports.get_top_customers(10, 30),
+    lambda: financial_reports.get_repair_analytics(30),
+    lambda: financial_reports.get_sales_report("2024-01-01", "2024-01-31"),
+], ids=["profit_loss", "sales_trends", "top_products", "top_customers", "repair_analytics", "sales_report"])
+def test_report_queries_do_not_scan_tables(test_db, monkeypatch, run_report):
+    """Report queries reach sales/repair rows through indexes, never a full scan"""
+    plans = _record_plans(monkeypatch)
+    run_report()
+
+    assert plans, "report ran no queries"
+    assert _full_scans(plans) == []
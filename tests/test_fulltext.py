@@ -0,0 +1,120 @@
+# tests/test_fulltext.py
+"""Unit tests for the FTS5 search indexes"""
+
+import pytest
+
+from modules import fulltext, models
+from modules.db import get_conn
+
+
+def _new_repair(order_number, customer, phone, model="Galaxy S24", problem="Broken screen"):
+    return models.create_repair_order(
+        order_number=order_number, customer_name=customer, phone=phone,
+        model=model, imei="356789012345678", problem=problem, est_date="",
+        tech="Tech", note="", total_est=0.0)
+
+
+@pytest.mark.unit
+def test_search_finds_rows_from_every_source(test_db):
+    """Inventory, customers and repairs are indexed by triggers as they are written"""
+    models.add_inventory_item("FTS-IP15", "iPhone 15 Pro", 5, 900.0, 1100.0, "Phones", "",
+                              storage="256GB", color="Natural Titanium", brand="Apple")
+    models.get_or_create_customer("Mona Hassan", "01098765432", email="mona@example.com")
+    _new_repair("FTS-R1", "Karim Adel", "01155555555")
+
+    assert [r['type'] for r in models.search("titanium")] == ["inventory"]
+    assert [r['type'] for r in models.search("mona@example")] == ["customers"]
+    assert [r['type'] for r in models.search("FTS-R1")] == ["repairs"]
+    assert {r['type'] for r in models.search("fts")} == {"inventory", "repairs"}
+    assert models.search("iphone titanium 256")[0]['title'] == "iPhone 15 Pro"
+
+
+@pytest.mark.unit
+def test_sources_are_ranked_on_their_own_scale(test_db):
+    """A weak source's best match is not buried under another source's bm25 scale"""
+    for n in range(5):
+        models.add_inventory_item(f"QZX-{n}", "QZX qzx case" + " silicone" * n, 1, 1.0, 2.0, "Accessories", "")
+    _new_repair("R-900", "Hany Samy", "01144444444",
+                problem="Customer says the qzx charger was used overnight; screen flickers after drops")
+
+    results = models.search("qzx", limit=3)
+
+    assert [r['type'] for r in results] == ["inventory", "repairs", "inventory"]
+    assert results[0]['score'] == results[1]['score'] == 1.0 > results[2]['score']
+    inventory = [r['rank'] for r in models.search("qzx", sources=["inventory"])]
+    assert inventory == sorted(inventory)
+
+
+@pytest.mark.unit
+def test_index_follows_updates_and_deletes(test_db):
+    """Updating or deleting a base row updates its index entry"""
+    customer_id = models.get_or_create_customer("Old Name", "01011111111")
+    conn = get_conn()
+    conn.execute("UPDATE customers SET name = 'Samir Fathy' WHERE customer_id = ?", (customer_id,))
+    conn.commit()
+
+    assert models.search("old name") == []
+    assert models.search("samir")[0]['id'] == customer_id
+
+    conn.execute("DELETE FROM customers WHERE customer_id = ?", (customer_id,))
+    conn.commit()
+    conn.close()
+    assert models.search("samir") == []
+
+
+@pytest.mark.unit
+def test_stock_updates_leave_the_index_alone(test_db):
+    """Only updates of indexed columns rewrite the FTS row"""
+    models.add_inventory_item("FTS-QTY", "Pixel 9", 5, 500.0, 650.0, "Phones", "")
+    item_id = models.get_inventory_item_by_sku("FTS-QTY")[0]
+    conn = get_conn()
+    try:
+        # Drop the index entry so any re-index by a trigger would show
+        conn.execute("DELETE FROM inventory_fts WHERE rowid = ?", (item_id,))
+        conn.execute("UPDATE inventory SET quantity = quantity - 1, sell_price = 600 WHERE item_id = ?", (item_id,))
+        conn.commit()
+        assert conn.execute("SELECT COUNT(*) FROM inventory_fts WHERE rowid = ?", (item_id,)).fetchone()[0] == 0
+
+        conn.execute("UPDATE inventory SET color = 'Obsidian' WHERE item_id = ?", (item_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    assert models.search("obsidian")[0]['id'] == item_id
+
+
+@pytest.mark.unit
+def test_arabic_spelling_variants_match(test_db):
+    """Hamza/alef variants and diacritics are folded on both sides"""
+    models.get_or_create_customer("أحمد مُحَمَّد", "01022222222")
+
+    assert models.search("احمد محمد")[0]['title'] == "أحمد مُحَمَّد"
+    assert models.search("إحمد")[0]['type'] == "customers"
+
+
+@pytest.mark.unit
+def test_phone_lookups_use_index(test_db):
+    """search_customer_by_phone and get_customer_history match partial phones"""
+    customer_id = models.get_or_create_customer("Nour", "01233334444")
+    _new_repair("FTS-R2", "Nour", "01233334444")
+    _new_repair("FTS-R3", "Other", "01099990000")
+
+    assert models.search_customer_by_phone("01233334444")[0] == customer_id
+    assert models.search_customer_by_phone("3334")[0] == customer_id
+    assert [row[1] for row in models.get_customer_history("3333")] == ["FTS-R2"]
+    assert fulltext.match_expression("ab") is None
+
+
+@pytest.mark.unit
+def test_rebuild_reindexes_existing_rows(test_db):
+    """rebuild_search_index restores entries removed from the FTS tables"""
+    models.add_inventory_item("FTS-RB", "Rebuild Case", 5, 1.0, 2.0, "Accessories", "")
+    conn = get_conn()
+    conn.execute("DELETE FROM inventory_fts")
+    conn.commit()
+    conn.close()
+    assert models.search("rebuild") == []
+
+    counts = fulltext.rebuild_search_index()
+
+    assert counts['inventory'] >= 1
+    assert models.search("rebuild")[0]['title'] == "Rebuild Case"
@@ -0,0 +1,66 @@
+# tests/test_inventory_index.py
+"""Unit tests for the inventory search index"""
+
+import pytest
+
+from modules import inventory_index, models
+from modules.inventory_index import InventorySearchIndex, search_text
+
+
+def _rows():
+    # id, sku, name, category, qty, buy, sell, storage, ram, color, ...
+    return [
+        (1, "IP15-128", "iPhone 15", "Phones", 3, 900.0, 1100.0, "128GB", "6GB", "Black", None, "Apple", None, 12),
+        (2, "SGS24", "Galaxy S24", "Phones", 12, 700.0, 850.0, "256GB", "8GB", "Gray", None, "Samsung", None, 12),
+        (3, "CASE-IP15", "iPhone 15 Case", "Accessories", 40, 5.0, 15.0, None, None, "Clear", None, None, None, None),
+        (4, "CHG-20W", "USB-C Charger 20W", "Accessories", 0, 8.0, 20.0, None, None, None, None, None, None, None),
+        (5, "MISC", "Screen protector", None, 2, 1.0, 4.0, None, None, None, None, None, None, None),
+    ]
+
+
+def _brute_force(rows, query, category, low_stock):
+    query = query.lower()
+    return [pos for pos, row in enumerate(rows)
+            if (category == "All" or str(row[3]) == category)
+            and (not low_stock or int(row[4]) < 5)
+            and (not query or query in search_text(row))]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("query", ["", "i", "ip", "iphone 15", "15 c", "black", "zzz", "GB", "128gb 6gb"])
+@pytest.mark.parametrize("category", ["All", "Phones", "Accessories", "Missing"])
+@pytest.mark.parametrize("low_stock", [False, True])
+def test_search_matches_linear_scan(query, category, low_stock):
+    """Index lookups return exactly what the old per-row filter did"""
+    rows = _rows()
+    index = InventorySearchIndex(rows)
+    assert index.search(query, category, low_stock) == _brute_force(rows, query, category, low_stock)
+
+
+@pytest.mark.unit
+def test_categories_and_displays_are_precomputed():
+    """Display data is computed once per row; categories skip empty values"""
+    calls = []
+    index = InventorySearchIndex(_rows(), display=lambda row: calls.append(row[0]) or row[2].upper())
+
+    assert calls == [1, 2, 3, 4, 5]
+    assert index.categories == ["Accessories", "Phones"]
+    assert [index.displays[pos] for pos in index.search("case")] == ["IPHONE 15 CASE"]
+    assert calls == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.unit
+def test_index_is_rebuilt_only_when_data_changes(test_db):
+    """The cached index is reused until something is committed"""
+    inventory_index.invalidate_inventory_index()
+    models.add_inventory_item("IDX-001", "Indexed Phone", 10, 40.0, 100.0, "Phones", "")
+
+    first = inventory_index.get_inventory_index()
+    assert inventory_index.get_inventory_index() is first
+    assert len(first.search("indexed")) == 1
+
+    models.add_inventory_item("IDX-002", "Indexed Case", 10, 4.0, 10.0, "Accessories", "")
+    second = inventory_index.get_inventory_index()
+    assert second is not first
+    assert len(second.search("indexed")) == 2
+    inventory_index.invalidate_inventory_index()
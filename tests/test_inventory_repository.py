@@ -0,0 +1,83 @@
+# tests/test_inventory_repository.py
+"""Unit tests for the shared inventory snapshot"""
+
+import pytest
+
+from modules import models
+from modules.inventory_repository import get_inventory_repository, invalidate_inventory_repository
+
+
+@pytest.fixture
+def repo_db(test_db):
+    invalidate_inventory_repository()
+    models.add_inventory_item("IR-001", "Repo Phone", 3, 100.0, 150.0, "Phones", "")
+    models.add_inventory_item("IR-002", "Repo Case", 10, 2.0, 5.0, "Accessories", "")
+    yield test_db
+    invalidate_inventory_repository()
+
+
+@pytest.mark.unit
+def test_lookups_by_id_sku_and_barcode(repo_db, db_execute):
+    """Items are found by id, SKU, product barcode and unit barcode"""
+    phone = models.get_inventory_item_by_sku("IR-001")[0]
+    db_execute("UPDATE inventory SET barcode = '6221234567890' WHERE item_id = ?", (phone,))
+    db_execute("INSERT INTO product_barcodes (item_id, barcode) VALUES (?, 'UNIT-0001')", (phone,))
+
+    repo = get_inventory_repository()
+
+    assert repo.get(phone)[1] == "IR-001"
+    assert repo.by_sku("IR-002")[2] == "Repo Case"
+    assert repo.by_barcode("6221234567890")[0] == phone
+    assert repo.by_barcode("UNIT-0001")[0] == phone
+    assert repo.barcode_of(phone) == "6221234567890"
+    assert repo.get(-1) is None and repo.by_barcode("nope") is None
+    assert {"Accessories", "Phones"} <= set(repo.categories)
+    assert [row[1] for row in repo.in_category("Phones")] == ["IR-001"]
+
+
+@pytest.mark.unit
+def test_snapshot_is_shared_until_inventory_changes(repo_db, db_execute):
+    """Unrelated commits keep the snapshot; inventory commits patch a new one"""
+    repo = get_inventory_repository()
+    assert get_inventory_repository() is repo
+
+    models.get_or_create_customer("Repo Customer", "01044444444")
+    assert get_inventory_repository() is repo
+
+    case = models.get_inventory_item_by_sku("IR-002")[0]
+    db_execute("UPDATE inventory SET quantity = 7 WHERE item_id = ?", (case,))
+    db_execute("DELETE FROM inventory WHERE sku = 'IR-001'")
+
+    patched = get_inventory_repository()
+    assert patched is not repo
+    assert patched.get(case)[4] == 7
+    assert patched.by_sku("IR-001") is None
+    assert sorted(patched.rows) == sorted(models.get_inventory())
+    # The old snapshot is untouched for whoever still holds it
+    assert repo.get(case)[4] == 10
+
+
+@pytest.mark.unit
+def test_barcodes_are_patched_for_changed_items_only(repo_db, monkeypatch, db_execute):
+    """A sale re-reads the barcodes of the items it touched, not every barcode"""
+    from modules import inventory_repository
+    phone = models.get_inventory_item_by_sku("IR-001")[0]
+    case = models.get_inventory_item_by_sku("IR-002")[0]
+    db_execute("INSERT INTO product_barcodes (item_id, barcode) VALUES (?, 'UNIT-0001')", (phone,))
+    db_execute("UPDATE inventory SET barcode = 'CASE-BC' WHERE item_id = ?", (case,))
+    repo = get_inventory_repository()
+    seq = repo.seq
+
+    def no_full_load():
+        raise AssertionError("full barcode reload")
+    monkeypatch.setattr(inventory_repository, "load_barcodes", no_full_load)
+    models.get_or_create_customer("Repo Customer", "01044444445")
+    assert get_inventory_repository() is repo and repo.seq == seq
+
+    db_execute("INSERT INTO product_barcodes (item_id, barcode) VALUES (?, 'UNIT-0002')", (phone,))
+    db_execute("DELETE FROM product_barcodes WHERE barcode = 'UNIT-0001'")
+    patched = get_inventory_repository()
+    assert patched.by_barcode("UNIT-0002")[0] == phone
+    assert patched.by_barcode("UNIT-0001") is None
+    assert patched.by_barcode("CASE-BC")[0] == case
+    assert repo.by_barcode("UNIT-0001")[0] == phone and repo.seq == seq
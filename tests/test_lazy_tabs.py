@@ -0,0 +1,112 @@
+# tests/test_lazy_tabs.py
+"""Unit tests for lazily built notebook tabs and deferred imports (no display needed)"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from ui.lazy_tabs import LazyTabs
+
+
+class FakeFrame:
+    def __init__(self):
+        self.packed = False
+
+    def pack(self, **kwargs):
+        self.packed = True
+
+
+class FakeNotebook:
+    """Stands in for a ttk Notebook: select() fires <<NotebookTabChanged>>"""
+
+    def __init__(self):
+        self.children = []
+        self.current = None
+        self.handler = None
+
+    def add(self, child, text=""):
+        self.children.append(child)
+
+    def bind(self, sequence, func, add=None):
+        self.handler = func
+
+    def index(self, what):
+        return self.children.index(self.current)
+
+    def select(self, child):
+        self.current = child
+        self.handler()
+
+
+class FakeView:
+    def __init__(self, parent):
+        self.parent = parent
+        self.frame = FakeFrame()
+        self.refreshed = 0
+
+    def refresh(self):
+        self.refreshed += 1
+
+
+@pytest.mark.unit
+def test_views_are_built_on_first_selection():
+    """Only the selected tab's view exists; it is built exactly once"""
+    built = []
+    nb = FakeNotebook()
+    tabs = LazyTabs(nb, make_placeholder=FakeFrame)
+    for name in ("dashboard", "sales", "inventory"):
+        tabs.add(name, name.title(), lambda parent, name=name: built.append(name) or FakeView(parent))
+
+    tabs.select("dashboard")
+    assert built == ["dashboard"]
+    assert tabs.get("sales") is None
+    assert tabs.call("sales", "refresh") is None
+
+    nb.select(nb.children[1])
+    nb.select(nb.children[0])
+    nb.select(nb.children[1])
+    assert built == ["dashboard", "sales"]
+    sales = tabs.get("sales")
+    assert sales.parent is nb.children[1] and sales.frame.packed
+
+    tabs.call("sales", "refresh")
+    assert sales.refreshed == 1
+
+
+@pytest.mark.unit
+def test_failed_view_does_not_break_other_tabs():
+    """A view that raises is logged once; the other tabs still build"""
+    calls = []
+    callbacks = []
+
+    def broken(parent):
+        calls.append("broken")
+        raise RuntimeError("boom")
+
+    nb = FakeNotebook()
+    tabs = LazyTabs(nb, make_placeholder=FakeFrame)
+    tabs.add("broken", "Broken", broken)
+    tabs.add("ok", "OK", FakeView)
+    tabs.on_build("ok", callbacks.append)
+
+    assert tabs.build("broken") is None
+    assert tabs.build("broken") is None
+    assert calls == ["broken"]
+    assert callbacks == []
+    view = tabs.build("ok")
+    assert callbacks == [view]
+
+
+@pytest.mark.unit
+def test_main_window_module_defers_heavy_imports():
+    """Importing the main window pulls in no view, PDF or chart modules"""
+    pytest.importorskip("ttkbootstrap")
+    root = Path(__file__).resolve().parents[1]
+    code = ("import sys, ui.main, ui.dashboard_view; "
+            "print(sorted(m for m in ('reportlab', 'matplotlib', 'qrcode', 'barcode', "
+            "'ui.sales_view', 'ui.repairs_view', 'ui.reports_view') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
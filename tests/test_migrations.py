@@ -0,0 +1,126 @@
+# tests/test_migrations.py
+"""Unit tests for the versioned schema migration engine"""
+
+import sqlite3
+
+import pytest
+
+import modules.db as db_module
+from modules import migrations
+from modules.db import get_conn
+
+
+def _columns(table):
+    conn = get_conn()
+    cols = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    conn.close()
+    return cols
+
+
+@pytest.mark.unit
+def test_fixture_database_is_at_latest_version(test_db):
+    """The test database is migrated to the latest version"""
+    assert migrations.get_schema_version() == migrations.LATEST_VERSION
+
+
+@pytest.mark.unit
+def test_migrate_is_noop_when_current(test_db):
+    """A current schema takes the fast path and applies nothing"""
+    result = migrations.migrate()
+    assert result['applied'] == []
+    assert result['from'] == result['to'] == migrations.LATEST_VERSION
+
+
+@pytest.mark.unit
+def test_fresh_database_gets_full_schema(tmp_path, monkeypatch):
+    """An empty file is migrated from version 0 to the latest version"""
+    monkeypatch.setattr(db_module, "DB_PATH", tmp_path / "fresh.db")
+    try:
+        result = migrations.migrate()
+        assert result['from'] == 0
+        assert result['to'] == migrations.LATEST_VERSION
+        assert len(result['applied']) == len(migrations.MIGRATIONS)
+
+        assert 'storage' in _columns("inventory")
+        assert 'seller_name' in _columns("sales")
+        assert 'barcode' in _columns("product_barcodes")
+    finally:
+        db_module.close_all()
+
+
+@pytest.mark.unit
+def test_legacy_columns_are_renamed(tmp_path, monkeypatch):
+    """Old column names (sale_items.qty/price, sales.total) are renamed in place"""
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE sales (sale_id INTEGER PRIMARY KEY, sale_date TEXT, total REAL)")
+    conn.execute("CREATE TABLE sale_items (id INTEGER PRIMARY KEY, sale_id INTEGER, item_id INTEGER, qty INTEGER, price REAL)")
+    conn.execute("INSERT INTO sale_items (sale_id, item_id, qty, price) VALUES (1, 1, 3, 9.5)")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db_module, "DB_PATH", path)
+    try:
+        migrations.migrate()
+        assert 'total_amount' in _columns("sales")
+
+        conn = get_conn()
+        row = conn.execute("SELECT quantity, unit_price FROM sale_items").fetchone()
+        conn.close()
+        assert row == (3, 9.5)
+    finally:
+        db_module.close_all()
+
+
+@pytest.mark.unit
+def test_partial_migration_to_target(tmp_path, monkeypatch):
+    """migrate(target) stops at the requested version and resumes later"""
+    monkeypatch.setattr(db_module, "DB_PATH", tmp_path / "partial.db")
+    try:
+        result = migrations.migrate(target=2)
+        assert result['to'] == 2
+        assert 'storage' not in _columns("inventory")
+
+        result = migrations.migrate()
+        assert result['from'] == 2
+        assert result['to'] == migrations.LATEST_VERSION
+        assert 'storage' in _columns("inventory")
+    finally:
+        db_module.close_all()
+
+
+@pytest.mark.unit
+def test_failed_step_rolls_back(tmp_path, monkeypatch):
+    """A failing step leaves the schema version and tables unchanged"""
+    monkeypatch.setattr(db_module, "DB_PATH", tmp_path / "broken.db")
+
+    def broken_step(c):
+        c.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS",
+                        migrations.MIGRATIONS + [(migrations.LATEST_VERSION + 1, "Broken", broken_step)])
+    try:
+        with pytest.raises(RuntimeError):
+            migrations.migrate(target=migrations.LATEST_VERSION + 1)
+        assert migrations.get_schema_version() == 0
+
+        conn = get_conn()
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        conn.close()
+        assert 'half_done' not in tables
+        assert 'inventory' not in tables
+    finally:
+        db_module.close_all()
+
+
+@pytest.mark.unit
+def test_importing_models_does_not_touch_schema(tmp_path, monkeypatch):
+    """Importing modules.models no longer runs schema checks"""
+    import importlib
+    from modules import models
+
+    path = tmp_path / "untouched.db"
+    monkeypatch.setattr(db_module, "DB_PATH", path)
+    importlib.reload(models)
+    assert not path.exists()
@@ -0,0 +1,102 @@
+# tests/test_receiving.py
+"""Unit tests for goods receiving"""
+
+import pytest
+
+from modules import models
+from modules.db import get_conn
+from modules.event_manager import event_manager
+from modules.receiving import COST_AVERAGE, get_cost_history, get_receipts, post_receipt
+
+IMEI_1 = "490154203237518"
+IMEI_2 = "356938035643809"
+
+
+@pytest.fixture
+def stock(test_db):
+    models.add_inventory_item("RC-001", "Receive Phone", 1, 100.0, 150.0, "Phones", "")
+    models.add_inventory_item("RC-002", "Receive Case", 10, 2.0, 5.0, "Accessories", "")
+    return tuple(models.get_inventory_item_by_sku(sku)[0] for sku in ("RC-001", "RC-002"))
+
+
+@pytest.mark.unit
+def test_post_receipt_updates_stock_costs_and_serials(stock, monkeypatch, db_query):
+    """One receipt increments stock, sets buy prices, registers serials and records costs"""
+    phone, case = stock
+    events = []
+    monkeypatch.setattr(event_manager, "notify", lambda event, data=None, ids=None: events.append((event, ids)))
+
+    result = post_receipt("Acme", [
+        {'item_id': phone, 'unit_cost': 90.0, 'serials': [IMEI_1, IMEI_2]},
+        {'sku': "RC-002", 'quantity': 20, 'unit_cost': 1.5},
+    ], reference="INV-7", user="tester")
+
+    assert result['errors'] == []
+    assert (result['lines'], result['units'], result['serials'], result['total_cost']) == (2, 22, 2, 210.0)
+    assert dict(db_query("SELECT sku, quantity FROM inventory WHERE sku LIKE 'RC-%'")) == {"RC-001": 3, "RC-002": 30}
+    assert dict(db_query("SELECT sku, buy_price FROM inventory WHERE sku LIKE 'RC-%'")) == {"RC-001": 90.0, "RC-002": 1.5}
+    assert set(db_query("SELECT barcode, item_id, status FROM product_barcodes")) == {
+        (IMEI_1, phone, "available"), (IMEI_2, phone, "available")}
+    assert [row[1:4] for row in get_cost_history(phone)] == [(2, 90.0, 100.0)]
+    assert get_receipts()[0][:3] == (result['receipt_id'], "Acme", "INV-7")
+    assert events == [('inventory_changed', [phone, case])]
+
+
+@pytest.mark.unit
+def test_invalid_line_rejects_whole_receipt(stock, db_query):
+    """Any invalid line rejects the document and writes nothing"""
+    phone, case = stock
+    conn = get_conn()
+    conn.execute("INSERT INTO product_barcodes (item_id, barcode, status) VALUES (?, ?, 'available')", (phone, IMEI_1))
+    conn.commit()
+    conn.close()
+
+    result = post_receipt("Acme", [
+        {'item_id': case, 'quantity': 5, 'unit_cost': 1.0},
+        {'item_id': phone, 'unit_cost': 90.0, 'serials': [IMEI_1]},
+        {'sku': "NOPE", 'quantity': 1, 'unit_cost': 1.0},
+    ])
+    assert result['receipt_id'] is None
+    assert [line for line, _ in result['errors']] == [2, 3]
+    assert db_query("SELECT quantity FROM inventory WHERE item_id = ?", (case,))[0][0] == 10
+    assert db_query("SELECT COUNT(*) FROM receiving_documents")[0][0] == 0
+
+    result = post_receipt("Acme", [{'item_id': case, 'quantity': 2, 'unit_cost': 1.0, 'serials': [IMEI_2]},
+                                   {'item_id': case, 'quantity': 0, 'unit_cost': -1}])
+    assert sorted({line for line, _ in result['errors']}) == [1, 2]
+
+
+@pytest.mark.unit
+def test_average_cost_and_large_receipt(stock, db_query):
+    """Weighted-average costing chains across lines; a 200-line receipt posts in one go"""
+    phone, case = stock
+    result = post_receipt("Acme", [{'item_id': case, 'quantity': 10, 'unit_cost': 4.0}] * 2,
+                          cost_method=COST_AVERAGE)
+    # (10 * 2 + 10 * 4) / 20 = 3.0, then (20 * 3 + 10 * 4) / 30 = 3.33
+    assert result['units'] == 20
+    assert db_query("SELECT quantity, buy_price FROM inventory WHERE item_id = ?", (case,))[0] == (30, 3.33)
+
+    lines = [{'item_id': phone, 'unit_cost': 80.0, 'serials': [f"RC-SN-{n:04d}"]} for n in range(200)]
+    result = post_receipt("Bulk Supplier", lines, imei=False)
+    assert result['errors'] == [] and result['serials'] == 200
+    assert db_query("SELECT quantity FROM inventory WHERE item_id = ?", (phone,))[0][0] == 201
+    assert db_query("SELECT COUNT(*) FROM product_barcodes WHERE item_id = ?", (phone,))[0][0] == 200
+    assert len(get_cost_history(phone)) == 200
+
+
+@pytest.mark.unit
+def test_item_ids_from_forms_are_coerced(stock, db_query):
+    """Item ids given as text are matched as integers; non-integer ids are line problems"""
+    from controllers.inventory_controller import InventoryController
+    phone, case = stock
+    result = InventoryController.post_receipt("Acme", [
+        {'item_id': str(case), 'quantity': "3", 'unit_cost': "2.5"},
+        {'item_id': f" {phone} ", 'quantity': 1, 'unit_cost': 95},
+    ])
+    assert result['errors'] == [] and result['items'] == [phone, case]
+    assert db_query("SELECT quantity FROM inventory WHERE item_id = ?", (case,))[0][0] == 13
+
+    result = post_receipt("Acme", [{'item_id': "abc", 'quantity': 1, 'unit_cost': 1},
+                                   {'item_id': 2.5, 'quantity': 1, 'unit_cost': 1}])
+    assert [line for line, _ in result['errors']] == [1, 2]
+    assert [row[0] for row in InventoryController.get_receipts()] == [1]
@@ -0,0 +1,91 @@
+# tests/test_scan_resolver.py
+"""Unit tests for the cached POS scan resolver"""
+
+import pytest
+
+from modules import models
+from modules.scan_resolver import ScanResolver
+
+
+@pytest.fixture
+def scan_db(test_db, db_execute):
+    models.add_inventory_item("SR-001", "Scan Phone", 2, 100.0, 150.0, "Phones", "")
+    models.add_inventory_item("SR-002", "Scan Case", 9, 2.0, 5.0, "Accessories", "")
+    phone = models.get_inventory_item_by_sku("SR-001")[0]
+    case = models.get_inventory_item_by_sku("SR-002")[0]
+    db_execute("INSERT INTO product_barcodes (item_id, barcode, serial_number, status) "
+               "VALUES (?, 'UNIT-1', 'SN-1', 'available')", (phone,))
+    db_execute("UPDATE inventory SET barcode = '6220000000017' WHERE item_id = ?", (case,))
+    return phone, case
+
+
+@pytest.mark.unit
+def test_resolves_units_product_barcodes_and_skus(scan_db):
+    """Unit barcodes, product barcodes and SKUs all resolve; unknown codes give None"""
+    phone, case = scan_db
+    resolver = ScanResolver()
+
+    unit = resolver.resolve("UNIT-1")
+    assert (unit.item_id, unit.serial, unit.unit, unit.sellable, unit.price) == (phone, "SN-1", True, True, 150.0)
+    assert resolver.resolve("6220000000017").item_id == case
+    product = resolver.resolve("SR-002")
+    assert product.item_id == case and not product.unit
+    assert resolver.resolve("NOPE") is None
+
+    resolver.resolve("UNIT-1")
+    resolver.resolve("NOPE")
+    stats = resolver.get_stats()
+    assert stats["misses"] == 4 and stats["hits"] == 2 and stats["cached"] == 3
+
+
+@pytest.mark.unit
+def test_changes_evict_only_affected_items(scan_db, db_execute):
+    """Selling a unit evicts that item; other entries stay cached; new codes are found"""
+    phone, case = scan_db
+    resolver = ScanResolver()
+    resolver.resolve("UNIT-1")
+    resolver.resolve("SR-002")
+    assert resolver.resolve("UNIT-2") is None
+
+    db_execute("UPDATE product_barcodes SET status = 'sold' WHERE barcode = 'UNIT-1'")
+    db_execute("INSERT INTO product_barcodes (item_id, barcode, status) VALUES (?, 'UNIT-2', 'available')", (phone,))
+
+    assert resolver.resolve("UNIT-1").status == "sold"
+    assert resolver.resolve("UNIT-2").item_id == phone
+    assert resolver.resolve("SR-002").item_id == case
+    stats = resolver.get_stats()
+    assert stats["evicted"] == 1
+    assert stats["misses"] == 5  # UNIT-1, SR-002, UNIT-2, then UNIT-1 and UNIT-2 again
+
+
+@pytest.mark.unit
+def test_scan_to_cart_latency_metric():
+    """Latency samples are summarised for the status bar and logs"""
+    resolver = ScanResolver()
+    resolver.record_scan_to_cart(4.0)
+    resolver.record_scan_to_cart(8.0)
+
+    stats = resolver.get_stats()
+    assert stats["scan_to_cart"] == 2
+    assert stats["scan_to_cart_avg_ms"] == 6.0
+    assert stats["scan_to_cart_max_ms"] == 8.0 and stats["scan_to_cart_last_ms"] == 8.0
+
+
+@pytest.mark.unit
+def test_resolve_many_uses_one_lookup(scan_db, monkeypatch):
+    """A burst of scans costs one query for the codes not yet cached"""
+    phone, case = scan_db
+    from modules import scan_resolver
+    lookups = []
+    real_lookup = scan_resolver._lookup
+    monkeypatch.setattr(scan_resolver, "_lookup", lambda codes: lookups.append(list(codes)) or real_lookup(codes))
+    resolver = ScanResolver()
+    resolver.resolve("SR-002")
+
+    results = resolver.resolve_many(["UNIT-1", "SR-002", "6220000000017", "NOPE", "UNIT-1", ""])
+
+    assert lookups == [["SR-002"], ["UNIT-1", "6220000000017", "NOPE"]]
+    assert results["UNIT-1"].item_id == phone and results["UNIT-1"].unit
+    assert results["SR-002"].item_id == case == results["6220000000017"].item_id
+    assert results["NOPE"] is None
+    assert set(results) == {"UNIT-1", "SR-002", "6220000000017", "NOPE"}
@@ -0,0 +1,97 @@
+# tests/test_stocktake.py
+"""Unit tests for stocktake sessions"""
+
+import pytest
+
+from modules import models
+from modules.db import get_conn
+from modules.event_manager import event_manager
+from modules.inventory_repository import invalidate_inventory_repository
+from modules.stocktake import StocktakeSession, list_sessions
+
+
+@pytest.fixture
+def shelf(test_db):
+    invalidate_inventory_repository()
+    models.add_inventory_item("ST-001", "Count Phone", 2, 100.0, 150.0, "Phones", "")
+    models.add_inventory_item("ST-002", "Count Case", 10, 2.0, 5.0, "Accessories", "")
+    models.add_inventory_item("ST-003", "Count Cable", 4, 1.0, 3.0, "Accessories", "")
+    phone, case, cable = (models.get_inventory_item_by_sku(sku)[0] for sku in ("ST-001", "ST-002", "ST-003"))
+    conn = get_conn()
+    conn.executemany("INSERT INTO product_barcodes (item_id, barcode, status) VALUES (?, ?, 'available')",
+                     [(phone, "ST-UNIT-1"), (phone, "ST-UNIT-2")])
+    conn.commit()
+    conn.close()
+    yield phone, case, cable
+    invalidate_inventory_repository()
+
+
+@pytest.mark.unit
+def test_tally_variance_and_resume(shelf, db_query):
+    """Scans and typed counts tally in memory, show variance, and survive a resume"""
+    phone, case, cable = shelf
+    session = StocktakeSession.start("Front shelf", user="tester")
+
+    assert session.count_code("ST-UNIT-1") is None
+    assert session.count_code("ST-UNIT-1") == "ST-UNIT-1: already counted"
+    assert session.count_code("NOPE") == "NOPE: not registered"
+    for _ in range(8):
+        session.count_code("ST-002")
+    session.set_count(cable, 4)
+
+    assert session.variance() == [(case, "ST-002", "Count Case", 10, 8, -2),
+                                  (phone, "ST-001", "Count Phone", 2, 1, -1),
+                                  (cable, "ST-003", "Count Cable", 4, 4, 0)]
+    assert db_query("SELECT COUNT(*) FROM stocktake_counts") == [(0,)]
+    assert session.save()
+
+    resumed = StocktakeSession.resume(session.session_id)
+    assert resumed.counts == {phone: 1, case: 8, cable: 4}
+    assert resumed.count_code("ST-UNIT-1") == "ST-UNIT-1: already counted"
+    assert [row[0] for row in list_sessions()] == [session.session_id]
+
+
+@pytest.mark.unit
+def test_commit_applies_all_adjustments_once(shelf, monkeypatch, db_query):
+    """One commit adjusts every changed item, writes their audit rows and sends one event"""
+    phone, case, cable = shelf
+    events = []
+    monkeypatch.setattr(event_manager, "notify", lambda event, data=None, ids=None: events.append((event, ids)))
+    session = StocktakeSession.start("Accessories", user="tester", category="Accessories")
+    session.set_count(case, 7)
+
+    result = session.commit(zero_uncounted=True)
+
+    assert sorted(result['adjusted']) == sorted([(case, 10, 7), (cable, 4, 0)])
+    assert dict(db_query("SELECT sku, quantity FROM inventory WHERE sku LIKE 'ST-%'")) == {
+        "ST-001": 2, "ST-002": 7, "ST-003": 0}
+    assert db_query("SELECT COUNT(*) FROM audit_logs WHERE description LIKE 'Stocktake #%'") == [(2,)]
+    assert [(event, sorted(ids)) for event, ids in events] == [('inventory_changed', sorted([case, cable]))]
+    assert db_query("SELECT status FROM stocktake_sessions WHERE session_id = ?",
+                    (session.session_id,)) == [("committed",)]
+    with pytest.raises(ValueError):
+        session.set_count(case, 1)
+    assert list_sessions() == []
+
+
+@pytest.mark.unit
+def test_sales_after_the_count_are_kept(shelf, db_query):
+    """A sale between counting an item and committing is not undone"""
+    phone, case, cable = shelf
+    session = StocktakeSession.start("Accessories", user="tester")
+    session.set_count(case, 9)       # one missing: 10 on hand when counted
+    session.set_count(cable, 4)
+    assert session.save()
+
+    sale = {'id': case, 'sku': "ST-002", 'name': "Count Case", 'category': "Accessories",
+            'qty': 2, 'price': 5.0, 'cost': 2.0}
+    assert models.create_sale_detailed("Walk-in", None, "", "", "", [sale], 10.0, 0, 0, 10.0) is not None
+
+    resumed = StocktakeSession.resume(session.session_id)
+    assert resumed.variance() == [(case, "ST-002", "Count Case", 10, 9, -1),
+                                  (cable, "ST-003", "Count Cable", 4, 4, 0)]
+    result = resumed.commit()
+
+    # 10 on hand - 2 sold - 1 missing
+    assert result['adjusted'] == [(case, 8, 7)]
+    assert db_query("SELECT quantity FROM inventory WHERE item_id = ?", (case,)) == [(7,)]
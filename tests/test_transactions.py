@@ -13,7 +13,11 @@ from modules.transaction_manager import (
     TransactionContext,
     verify_transaction_state,
     get_transaction_isolation_level,
-    set_transaction_isolation_level
+    set_transaction_isolation_level,
+    execute_with_retry,
+    get_retry_policy,
+    set_retry_policy,
+    get_write_stats
 )
 from modules.db import get_conn
 
@@ -428,3 +432,112 @@ def test_transaction_rolls_back_all_operations_on_error(test_db):
     
     assert inv_count == 0
     assert sale_count == 0
+
+
+# ==================== Write Contention Tests ====================
+
+@pytest.fixture
+def fast_retries():
+    saved = dict(get_retry_policy())
+    set_retry_policy(attempts=3, base_delay_ms=1, max_delay_ms=2)
+    yield
+    set_retry_policy(**saved)
+
+
+@pytest.mark.unit
+def test_execute_with_retry_retries_lock_errors(test_db, fast_retries):
+    """A locked database is retried from scratch; nothing from the failed attempt is kept"""
+    calls = []
+
+    def write(conn):
+        calls.append(1)
+        conn.execute("INSERT INTO inventory (sku, name, quantity) VALUES (?, ?, ?)", (f"RETRY-{len(calls)}", "Retry", 1))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return "done"
+
+    before = get_write_stats()
+    assert execute_with_retry(write) == "done"
+
+    stats = get_write_stats()
+    assert stats['retries'] == before['retries'] + 1
+    assert stats['contended'] == before['contended'] + 1
+    conn = get_conn()
+    skus = [row[0] for row in conn.execute("SELECT sku FROM inventory WHERE name = 'Retry'")]
+    conn.close()
+    assert skus == ["RETRY-2"]
+
+
+@pytest.mark.unit
+def test_execute_with_retry_gives_up_and_does_not_retry_other_errors(test_db, fast_retries):
+    """Lock errors stop after the last attempt; other errors are raised at once"""
+    calls = []
+
+    def locked(conn):
+        calls.append(1)
+        raise sqlite3.OperationalError("database is locked")
+
+    before = get_write_stats()
+    with pytest.raises(sqlite3.OperationalError):
+        execute_with_retry(locked)
+    assert len(calls) == 3
+    assert get_write_stats()['gave_up'] == before['gave_up'] + 1
+
+    def broken(conn):
+        calls.append(1)
+        raise ValueError("not a lock problem")
+
+    with pytest.raises(ValueError):
+        execute_with_retry(broken)
+    assert len(calls) == 4
+
+
+@pytest.mark.unit
+def test_stock_decrement_waits_for_another_terminal(test_db):
+    """A till holding the write lock delays, but does not fail, another till's sale"""
+    import threading
+    from modules import models
+
+    models.add_inventory_item("LOCK-001", "Locked Item", 2, 1.0, 2.0, "Test", "")
+    item_id = models.get_inventory_item_by_sku("LOCK-001")[0]
+
+    other_till = sqlite3.connect(str(test_db), check_same_thread=False, isolation_level=None)
+    other_till.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(0.3, other_till.execute, ("COMMIT",))
+    release.start()
+    try:
+        assert models.decrease_inventory_quantity(item_id, 2)
+        # Stock is never oversold
+        assert not models.decrease_inventory_quantity(item_id, 1)
+    finally:
+        release.join()
+        other_till.close()
+
+    assert models.get_inventory_item_by_id(item_id)[5] == 0
+
+
+
+@pytest.mark.unit
+def test_create_sale_does_not_oversell_across_terminals(test_db):
+    """A sale waits for another till's stock update and then sees the new quantity"""
+    import threading
+    from modules import models
+
+    models.add_inventory_item("LOCK-002", "Last Units", 2, 1.0, 2.0, "Test", "")
+    item_id = models.get_inventory_item_by_sku("LOCK-002")[0]
+
+    other_till = sqlite3.connect(str(test_db), check_same_thread=False, isolation_level=None)
+    other_till.execute("BEGIN IMMEDIATE")
+    other_till.execute("UPDATE inventory SET quantity = quantity - 1 WHERE item_id = ?", (item_id,))
+    release = threading.Timer(0.3, other_till.execute, ("COMMIT",))
+    release.start()
+    try:
+        assert models.create_sale("Customer", [(item_id, 2, 2.0, 1.0)]) is None
+        # Two lines of one item together cannot exceed the stock either
+        assert models.create_sale("Customer", [(item_id, 1, 2.0, 1.0), (item_id, 1, 2.0, 1.0)]) is None
+        assert models.create_sale("Customer", [(item_id, 1, 2.0, 1.0)]) is not None
+    finally:
+        release.join()
+        other_till.close()
+
+    assert models.get_inventory_item_by_id(item_id)[5] == 0
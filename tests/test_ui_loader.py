@@ -0,0 +1,90 @@
+# tests/test_ui_loader.py
+"""Unit tests for the background view loader (no display needed)"""
+
+import threading
+
+import pytest
+
+from ui import loader as ui_loader
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks run when pump() is called"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def after(self, ms, callback):
+        self.jobs.append(callback)
+        return f"after#{len(self.jobs)}"
+
+    def pump(self):
+        while self.jobs:
+            self.jobs.pop(0)()
+
+
+@pytest.fixture
+def widget():
+    yield FakeWidget()
+    ui_loader.shutdown_loaders(wait=True)
+
+
+def _wait_for(futures):
+    for future in futures:
+        try:
+            future.result(timeout=5)
+        except Exception:
+            pass
+
+
+@pytest.mark.unit
+def test_result_is_delivered_on_main_loop(widget):
+    """on_done runs from after(), not on the worker thread"""
+    busy_states = []
+    delivered = []
+    loader = ui_loader.ViewLoader(widget, on_busy=busy_states.append)
+
+    loader.load("rows", lambda: threading.get_ident(), delivered.append)
+    assert loader.busy
+    _wait_for(loader._futures.values())
+    widget.pump()
+
+    assert len(delivered) == 1
+    assert delivered[0] != threading.get_ident()
+    assert not loader.busy
+    assert busy_states == [True, False]
+
+
+@pytest.mark.unit
+def test_newer_request_makes_older_stale(widget):
+    """Only the latest request for a key is delivered"""
+    release = threading.Event()
+    delivered = []
+    loader = ui_loader.ViewLoader(widget)
+
+    loader.load("rows", lambda: release.wait(5) and "old", delivered.append)
+    first = loader._futures["rows"]
+    loader.load("rows", lambda: "new", delivered.append)
+    release.set()
+    _wait_for([first, loader._futures["rows"]])
+    widget.pump()
+
+    assert delivered == ["new"]
+    assert loader.stats["stale"] + loader.stats["cancelled"] == 1
+
+
+@pytest.mark.unit
+def test_errors_go_to_on_error(widget):
+    """Exceptions raised by the load function reach on_error"""
+    errors = []
+    loader = ui_loader.ViewLoader(widget)
+
+    def fail():
+        raise ValueError("boom")
+
+    loader.load("rows", fail, lambda result: None, errors.append)
+    _wait_for(loader._futures.values())
+    widget.pump()
+
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    assert loader.stats["errors"] == 1
@@ -0,0 +1,135 @@
+# tests/test_virtual_table.py
+"""Unit tests for the windowed, diff-updating table (no display needed)"""
+
+import pytest
+
+from ui.table_styles import VirtualTable
+
+
+class FakeTree:
+    """Minimal stand-in for ttk.Treeview that counts item operations"""
+
+    def __init__(self, height=5):
+        self.height = height
+        self.items = {}    # iid -> {"values": ..., "tags": ...}
+        self.order = []
+        self.ops = {"insert": 0, "item": 0, "delete": 0, "move": 0}
+        self.selected = ()
+        self.focused = ""
+        self._next = 0
+
+    def cget(self, option):
+        return self.height
+
+    def configure(self, **kwargs):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def insert(self, parent, index, values=(), tags=()):
+        self._next += 1
+        iid = f"I{self._next}"
+        self.items[iid] = {"values": values, "tags": tags}
+        self.order.insert(index if index != "end" else len(self.order), iid)
+        self.ops["insert"] += 1
+        return iid
+
+    def item(self, iid, values=None, tags=None):
+        self.items[iid] = {"values": values, "tags": tags}
+        self.ops["item"] += 1
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.order.remove(iid)
+            del self.items[iid]
+        self.ops["delete"] += len(iids)
+
+    def index(self, iid):
+        return self.order.index(iid)
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+        self.ops["move"] += 1
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def bbox(self, iid):
+        return ()
+
+    def winfo_height(self):
+        return 1
+
+    def selection_set(self, iid):
+        self.selected = (iid,)
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self.focused
+        self.focused = iid
+
+    def visible_keys(self):
+        return [self.items[iid]["values"][0] for iid in self.order]
+
+
+def _rows(keys, label="row"):
+    return [((key, f"{label} {key}"), ("evenrow" if i % 2 == 0 else "oddrow",))
+            for i, key in enumerate(keys)]
+
+
+@pytest.mark.unit
+def test_only_visible_window_is_materialized():
+    """20k rows put just one page of items in the tree"""
+    tree = FakeTree(height=5)
+    table = VirtualTable(tree)
+
+    table.set_rows(_rows(range(20000)))
+
+    assert len(table) == 20000
+    assert tree.visible_keys() == [0, 1, 2, 3, 4]
+    assert tree.ops["insert"] == 5
+
+    table.yview("moveto", 0.5)
+    assert tree.visible_keys() == [10000, 10001, 10002, 10003, 10004]
+
+    table.yview("scroll", 1, "pages")
+    assert tree.visible_keys()[0] == 10005
+
+
+@pytest.mark.unit
+def test_refresh_applies_keyed_diffs():
+    """Unchanged rows are left alone; changed rows are updated in place"""
+    tree = FakeTree(height=5)
+    table = VirtualTable(tree)
+    table.set_rows(_rows(range(100)))
+    iids = list(tree.order)
+    tree.ops.update(insert=0, item=0, delete=0, move=0)
+
+    rows = _rows(range(100))
+    rows[2] = ((2, "changed"), rows[2][1])
+    table.set_rows(rows)
+
+    assert tree.order == iids
+    assert tree.ops == {"insert": 0, "item": 1, "delete": 0, "move": 0}
+    assert tree.items[iids[2]]["values"] == (2, "changed")
+
+
+@pytest.mark.unit
+def test_filter_keeps_surviving_rows_and_select_scrolls():
+    """Filtering reuses items for rows still shown; select() scrolls to a key"""
+    tree = FakeTree(height=5)
+    table = VirtualTable(tree)
+    table.set_rows(_rows(range(100)))
+    kept_iid = tree.order[2]
+
+    table.set_rows(_rows([key for key in range(100) if key % 2 == 0]))
+
+    assert tree.visible_keys() == [0, 2, 4, 6, 8]
+    assert kept_iid in tree.order
+
+    assert table.select(60)
+    assert tree.items[tree.selected[0]]["values"][0] == 60
+    assert not table.select(61)
+    assert len(table.all_values()) == 50
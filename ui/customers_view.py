@@ -4,6 +4,8 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox
 from modules import models
+from ui.loader import ViewLoader, label_busy_indicator
+from ui.table_styles import VirtualTable
 
 class CustomersFrame:
     def __init__(self, parent):
@@ -177,9 +179,10 @@ class CustomersFrame:
         self.tree.grid(row=0, column=0, sticky="nsew")
 
         # Scrollbars
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        vsb = ttk.Scrollbar(table_frame, orient="vertical")
         vsb.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=vsb.set)
+        # Only the visible rows live in the tree; rows are keyed by customer ID
+        self.table = VirtualTable(self.tree, vsb, key_index=1)
         
         hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
         hsb.grid(row=1, column=0, sticky="ew")
@@ -208,6 +211,7 @@ class CustomersFrame:
         self.all_customers = []
 
         # Load all customers initially
+        self.loader = ViewLoader(self.frame, on_busy=label_busy_indicator(self.info_lbl))
         self.load_all()
     
     def filter_by_type(self, customer_type):
@@ -225,33 +229,32 @@ class CustomersFrame:
         self.display_customers(self.all_customers)
 
     def load_all(self):
-        """Load all customers from the database and display them in the table."""
-        try:
-            from modules.models import get_all_customers
-            self.all_customers = get_all_customers()
-            
-            # Reset filter to "All"
-            self.filter_type.set("All")
-            for tab_id, (btn, style) in self.tab_buttons.items():
-                if tab_id == "All":
-                    btn.configure(bootstyle=style)
-                else:
-                    btn.configure(bootstyle=f"{style}-outline")
-            
-            self.display_customers(self.all_customers)
-                
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-            import traceback
-            traceback.print_exc()
+        """Load all customers in the background and display them in the table."""
+        from modules.models import get_all_customers
+        self.loader.load("customers", get_all_customers, self._apply_customers, self._load_failed)
+
+    def _apply_customers(self, customers):
+        self.all_customers = customers
+        
+        # Reset filter to "All"
+        self.filter_type.set("All")
+        for tab_id, (btn, style) in self.tab_buttons.items():
+            if tab_id == "All":
+                btn.configure(bootstyle=style)
+            else:
+                btn.configure(bootstyle=f"{style}-outline")
+        
+        self.display_customers(self.all_customers)
+
+    def _load_failed(self, error):
+        messagebox.showerror("Error", str(error))
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__)
     
     def display_customers(self, rows):
         """Display customers in the table with filtering and styling"""
-        # Clear existing rows
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
         if not rows:
+            self.table.set_rows([])
             self.info_lbl.configure(text="No customers found", bootstyle="warning")
             return
 
@@ -271,6 +274,7 @@ class CustomersFrame:
             bootstyle="info"
         )
 
+        display_rows = []
         for idx, row in enumerate(rows):
             # row: customer_id, name, phone, email, address, customer_type,
             #      total_purchases, total_repairs, total_spent,
@@ -313,7 +317,9 @@ class CustomersFrame:
                 type_tag = type_key
             
             display_values = (icon, customer_id, name, phone, email, customer_type, purchases, repairs, spent, last_activity)
-            self.tree.insert("", "end", values=display_values, tags=(type_tag,))
+            display_rows.append((display_values, (type_tag,)))
+        
+        self.table.set_rows(display_rows)
 
     def search(self):
         """Search customers by phone number or name (partial match)."""
@@ -331,8 +337,7 @@ class CustomersFrame:
             if not filtered:
                 self.info_lbl.configure(text=f"❌ No results for '{query}'", bootstyle="danger")
                 # Clear table
-                for item in self.tree.get_children():
-                    self.tree.delete(item)
+                self.table.set_rows([])
                 return
 
             self.display_customers(filtered)
@@ -345,7 +350,7 @@ class CustomersFrame:
             from tkinter import filedialog
             import csv
             
-            rows = [self.tree.item(i)['values'] for i in self.tree.get_children()]
+            rows = self.table.all_values()
             if not rows:
                 messagebox.showwarning("No Data", "No customers to export")
                 return
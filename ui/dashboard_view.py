@@ -4,14 +4,25 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox
 from controllers.report_controller import ReportController
+from ui.loader import ViewLoader
 
-# Try importing matplotlib
-try:
-    import matplotlib.pyplot as plt
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    HAS_MATPLOTLIB = True
-except ImportError:
-    HAS_MATPLOTLIB = False
+# matplotlib is imported when the first chart is drawn, not at startup
+plt = None
+FigureCanvasTkAgg = None
+HAS_MATPLOTLIB = None  # unknown until _load_matplotlib() runs
+
+
+def _load_matplotlib() -> bool:
+    """Import matplotlib on first use; return whether it is available."""
+    global plt, FigureCanvasTkAgg, HAS_MATPLOTLIB
+    if HAS_MATPLOTLIB is None:
+        try:
+            import matplotlib.pyplot as _plt
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as _canvas
+            plt, FigureCanvasTkAgg, HAS_MATPLOTLIB = _plt, _canvas, True
+        except ImportError:
+            HAS_MATPLOTLIB = False
+    return HAS_MATPLOTLIB
 
 class DashboardFrame:
     def __init__(self, parent):
@@ -177,6 +188,7 @@ class DashboardFrame:
         self.recent_tree.tag_configure('overdue', foreground='#DC3545')
 
         # Initial load
+        self.loader = ViewLoader(self.frame, on_busy=self._set_busy)
         self.refresh()
 
     def _create_card(self, parent, row, col, title, value, bootstyle):
@@ -216,28 +228,39 @@ class DashboardFrame:
             self.refresh_job = self.frame.after(30000, self.schedule_refresh)
 
     def refresh(self):
-        """Initiate dashboard refresh"""
-        # Prevent multiple simultaneous refreshes
-        if hasattr(self, '_refreshing') and self._refreshing:
-            return
-        
-        self._refreshing = True
-        
-        # Show loading indicator
-        self.loading_label.configure(text="⏳ Loading...", bootstyle="info")
-        self.refresh_btn.configure(state="disabled")
-        
-        # Use after to allow UI to update
-        self.frame.after(10, self._do_refresh)
+        """Initiate dashboard refresh (data is loaded in the background)"""
+        # A newer refresh supersedes one still loading
+        self.loader.load("dashboard", self._fetch_data, self._do_refresh, self._refresh_failed)
     
     def refresh_data(self, *args):
         """Alias for refresh to support event manager callbacks"""
         self.refresh()
     
-    def _do_refresh(self):
-        """Actual refresh logic"""
+    def _set_busy(self, busy):
+        """Show the loading indicator while dashboard data loads"""
+        if busy:
+            self.loading_label.configure(text="⏳ Loading...", bootstyle="info")
+            self.refresh_btn.configure(state="disabled")
+        else:
+            self.refresh_btn.configure(state="normal")
+    
+    @staticmethod
+    def _fetch_data():
+        """Read everything the dashboard shows (runs on the loader thread; no Tk calls)"""
+        return {
+            'stats': ReportController.get_dashboard_summary(),
+            'top_items': ReportController.get_top_selling_items(),
+            'distribution': ReportController.get_repair_distribution(),
+        }
+    
+    def _refresh_failed(self, error):
+        print(f"Dashboard refresh error: {error}")
+        self.loading_label.configure(text="❌ Error", bootstyle="danger")
+    
+    def _do_refresh(self, data):
+        """Apply freshly loaded data to the cards, tables and chart"""
         try:
-            stats = ReportController.get_dashboard_summary()
+            stats = data['stats']
             
             # Update Cards with new data structure
             try:
@@ -257,7 +280,7 @@ class DashboardFrame:
                 for item in self.best_tree.get_children(): 
                     self.best_tree.delete(item)
                 
-                top_items = ReportController.get_top_selling_items()
+                top_items = data['top_items']
                 for idx, item_data in enumerate(top_items):
                     tag_base = 'odd' if idx % 2 == 0 else 'even'
                     tags = [tag_base]
@@ -323,7 +346,7 @@ class DashboardFrame:
                 traceback.print_exc()
 
             # Update Chart - schedule separately to avoid blocking
-            self.frame.after(50, self._update_chart)
+            self.frame.after(50, lambda: self._update_chart(data['distribution']))
             
             # Update loading indicator
             from datetime import datetime
@@ -334,20 +357,17 @@ class DashboardFrame:
             import traceback
             traceback.print_exc()
             self.loading_label.configure(text="❌ Error", bootstyle="danger")
-        finally:
-            self.refresh_btn.configure(state="normal")
-            self._refreshing = False
     
-    def _update_chart(self):
+    def _update_chart(self, data):
         """Update chart separately to avoid blocking"""
         try:
-            self._draw_chart()
+            self._draw_chart(data)
         except Exception as e:
             print(f"Error drawing chart: {e}")
 
-    def _draw_chart(self):
+    def _draw_chart(self, data):
         """Draw enhanced pie chart with better styling and data representation"""
-        if not HAS_MATPLOTLIB:
+        if not _load_matplotlib():
             for w in self.chart_container.winfo_children(): w.destroy()
             tb.Label(
                 self.chart_container, 
@@ -377,7 +397,6 @@ class DashboardFrame:
                 pass
 
         try:
-            data = ReportController.get_repair_distribution()
             if not data or len(data) == 0:
                 tb.Label(
                     self.chart_container, 
@@ -4,8 +4,63 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox, filedialog, simpledialog
 from controllers.inventory_controller import InventoryController
+from ui.loader import ViewLoader, label_busy_indicator
+from ui.table_styles import VirtualTable
+from ui.styles import get_stock_tag
+from modules.inventory_index import InventorySearchIndex, get_inventory_index
+from modules.mobile_spec_manager import MobileSpecManager
+from modules import models
 import csv
 
+
+def _display_row(row):
+    """
+    Precompute how an inventory row is shown in the grid (runs once per row
+    when the search index is built, not on every keystroke).
+    
+    Returns:
+        (display values, stock tag, total value)
+    """
+    # row: id, sku, name, category, qty, buy_price, sell_price, storage, ram, color, condition, brand, model, warranty_months
+    try:
+        qty = int(row[4])  # qty is at index 4
+    except:
+        qty = 0
+    
+    # Get prices
+    try:
+        buy_price = float(row[5])  # buy price at index 5
+        sell_price = float(row[6])  # sell price at index 6
+    except:
+        buy_price = 0.0
+        sell_price = 0.0
+    
+    # Calculate total value (qty * buy price)
+    total_value = qty * buy_price
+    
+    # Format mobile specifications
+    storage = row[7] if len(row) > 7 else None
+    ram = row[8] if len(row) > 8 else None
+    color = row[9] if len(row) > 9 else None
+    specs_display = MobileSpecManager.format_specs_display(storage, ram, color)
+    
+    # Format display row with formatted prices and specs
+    display_row = (
+        row[0],  # id
+        row[1],  # sku
+        row[2],  # name
+        row[3],  # category
+        specs_display,  # formatted specs
+        row[4],  # qty
+        f"{buy_price:,.2f}",  # buy price (unit price, not total)
+        f"{sell_price:,.2f}",  # sell price (unit price, not total)
+        f"EGP {total_value:,.2f}"  # total value (qty * buy_price)
+    )
+    
+    # Stock level tag (green/yellow/red/gray based on quantity)
+    return display_row, get_stock_tag(qty), total_value
+
+
 class InventoryFrame:
     def __init__(self, parent):
         self.frame = tb.Frame(parent, padding=30)
@@ -15,6 +70,11 @@ class InventoryFrame:
         # Callback for when inventory changes (to notify other views)
         self.on_inventory_change = None
         
+        # Rows from the last load: id, sku, name, category, qty, buy, sell, specs...
+        self.all_items = []
+        # Search index over those rows (rebuilt only when the database changed)
+        self.index = InventorySearchIndex([])
+        
         # --- Header Section ---
         header_frame = tb.Frame(self.frame)
         header_frame.grid(row=0, column=0, sticky="ew", pady=(0, 25))
@@ -47,6 +107,22 @@ class InventoryFrame:
             width=15
         ).pack(side="right", padx=5)
         
+        tb.Button(
+            actions, 
+            text="📋 Stocktake", 
+            bootstyle="info-outline", 
+            command=self.open_stocktake,
+            width=13
+        ).pack(side="right", padx=5)
+        
+        tb.Button(
+            actions, 
+            text="📥 Receive", 
+            bootstyle="success-outline", 
+            command=self.open_receiving,
+            width=12
+        ).pack(side="right", padx=5)
+        
         # Print Labels button
         tb.Button(
             actions, 
@@ -240,9 +316,10 @@ class InventoryFrame:
         self.tree.tag_configure('oddrow', background='#F8F9FA')
         
         # Scrollbars
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        vsb = ttk.Scrollbar(table_frame, orient="vertical")
         vsb.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=vsb.set)
+        # Only the visible rows live in the tree; the table drives the scrollbar
+        self.table = VirtualTable(self.tree, vsb)
         
         hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
         hsb.grid(row=1, column=0, sticky="ew")
@@ -284,35 +361,42 @@ class InventoryFrame:
         )
         self.total_value_label.pack(side="right", padx=20)
 
-        self.all_items = []
+        self.loader = ViewLoader(self.frame, on_busy=label_busy_indicator(self.count_label))
         self.refresh()
 
     def load_categories(self):
-        """Load unique categories from inventory"""
+        """Load unique categories from the search index"""
         try:
-            items = InventoryController.get_all_items()
-            categories = set()
-            for item in items:
-                if item[3]:  # category is at index 3
-                    categories.add(str(item[3]))
-            
             # Update combobox values
-            category_list = ["All"] + sorted(list(categories))
+            category_list = ["All"] + self.index.categories
             self.category_combo['values'] = category_list
             self.category_var.set("All")
         except Exception as e:
             print(f"Error loading categories: {e}")
 
-    def refresh(self):
-        try:
-            self.all_items = InventoryController.get_all_items()
-            self.load_categories()  # Reload categories when refreshing
-            self.filter_items()
-            # Notify ALL views that inventory was refreshed
-            from modules.event_manager import event_manager
-            event_manager.notify('inventory_changed', {'action': 'refresh'})
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load inventory: {e}")
+    def refresh(self, then=None):
+        """
+        Reload inventory in the background; the table updates when it arrives.
+        
+        Args:
+            then: Optional callback run after the new rows are displayed
+        """
+        self.loader.load(
+            "items",
+            lambda: get_inventory_index(display=_display_row),
+            lambda index: self._apply_index(index, then),
+            lambda e: messagebox.showerror("Error", f"Could not load inventory: {e}")
+        )
+
+    def _apply_index(self, index, then=None):
+        self.index = index
+        self.all_items = index.rows
+        self.load_categories()  # Reload categories when refreshing
+        self.filter_items()
+        # No inventory_changed here: reloading is not a change, and re-emitting
+        # made every refresh cascade through the other views
+        if then:
+            then()
 
     def filter_items(self, *args):
         # Safety check - ensure initialization is complete
@@ -329,84 +413,21 @@ class InventoryFrame:
         # Get category filter
         selected_category = self.category_var.get() if hasattr(self, 'category_var') else "All"
         
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Only matching items are visited; their display rows were precomputed
+        matches = self.index.search(query, selected_category, low_stock)
+        displays = self.index.displays
         
-        displayed_count = 0
+        rows = []
         total_inventory_value = 0.0
-        
-        for idx, row in enumerate(self.all_items):
-            # row: id, sku, name, category, qty, buy_price, sell_price, storage, ram, color, condition, brand, model, warranty_months
-            # Filter by category
-            if selected_category != "All":
-                item_category = str(row[3])  # category is at index 3
-                if item_category != selected_category:
-                    continue
-            
-            # Filter by text (including specs)
-            if query:
-                combined = " ".join([str(x) if x else "" for x in row]).lower()
-                if query not in combined:
-                    continue
-            
-            # Get quantity for filtering and styling
-            try:
-                qty = int(row[4])  # qty is at index 4
-            except:
-                qty = 0
-            
-            # Filter by low stock (< 5)
-            if low_stock and qty >= 5:
-                continue
-            
-            # Get prices
-            try:
-                buy_price = float(row[5])  # buy price at index 5
-                sell_price = float(row[6])  # sell price at index 6
-            except:
-                buy_price = 0.0
-                sell_price = 0.0
-            
-            # Calculate total value (qty * buy price)
-            total_value = qty * buy_price
+        for displayed_count, pos in enumerate(matches):
+            display_row, stock_tag, total_value = displays[pos]
             total_inventory_value += total_value
-            
-            # Format mobile specifications
-            from modules.mobile_spec_manager import MobileSpecManager
-            storage = row[7] if len(row) > 7 else None
-            ram = row[8] if len(row) > 8 else None
-            color = row[9] if len(row) > 9 else None
-            specs_display = MobileSpecManager.format_specs_display(storage, ram, color)
-            
-            # Format display row with formatted prices and specs
-            display_row = [
-                row[0],  # id
-                row[1],  # sku
-                row[2],  # name
-                row[3],  # category
-                specs_display,  # formatted specs
-                row[4],  # qty
-                f"{buy_price:,.2f}",  # buy price (unit price, not total)
-                f"{sell_price:,.2f}",  # sell price (unit price, not total)
-                f"EGP {total_value:,.2f}"  # total value (qty * buy_price)
-            ]
-            
-            # Determine row styling with enhanced stock level color coding
-            from ui.styles import get_stock_tag
-            tags = []
-            
-            # Add stock level tag (green/yellow/red/gray based on quantity)
-            stock_tag = get_stock_tag(qty)
-            tags.append(stock_tag)
-            
             # Add alternating row color for better readability
-            if displayed_count % 2 == 0:
-                tags.append('evenrow')
-            else:
-                tags.append('oddrow')
-            
-            self.tree.insert("", "end", values=display_row, tags=tuple(tags))
-            displayed_count += 1
+            stripe = 'evenrow' if displayed_count % 2 == 0 else 'oddrow'
+            rows.append((display_row, (stock_tag, stripe)))
+        displayed_count = len(matches)
+        
+        self.table.set_rows(rows)
         
         # Update count label
         self.count_label.configure(text=f"Items: {displayed_count} / {len(self.all_items)}")
@@ -1037,24 +1058,20 @@ class InventoryFrame:
                 prefs = LabelPreferences()
                 if prefs.get('auto_print_new_products', False):
                     # Get the newly added item ID
-                    from modules.db import get_conn
-                    conn = get_conn()
-                    c = conn.cursor()
-                    c.execute("SELECT item_id FROM inventory WHERE sku = ?", (sku,))
-                    result = c.fetchone()
-                    conn.close()
+                    result = models.get_inventory_item_by_sku(sku)
                     
                     if result:
                         # Select the new item in the tree and open print dialog
                         item_id = result[0]
-                        # Find and select the item in the tree
-                        for tree_item in self.tree.get_children():
-                            if self.tree.item(tree_item)['values'][0] == item_id:
-                                self.tree.selection_set(tree_item)
-                                self.tree.see(tree_item)
+                        
+                        def select_new_item():
+                            # Find and select the item in the table
+                            if self.table.select(item_id):
                                 # Open print labels dialog
                                 self.frame.after(100, self.print_labels_dialog)
-                                break
+                        
+                        # The table reloads in the background; select once it has
+                        self.refresh(then=select_new_item)
             else:
                 validation_label.configure(
                     text="❌ Could not add item. SKU might already exist.",
@@ -1120,7 +1137,7 @@ class InventoryFrame:
                 self.refresh()
                 # Notify ALL views that inventory changed
                 from modules.event_manager import event_manager
-                event_manager.notify('inventory_changed', {'action': 'delete', 'item': name})
+                event_manager.notify('inventory_changed', {'action': 'delete', 'item': name, 'item_id': item_id})
             else:
                 messagebox.showerror("Error", "Could not delete item. Check logs for details.")
         except Exception as e:
@@ -1200,6 +1217,16 @@ class InventoryFrame:
         if qty:
             self.adjust_stock(-qty)
     
+    def open_stocktake(self):
+        """Open the stocktake window (counts are committed in one batch)"""
+        from ui.stocktake_view import StocktakeWindow
+        StocktakeWindow(self.frame)
+    
+    def open_receiving(self):
+        """Open the goods receiving window (a delivery is posted in one transaction)"""
+        from ui.receiving_view import ReceivingWindow
+        ReceivingWindow(self.frame)
+    
     def adjust_stock(self, adjustment):
         """Adjust stock quantity for selected item"""
         selection = self.tree.selection()
@@ -1266,7 +1293,7 @@ class InventoryFrame:
                 
                 # Notify ALL views that inventory changed
                 from modules.event_manager import event_manager
-                event_manager.notify('inventory_changed', {'action': 'adjust_stock', 'item': name, 'adjustment': adjustment})
+                event_manager.notify('inventory_changed', {'action': 'adjust_stock', 'item': name, 'item_id': item_id, 'adjustment': adjustment})
             else:
                 messagebox.showerror("Error", "Failed to update stock")
         except Exception as e:
@@ -1284,14 +1311,7 @@ class InventoryFrame:
         item_id = item_values[0]
         
         # Get full item details from database
-        from modules.db import get_conn
-        conn = get_conn()
-        c = conn.cursor()
-        c.execute("""SELECT item_id, sku, name, category, quantity, buy_price, sell_price, 
-                            storage, ram, color, description 
-                     FROM inventory WHERE item_id=?""", (item_id,))
-        item = c.fetchone()
-        conn.close()
+        item = models.get_inventory_item_for_edit(item_id)
         
         if not item:
             messagebox.showerror("Error", "Could not load item details")
@@ -1598,7 +1618,7 @@ class InventoryFrame:
                 win.destroy()
                 self.refresh()
                 from modules.event_manager import event_manager
-                event_manager.notify('inventory_changed', {'action': 'update', 'item': new_name})
+                event_manager.notify('inventory_changed', {'action': 'update', 'item': new_name, 'item_id': item_id})
             else:
                 validation_label.configure(
                     text="❌ Could not update item. SKU might already exist.",
@@ -1844,34 +1864,28 @@ class InventoryFrame:
                     messagebox.showwarning("No Labels", "Please set at least one product quantity greater than 0.", parent=win)
                     return
                 
-                # Get full product data from database
-                from modules.db import get_conn
-                conn = get_conn()
-                c = conn.cursor()
+                # Get full product data from the shared inventory snapshot
+                repo = InventoryController.get_repository()
                 
                 products_data = []
                 for product in selected_products:
-                    c.execute("""
-                        SELECT item_id, sku, name, sell_price, storage, ram, color, brand, model, barcode
-                        FROM inventory WHERE item_id = ?
-                    """, (product['item_id'],))
-                    row = c.fetchone()
+                    # row: id, sku, name, category, qty, buy, sell, storage, ram, color, condition, brand, model, warranty
+                    row = repo.get(product['item_id'])
                     if row:
                         # Use barcode if available, otherwise fall back to SKU
-                        barcode_value = row[9] if row[9] else row[1]  # barcode or SKU
+                        barcode_value = repo.barcode_of(row[0]) or row[1]  # barcode or SKU
                         products_data.append({
                             'item_id': row[0],
                             'sku': row[1],
                             'barcode': barcode_value,  # Add barcode field
                             'name': row[2],
-                            'sell_price': row[3],
-                            'storage': row[4],
-                            'ram': row[5],
-                            'color': row[6],
-                            'brand': row[7],
-                            'model': row[8]
+                            'sell_price': row[6],
+                            'storage': row[7],
+                            'ram': row[8],
+                            'color': row[9],
+                            'brand': row[11],
+                            'model': row[12]
                         })
-                conn.close()
                 
                 # Ensure labels directory exists
                 from pathlib import Path
@@ -0,0 +1,138 @@
+# ui/lazy_tabs.py
+"""
+Notebook tabs whose views are built the first time they are shown.
+
+Every tab gets an empty placeholder frame up front, so the notebook shows
+all its titles immediately. The view itself (its module import, widgets
+and first refresh query) is only created when the tab is first selected.
+Views keep their usual constructor: they are built with the placeholder
+as parent and their ``frame`` is packed into it.
+
+Usage:
+
+    tabs = LazyTabs(nb)
+    tabs.add("sales", "💰 Sales", view_factory("ui.sales_view", "SalesFrame"))
+    ...
+    event_manager.subscribe('sale_completed', lambda data: tabs.call("inventory", "refresh"))
+"""
+
+import importlib
+import time
+import traceback
+
+from modules.logger import log
+
+
+def view_factory(module_name: str, class_name: str):
+    """Return a factory that imports ``module_name`` and builds ``class_name`` when called."""
+    def build(parent):
+        module = importlib.import_module(module_name)
+        return getattr(module, class_name)(parent)
+    return build
+
+
+class LazyTabs:
+    """Tabs of a ttk Notebook, each built on first selection"""
+
+    def __init__(self, notebook, make_placeholder=None):
+        """
+        Args:
+            notebook: The ttk/ttkbootstrap Notebook
+            make_placeholder: Returns an empty frame for a tab (default: a
+                ttkbootstrap Frame inside the notebook)
+        """
+        self.notebook = notebook
+        self._make_placeholder = make_placeholder or self._default_placeholder
+        self._tabs = {}       # name -> (placeholder, factory)
+        self._order = []      # tab names in notebook order
+        self._views = {}      # name -> built view
+        self._failed = set()
+        self._on_build = {}   # name -> callbacks run once the view exists
+        self.build_times = {}  # name -> seconds spent building the view
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed, add="+")
+
+    def _default_placeholder(self):
+        import ttkbootstrap as tb
+        return tb.Frame(self.notebook)
+
+    def add(self, name: str, title: str, factory):
+        """Add a tab; ``factory(parent)`` builds its view when it is first selected."""
+        placeholder = self._make_placeholder()
+        self.notebook.add(placeholder, text=title)
+        self._tabs[name] = (placeholder, factory)
+        self._order.append(name)
+
+    def get(self, name: str):
+        """The view of a tab, or None if it has not been built (yet)."""
+        return self._views.get(name)
+
+    def call(self, name: str, method: str, *args):
+        """
+        Call ``view.method(*args)`` if the tab's view is built and has that method.
+
+        Views that do not exist yet are skipped: they load fresh data when built.
+        """
+        view = self._views.get(name)
+        func = getattr(view, method, None) if view is not None else None
+        if func is not None:
+            return func(*args)
+        return None
+
+    def on_build(self, name: str, callback):
+        """Run ``callback(view)`` once the tab's view is built (now, if it already is)."""
+        if name in self._views:
+            callback(self._views[name])
+        else:
+            self._on_build.setdefault(name, []).append(callback)
+
+    def build(self, name: str):
+        """
+        Build the tab's view now if it is not built yet.
+
+        Returns:
+            The view, or None if building it failed (the error is logged and
+            the tab shows a message instead)
+        """
+        if name in self._views or name in self._failed:
+            return self._views.get(name)
+        placeholder, factory = self._tabs[name]
+        start = time.perf_counter()
+        try:
+            view = factory(placeholder)
+            view.frame.pack(expand=1, fill="both")
+        except Exception as e:
+            self._failed.add(name)
+            log.error(f"Error loading tab {name}: {e}")
+            traceback.print_exc()
+            self._show_error(placeholder, name, e)
+            return None
+        self.build_times[name] = time.perf_counter() - start
+        self._views[name] = view
+        for callback in self._on_build.pop(name, []):
+            try:
+                callback(view)
+            except Exception as e:
+                log.error(f"Tab {name} build callback failed: {e}")
+        return view
+
+    def select(self, name: str):
+        """Show a tab, building its view first."""
+        self.build(name)
+        self.notebook.select(self._tabs[name][0])
+
+    def _on_tab_changed(self, event=None):
+        try:
+            index = self.notebook.index("current")
+        except Exception:
+            return
+        if 0 <= index < len(self._order):
+            self.build(self._order[index])
+
+    @staticmethod
+    def _show_error(placeholder, name, error):
+        try:
+            import ttkbootstrap as tb
+            tb.Label(placeholder, text=f"⚠️ Could not load {name}:\n{error}",
+                     bootstyle="danger").pack(expand=True)
+        except Exception:
+            pass
@@ -0,0 +1,194 @@
+# ui/loader.py
+"""
+Background data loading for the Tk views.
+
+Database queries and row formatting run on a small shared thread pool so the
+Tk main loop keeps painting while they run. Results are handed back to the
+main loop through a queue that the view polls with ``after()`` (Tk widgets
+must only be touched from the main thread).
+
+Each request has a key (e.g. "rows"). Starting a new request for a key makes
+the older one stale: it is cancelled if it has not started yet, and its
+result is dropped if it has.
+
+Usage in a view:
+
+    self.loader = ViewLoader(self.frame, on_busy=self._show_loading)
+    self.loader.load("rows", RepairController.get_all_repairs, self._render_rows)
+"""
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.logger import log
+
+# SQLite work is mostly I/O and C code; two workers keep one view's slow load
+# from blocking another view without flooding the database with readers.
+MAX_WORKERS = 2
+
+# How often (ms) the main loop checks for finished loads while any are pending
+POLL_MS = 25
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared loader thread pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ui-loader")
+        return _executor
+
+
+def shutdown_loaders(wait: bool = False):
+    """Stop the shared thread pool (call when the main window closes)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+
+
+def label_busy_indicator(label, text="⏳ Loading..."):
+    """
+    Return an ``on_busy`` callback that shows ``text`` on a label while a view loads.
+
+    The label's previous text comes back afterwards unless the view wrote a
+    new one (e.g. an updated row count) while applying the result.
+    """
+    saved = {}
+
+    def on_busy(busy):
+        if busy:
+            saved["text"] = label.cget("text")
+            label.configure(text=text)
+        elif str(label.cget("text")) == text:
+            label.configure(text=saved.get("text", ""))
+
+    return on_busy
+
+
+class ViewLoader:
+    """Runs a view's loads in the background and delivers results on the main loop"""
+
+    def __init__(self, widget, on_busy=None):
+        """
+        Args:
+            widget: Any Tk widget of the view (used for ``after()``)
+            on_busy: Optional callback(bool) invoked on the main loop when the
+                view starts waiting for data (True) and when all loads are done (False)
+        """
+        self.widget = widget
+        self.on_busy = on_busy
+        self._results = queue.SimpleQueue()
+        self._latest = {}    # key -> (sequence number, on_done, on_error) of the current request
+        self._futures = {}   # key -> Future of the current request
+        self._seq = 0
+        self._poll_job = None
+        self.stats = {"started": 0, "delivered": 0, "stale": 0, "cancelled": 0, "errors": 0}
+
+    @property
+    def busy(self) -> bool:
+        """True while any request is waiting for its result."""
+        return bool(self._latest)
+
+    def load(self, key, func, on_done, on_error=None):
+        """
+        Run ``func()`` on the loader pool.
+
+        ``on_done(result)`` (or ``on_error(exception)``) is called on the main
+        loop, unless a newer request for the same key was started meanwhile.
+        Must be called from the main loop.
+        """
+        was_busy = self.busy
+        self._seq += 1
+        seq = self._seq
+
+        previous = self._futures.get(key)
+        if previous is not None and previous.cancel():
+            self.stats["cancelled"] += 1
+
+        self._latest[key] = (seq, on_done, on_error)
+        self._futures[key] = get_executor().submit(self._run, key, seq, func)
+        self.stats["started"] += 1
+
+        if not was_busy:
+            self._notify_busy(True)
+        self._schedule_poll()
+
+    def cancel(self, key=None):
+        """Forget pending requests (all of them, or just ``key``); their results are dropped."""
+        keys = list(self._latest) if key is None else [key]
+        for k in keys:
+            self._latest.pop(k, None)
+            future = self._futures.pop(k, None)
+            if future is not None and future.cancel():
+                self.stats["cancelled"] += 1
+        if keys and not self.busy:
+            self._notify_busy(False)
+
+    def _run(self, key, seq, func):
+        # Worker thread: never touch Tk here
+        try:
+            self._results.put((key, seq, True, func()))
+        except Exception as e:
+            self._results.put((key, seq, False, e))
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            try:
+                self._poll_job = self.widget.after(POLL_MS, self._poll)
+            except tk.TclError:
+                # Widget destroyed; nothing left to deliver to
+                self._latest.clear()
+
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                key, seq, ok, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            current = self._latest.get(key)
+            if current is None or current[0] != seq:
+                self.stats["stale"] += 1
+                continue
+
+            _, on_done, on_error = current
+            del self._latest[key]
+            self._futures.pop(key, None)
+            try:
+                if ok:
+                    self.stats["delivered"] += 1
+                    on_done(value)
+                else:
+                    self.stats["errors"] += 1
+                    if on_error is not None:
+                        on_error(value)
+                    else:
+                        log.error(f"Background load '{key}' failed: {value}")
+            except tk.TclError:
+                # View closed while the data was loading
+                pass
+            except Exception as e:
+                log.error(f"Error applying background load '{key}': {e}")
+
+        if self.busy:
+            self._schedule_poll()
+        else:
+            self._notify_busy(False)
+
+    def _notify_busy(self, busy: bool):
+        if self.on_busy is None:
+            return
+        try:
+            self.on_busy(busy)
+        except tk.TclError:
+            pass
+        except Exception as e:
+            log.error(f"Loading indicator error: {e}")
@@ -4,6 +4,8 @@ from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timedelta
 from modules.audit_logger import get_logs, get_entity_history
+from ui.loader import ViewLoader, label_busy_indicator
+from ui.table_styles import VirtualTable
 import csv
 
 class LogsFrame:
@@ -17,6 +19,8 @@ class LogsFrame:
         header.grid(row=0, column=0, sticky="ew", pady=(0, 15))
         
         tb.Label(header, text="Audit Logs", font=("Segoe UI", 18, "bold")).pack(side="left")
+        self.loading_label = tb.Label(header, text="", bootstyle="info")
+        self.loading_label.pack(side="left", padx=15)
         tb.Button(header, text="Export to CSV", bootstyle="secondary-outline", command=self.export_logs).pack(side="right", padx=5)
         tb.Button(header, text="Refresh", bootstyle="primary", command=self.refresh).pack(side="right")
         
@@ -83,21 +87,19 @@ class LogsFrame:
         self.tree.grid(row=2, column=0, sticky="nsew")
         
         # Scrollbar
-        vsb = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        vsb = ttk.Scrollbar(self.frame, orient="vertical")
         vsb.grid(row=2, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=vsb.set)
+        # Only the visible rows live in the tree; the table drives the scrollbar
+        self.table = VirtualTable(self.tree, vsb)
         
         # Context menu
         self.tree.bind("<Double-1>", self.show_details)
         
         # Initial load
+        self.loader = ViewLoader(self.frame, on_busy=label_busy_indicator(self.loading_label))
         self.refresh()
     
     def refresh(self):
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         # Get filter values
         action_type = self.action_filter.get()
         if action_type == "All":
@@ -123,32 +125,36 @@ class LogsFrame:
         elif date_range == "Last 30 Days":
             start_date = (datetime.now() - timedelta(days=30)).isoformat()
         
-        # Fetch logs
-        try:
-            logs = get_logs(
+        # Fetch logs in the background
+        self.loader.load(
+            "logs",
+            lambda: get_logs(
                 limit=500,
                 user=user,
                 action_type=action_type,
                 entity_type=entity_type,
                 start_date=start_date,
                 end_date=end_date
+            ),
+            self._show_logs,
+            lambda e: messagebox.showerror("Error", f"Failed to load logs: {e}")
+        )
+    
+    def _show_logs(self, logs):
+        rows = []
+        for log in logs:
+            # log: (log_id, timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
+            display_values = (
+                log[0],  # log_id
+                log[1][:19] if log[1] else "",  # timestamp (truncate)
+                log[2] or "System",  # user
+                log[3],  # action_type
+                log[4],  # entity_type
+                log[5] or "",  # entity_id
+                log[8] or ""  # description
             )
-            
-            for log in logs:
-                # log: (log_id, timestamp, user, action_type, entity_type, entity_id, old_value, new_value, description)
-                display_values = (
-                    log[0],  # log_id
-                    log[1][:19] if log[1] else "",  # timestamp (truncate)
-                    log[2] or "System",  # user
-                    log[3],  # action_type
-                    log[4],  # entity_type
-                    log[5] or "",  # entity_id
-                    log[8] or ""  # description
-                )
-                self.tree.insert("", "end", values=display_values)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load logs: {e}")
+            rows.append((display_values, ()))
+        self.table.set_rows(rows)
     
     def show_details(self, event):
         sel = self.tree.selection()
@@ -186,10 +192,7 @@ Description: {item[6]}
     
     def export_logs(self):
         # Get current filtered logs
-        logs_data = []
-        for item_id in self.tree.get_children():
-            item = self.tree.item(item_id)['values']
-            logs_data.append(item)
+        logs_data = self.table.all_values()
         
         if not logs_data:
             messagebox.showwarning("No Data", "No logs to export.")
@@ -2,31 +2,53 @@
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import messagebox
-from ui.inventory_view import InventoryFrame
-from ui.repairs_view import RepairsFrame
-from ui.users_view import UsersFrame
-from ui.dashboard_view import DashboardFrame
-from ui.customers_view import CustomersFrame
-from ui.sales_view import SalesFrame  # Changed from pos_view
-from ui.reports_view import ReportsFrame
-from ui.settings_view import SettingsFrame
-from ui.logs_view import LogsFrame
-from ui.login_view import show_login
+from ui.lazy_tabs import LazyTabs, view_factory
 
 from ui.styles import apply_styles
-from modules import session
+from modules import session, startup_timeline
 from modules.permissions import has_permission
 
-def start_app(theme_name="flatly"):
-    """Start the main application after successful login"""
+# Notebook tabs in order: (name, title, module, view class). View modules are
+# imported when their tab is first opened.
+VIEW_TABS = [
+    ("dashboard", "Dashboard", "ui.dashboard_view", "DashboardFrame"),
+    ("sales", "💰 Sales", "ui.sales_view", "SalesFrame"),
+    ("inventory", "Inventory", "ui.inventory_view", "InventoryFrame"),
+    ("repairs", "Repairs", "ui.repairs_view", "RepairsFrame"),
+    ("customers", "Customers", "ui.customers_view", "CustomersFrame"),
+    ("reports", "📊 Reports", "ui.reports_view", "ReportsFrame"),
+    ("logs", "Audit Logs", "ui.logs_view", "LogsFrame"),
+    ("users", "👥 Users", "ui.users_view", "UsersFrame"),
+    ("settings", "Settings", "ui.settings_view", "SettingsFrame"),
+]
+
+def start_app(theme_name="flatly", on_ready=None):
+    """
+    Start the main application after successful login
+
+    Args:
+        theme_name: ttkbootstrap theme
+        on_ready: Called once the window is up and idle (e.g. to log the
+            startup timeline)
+    """
     try:
+        # Optionally send controller calls to the shop's data service process
+        import config
+        service_mode, service_cfg = config.get_data_service_settings()
+        if service_mode:
+            import controllers
+            from modules.data_service import DataServiceClient, DEFAULT_ADDRESS
+            address = service_cfg.get("address") or DEFAULT_ADDRESS
+            controllers.use_service(DataServiceClient(address, secret=service_cfg.get("secret")))
+            print(f"✅ Using data service at {address}")
+
         # Apply styles (creates Window/Style internally or we use it to configure)
         # ttkbootstrap's Window creates a style, so we might need to adjust
         app = tb.Window(themename=theme_name)
         
         # Apply custom styles after window creation
-        from ui.styles import apply_styles
         apply_styles(theme_name)
+        startup_timeline.mark("window")
 
         # Get current user info
         user = session.get_current_user()
@@ -38,144 +60,81 @@ def start_app(theme_name="flatly"):
         nb = tb.Notebook(app, bootstyle="primary")
         nb.pack(expand=1, fill="both", padx=8, pady=8)
         
-        # Import event manager for real-time sync
+        # Import event manager for real-time sync; events are delivered (and
+        # coalesced) on this window's main loop, whichever thread publishes them
         from modules.event_manager import event_manager
+        event_manager.attach(app)
 
-        # Dashboard (First tab)
-        dash = None
-        try:
-            dash = DashboardFrame(nb)
-            nb.add(dash.frame, text="Dashboard")
-        except Exception as e:
-            print(f"Error loading Dashboard: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Sales (renamed from POS)
-        sales = None
-        try:
-            sales = SalesFrame(nb)
-            nb.add(sales.frame, text="💰 Sales")  # Changed from "POS (Sales)"
-        except Exception as e:
-            print(f"Error loading Sales: {e}")
-            import traceback
-            traceback.print_exc()
-
-        # Inventory
-        inv = None
-        try:
-            inv = InventoryFrame(nb)
-            nb.add(inv.frame, text="Inventory")
-        except Exception as e:
-            print(f"Error loading Inventory: {e}")
-            import traceback
-            traceback.print_exc()
-
-        # Repairs
-        rep = None
-        try:
-            rep = RepairsFrame(nb)
-            nb.add(rep.frame, text="Repairs")
-        except Exception as e:
-            print(f"Error loading Repairs: {e}")
-            import traceback
-            traceback.print_exc()
-
-        # Customers
-        cust = None
-        try:
-            cust = CustomersFrame(nb)
-            nb.add(cust.frame, text="Customers")
-        except Exception as e:
-            print(f"Error loading Customers: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Reports (NEW - Sales Reports)
-        reports = None
-        try:
-            reports = ReportsFrame(nb)
-            nb.add(reports.frame, text="📊 Reports")
-        except Exception as e:
-            print(f"Error loading Reports: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Logs (NEW - Phase 3)
-        logs = None
-        try:
-            logs = LogsFrame(nb)
-            nb.add(logs.frame, text="Audit Logs")
-        except Exception as e:
-            print(f"Error loading Logs: {e}")
-            import traceback
-            traceback.print_exc()
+        # Views are built the first time their tab is selected: startup only
+        # pays for the Dashboard; the rest (and their imports) come on demand
+        tabs = LazyTabs(nb)
+        for name, title, module_name, class_name in VIEW_TABS:
+            tabs.add(name, title, view_factory(module_name, class_name))
 
-        # Users
-        users = None
-        try:
-            users = UsersFrame(nb)
-            nb.add(users.frame, text="👥 Users")
-        except Exception as e:
-            print(f"Error loading Users: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Settings
-        sett = None
-        try:
-            sett = SettingsFrame(nb)
-            nb.add(sett.frame, text="Settings")
-        except Exception as e:
-            print(f"Error loading Settings: {e}")
-            import traceback
-            traceback.print_exc()
-        
         # ===== REAL-TIME SYNCHRONIZATION SETUP =====
-        # Subscribe all views to relevant events for automatic refresh
-        
+        # Subscribe views to relevant events for automatic refresh. Views that
+        # have not been opened yet are skipped; they load fresh data when built.
+
         # When inventory changes -> refresh Sales, Dashboard, Repairs
-        if sales:
-            event_manager.subscribe('inventory_changed', lambda data: sales.refresh_inventory())
-        if dash:
-            event_manager.subscribe('inventory_changed', lambda data: dash.refresh_data())
-        if rep:
-            event_manager.subscribe('inventory_changed', lambda data: rep.refresh() if hasattr(rep, 'refresh') else None)
-        
+        event_manager.subscribe('inventory_changed', lambda data: tabs.call("sales", "refresh_inventory"))
+        event_manager.subscribe('inventory_changed', lambda data: tabs.call("dashboard", "refresh_data"))
+        event_manager.subscribe('inventory_changed', lambda data: tabs.call("repairs", "refresh"))
+
         # When sale completes -> refresh Inventory, Dashboard, Customers
-        if inv:
-            event_manager.subscribe('sale_completed', lambda data: inv.refresh())
-        if dash:
-            event_manager.subscribe('sale_completed', lambda data: dash.refresh_data())
-        if cust:
-            event_manager.subscribe('sale_completed', lambda data: cust.refresh() if hasattr(cust, 'refresh') else None)
-        
+        event_manager.subscribe('sale_completed', lambda data: tabs.call("inventory", "refresh"))
+        event_manager.subscribe('sale_completed', lambda data: tabs.call("dashboard", "refresh_data"))
+        event_manager.subscribe('sale_completed', lambda data: tabs.call("customers", "refresh"))
+
         # When repair updated -> refresh Dashboard, Customers
-        if dash:
-            event_manager.subscribe('repair_updated', lambda data: dash.refresh_data())
-        if cust:
-            event_manager.subscribe('repair_updated', lambda data: cust.refresh() if hasattr(cust, 'refresh') else None)
-        
+        event_manager.subscribe('repair_updated', lambda data: tabs.call("dashboard", "refresh_data"))
+        event_manager.subscribe('repair_updated', lambda data: tabs.call("customers", "refresh"))
+
         # When customer updated -> refresh Customers view, Dashboard
-        if cust:
-            event_manager.subscribe('customer_updated', lambda data: cust.refresh() if hasattr(cust, 'refresh') else None)
-        if dash:
-            event_manager.subscribe('customer_updated', lambda data: dash.refresh_data())
+        event_manager.subscribe('customer_updated', lambda data: tabs.call("customers", "refresh"))
+        event_manager.subscribe('customer_updated', lambda data: tabs.call("dashboard", "refresh_data"))
+
+        # Focus on Dashboard by default (builds it now)
+        tabs.select("dashboard")
+        startup_timeline.mark("first view")
 
-        # Focus on Dashboard by default
-        nb.select(0)
-        
         # Start database monitor for real-time sync across multiple instances
         try:
             from modules.db_monitor import start_database_monitor
             from pathlib import Path
             db_path = Path(__file__).resolve().parents[1] / "shop.db"
-            start_database_monitor(db_path, check_interval=3)  # Check every 3 seconds
+            start_database_monitor(db_path, check_interval=1)  # One PRAGMA per second
             print("✅ Real-time database synchronization enabled")
         except Exception as e:
             print(f"⚠️ Database monitor not started: {e}")
 
+        # Keep WAL checkpoints off the checkout path (in service mode the
+        # service owns the database file and checkpoints it)
+        if not service_mode:
+            try:
+                from modules.db_checkpoint import start_wal_checkpointer
+                start_wal_checkpointer()
+            except Exception as e:
+                print(f"⚠️ WAL checkpointer not started: {e}")
+
+        def ready():
+            startup_timeline.mark("interactive")
+            if on_ready:
+                on_ready()
+        app.after_idle(ready)
+
         app.mainloop()
+
+        # Drop any view loads still queued; running queries finish on their own
+        from ui.loader import shutdown_loaders
+        shutdown_loaders()
+        event_manager.detach()
+
+        try:
+            if not service_mode:
+                from modules.db_checkpoint import stop_wal_checkpointer
+                stop_wal_checkpointer()
+        except Exception as e:
+            print(f"⚠️ WAL checkpointer did not stop cleanly: {e}")
     except Exception as e:
         messagebox.showerror("Startup error", str(e))
         raise
@@ -87,7 +87,7 @@ class POSFrame:
 
     def refresh_inventory(self):
         try:
-            self.all_inventory = InventoryController.get_all_items()
+            self.all_inventory = InventoryController.get_repository().rows
             self.filter_inventory()
         except Exception as e:
             messagebox.showerror("Error", str(e))
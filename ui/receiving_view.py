@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# ui/receiving_view.py
+"""
+Goods receiving window: build a supplier delivery line by line, post it once.
+
+Lines are kept in the window until "Post Receipt"; then the whole document
+(stock, buy prices, serials, cost history) is written in one transaction
+through InventoryController.post_receipt. If any line is rejected nothing
+is posted and the rejected lines are marked.
+"""
+
+import ttkbootstrap as tb
+from ttkbootstrap.constants import *
+from tkinter import ttk, messagebox
+
+from controllers.inventory_controller import InventoryController
+from modules import session as app_session
+from modules.receiving import COST_AVERAGE, COST_LAST
+from modules.scan_resolver import get_scan_resolver
+from ui.table_styles import configure_alternating_rows
+
+COST_METHODS = {"Last cost": COST_LAST, "Weighted average": COST_AVERAGE}
+
+
+class ReceivingWindow:
+    def __init__(self, parent):
+        self.win = tb.Toplevel(parent)
+        self.win.title("📥 Receive Goods")
+        self.win.geometry("920x680")
+        self.win.columnconfigure(0, weight=1)
+        self.win.rowconfigure(2, weight=1)
+        self.lines = []   # dicts as post_receipt takes them, plus 'sku' and 'name' for display
+
+        # --- Document ---
+        doc = tb.Labelframe(self.win, text="📄 Delivery", padding=10, bootstyle="primary")
+        doc.grid(row=0, column=0, sticky="ew", padx=15, pady=(15, 5))
+        doc.columnconfigure(1, weight=1)
+        doc.columnconfigure(3, weight=1)
+        tb.Label(doc, text="Supplier:").grid(row=0, column=0, sticky="w", padx=(0, 10))
+        self.supplier_var = tb.StringVar()
+        tb.Entry(doc, textvariable=self.supplier_var).grid(row=0, column=1, sticky="ew")
+        tb.Label(doc, text="Invoice / Ref:").grid(row=0, column=2, sticky="w", padx=10)
+        self.reference_var = tb.StringVar()
+        tb.Entry(doc, textvariable=self.reference_var).grid(row=0, column=3, sticky="ew")
+        tb.Label(doc, text="Buy price:").grid(row=1, column=0, sticky="w", padx=(0, 10), pady=(8, 0))
+        self.cost_method_var = tb.StringVar(value="Last cost")
+        ttk.Combobox(doc, textvariable=self.cost_method_var, values=list(COST_METHODS),
+                     state="readonly", width=18).grid(row=1, column=1, sticky="w", pady=(8, 0))
+
+        # --- Line entry ---
+        entry = tb.Labelframe(self.win, text="➕ Add line", padding=10, bootstyle="info")
+        entry.grid(row=1, column=0, sticky="ew", padx=15, pady=5)
+        entry.columnconfigure(1, weight=1)
+        tb.Label(entry, text="SKU / Barcode:").grid(row=0, column=0, sticky="w", padx=(0, 10))
+        self.code_var = tb.StringVar()
+        self.code_entry = tb.Entry(entry, textvariable=self.code_var, font=("Segoe UI", 12))
+        self.code_entry.grid(row=0, column=1, sticky="ew")
+        tb.Label(entry, text="Qty:").grid(row=0, column=2, padx=(10, 5))
+        self.qty_var = tb.StringVar(value="1")
+        tb.Entry(entry, textvariable=self.qty_var, width=7).grid(row=0, column=3)
+        tb.Label(entry, text="Unit cost:").grid(row=0, column=4, padx=(10, 5))
+        self.cost_var = tb.StringVar()
+        tb.Entry(entry, textvariable=self.cost_var, width=10).grid(row=0, column=5)
+        tb.Button(entry, text="➕ Add", bootstyle="success", command=self.add_line).grid(row=0, column=6, padx=(10, 0))
+        tb.Label(entry, text="Serials / IMEIs (one per line, optional):").grid(
+            row=1, column=0, columnspan=7, sticky="w", pady=(8, 2))
+        self.serials_text = tb.Text(entry, height=4, font=("Consolas", 10))
+        self.serials_text.grid(row=2, column=0, columnspan=7, sticky="ew")
+        self.status_label = tb.Label(entry, text="Scan or type an item, then Add", font=("Segoe UI", 9), bootstyle="info")
+        self.status_label.grid(row=3, column=0, columnspan=7, sticky="w", pady=(5, 0))
+        self.code_entry.bind('<Return>', lambda e: self.add_line())
+
+        # --- Lines ---
+        table = tb.Frame(self.win, padding=(15, 0))
+        table.grid(row=2, column=0, sticky="nsew")
+        table.columnconfigure(0, weight=1)
+        table.rowconfigure(0, weight=1)
+        columns = ("no", "sku", "name", "qty", "cost", "serials", "total")
+        self.tree = ttk.Treeview(table, columns=columns, show="headings", height=12)
+        for col, title, width, anchor in (("no", "#", 40, "center"), ("sku", "SKU", 120, "w"),
+                                          ("name", "Name", 300, "w"), ("qty", "Qty", 70, "center"),
+                                          ("cost", "Unit Cost", 90, "e"), ("serials", "Serials", 70, "center"),
+                                          ("total", "Line Total", 100, "e")):
+            self.tree.heading(col, text=title)
+            self.tree.column(col, width=width, anchor=anchor)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        configure_alternating_rows(self.tree)
+        self.tree.tag_configure('rejected', foreground='#c0392b')
+
+        # --- Actions ---
+        actions = tb.Frame(self.win, padding=15)
+        actions.grid(row=3, column=0, sticky="ew")
+        self.summary_label = tb.Label(actions, text="", font=("Segoe UI", 10, "bold"))
+        self.summary_label.pack(side="left")
+        tb.Button(actions, text="✖ Close", bootstyle="secondary", command=self.win.destroy).pack(side="right", padx=5)
+        tb.Button(actions, text="✅ Post Receipt", bootstyle="success", command=self.post).pack(side="right", padx=5)
+        tb.Button(actions, text="🗑️ Remove Line", bootstyle="danger-outline", command=self.remove_line).pack(side="right", padx=5)
+
+        self.refresh_lines()
+        self.code_entry.focus()
+
+    # ---------- lines ----------
+    def add_line(self):
+        code = self.code_var.get().strip()
+        if not code:
+            return
+        hit = get_scan_resolver().resolve(code)
+        if hit is None:
+            self.status_label.configure(text=f"⚠️ {code}: not registered", bootstyle="warning")
+            return
+        serials = [s.strip() for s in self.serials_text.get("1.0", "end").splitlines() if s.strip()]
+        try:
+            qty = int(self.qty_var.get().strip() or len(serials))
+            cost = float(self.cost_var.get().strip())
+        except ValueError:
+            self.status_label.configure(text="⚠️ Quantity and unit cost must be numbers", bootstyle="warning")
+            return
+        if serials and len(serials) != qty:
+            self.status_label.configure(text=f"⚠️ {len(serials)} serial(s) for a quantity of {qty}",
+                                        bootstyle="warning")
+            return
+        self.lines.append({'item_id': hit.item_id, 'quantity': qty, 'unit_cost': cost, 'serials': serials,
+                           'sku': hit.sku, 'name': hit.name})
+        self.code_var.set("")
+        self.qty_var.set("1")
+        self.serials_text.delete("1.0", "end")
+        self.status_label.configure(text=f"✓ Added {qty} × {hit.name}", bootstyle="success")
+        self.refresh_lines()
+        self.code_entry.focus()
+
+    def remove_line(self):
+        for iid in sorted((int(i) for i in self.tree.selection()), reverse=True):
+            del self.lines[iid]
+        self.refresh_lines()
+
+    def refresh_lines(self, rejected=()):
+        self.tree.delete(*self.tree.get_children())
+        for idx, line in enumerate(self.lines):
+            tags = ('evenrow' if idx % 2 == 0 else 'oddrow',)
+            if idx + 1 in rejected:
+                tags += ('rejected',)
+            total = line['quantity'] * line['unit_cost']
+            self.tree.insert("", "end", iid=str(idx), tags=tags,
+                             values=(idx + 1, line['sku'], line['name'], line['quantity'],
+                                     f"{line['unit_cost']:.2f}", len(line['serials']), f"{total:.2f}"))
+        units = sum(line['quantity'] for line in self.lines)
+        value = sum(line['quantity'] * line['unit_cost'] for line in self.lines)
+        self.summary_label.configure(text=f"{len(self.lines)} line(s) · {units} unit(s) · {value:.2f}")
+
+    # ---------- posting ----------
+    def post(self):
+        if not self.supplier_var.get().strip():
+            messagebox.showwarning("Receive Goods", "Enter the supplier.", parent=self.win)
+            return
+        if not self.lines:
+            messagebox.showwarning("Receive Goods", "Add at least one line.", parent=self.win)
+            return
+        result = InventoryController.post_receipt(
+            self.supplier_var.get(),
+            [{key: line[key] for key in ('item_id', 'quantity', 'unit_cost', 'serials')} for line in self.lines],
+            reference=self.reference_var.get().strip() or None,
+            user=app_session.get_username(),
+            cost_method=COST_METHODS.get(self.cost_method_var.get(), COST_LAST))
+        if result['receipt_id'] is None:
+            errors = result['errors']
+            self.refresh_lines(rejected={line_no for line_no, _ in errors})
+            details = "\n".join(f"Line {line_no}: {message}" if line_no else message
+                                for line_no, message in errors[:15])
+            more = f"\n… and {len(errors) - 15} more" if len(errors) > 15 else ""
+            messagebox.showerror("Receive Goods", f"Nothing was posted.\n\n{details}{more}", parent=self.win)
+            return
+        messagebox.showinfo("Receive Goods",
+                            f"Receipt #{result['receipt_id']} posted.\n\n"
+                            f"{result['units']} unit(s) on {result['lines']} line(s), "
+                            f"{result['serials']} serial(s), total {result['total_cost']:.2f}",
+                            parent=self.win)
+        self.lines = []
+        self.reference_var.set("")
+        self.refresh_lines()
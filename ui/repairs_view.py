@@ -9,10 +9,13 @@ from tkinter import StringVar
 from tkinter import StringVar
 from datetime import datetime, timedelta
 import random
+import threading
 
 from controllers.repair_controller import RepairController
 from controllers.inventory_controller import InventoryController
-from modules.reports.receipt_generator import generate_receipt_pdf
+from modules import models
+from ui.loader import ViewLoader, label_busy_indicator
+from ui.table_styles import VirtualTable
 
 def set_placeholder(entry: ttk.Entry, text: str, color="#888888"):
     """Adds placeholder behavior to a ttk Entry widget."""
@@ -66,6 +69,8 @@ class RepairsFrame:
 
         tb.Button(ctrl, text="Export CSV", bootstyle="secondary-outline", command=self.export_csv).grid(row=0, column=5, padx=8)
         tb.Button(ctrl, text="Refresh", bootstyle="primary", command=self.refresh).grid(row=0, column=6, padx=(6,0))
+        self.loading_label = tb.Label(ctrl, text="", bootstyle="info")
+        self.loading_label.grid(row=0, column=7, padx=(8,0))
 
         # Form: New Repair (Modern Card Style)
         form_frame = tb.Labelframe(self.frame, text="New Repair Order", padding=15, bootstyle="primary")
@@ -173,9 +178,10 @@ class RepairsFrame:
         self.tree.grid(row=3, column=0, sticky="nsew", padx=0, pady=(0,6))
 
         # Scrollbars
-        vsb = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        vsb = ttk.Scrollbar(self.frame, orient="vertical")
         vsb.grid(row=3, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=vsb.set)
+        # Only the visible rows live in the tree; the table drives the scrollbar
+        self.table = VirtualTable(self.tree, vsb)
 
         # Bind double click and right click menu
         self.tree.bind("<Double-1>", lambda e: self._on_double_click())
@@ -201,6 +207,9 @@ class RepairsFrame:
         tb.Button(right, text="Refresh", bootstyle="primary", command=self.refresh).pack(side="right", padx=6)
 
         # initial load
+        self._repairs_cache = None   # (version, rows) from the last load; patched with deltas
+        self._cache_lock = threading.Lock()
+        self.loader = ViewLoader(self.frame, on_busy=label_busy_indicator(self.loading_label))
         self.refresh()
     
     def clear_form(self):
@@ -255,24 +264,57 @@ class RepairsFrame:
 
     # ---------- core ----------
     def refresh(self):
-        try:
-            rows = RepairController.get_all_repairs()
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load repairs: {e}")
-            return
-
+        """Reload repairs in the background; the table updates when they arrive"""
         q = (self.search_var.get() or "").strip().lower()
         placeholder = "order #, customer, model, imei ...".lower()
         if q == placeholder:
             q = ""
             
         status_filter = (self.status_filter.get() or "All")
-        today = datetime.now().isoformat()[:10]
 
-        # clear tree
-        for r in self.tree.get_children():
-            self.tree.delete(r)
+        self.loader.load(
+            "repairs",
+            lambda: self._build_rows(self._load_repairs(), q, status_filter),
+            self._render_rows,
+            lambda e: messagebox.showerror("Error", f"Could not load repairs: {e}")
+        )
+
+    def _load_repairs(self):
+        """
+        All repairs, newest first (runs on the loader thread).
+
+        After the first load only the repairs changed since then are read
+        and patched into the cached list; a full reload happens when the
+        change journal no longer covers the cached version.
+        """
+        with self._cache_lock:
+            cache = self._repairs_cache
+            rows = None
+            if cache is not None:
+                version, cached = cache
+                delta = RepairController.get_repairs_changed_since(version)
+                rows = models.apply_changes(cached, delta, sort_key=lambda r: r[0], reverse=True)
+                if rows is not None:
+                    version = delta['version']
+            if rows is None:
+                # Take the version first: changes committed during the load are re-read next time
+                version = models.get_data_seq()
+                rows = RepairController.get_all_repairs()
+            self._repairs_cache = (version, rows)
+            return rows
 
+    def _build_rows(self, rows, q, status_filter):
+        """Filter and format repair rows (runs on the loader thread; no Tk calls)"""
+        today = datetime.now().isoformat()[:10]
+        status_icons = {
+            "Received": "🔴 Received",
+            "InProgress": "🟡 In Progress",
+            "Completed": "🟢 Completed",
+            "Delivered": "🔵 Delivered",
+            "Cancelled": "⚫ Cancelled"
+        }
+
+        result = []
         row_index = 0  # Track row index for alternating colors
         for row in rows:
             # row: id, order, cust, phone, model, imei, status, received, estimated
@@ -300,20 +342,11 @@ class RepairsFrame:
             
             # Format status with emoji indicators
             status = display_row[6]
-            status_icons = {
-                "Received": "🔴 Received",
-                "InProgress": "🟡 In Progress",
-                "Completed": "🟢 Completed",
-                "Delivered": "🔵 Delivered",
-                "Cancelled": "⚫ Cancelled"
-            }
             status_display = status_icons.get(status, status)
             
             values = (display_row[0], display_row[1], display_row[2], display_row[3], 
                       display_row[4], display_row[5], status_display, formatted_date)
             
-            iid = self.tree.insert("", "end", values=values)
-            
             # Enhanced tag logic with priority
             tags = []
             
@@ -332,14 +365,13 @@ class RepairsFrame:
                 row_color = "evenrow" if row_index % 2 == 0 else "oddrow"
                 tags.append(row_color)
             
-            if tags:
-                self.tree.item(iid, tags=tuple(tags))
-            
+            result.append((values, tuple(tags)))
             row_index += 1
-        
-        # Notify that repairs were refreshed (for synchronization)
-        from modules.event_manager import event_manager
-        event_manager.notify('repair_updated', {'action': 'refresh'})
+        return result
+
+    def _render_rows(self, rows):
+        # No repair_updated here: the actions that change repairs publish it
+        self.table.set_rows(rows)
 
     def create_order(self):
         # AUTO-GENERATE Order # - Get next sequential number from database
@@ -348,15 +380,10 @@ class RepairsFrame:
         if True:  # Always auto-generate
             # Auto-generate sequential order number
             try:
-                from modules.db import get_conn
-                conn = get_conn()
-                c = conn.cursor()
-                c.execute("SELECT MAX(CAST(order_number AS INTEGER)) FROM repair_orders WHERE order_number GLOB '[0-9]*'")
-                result = c.fetchone()
-                conn.close()
+                last = models.get_last_order_number()
                 
-                if result and result[0]:
-                    order = str(int(result[0]) + 1)
+                if last:
+                    order = str(int(last) + 1)
                 else:
                     order = "1"  # Start from 1 if no orders exist
             except:
@@ -480,7 +507,8 @@ class RepairsFrame:
 
         try:
             print(f"DEBUG: Generating PDF for order {rid}")
-            # Generate PDF using new generator
+            # Generate PDF using new generator (reportlab loads on first print)
+            from modules.reports.receipt_generator import generate_receipt_pdf
             pdf_path = generate_receipt_pdf(order, parts, history)
             print(f"DEBUG: PDF generated at {pdf_path}")
             
@@ -530,7 +558,7 @@ class RepairsFrame:
         messagebox.showinfo("Exported", f"Saved: {fname}")
 
     def export_csv(self):
-        rows = [self.tree.item(i)['values'] for i in self.tree.get_children()]
+        rows = self.table.all_values()
         if not rows:
             messagebox.showwarning("No data", "No rows to export.")
             return
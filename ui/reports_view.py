@@ -4,8 +4,8 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-import sqlite3
-from pathlib import Path
+
+from modules.financial_reports import get_sales_report
 
 class ReportsFrame:
     def __init__(self, parent):
@@ -56,10 +56,6 @@ class ReportsFrame:
         self.current_report = "today"
         self.show_today_sales()
     
-    def get_db_conn(self):
-        DB_PATH = Path(__file__).resolve().parents[1] / "shop.db"
-        return sqlite3.connect(str(DB_PATH))
-    
     def clear_report(self):
         for widget in self.report_container.winfo_children():
             widget.destroy()
@@ -78,34 +74,14 @@ class ReportsFrame:
         summary_frame.columnconfigure(2, weight=1)
         summary_frame.columnconfigure(3, weight=1)
         
-        conn = self.get_db_conn()
-        c = conn.cursor()
-        
-        # Get today's stats
-        c.execute("""
-            SELECT 
-                COUNT(*) as total_sales,
-                SUM(total_amount) as revenue,
-                SUM(subtotal - total_amount) as total_discount
-            FROM sales 
-            WHERE sale_date = ?
-        """, (today,))
-        stats = c.fetchone()
-        
-        total_sales = stats[0] or 0
-        revenue = stats[1] or 0.0
-        total_discount = stats[2] or 0.0
-        
-        # Get profit
-        c.execute("""
-            SELECT SUM(profit) 
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.sale_id
-            WHERE s.sale_date = ?
-        """, (today,))
-        profit = c.fetchone()[0] or 0.0
-        
-        conn.close()
+        # Totals and sales rows come from one report snapshot (read in the
+        # data service when this terminal runs in service mode)
+        report = get_sales_report(today, today)
+        totals = report['totals']
+        total_sales = totals['transaction_count']
+        revenue = totals['revenue']
+        total_discount = totals['discount']
+        profit = totals['profit']
         
         # Cards
         cards_data = [
@@ -174,26 +150,7 @@ class ReportsFrame:
         tree.configure(yscrollcommand=scroll.set)
         
         # Load data
-        conn = self.get_db_conn()
-        c = conn.cursor()
-        c.execute("""
-            SELECT 
-                s.sale_id,
-                s.sale_time,
-                s.customer_name,
-                COUNT(si.id) as item_count,
-                s.subtotal,
-                s.discount_amount,
-                s.total_amount,
-                SUM(si.profit) as total_profit
-            FROM sales s
-            LEFT JOIN sale_items si ON s.sale_id = si.sale_id
-            WHERE s.sale_date = ?
-            GROUP BY s.sale_id
-            ORDER BY s.sale_time DESC
-        """, (today,))
-        
-        for row in c.fetchall():
+        for row in report['rows']:
             tree.insert("", "end", values=(
                 row[0],
                 row[1] or "N/A",
@@ -204,8 +161,6 @@ class ReportsFrame:
                 f"{row[6]:,.2f}" if row[6] else "0.00",
                 f"{row[7]:,.2f}" if row[7] else "0.00"
             ))
-        
-        conn.close()
     
     def show_week_sales(self):
         self.current_report = "week"
@@ -234,31 +189,12 @@ class ReportsFrame:
         self._show_period_report(month_start, month_end)
     
     def _show_period_report(self, start_date, end_date):
-        conn = self.get_db_conn()
-        c = conn.cursor()
-        
-        # Summary
-        c.execute("""
-            SELECT 
-                COUNT(*) as total_sales,
-                SUM(total_amount) as revenue,
-                SUM(subtotal - total_amount) as total_discount
-            FROM sales 
-            WHERE sale_date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        stats = c.fetchone()
-        
-        total_sales = stats[0] or 0
-        revenue = stats[1] or 0.0
-        total_discount = stats[2] or 0.0
-        
-        c.execute("""
-            SELECT SUM(profit) 
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.sale_id
-            WHERE s.sale_date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        profit = c.fetchone()[0] or 0.0
+        report = get_sales_report(start_date, end_date, detail="days")
+        totals = report['totals']
+        total_sales = totals['transaction_count']
+        revenue = totals['revenue']
+        total_discount = totals['discount']
+        profit = totals['profit']
         
         # Summary cards
         summary_frame = tb.Frame(self.report_container)
@@ -323,31 +259,16 @@ class ReportsFrame:
         scroll.grid(row=0, column=1, sticky="ns")
         tree.configure(yscrollcommand=scroll.set)
         
-        # Load daily data
-        c.execute("""
-            SELECT 
-                s.sale_date,
-                COUNT(*) as sales_count,
-                SUM(s.total_amount) as revenue,
-                SUM(si.profit) as profit
-            FROM sales s
-            LEFT JOIN sale_items si ON s.sale_id = si.sale_id
-            WHERE s.sale_date BETWEEN ? AND ?
-            GROUP BY s.sale_date
-            ORDER BY s.sale_date DESC
-        """, (start_date, end_date))
-        
-        for row in c.fetchall():
-            avg_sale = row[2] / row[1] if row[1] > 0 else 0
+        # Load daily data (newest first)
+        for day, count, day_revenue, _discount, day_profit in reversed(report['rows']):
+            avg_sale = day_revenue / count if count > 0 else 0
             tree.insert("", "end", values=(
-                row[0],
-                row[1],
-                f"{row[2]:,.2f}" if row[2] else "0.00",
-                f"{row[3]:,.2f}" if row[3] else "0.00",
+                day,
+                count,
+                f"{day_revenue:,.2f}" if day_revenue else "0.00",
+                f"{day_profit:,.2f}" if day_profit else "0.00",
                 f"{avg_sale:,.2f}"
             ))
-        
-        conn.close()
     
     def refresh_current(self):
         if self.current_report == "today":
@@ -4,9 +4,15 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox, simpledialog
 import os
+import time
 from datetime import datetime
 from controllers.pos_controller import POSController
 from controllers.inventory_controller import InventoryController
+from ui.loader import ViewLoader
+from modules.inventory_repository import InventoryRepository
+from modules.scan_resolver import get_scan_resolver
+from modules.smart_barcode_entry import BurstScanQueue
+from ui.scan_tray import ScanTray
 
 class SalesFrame:
     def __init__(self, parent):
@@ -39,7 +45,7 @@ class SalesFrame:
         self.barcode_var = tb.StringVar()
         self.barcode_entry = tb.Entry(barcode_frame, textvariable=self.barcode_var, font=("Segoe UI", 12), width=25)
         self.barcode_entry.grid(row=0, column=1, sticky="ew", padx=(0, 10))
-        self.barcode_entry.bind('<Return>', self.scan_barcode)
+        self.barcode_entry.bind('<Return>', self._on_scan_enter)
         self.barcode_entry.focus()  # Auto-focus for scanner
         
         # Scan button
@@ -47,7 +53,17 @@ class SalesFrame:
         
         # Status label
         self.barcode_status = tb.Label(barcode_frame, text="Ready to scan", font=("Segoe UI", 9), bootstyle="info")
-        self.barcode_status.grid(row=1, column=0, columnspan=3, sticky="w", pady=(5, 0))
+        self.barcode_status.grid(row=1, column=0, columnspan=2, sticky="w", pady=(5, 0))
+        
+        # Burst mode: scans are queued and added to the cart together, problems
+        # go to the tray below instead of a dialog per scan
+        self.burst_var = tb.BooleanVar(value=False)
+        tb.Checkbutton(barcode_frame, text="⚡ Burst", variable=self.burst_var,
+                       bootstyle="round-toggle").grid(row=1, column=2, sticky="e", pady=(5, 0))
+        self.scan_tray = ScanTray(barcode_frame)
+        self.scan_tray.frame.grid(row=2, column=0, columnspan=3, sticky="ew")
+        self.scan_queue = BurstScanQueue(self.frame, get_scan_resolver().resolve_many,
+                                         self._apply_scans, on_error=self.scan_tray.add)
         
         # Search
         search_frame = tb.Frame(left_panel)
@@ -317,16 +333,29 @@ class SalesFrame:
         self.checkout_btn = tb.Button(right_panel, text="✅ CHECKOUT", bootstyle="success", command=self.checkout, padding=12)
         self.checkout_btn.grid(row=6, column=0, sticky="ew")
         
-        # Load inventory
+        # Load inventory (the shared snapshot; see modules.inventory_repository)
+        self.inventory = InventoryRepository([])
         self.all_inventory = []
+        # Busy cursor on the product list while it reloads (barcode status label stays free)
+        self.loader = ViewLoader(
+            self.frame,
+            on_busy=lambda busy: self.inv_tree.configure(cursor="watch" if busy else "")
+        )
         self.refresh_inventory()
 
     def refresh_inventory(self):
-        try:
-            self.all_inventory = InventoryController.get_all_items()
-            self.filter_inventory()
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        """Reload products in the background; the list updates when they arrive"""
+        self.loader.load(
+            "inventory",
+            InventoryController.get_repository,
+            self._apply_inventory,
+            lambda e: messagebox.showerror("Error", str(e))
+        )
+
+    def _apply_inventory(self, repo):
+        self.inventory = repo
+        self.all_inventory = repo.rows
+        self.filter_inventory()
 
     def filter_inventory(self, *args):
         """Filter inventory and show AVAILABLE stock (accounting for items in cart)"""
@@ -336,24 +365,23 @@ class SalesFrame:
         for item in self.inv_tree.get_children():
             self.inv_tree.delete(item)
         
-        for row in self.all_inventory:
+        rows = self.all_inventory if category == "All" else self.inventory.in_category(category)
+        # First cart line per item, as the stock shown has always used
+        cart_qty = {}
+        for cart_item in self.cart:
+            cart_qty.setdefault(cart_item['id'], cart_item['qty'])
+
+        for row in rows:
             # row: id, sku, name, category, qty, buy_price, sell_price
             if query and query not in str(row[1]).lower() and query not in str(row[2]).lower():
                 continue
             
-            if category != "All" and str(row[3]) != category:
-                continue
-            
             item_id = row[0]
             stock = int(row[4]) if row[4] else 0
             sell_price = float(row[6])
             
             # Calculate available stock (subtract quantity in cart)
-            qty_in_cart = 0
-            for cart_item in self.cart:
-                if cart_item['id'] == item_id:
-                    qty_in_cart = cart_item['qty']
-                    break
+            qty_in_cart = cart_qty.get(item_id, 0)
             
             available_stock = stock - qty_in_cart
             
@@ -448,6 +476,59 @@ class SalesFrame:
     
 
 
+    def _on_scan_enter(self, event=None):
+        """Scanner Enter: queue the code in burst mode, otherwise add it now"""
+        if not self.burst_var.get():
+            return self.scan_barcode()
+        self.scan_queue.push(self.barcode_var.get())
+        self.barcode_var.set("")
+        return "break"
+    
+    def _apply_scans(self, scans):
+        """Add one tick's burst of scans to the cart with a single cart update"""
+        resolver = get_scan_resolver()
+        in_cart = {entry['barcode'] for entry in self.cart if entry.get('barcode')}
+        added = 0
+        for code, hit in scans:
+            if hit is None:
+                self.scan_tray.add(f"{code}: not registered")
+                continue
+            if hit.unit:
+                if not hit.sellable:
+                    self.scan_tray.add(f"{code}: already {hit.status} ({hit.name})")
+                    continue
+                if code in in_cart:
+                    self.scan_tray.add(f"{code}: already in cart")
+                    continue
+                row = self.inventory.get(hit.item_id) or InventoryController.get_repository().get(hit.item_id)
+                in_cart.add(code)
+                self.cart.append(self._unit_line(hit.item_id, code, hit.serial, hit.name, hit.price, hit.sku, row))
+            else:
+                row = self.inventory.get(hit.item_id) or InventoryController.get_repository().get(hit.item_id)
+                if row is None:
+                    self.scan_tray.add(f"{code}: item not found")
+                    continue
+                line = next((entry for entry in self.cart
+                             if entry['id'] == hit.item_id and not entry.get('barcode')), None)
+                in_cart_qty = line['qty'] if line else 0
+                if in_cart_qty >= int(row[4]):
+                    self.scan_tray.add(f"{code}: no more '{hit.name}' in stock ({int(row[4])})")
+                    continue
+                if line:
+                    line['qty'] += 1
+                else:
+                    self.cart.append(self._product_line(row))
+            added += 1
+        
+        if added:
+            self.update_cart_view()
+            self.refresh_inventory()
+        elapsed = (time.perf_counter() - self.scan_queue.batch_started) * 1000
+        resolver.record_scan_to_cart(elapsed)
+        self.barcode_status.configure(
+            text=f"⚡ Added {added} of {len(scans)} scan(s) · {elapsed:.0f} ms",
+            bootstyle="success" if added == len(scans) else "warning")
+    
     def scan_barcode(self, event=None):
         """Scan barcode and add to cart"""
         barcode = self.barcode_var.get().strip()
@@ -456,14 +537,13 @@ class SalesFrame:
             self.barcode_status.configure(text="⚠️ Please enter a barcode", bootstyle="warning")
             return
         
+        started = time.perf_counter()
         try:
-            # Import barcode manager
-            from modules.barcode_manager import get_barcode_info, mark_barcode_sold, BarcodeStatus
+            # Cached lookup: repeat scans and unchanged items never hit the database
+            resolver = get_scan_resolver()
+            hit = resolver.resolve(barcode)
             
-            # Look up barcode
-            barcode_info = get_barcode_info(barcode)
-            
-            if not barcode_info:
+            if not hit:
                 self.barcode_status.configure(text=f"❌ Barcode not found: {barcode}", bootstyle="danger")
                 self.barcode_var.set("")
                 messagebox.showerror(
@@ -473,11 +553,26 @@ class SalesFrame:
                 )
                 return
             
-            # Extract info
-            barcode_id, item_id, bc, serial, status, added_date, sold_date, sale_id, notes, item_name, sell_price, sku = barcode_info
+            item_id, serial, status, item_name, sell_price, sku = (
+                hit.item_id, hit.serial, hit.status, hit.name, hit.price, hit.sku)
+            
+            if not hit.unit:
+                # A product barcode or SKU: add one of the item like a manual pick
+                row = self.inventory.get(item_id) or InventoryController.get_repository().get(item_id)
+                if row is None:
+                    self.barcode_status.configure(text=f"❌ Item not found: {barcode}", bootstyle="danger")
+                    self.barcode_var.set("")
+                    return
+                self.add_item_to_cart(row)
+                elapsed = (time.perf_counter() - started) * 1000
+                resolver.record_scan_to_cart(elapsed)
+                self.barcode_status.configure(text=f"✓ Added: {item_name} ({elapsed:.0f} ms)", bootstyle="success")
+                self.barcode_var.set("")
+                self.barcode_entry.focus()
+                return
             
             # Check if already sold
-            if status != BarcodeStatus.AVAILABLE:
+            if status != 'available':
                 self.barcode_status.configure(text=f"❌ Already {status}: {barcode}", bootstyle="danger")
                 self.barcode_var.set("")
                 messagebox.showerror(
@@ -489,11 +584,19 @@ class SalesFrame:
                 )
                 return
             
+            if any(entry.get('barcode') == barcode for entry in self.cart):
+                self.barcode_status.configure(text=f"⚠️ Already in cart: {barcode}", bootstyle="warning")
+                self.barcode_var.set("")
+                return
+            
             # Add to cart with barcode info
             self.add_barcode_to_cart(item_id, barcode, serial, item_name, sell_price, sku)
+            elapsed = (time.perf_counter() - started) * 1000
+            resolver.record_scan_to_cart(elapsed)
             
             # Success feedback
-            self.barcode_status.configure(text=f"✓ Added: {item_name} ({barcode})", bootstyle="success")
+            self.barcode_status.configure(text=f"✓ Added: {item_name} ({barcode}) · {elapsed:.0f} ms",
+                                          bootstyle="success")
             self.barcode_var.set("")
             self.barcode_entry.focus()
             
@@ -505,41 +608,42 @@ class SalesFrame:
     def add_barcode_to_cart(self, item_id, barcode, serial, item_name, sell_price, sku):
         """Add item to cart using barcode (individual tracking)"""
         # Get item details from inventory
-        for row in self.all_inventory:
-            if row[0] == item_id:
-                buy_price = float(row[5])
-                category = row[3] if len(row) > 3 else "Unknown"
-                
-                # Add to cart with barcode info
-                self.cart.append({
-                    'id': item_id,
-                    'sku': sku,
-                    'name': f"{item_name} [{barcode}]",  # Show barcode in cart
-                    'category': category,
-                    'qty': 1,  # Always 1 for barcode items
-                    'price': sell_price,
-                    'cost': buy_price,
-                    'max_qty': 1,  # Can't increase qty for barcode items
-                    'barcode': barcode,  # Track which barcode
-                    'serial': serial  # Track serial number
-                })
-                self.update_cart_view()
-                return
-        
-        # If not found in inventory, still add (shouldn't happen)
-        self.cart.append({
+        # A snapshot older than the item falls back to the current one
+        row = self.inventory.get(item_id) or InventoryController.get_repository().get(item_id)
+        self.cart.append(self._unit_line(item_id, barcode, serial, item_name, sell_price, sku, row))
+        self.update_cart_view()
+    
+    @staticmethod
+    def _unit_line(item_id, barcode, serial, item_name, sell_price, sku, row):
+        """Cart line for one individually tracked unit (row: its inventory row, if known)"""
+        return {
             'id': item_id,
             'sku': sku,
-            'name': f"{item_name} [{barcode}]",
-            'category': 'Unknown',
-            'qty': 1,
+            'name': f"{item_name} [{barcode}]",  # Show barcode in cart
+            # If not found in inventory, still add (shouldn't happen)
+            'category': (row[3] if len(row) > 3 else "Unknown") if row is not None else 'Unknown',
+            'qty': 1,  # Always 1 for barcode items
             'price': sell_price,
-            'cost': 0,
-            'max_qty': 1,
-            'barcode': barcode,
-            'serial': serial
-        })
-        self.update_cart_view()
+            'cost': float(row[5]) if row is not None else 0,
+            'max_qty': 1,  # Can't increase qty for barcode items
+            'barcode': barcode,  # Track which barcode
+            'serial': serial  # Track serial number
+        }
+    
+    @staticmethod
+    def _product_line(row):
+        """Cart line for one of a quantity-tracked item"""
+        # row: id, sku, name, category, qty, buy_price, sell_price
+        return {
+            'id': row[0],
+            'sku': row[1],
+            'name': row[2],
+            'category': row[3] if len(row) > 3 else "Unknown",
+            'qty': 1,
+            'price': float(row[6]),
+            'cost': float(row[5]),
+            'max_qty': int(row[4])
+        }
     
     def add_to_cart(self):
         sel = self.inv_tree.selection()
@@ -551,21 +655,17 @@ class SalesFrame:
         item_id = values[0]
         
         # Find full item data
-        for row in self.all_inventory:
-            if row[0] == item_id:
-                self.add_item_to_cart(row)
-                break
+        # A snapshot older than the item falls back to the current one
+        row = self.inventory.get(item_id) or InventoryController.get_repository().get(item_id)
+        if row is not None:
+            self.add_item_to_cart(row)
 
     def add_item_to_cart(self, row):
         """Add item to cart - ENFORCE STOCK LIMITS"""
         # row: id, sku, name, category, qty, buy_price, sell_price
         item_id = row[0]
-        sku = row[1]
         name = row[2]
-        category = row[3] if len(row) > 3 else "Unknown"
         stock = int(row[4])
-        buy_price = float(row[5])
-        sell_price = float(row[6])
         
         # Check stock availability
         if stock <= 0:
@@ -593,16 +693,7 @@ class SalesFrame:
                 return
         
         # Add new item to cart with category
-        self.cart.append({
-            'id': item_id,
-            'sku': sku,
-            'name': name,
-            'category': category,
-            'qty': 1,
-            'price': sell_price,
-            'cost': buy_price,
-            'max_qty': stock
-        })
+        self.cart.append(self._product_line(row))
         self.update_cart_view()
         self.refresh_inventory()  # Update product list to show reduced available stock
 
@@ -783,15 +874,7 @@ class SalesFrame:
             )
             
             if sale_id:
-                # Mark barcodes as sold
-                from modules.barcode_manager import mark_barcode_sold
-                for item in self.cart:
-                    if 'barcode' in item and item['barcode']:
-                        try:
-                            mark_barcode_sold(item['barcode'], sale_id)
-                            print(f"✓ Marked barcode {item['barcode']} as sold")
-                        except Exception as e:
-                            print(f"Warning: Could not mark barcode {item['barcode']} as sold: {e}")
+                # Scanned units were marked sold in the same transaction as the sale
                 
                 # Calculate totals for receipt
                 subtotal = sum([i['qty']*i['price'] for i in self.cart])
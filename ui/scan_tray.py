@@ -0,0 +1,58 @@
+# ui/scan_tray.py
+"""
+Non-modal tray for scan problems.
+
+Burst scanning must not stop for a dialog on every unknown or sold code:
+problems are listed here instead, and the cashier reviews them when the
+burst is done.
+"""
+
+from datetime import datetime
+
+import ttkbootstrap as tb
+from ttkbootstrap.constants import *
+
+# Problems kept in the tray (oldest dropped first)
+MAX_ENTRIES = 50
+
+
+class ScanTray:
+    def __init__(self, parent, height=3):
+        self.frame = tb.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        # Shown only while there are problems; the empty frame takes no space
+        self.body = tb.Frame(self.frame)
+        self.body.grid(row=0, column=0, sticky="ew")
+        self.body.columnconfigure(0, weight=1)
+
+        header = tb.Frame(self.body)
+        header.grid(row=0, column=0, sticky="ew")
+        header.columnconfigure(0, weight=1)
+        self.count_label = tb.Label(header, text="", font=("Segoe UI", 9, "bold"), bootstyle="danger")
+        self.count_label.grid(row=0, column=0, sticky="w")
+        tb.Button(header, text="Clear", bootstyle="secondary-link", command=self.clear).grid(row=0, column=1)
+
+        self.listbox = tb.Listbox(self.body, height=height, font=("Segoe UI", 9))
+        self.listbox.grid(row=1, column=0, sticky="ew")
+        self.count = 0
+        self._update()
+
+    def add(self, message):
+        """Add one problem at the top of the tray."""
+        self.listbox.insert(0, f"{datetime.now():%H:%M:%S}  {message}")
+        if self.listbox.size() > MAX_ENTRIES:
+            self.listbox.delete(MAX_ENTRIES, "end")
+        self.count += 1
+        self._update()
+
+    def clear(self):
+        self.listbox.delete(0, "end")
+        self.count = 0
+        self._update()
+
+    def _update(self):
+        if self.count:
+            self.count_label.configure(text=f"⚠️ {self.count} scan problem(s)")
+            self.body.grid()
+        else:
+            self.body.grid_remove()
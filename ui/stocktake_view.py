@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+# ui/stocktake_view.py
+"""
+Stocktake window: scan or type counts, watch the variance, commit once.
+
+Scans go through a BurstScanQueue, so a burst of trigger pulls is
+resolved in one lookup and tallied in memory. Nothing touches the
+inventory until "Commit": then every adjustment is written in one
+transaction and the other views get a single inventory_changed event.
+"""
+
+import ttkbootstrap as tb
+from ttkbootstrap.constants import *
+from tkinter import ttk, messagebox, simpledialog
+
+from modules import session as app_session
+from modules.scan_resolver import get_scan_resolver
+from modules.smart_barcode_entry import BurstScanQueue
+from modules.stocktake import StocktakeSession, list_sessions
+from ui.scan_tray import ScanTray
+from ui.table_styles import VirtualTable, configure_alternating_rows
+
+# How often (ms) the tally is saved while the window is open
+AUTOSAVE_MS = 15000
+
+
+class StocktakeWindow:
+    def __init__(self, parent, category=None):
+        self.win = tb.Toplevel(parent)
+        self.win.title("📋 Stocktake")
+        self.win.geometry("900x680")
+        self.win.columnconfigure(0, weight=1)
+        self.win.rowconfigure(3, weight=1)
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+        self.session = None
+        self.category = category
+        self._autosave_job = None
+
+        # --- Session ---
+        top = tb.Frame(self.win, padding=(15, 15, 15, 5))
+        top.grid(row=0, column=0, sticky="ew")
+        top.columnconfigure(0, weight=1)
+        self.session_label = tb.Label(top, text="No session", font=("Segoe UI", 13, "bold"))
+        self.session_label.grid(row=0, column=0, sticky="w")
+        self.resume_var = tb.StringVar()
+        self.resume_combo = ttk.Combobox(top, textvariable=self.resume_var, state="readonly", width=32)
+        self.resume_combo.grid(row=0, column=1, padx=5)
+        tb.Button(top, text="▶ Resume", bootstyle="info-outline", command=self.resume_selected).grid(row=0, column=2, padx=5)
+        tb.Button(top, text="➕ New Count", bootstyle="success", command=self.new_session).grid(row=0, column=3)
+
+        # --- Scan / type counts ---
+        entry_frame = tb.Labelframe(self.win, text="🔍 Scan or enter", padding=10, bootstyle="primary")
+        entry_frame.grid(row=1, column=0, sticky="ew", padx=15, pady=5)
+        entry_frame.columnconfigure(1, weight=1)
+        tb.Label(entry_frame, text="Barcode / SKU:").grid(row=0, column=0, sticky="w", padx=(0, 10))
+        self.code_var = tb.StringVar()
+        self.code_entry = tb.Entry(entry_frame, textvariable=self.code_var, font=("Segoe UI", 12))
+        self.code_entry.grid(row=0, column=1, sticky="ew")
+        self.code_entry.bind('<Return>', self._on_scan_enter)
+        tb.Button(entry_frame, text="🔢 Set Count...", bootstyle="info-outline",
+                  command=self.set_count_dialog).grid(row=0, column=2, padx=(10, 0))
+        self.status_label = tb.Label(entry_frame, text="Start or resume a count", font=("Segoe UI", 9), bootstyle="info")
+        self.status_label.grid(row=1, column=0, columnspan=3, sticky="w", pady=(5, 0))
+        self.tray = ScanTray(entry_frame)
+        self.tray.frame.grid(row=2, column=0, columnspan=3, sticky="ew")
+        self.scan_queue = BurstScanQueue(self.win, get_scan_resolver().resolve_many,
+                                         self._apply_scans, on_error=self.tray.add)
+
+        # --- Variance ---
+        options = tb.Frame(self.win, padding=(15, 5))
+        options.grid(row=2, column=0, sticky="ew")
+        self.uncounted_var = tb.BooleanVar(value=False)
+        tb.Checkbutton(options, text="Show uncounted items (as 0)", variable=self.uncounted_var,
+                       bootstyle="round-toggle", command=self.refresh_variance).pack(side="left")
+        self.summary_label = tb.Label(options, text="", font=("Segoe UI", 10))
+        self.summary_label.pack(side="right")
+
+        table = tb.Frame(self.win, padding=(15, 0))
+        table.grid(row=3, column=0, sticky="nsew")
+        table.columnconfigure(0, weight=1)
+        table.rowconfigure(0, weight=1)
+        columns = ("id", "sku", "name", "expected", "counted", "diff")
+        self.tree = ttk.Treeview(table, columns=columns, show="headings", height=15)
+        for col, title, width, anchor in (("id", "ID", 60, "center"), ("sku", "SKU", 120, "w"),
+                                          ("name", "Name", 330, "w"), ("expected", "Expected", 90, "center"),
+                                          ("counted", "Counted", 90, "center"), ("diff", "Difference", 100, "center")):
+            self.tree.heading(col, text=title)
+            self.tree.column(col, width=width, anchor=anchor)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(table, orient="vertical")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        configure_alternating_rows(self.tree)
+        self.tree.tag_configure('short', foreground='#c0392b')
+        self.tree.tag_configure('over', foreground='#2874a6')
+        self.table = VirtualTable(self.tree, scrollbar)
+
+        # --- Actions ---
+        actions = tb.Frame(self.win, padding=15)
+        actions.grid(row=4, column=0, sticky="ew")
+        tb.Button(actions, text="✖ Close", bootstyle="secondary", command=self.close).pack(side="right", padx=5)
+        tb.Button(actions, text="✅ Commit Count", bootstyle="success", command=self.commit).pack(side="right", padx=5)
+        tb.Button(actions, text="💾 Save", bootstyle="info-outline", command=self.save).pack(side="right", padx=5)
+        tb.Button(actions, text="🗑️ Cancel Count", bootstyle="danger-outline", command=self.cancel_session).pack(side="left")
+
+        self._load_open_sessions()
+        self.code_entry.focus()
+
+    # ---------- sessions ----------
+    def _load_open_sessions(self):
+        self._open = list_sessions()
+        self.resume_combo['values'] = [f"#{row[0]} {row[1] or ''} ({row[7]} items, {str(row[6] or '')[:16]})"
+                                       for row in self._open]
+        if self._open:
+            self.resume_combo.current(0)
+
+    def _set_session(self, session):
+        self.session = session
+        scope = f" · {session.category}" if session.category else ""
+        self.session_label.configure(text=f"📋 #{session.session_id} {session.name}{scope}")
+        self.status_label.configure(text="Ready to scan", bootstyle="info")
+        self.refresh_variance()
+        self._schedule_autosave()
+        self.code_entry.focus()
+
+    def new_session(self):
+        name = simpledialog.askstring("New Count", "Name of this count (e.g. shelf or area):", parent=self.win)
+        if name is None:
+            return
+        self.save()
+        self._set_session(StocktakeSession.start(name.strip(), user=app_session.get_username(), category=self.category))
+        self._load_open_sessions()
+
+    def resume_selected(self):
+        index = self.resume_combo.current()
+        if index < 0:
+            return
+        self.save()
+        session = StocktakeSession.resume(self._open[index][0])
+        if session is None:
+            messagebox.showerror("Stocktake", "That count no longer exists.", parent=self.win)
+            return
+        self._set_session(session)
+
+    def _require_session(self):
+        if self.session is None or self.session.status != "open":
+            self.status_label.configure(text="⚠️ Start or resume a count first", bootstyle="warning")
+            return False
+        return True
+
+    # ---------- counting ----------
+    def _on_scan_enter(self, event=None):
+        if self._require_session():
+            self.scan_queue.push(self.code_var.get())
+        self.code_var.set("")
+        return "break"
+
+    def _apply_scans(self, scans):
+        """Tally one tick's burst of scans and redraw once"""
+        if not self._require_session():
+            return
+        problems = self.session.count_scans(scans)
+        for problem in problems:
+            self.tray.add(problem)
+        counted = len(scans) - len(problems)
+        self.status_label.configure(text=f"✓ Counted {counted} of {len(scans)} scan(s)",
+                                    bootstyle="success" if not problems else "warning")
+        self.refresh_variance()
+
+    def set_count_dialog(self):
+        """Type a counted quantity for the code in the entry (or the selected row)"""
+        if not self._require_session():
+            return
+        code = self.code_var.get().strip()
+        if code:
+            hit = get_scan_resolver().resolve(code)
+            if hit is None:
+                self.tray.add(f"{code}: not registered")
+                return
+            item_id, label = hit.item_id, hit.name
+        else:
+            selection = self.tree.selection()
+            if not selection:
+                self.status_label.configure(text="⚠️ Enter a code or select a row", bootstyle="warning")
+                return
+            values = self.tree.item(selection[0])['values']
+            item_id, label = int(values[0]), values[2]
+        qty = simpledialog.askinteger("Set Count", f"Counted quantity of\n{label}:", parent=self.win,
+                                      minvalue=0, initialvalue=self.session.counts.get(item_id, 0))
+        if qty is None:
+            return
+        self.session.set_count(item_id, qty)
+        self.code_var.set("")
+        self.refresh_variance()
+        self.code_entry.focus()
+
+    # ---------- variance ----------
+    def refresh_variance(self):
+        if self.session is None:
+            self.table.set_rows([])
+            self.summary_label.configure(text="")
+            return
+        rows = self.session.variance(include_uncounted=self.uncounted_var.get())
+        display = []
+        for idx, (item_id, sku, name, expected, counted, diff) in enumerate(rows):
+            tags = ('evenrow' if idx % 2 == 0 else 'oddrow',)
+            if diff:
+                tags += ('short' if diff < 0 else 'over',)
+            display.append(((item_id, sku, name, expected, counted, f"{diff:+d}" if diff else "0"), tags))
+        self.table.set_rows(display)
+        off = sum(1 for row in rows if row[5])
+        self.summary_label.configure(text=f"{len(self.session.counts)} counted · {off} with a difference")
+
+    # ---------- saving ----------
+    def _schedule_autosave(self):
+        if self._autosave_job is not None:
+            self.win.after_cancel(self._autosave_job)
+        self._autosave_job = self.win.after(AUTOSAVE_MS, self._autosave)
+
+    def _autosave(self):
+        self._autosave_job = None
+        self.save()
+        if self.session is not None and self.session.status == "open":
+            self._schedule_autosave()
+
+    def save(self):
+        if self.session is not None and self.session.status == "open":
+            self.scan_queue.flush()
+            if not self.session.save():
+                self.status_label.configure(text="❌ Could not save the count", bootstyle="danger")
+
+    def commit(self):
+        if not self._require_session():
+            return
+        self.scan_queue.flush()
+        rows = [row for row in self.session.variance(include_uncounted=self.uncounted_var.get()) if row[5]]
+        if not messagebox.askyesno(
+                "Commit Count",
+                f"Set the stock of {len(rows)} item(s) to the counted quantities?"
+                + ("\n\nItems not counted will be set to 0." if self.uncounted_var.get() else ""),
+                parent=self.win):
+            return
+        result = self.session.commit(user=app_session.get_username(), zero_uncounted=self.uncounted_var.get())
+        if result is None:
+            messagebox.showerror("Stocktake", "Could not commit the count. Nothing was changed.", parent=self.win)
+            return
+        messagebox.showinfo("Stocktake", f"Count committed.\n\n{len(result['adjusted'])} item(s) adjusted.",
+                            parent=self.win)
+        self.session_label.configure(text=f"📋 #{self.session.session_id} committed")
+        self._load_open_sessions()
+        self.refresh_variance()
+
+    def cancel_session(self):
+        if not self._require_session():
+            return
+        if messagebox.askyesno("Cancel Count", "Discard this count? Stock is not changed.", parent=self.win):
+            self.session.cancel()
+            self.session = None
+            self.session_label.configure(text="No session")
+            self._load_open_sessions()
+            self.refresh_variance()
+
+    def close(self):
+        self.save()
+        self.scan_queue.cancel()
+        if self._autosave_job is not None:
+            self.win.after_cancel(self._autosave_job)
+        self.win.destroy()
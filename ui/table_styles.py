@@ -118,3 +118,194 @@ def apply_row_tags(tree, row_index, base_tag=None):
         tags.append(row_color)
     
     return tuple(tags) if tags else ()
+
+
+class VirtualTable:
+    """
+    Shows a large row set in a ttk.Treeview by materializing only the visible window.
+
+    The full data lives in a Python list of ``(values, tags)`` pairs; the tree
+    holds just the rows that fit on screen. ``set_rows`` diffs the new window
+    against the rows already in the tree by key (``values[key_index]``) and
+    applies in-place updates, moves, inserts and deletes, so refreshing or
+    filtering 20k rows touches only a screenful of Tk items. Tags are passed
+    through unchanged, so the stock/status/alternating-row tags configured on
+    the tree keep working.
+
+    The vertical scrollbar (if any) is driven by the table instead of the
+    tree; mouse wheel, arrow keys and Page Up/Down scroll through the full set.
+    Only materialized rows can be selected.
+    """
+
+    def __init__(self, tree, scrollbar=None, key_index=0):
+        """
+        Args:
+            tree: ttk.Treeview widget (columns and tags already configured)
+            scrollbar: Optional vertical ttk.Scrollbar to attach to the table
+            key_index: Index in each row's values of its unique key (e.g. the ID)
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.key_index = key_index
+        self._rows = []        # [(values, tags)] for the whole data set
+        self._positions = {}   # key -> index in _rows
+        self._shown = {}       # key -> (iid, values, tags) currently in the tree
+        self._offset = 0
+        self._page = max(1, int(tree.cget("height") or 10))
+
+        tree.configure(yscrollcommand="")
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        tree.bind("<Down>", lambda e: self._on_arrow(1))
+        tree.bind("<Prior>", lambda e: self._scroll_by(-self._page))
+        tree.bind("<Next>", lambda e: self._scroll_by(self._page))
+
+    def __len__(self):
+        return len(self._rows)
+
+    # ---------- data ----------
+    def set_rows(self, rows):
+        """
+        Replace the data set and update the visible window in place.
+
+        Args:
+            rows: Sequence of (values, tags) pairs in display order
+        """
+        top_key = self._key_at(self._offset)
+        self._rows = list(rows)
+        self._positions = {values[self.key_index]: i for i, (values, _) in enumerate(self._rows)}
+        # Keep the same row at the top when it is still there (e.g. a refresh)
+        if top_key is not None and top_key in self._positions:
+            self._offset = self._positions[top_key]
+        self._render()
+
+    def all_values(self):
+        """Return the values of every row (visible or not), e.g. for exports."""
+        return [values for values, _ in self._rows]
+
+    def get_values(self, key):
+        """Return the values of the row with ``key``, or None."""
+        pos = self._positions.get(key)
+        return self._rows[pos][0] if pos is not None else None
+
+    def see(self, key):
+        """Scroll so the row with ``key`` is visible; return its tree item id (or None)."""
+        pos = self._positions.get(key)
+        if pos is None:
+            return None
+        if pos < self._offset or pos >= self._offset + self._page:
+            self._offset = pos - self._page // 2
+            self._render()
+        return self._shown[key][0]
+
+    def select(self, key):
+        """Scroll to the row with ``key`` and select it. Returns True if found."""
+        iid = self.see(key)
+        if iid is None:
+            return False
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        return True
+
+    # ---------- scrolling ----------
+    def yview(self, *args):
+        """Scrollbar command: ``moveto fraction`` or ``scroll n units|pages``."""
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self._offset = int(round(float(args[1]) * len(self._rows)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self._page if args[2] == "pages" else 1)
+            self._offset += step
+        self._render()
+
+    def _scroll_by(self, rows):
+        self.yview("scroll", rows, "units")
+        return "break"
+
+    def _on_mousewheel(self, event):
+        # Windows/macOS report multiples of 120 per notch
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_arrow(self, step):
+        """Move the focus past the window edge by scrolling one row."""
+        focus = self.tree.focus()
+        children = self.tree.get_children()
+        if not focus or not children:
+            return None
+        at_edge = (step < 0 and focus == children[0]) or (step > 0 and focus == children[-1])
+        if not at_edge:
+            return None  # normal Treeview navigation inside the window
+        key = self._key_of(focus)
+        pos = self._positions.get(key)
+        if pos is None or not 0 <= pos + step < len(self._rows):
+            return "break"
+        self.select(self._rows[pos + step][0][self.key_index])
+        return "break"
+
+    def _on_configure(self, event=None):
+        page = self._measure_page()
+        if page != self._page:
+            self._page = page
+            self._render()
+
+    def _measure_page(self):
+        """Rows that fit in the tree's current height (falls back to its height option)."""
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        height = self.tree.winfo_height()
+        if not bbox or height <= 1:
+            return self._page
+        top, row_height = bbox[1], bbox[3]
+        return max(1, (height - top) // max(1, row_height))
+
+    # ---------- rendering ----------
+    def _key_at(self, pos):
+        if 0 <= pos < len(self._rows):
+            return self._rows[pos][0][self.key_index]
+        return None
+
+    def _key_of(self, iid):
+        for key, (shown_iid, _, _) in self._shown.items():
+            if shown_iid == iid:
+                return key
+        return None
+
+    def _fractions(self):
+        total = len(self._rows)
+        if not total:
+            return 0.0, 1.0
+        return self._offset / total, min(1.0, (self._offset + self._page) / total)
+
+    def _render(self):
+        """Bring the tree in line with rows[offset:offset + page] using keyed diffs."""
+        self._offset = max(0, min(self._offset, len(self._rows) - self._page))
+        window = self._rows[self._offset:self._offset + self._page]
+        wanted = {values[self.key_index] for values, _ in window}
+
+        stale = [key for key in self._shown if key not in wanted]
+        if stale:
+            self.tree.delete(*[self._shown.pop(key)[0] for key in stale])
+
+        for index, (values, tags) in enumerate(window):
+            key = values[self.key_index]
+            shown = self._shown.get(key)
+            if shown is None:
+                iid = self.tree.insert("", index, values=values, tags=tags)
+                self._shown[key] = (iid, values, tags)
+                continue
+            iid, old_values, old_tags = shown
+            if old_values != values or old_tags != tags:
+                self.tree.item(iid, values=values, tags=tags)
+                self._shown[key] = (iid, values, tags)
+            if self.tree.index(iid) != index:
+                self.tree.move(iid, "", index)
+
+        if self.scrollbar is not None:
+            self.scrollbar.set(*self._fractions())